@@ -3,9 +3,13 @@
 """
 多账号轮换管理器
 管理多个AdsPower账号的轮换使用，提高采集效率和降低风险
+可用账号由就绪堆维护，冷却中的账号按冷却结束时间定时，选择和归还账号无需扫描全部账号
+配置了租约服务时，使用账号前先领取跨进程租约，其他进程正在使用的账号不会被选中
+配置了限流控制器时，冷却时间按该配置文件当前的自适应速率放大，被限流的账号按控制器的退避时间冷却
 """
 
 import asyncio
+import time
 import logging
 import random
 from datetime import datetime, timedelta
@@ -13,6 +17,10 @@ from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from ready_queue import ReadyQueue
+from lease_service import LeaseService, PROFILE
+from rate_controller import AdaptiveRateController, profile_key, OUTCOME_OK, OUTCOME_RATE_LIMITED
+
 class AccountStatus(Enum):
     """账号状态枚举"""
     AVAILABLE = "available"      # 可用
@@ -42,8 +50,11 @@ class AccountManager:
     多账号轮换管理器
     """
     
-    def __init__(self, accounts_config: List[Dict[str, Any]]):
+    def __init__(self, accounts_config: List[Dict[str, Any]], lease_service: Optional[LeaseService] = None,
+                 rate_controller: Optional[AdaptiveRateController] = None):
         self.logger = logging.getLogger('AccountManager')
+        self.lease_service = lease_service
+        self.rate_controller = rate_controller
         self.accounts: List[AccountInfo] = []
         self.current_account: Optional[AccountInfo] = None
         
@@ -53,6 +64,14 @@ class AccountManager:
         self.max_error_count = 3    # 最大错误次数，超过后暂时禁用
         self.rotation_strategy = 'round_robin'  # 轮换策略：round_robin, priority, random
         
+        # 可用账号索引（按当前轮换策略排序）和冷却定时
+        self._index = ReadyQueue()
+        self._index_strategy = self.rotation_strategy
+        self._accounts_by_id: Dict[str, AccountInfo] = {}
+        self._account_order: Dict[str, int] = {}  # 同等条件下按初始顺序选择
+        self._last_reset_date: Optional[str] = None
+        self._last_lease_renewal = time.monotonic()
+        
         # 初始化账号列表
         self._initialize_accounts(accounts_config)
         
@@ -78,6 +97,36 @@ class AccountManager:
         
         # 按优先级排序
         self.accounts.sort(key=lambda x: x.priority)
+        
+        for order, account in enumerate(self.accounts):
+            self._accounts_by_id[account.user_id] = account
+            self._account_order[account.user_id] = order
+            self._reindex(account)
+    
+    def _sort_key(self, account: AccountInfo) -> tuple:
+        """当前轮换策略下的排序键（越小越先选）"""
+        order = self._account_order.get(account.user_id, 0)
+        if self.rotation_strategy == 'priority':
+            return (account.priority, order)
+        # round_robin：选择使用次数最少的账号；random不依赖排序
+        return (account.usage_count, account.priority, order)
+    
+    def _reindex(self, account: AccountInfo):
+        """账号状态变化后更新索引：可用的放入就绪堆，冷却/禁用中的按结束时间定时"""
+        if account.status == AccountStatus.AVAILABLE:
+            self._index.push(account.user_id, self._sort_key(account))
+        elif (account.status in [AccountStatus.COOLING_DOWN, AccountStatus.BLOCKED] and
+              account.cooldown_until):
+            self._index.schedule(account.user_id, account.cooldown_until.timestamp())
+        else:
+            self._index.discard(account.user_id)
+    
+    def _rebuild_index(self):
+        """轮换策略变化后按新的排序键重建索引"""
+        self._index = ReadyQueue()
+        self._index_strategy = self.rotation_strategy
+        for account in self.accounts:
+            self._reindex(account)
     
     def get_available_account(self) -> Optional[AccountInfo]:
         """
@@ -86,29 +135,39 @@ class AccountManager:
         Returns:
             可用的账号信息，如果没有可用账号则返回None
         """
+        accounts = self.get_available_accounts(1)
+        if not accounts:
+            self.logger.warning("没有可用的账号")
+            return None
+        return accounts[0]
+    
+    def get_available_accounts(self, count: int) -> List[AccountInfo]:
+        """
+        按轮换策略获取最多count个可用账号（不标记为使用中）
+        
+        Args:
+            count: 需要的账号数量
+            
+        Returns:
+            可用账号列表，可能少于count个
+        """
         # 更新账号状态
         self._update_account_statuses()
+        if self._index_strategy != self.rotation_strategy:
+            self._rebuild_index()
         
-        # 筛选可用账号
-        available_accounts = [
-            account for account in self.accounts 
-            if account.status == AccountStatus.AVAILABLE
-        ]
-        
-        if not available_accounts:
-            self.logger.warning("没有可用的账号")
-            return None
+        # 其他进程持有租约的账号不参与选择
+        held = self.lease_service.held_by_others(PROFILE) if self.lease_service else set()
         
         # 根据轮换策略选择账号
-        if self.rotation_strategy == 'priority':
-            selected_account = min(available_accounts, key=lambda x: x.priority)
-        elif self.rotation_strategy == 'random':
-            selected_account = random.choice(available_accounts)
-        else:  # round_robin
-            # 选择使用次数最少的账号
-            selected_account = min(available_accounts, key=lambda x: x.usage_count)
-        
-        return selected_account
+        if self.rotation_strategy == 'random':
+            available_ids = [user_id for user_id in self._index.smallest() if user_id not in held]
+            selected_ids = random.sample(available_ids, min(count, len(available_ids)))
+        else:
+            candidates = self._index.smallest(count + len(held))
+            selected_ids = [user_id for user_id in candidates if user_id not in held][:count]
+        
+        return [self._accounts_by_id[user_id] for user_id in selected_ids]
     
     def use_account(self, account: AccountInfo) -> bool:
         """
@@ -129,6 +188,12 @@ class AccountManager:
             self.logger.warning(f"账号 {account.name} 已达到日使用限制")
             account.status = AccountStatus.COOLING_DOWN
             account.cooldown_until = datetime.now() + timedelta(hours=24)
+            self._reindex(account)
+            return False
+        
+        # 领取跨进程租约
+        if self.lease_service and not self.lease_service.try_acquire(PROFILE, account.user_id):
+            self.logger.warning(f"账号 {account.name} 正在被其他进程使用")
             return False
         
         # 标记账号为使用中
@@ -137,24 +202,43 @@ class AccountManager:
         account.usage_count += 1
         account.daily_usage_count += 1
         self.current_account = account
+        self._reindex(account)
         
         self.logger.info(f"开始使用账号: {account.name} (ID: {account.user_id})")
         return True
     
-    def release_account(self, account: AccountInfo, success: bool = True):
+    def release_account(self, account: AccountInfo, success: bool = True, rate_limited: bool = False):
         """
         释放账号使用
         
         Args:
             account: 要释放的账号
             success: 是否成功完成任务
-        """
-        if success:
+            rate_limited: 任务中是否遇到限流（429或限流页面）
+        """
+        cooldown_minutes = self.cooldown_minutes
+        if self.rate_controller:
+            key = profile_key(account.user_id)
+            if rate_limited:
+                self.rate_controller.record_outcome([key], OUTCOME_RATE_LIMITED)
+            elif success:
+                self.rate_controller.record_outcome([key], OUTCOME_OK)
+            cooldown_minutes = self.cooldown_minutes * self.rate_controller.cooldown_multiplier(key)
+        
+        if rate_limited:
+            # 限流不计入错误次数，冷却时间取控制器退避时间和放大后冷却时间中的较长者
+            backoff_minutes = self.rate_controller.backoff_remaining(profile_key(account.user_id)) / 60 \
+                if self.rate_controller else self.cooldown_minutes * 2
+            cooldown_minutes = max(cooldown_minutes, backoff_minutes)
+            account.status = AccountStatus.COOLING_DOWN
+            account.cooldown_until = datetime.now() + timedelta(minutes=cooldown_minutes)
+            self.logger.warning(f"账号 {account.name} 遇到限流，冷却 {cooldown_minutes:.0f} 分钟")
+        elif success:
             # 成功完成任务，设置冷却时间
             account.status = AccountStatus.COOLING_DOWN
-            account.cooldown_until = datetime.now() + timedelta(minutes=self.cooldown_minutes)
+            account.cooldown_until = datetime.now() + timedelta(minutes=cooldown_minutes)
             account.error_count = 0  # 重置错误计数
-            self.logger.info(f"账号 {account.name} 任务完成，进入冷却期 {self.cooldown_minutes} 分钟")
+            self.logger.info(f"账号 {account.name} 任务完成，进入冷却期 {cooldown_minutes:.0f} 分钟")
         else:
             # 任务失败，增加错误计数
             account.error_count += 1
@@ -164,31 +248,51 @@ class AccountManager:
                 self.logger.warning(f"账号 {account.name} 错误次数过多，暂时禁用2小时")
             else:
                 account.status = AccountStatus.COOLING_DOWN
-                account.cooldown_until = datetime.now() + timedelta(minutes=self.cooldown_minutes * 2)
+                account.cooldown_until = datetime.now() + timedelta(minutes=cooldown_minutes * 2)
                 self.logger.warning(f"账号 {account.name} 任务失败，延长冷却时间")
         
+        self._reindex(account)
+        if self.lease_service:
+            self.lease_service.release(PROFILE, [account.user_id])
         if self.current_account == account:
             self.current_account = None
     
     def _update_account_statuses(self):
         """
-        更新所有账号的状态
+        更新账号状态：日期变化时重置日使用计数，冷却到期的账号重新可用
         """
         current_time = datetime.now()
         current_date = current_time.strftime('%Y-%m-%d')
         
-        for account in self.accounts:
-            # 重置日使用计数
-            if account.last_reset_date != current_date:
-                account.daily_usage_count = 0
-                account.last_reset_date = current_date
-            
-            # 检查冷却时间
+        # 重置日使用计数（每天一次）
+        if self._last_reset_date != current_date:
+            for account in self.accounts:
+                if account.last_reset_date != current_date:
+                    account.daily_usage_count = 0
+                    account.last_reset_date = current_date
+            self._last_reset_date = current_date
+        
+        # 检查冷却时间（只处理定时已到期的账号）
+        for user_id in self._index.pop_due(time.time()):
+            account = self._accounts_by_id.get(user_id)
+            if account is None:
+                continue
             if (account.status in [AccountStatus.COOLING_DOWN, AccountStatus.BLOCKED] and 
                 account.cooldown_until and current_time >= account.cooldown_until):
                 account.status = AccountStatus.AVAILABLE
                 account.cooldown_until = None
                 self.logger.info(f"账号 {account.name} 冷却完成，重新可用")
+            self._reindex(account)
+        
+        # 使用中账号的租约按TTL的1/3续期
+        if self.lease_service and time.monotonic() - self._last_lease_renewal >= self.lease_service.ttl / 3:
+            self.renew_leases()
+    
+    def renew_leases(self):
+        """为本进程使用中的账号续租（长时间占用账号时定期调用）"""
+        if self.lease_service:
+            self.lease_service.heartbeat()
+            self._last_lease_renewal = time.monotonic()
     
     def get_account_statistics(self) -> Dict[str, Any]:
         """
@@ -243,6 +347,7 @@ class AccountManager:
                 if account.status == AccountStatus.BLOCKED:
                     account.status = AccountStatus.AVAILABLE
                     account.cooldown_until = None
+                    self._reindex(account)
                 self.logger.info(f"已重置账号 {account.name} 的错误计数")
                 return True
         
@@ -263,6 +368,7 @@ class AccountManager:
         for account in self.accounts:
             if account.user_id == user_id:
                 account.priority = priority
+                self._reindex(account)
                 self.logger.info(f"已设置账号 {account.name} 的优先级为 {priority}")
                 # 重新排序
                 self.accounts.sort(key=lambda x: x.priority)
@@ -286,6 +392,7 @@ class AccountManager:
             if account.user_id == user_id:
                 account.status = AccountStatus.BLOCKED
                 account.cooldown_until = datetime.now() + timedelta(days=1)  # 禁用24小时
+                self._reindex(account)
                 if reason:
                     account.notes = f"禁用原因: {reason}"
                 self.logger.info(f"已禁用账号 {account.name}，原因: {reason}")
@@ -309,6 +416,7 @@ class AccountManager:
                 account.status = AccountStatus.AVAILABLE
                 account.cooldown_until = None
                 account.error_count = 0
+                self._reindex(account)
                 self.logger.info(f"已启用账号 {account.name}")
                 return True
         
@@ -324,24 +432,15 @@ class AccountManager:
         """
         self._update_account_statuses()
         
-        available_accounts = [
-            account for account in self.accounts 
-            if account.status == AccountStatus.AVAILABLE
-        ]
-        
-        if available_accounts:
+        if self._index.ready_count:
             return None  # 有账号立即可用
         
         # 找到最早可用的时间
-        cooling_accounts = [
-            account for account in self.accounts 
-            if account.cooldown_until is not None
-        ]
-        
-        if not cooling_accounts:
+        next_due = self._index.next_due()
+        if next_due is None:
             return None  # 没有冷却中的账号
         
-        return min(account.cooldown_until for account in cooling_accounts)
+        return datetime.fromtimestamp(next_due)
     
     def wait_for_available_account(self, max_wait_minutes: int = 60) -> Optional[AccountInfo]:
         """
@@ -467,6 +566,7 @@ class AccountManager:
                 account.status = AccountStatus.IN_USE
                 account.last_used = datetime.now()
                 account.usage_count += 1
+                self._reindex(account)
                 self.logger.info(f"账号 {account.name} 已标记为使用中")
                 return True
         
@@ -3,16 +3,28 @@
 """
 账号状态跟踪模块 - 管理推特账号的抓取状态
 支持增量抓取、错误恢复、重试机制
+历史事件追加写入SQLite（按用户名+时间建索引），账号状态按防抖间隔批量写快照
+可抓取账号由就绪堆维护，重试等待中的账号在定时堆中到期后自动回到就绪堆
 """
 
+import os
 import json
+import time
+import atexit
+import sqlite3
 import logging
+import threading
+import weakref
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 
+from ready_queue import ReadyQueue
+from lease_service import LeaseService, TWITTER_ACCOUNT
+
 
 class AccountStatus(str, Enum):
     """账号状态枚举"""
@@ -135,21 +147,71 @@ class AccountState:
         self.status = AccountStatus.PENDING
 
 
+# 进程退出前需要写出未保存状态的跟踪器
+_live_trackers = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_trackers():
+    for tracker in list(_live_trackers):
+        tracker.flush()
+
+
 class AccountStateTracker:
     """账号状态跟踪器"""
     
-    def __init__(self, storage_dir: str = "./data/accounts"):
+    HISTORY_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS account_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            timestamp TEXT NOT NULL,
+            username TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            details TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_account_history_user_time
+            ON account_history (username, ts);
+        CREATE INDEX IF NOT EXISTS idx_account_history_event
+            ON account_history (event_type, username, id);
+        CREATE INDEX IF NOT EXISTS idx_account_history_time
+            ON account_history (ts);
+    """
+    
+    def __init__(self, storage_dir: str = "./data/accounts", snapshot_interval: float = 5.0,
+                 history_retention_days: int = 30, lease_service: Optional[LeaseService] = None):
+        """
+        Args:
+            storage_dir: 状态快照和历史数据库所在目录
+            snapshot_interval: 状态变更后延迟多久写快照（秒），期间的多次变更合并为一次写入；0表示每次变更立即写入
+            history_retention_days: 历史事件保留天数，启动时清理更早的记录
+            lease_service: 跨进程租约服务，claim_ready_accounts领取的账号在其他进程中不会被同时领取
+        """
+        self.lease_service = lease_service
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         
         self.states_file = self.storage_dir / "account_states.json"
+        self.history_db = self.storage_dir / "account_history.db"
+        # 旧版JSON历史文件，首次启动时导入数据库
         self.history_file = self.storage_dir / "account_history.json"
         
         self.logger = logging.getLogger(__name__)
         self.account_states: Dict[str, AccountState] = {}
+        # 就绪账号按 (优先级, 上次尝试时间) 排序；等待重试的账号按下次重试时间定时
+        self._ready_index = ReadyQueue()
+        self._state_order: Dict[str, int] = {}
+        
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_timer: Optional[threading.Timer] = None
+        self._dirty = False
         
         # 加载现有状态
         self.load_states()
+        self._init_history_store()
+        if history_retention_days:
+            self.cleanup_old_history(history_retention_days)
+        _live_trackers.add(self)
     
     def get_account_state(self, username: str) -> AccountState:
         """
@@ -163,6 +225,7 @@ class AccountStateTracker:
         """
         if username not in self.account_states:
             self.account_states[username] = AccountState(username=username)
+            self._reindex(username)
             self.logger.debug(f"为用户 @{username} 创建新的状态记录")
         
         return self.account_states[username]
@@ -184,18 +247,23 @@ class AccountStateTracker:
                 self.logger.warning(f"账号状态不存在字段: {key}")
         
         self.logger.debug(f"更新用户 @{username} 的状态: {kwargs}")
+        self._state_changed(username)
     
     def mark_attempt_start(self, username: str):
         """标记开始抓取尝试"""
         state = self.get_account_state(username)
         state.mark_attempt_start()
         self.logger.info(f"开始抓取用户 @{username}，第 {state.total_attempts} 次尝试")
+        self._state_changed(username)
     
     def mark_success(self, username: str, fetched_id: str = None, tweets_count: int = 0):
         """标记抓取成功"""
         state = self.get_account_state(username)
         state.mark_success(fetched_id, tweets_count)
         self.logger.info(f"用户 @{username} 抓取成功，获得 {tweets_count} 条推文")
+        self._state_changed(username)
+        
+        self.release_account_claim(username)
         
         # 记录历史
         self._record_history(username, "success", {
@@ -211,6 +279,9 @@ class AccountStateTracker:
         self.logger.warning(f"用户 @{username} 抓取失败 (第{state.retry_count}次): {error_message}")
         if state.next_retry_time:
             self.logger.info(f"下次重试时间: {state.next_retry_time}")
+        self._state_changed(username)
+        
+        self.release_account_claim(username)
         
         # 记录历史
         self._record_history(username, "failure", {
@@ -218,16 +289,30 @@ class AccountStateTracker:
             "retry_count": state.retry_count
         })
     
-    def mark_rate_limited(self, username: str, retry_delay_minutes: int = 60):
-        """标记被限流"""
+    def mark_rate_limited(self, username: str, retry_delay_minutes: int = 60,
+                          backoff_seconds: Optional[float] = None):
+        """
+        标记被限流
+        
+        Args:
+            username: 用户名
+            retry_delay_minutes: 基础重试延迟（分钟），按重试次数线性增长
+            backoff_seconds: 自适应限流控制器给出的退避时间（秒），提供时取代固定延迟
+        """
         state = self.get_account_state(username)
         state.mark_rate_limited(retry_delay_minutes)
+        if backoff_seconds is not None:
+            state.next_retry_time = datetime.now() + timedelta(seconds=backoff_seconds)
         
         self.logger.warning(f"用户 @{username} 被限流，下次重试时间: {state.next_retry_time}")
+        self._state_changed(username)
+        
+        self.release_account_claim(username)
         
         # 记录历史
         self._record_history(username, "rate_limited", {
-            "retry_delay_minutes": retry_delay_minutes
+            "retry_delay_minutes": retry_delay_minutes,
+            "backoff_seconds": backoff_seconds
         })
     
     def get_ready_accounts(self, max_count: int = None) -> List[str]:
@@ -238,28 +323,81 @@ class AccountStateTracker:
             max_count: 最大返回数量
             
         Returns:
-            准备好的账号用户名列表
+            准备好的账号用户名列表（按优先级、上次尝试时间排序）
         """
-        ready_accounts = []
+        self._promote_due_retries()
         
-        # 按优先级排序
-        sorted_accounts = sorted(
-            self.account_states.items(),
-            key=lambda x: (x[1].priority, x[1].last_attempt_time or datetime.min)
-        )
+        while True:
+            ready_accounts = self._ready_index.smallest(max_count)
+            # 绕过跟踪器直接修改的状态对象：发现不再就绪时重新归类后再取一次
+            stale = [username for username in ready_accounts
+                     if not self._is_ready(self.account_states[username])]
+            if not stale:
+                return ready_accounts
+            for username in stale:
+                self._reindex(username)
+    
+    def claim_ready_accounts(self, max_count: int) -> List[str]:
+        """
+        领取最多max_count个准备好的账号：按get_ready_accounts的顺序领取跨进程租约，
+        跳过其他进程正在抓取的账号；账号的成功/失败/限流结果记录后租约自动释放
+        """
+        if self.lease_service is None:
+            return self.get_ready_accounts(max_count)
         
-        for username, state in sorted_accounts:
-            if state.should_skip:
-                continue
-            
-            # 检查是否准备好
-            if state.status == AccountStatus.PENDING or state.is_ready_for_retry:
-                ready_accounts.append(username)
-                
-                if max_count and len(ready_accounts) >= max_count:
-                    break
+        held = self.lease_service.held_by_others(TWITTER_ACCOUNT)
+        candidates = [username for username in self.get_ready_accounts(max_count + len(held))
+                      if username not in held]
+        claimed = self.lease_service.acquire_any(TWITTER_ACCOUNT, candidates, count=max_count)
+        if claimed:
+            self.logger.debug(f"领取账号: {claimed}")
+        return claimed
+    
+    def release_account_claim(self, username: str):
+        """释放claim_ready_accounts领取的账号"""
+        if self.lease_service is not None:
+            self.lease_service.release(TWITTER_ACCOUNT, [username])
+    
+    def _state_changed(self, username: str):
+        """账号状态变更：更新就绪索引并安排快照"""
+        self._reindex(username)
+        self._schedule_snapshot()
+    
+    @staticmethod
+    def _is_ready(state: AccountState) -> bool:
+        if state.should_skip:
+            return False
+        return state.status == AccountStatus.PENDING or state.is_ready_for_retry
+    
+    def _reindex(self, username: str):
+        """按账号当前状态放入就绪堆、定时堆或从索引中移除"""
+        state = self.account_states.get(username)
+        if state is None or state.should_skip:
+            self._ready_index.discard(username)
+            return
         
-        return ready_accounts
+        waiting_retry = (state.status == AccountStatus.FAILED and
+                         state.retry_count < state.max_retry_count and
+                         state.next_retry_time is not None and
+                         datetime.now() < state.next_retry_time)
+        if waiting_retry:
+            self._ready_index.schedule(username, state.next_retry_time.timestamp())
+        elif self._is_ready(state):
+            last_attempt = state.last_attempt_time.timestamp() if state.last_attempt_time else float('-inf')
+            # 同等条件下按账号加入顺序
+            order = self._state_order.setdefault(username, len(self._state_order))
+            self._ready_index.push(username, (state.priority, last_attempt, order))
+        else:
+            self._ready_index.discard(username)
+    
+    def _promote_due_retries(self):
+        """重试时间已到的账号回到就绪堆"""
+        for username in self._ready_index.pop_due(time.time()):
+            self._reindex(username)
+    
+    def _count_ready_accounts(self) -> int:
+        self._promote_due_retries()
+        return self._ready_index.ready_count
     
     def get_failed_accounts(self) -> List[str]:
         """获取失败的账号列表"""
@@ -281,6 +419,7 @@ class AccountStateTracker:
             state = self.account_states[username]
             state.reset_retry_state()
             self.logger.info(f"重置用户 @{username} 的状态")
+            self._state_changed(username)
         else:
             self.logger.warning(f"用户 @{username} 不存在，无法重置状态")
     
@@ -290,6 +429,7 @@ class AccountStateTracker:
         state.enabled = False
         state.status = AccountStatus.SKIPPED
         self.logger.info(f"禁用用户 @{username}")
+        self._state_changed(username)
     
     def enable_account(self, username: str):
         """启用账号"""
@@ -298,12 +438,14 @@ class AccountStateTracker:
         if state.status == AccountStatus.SKIPPED:
             state.status = AccountStatus.PENDING
         self.logger.info(f"启用用户 @{username}")
+        self._state_changed(username)
     
     def set_account_priority(self, username: str, priority: int):
         """设置账号优先级"""
         state = self.get_account_state(username)
         state.priority = priority
         self.logger.info(f"设置用户 @{username} 的优先级为 {priority}")
+        self._state_changed(username)
     
     def get_statistics(self) -> Dict[str, Any]:
         """获取统计信息"""
@@ -330,17 +472,44 @@ class AccountStateTracker:
             "successful_attempts": successful_attempts,
             "overall_success_rate": (successful_attempts / total_attempts * 100) if total_attempts > 0 else 0,
             "average_tweets_per_account": total_tweets / total_accounts,
-            "ready_for_retry": len(self.get_ready_accounts()),
+            "ready_for_retry": self._count_ready_accounts(),
             "failed_accounts": len(self.get_failed_accounts()),
             "rate_limited_accounts": len(self.get_rate_limited_accounts())
         }
     
+    def _schedule_snapshot(self):
+        """标记状态已变更，在snapshot_interval秒后合并写一次快照"""
+        with self._snapshot_lock:
+            self._dirty = True
+            if self.snapshot_interval > 0 and self._snapshot_timer is None:
+                self._snapshot_timer = threading.Timer(self.snapshot_interval, self._snapshot_due)
+                self._snapshot_timer.daemon = True
+                self._snapshot_timer.start()
+        if self.snapshot_interval <= 0:
+            self.flush()
+    
+    def _snapshot_due(self):
+        with self._snapshot_lock:
+            self._snapshot_timer = None
+        self.flush()
+    
+    def flush(self):
+        """立即写出尚未保存的状态变更"""
+        with self._snapshot_lock:
+            if self._snapshot_timer is not None:
+                self._snapshot_timer.cancel()
+                self._snapshot_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+        self.save_states()
+    
     def save_states(self):
-        """保存状态到文件"""
+        """保存状态到文件（先写临时文件再替换，读取方不会看到写了一半的文件）"""
         try:
             # 转换为可序列化的格式
             serializable_states = {}
-            for username, state in self.account_states.items():
+            for username, state in list(self.account_states.items()):
                 state_dict = asdict(state)
                 # 处理datetime对象
                 for key, value in state_dict.items():
@@ -357,8 +526,10 @@ class AccountStateTracker:
                 "account_states": serializable_states
             }
             
-            with open(self.states_file, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
+            tmp_file = self.states_file.with_name(f"{self.states_file.name}.{os.getpid()}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(save_data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_file, self.states_file)
             
             self.logger.debug(f"账号状态已保存到: {self.states_file}")
             
@@ -395,58 +566,160 @@ class AccountStateTracker:
                 
                 # 创建AccountState对象
                 self.account_states[username] = AccountState(**state_dict)
+                self._reindex(username)
             
             self.logger.info(f"加载了 {len(self.account_states)} 个账号的状态")
             
         except Exception as e:
             self.logger.error(f"加载账号状态失败: {e}")
             self.account_states = {}
+            self._ready_index = ReadyQueue()
     
-    def _record_history(self, username: str, event_type: str, details: Dict[str, Any]):
-        """记录历史事件"""
+    @contextmanager
+    def _connect(self):
+        # 每次操作使用独立连接（自动提交模式），多个进程可同时追加
+        conn = sqlite3.connect(str(self.history_db), timeout=30, isolation_level=None)
         try:
-            history_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "username": username,
-                "event_type": event_type,
-                "details": details
-            }
+            yield conn
+        finally:
+            conn.close()
+    
+    def _init_history_store(self):
+        """创建历史表；存在旧版JSON历史文件时导入后改名"""
+        try:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(self.HISTORY_SCHEMA)
             
-            # 读取现有历史
-            history = []
             if self.history_file.exists():
                 with open(self.history_file, 'r', encoding='utf-8') as f:
-                    history = json.load(f)
-            
-            # 添加新记录
-            history.append(history_entry)
-            
-            # 保持最近1000条记录
-            if len(history) > 1000:
-                history = history[-1000:]
-            
-            # 保存历史
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(history, f, ensure_ascii=False, indent=2)
-            
+                    legacy_history = json.load(f)
+                self._append_history(legacy_history)
+                self.history_file.rename(self.history_file.with_suffix('.json.migrated'))
+                self.logger.info(f"已导入 {len(legacy_history)} 条旧版历史记录")
+        except Exception as e:
+            self.logger.error(f"初始化历史记录存储失败: {e}")
+    
+    def _record_history(self, username: str, event_type: str, details: Dict[str, Any]):
+        """记录历史事件"""
+        self._append_history([{
+            "timestamp": datetime.now().isoformat(),
+            "username": username,
+            "event_type": event_type,
+            "details": details
+        }])
+    
+    def _append_history(self, entries: List[Dict[str, Any]]):
+        """批量追加历史事件（单个事务）"""
+        if not entries:
+            return
+        rows = []
+        for entry in entries:
+            timestamp = entry.get("timestamp") or datetime.now().isoformat()
+            try:
+                ts = datetime.fromisoformat(timestamp).timestamp()
+            except ValueError:
+                ts = time.time()
+            rows.append((ts, timestamp, entry.get("username") or "", entry.get("event_type") or "",
+                         json.dumps(entry.get("details"), ensure_ascii=False, default=str)))
+        try:
+            with self._connect() as conn:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT INTO account_history (ts, timestamp, username, event_type, details) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.execute("COMMIT")
         except Exception as e:
             self.logger.error(f"记录历史事件失败: {e}")
     
+    def record_item_timings(self, timings: List[Dict[str, Any]]):
+        """
+        记录抓取工作项的耗时，供下次运行估算成本
+        
+        Args:
+            timings: 每项包含 target（目标键）、duration（秒）、tweets_found、scrolls、success 等字段
+        """
+        if not timings:
+            return
+        timestamp = datetime.now().isoformat()
+        self._append_history([
+            {
+                "timestamp": timestamp,
+                "username": timing["target"],
+                "event_type": "timing",
+                "details": {key: value for key, value in timing.items() if key != "target"}
+            }
+            for timing in timings
+        ])
+    
+    def get_cost_estimates(self, targets: List[str], recent: int = 5) -> Dict[str, float]:
+        """
+        按历史耗时估算各目标的抓取成本（最近几次成功抓取的平均耗时，秒）
+        
+        Args:
+            targets: 目标键列表
+            recent: 参与平均的最近记录数
+            
+        Returns:
+            {目标键: 估算耗时}，没有历史记录的目标不包含在内
+        """
+        targets = list(dict.fromkeys(targets))
+        if not targets:
+            return {}
+        
+        durations: Dict[str, List[float]] = {}
+        try:
+            with self._connect() as conn:
+                for chunk_start in range(0, len(targets), 500):
+                    chunk = targets[chunk_start:chunk_start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = conn.execute(
+                        "SELECT username, duration FROM ("
+                        "  SELECT username, json_extract(details, '$.duration') AS duration,"
+                        "         ROW_NUMBER() OVER (PARTITION BY username ORDER BY id DESC) AS rn"
+                        "  FROM account_history"
+                        f"  WHERE event_type = 'timing' AND username IN ({placeholders})"
+                        "    AND COALESCE(json_extract(details, '$.success'), 1)"
+                        "    AND json_extract(details, '$.duration') IS NOT NULL"
+                        ") WHERE rn <= ?",
+                        (*chunk, recent)
+                    ).fetchall()
+                    for target, duration in rows:
+                        durations.setdefault(target, []).append(float(duration))
+        except Exception as e:
+            self.logger.error(f"读取历史耗时失败: {e}")
+            return {}
+        
+        return {target: sum(values) / len(values) for target, values in durations.items()}
+    
     def get_account_history(self, username: str = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """获取账号历史记录"""
+        """获取账号历史记录（按时间从早到晚，返回最近limit条）"""
         try:
-            if not self.history_file.exists():
-                return []
-            
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-            
-            # 过滤特定用户
             if username:
-                history = [entry for entry in history if entry.get("username") == username]
+                sql = ("SELECT timestamp, username, event_type, details FROM account_history "
+                       "WHERE username = ? ORDER BY ts DESC, id DESC")
+                params = [username]
+            else:
+                sql = "SELECT timestamp, username, event_type, details FROM account_history ORDER BY id DESC"
+                params = []
+            if limit:
+                sql += " LIMIT ?"
+                params.append(limit)
             
-            # 返回最近的记录
-            return history[-limit:] if limit else history
+            with self._connect() as conn:
+                rows = conn.execute(sql, params).fetchall()
+            
+            return [
+                {
+                    "timestamp": timestamp,
+                    "username": entry_username,
+                    "event_type": event_type,
+                    "details": json.loads(details) if details else None
+                }
+                for timestamp, entry_username, event_type, details in reversed(rows)
+            ]
             
         except Exception as e:
             self.logger.error(f"获取账号历史失败: {e}")
@@ -455,31 +728,14 @@ class AccountStateTracker:
     def cleanup_old_history(self, days_to_keep: int = 30):
         """清理旧的历史记录"""
         try:
-            if not self.history_file.exists():
-                return
-            
-            cutoff_time = datetime.now() - timedelta(days=days_to_keep)
-            
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-            
-            # 过滤旧记录
-            filtered_history = []
-            for entry in history:
-                try:
-                    entry_time = datetime.fromisoformat(entry["timestamp"])
-                    if entry_time >= cutoff_time:
-                        filtered_history.append(entry)
-                except (ValueError, KeyError):
-                    # 保留无法解析时间的记录
-                    filtered_history.append(entry)
-            
-            # 保存过滤后的历史
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(filtered_history, f, ensure_ascii=False, indent=2)
+            cutoff_ts = (datetime.now() - timedelta(days=days_to_keep)).timestamp()
+            with self._connect() as conn:
+                removed_count = conn.execute(
+                    "DELETE FROM account_history WHERE ts < ?", (cutoff_ts,)
+                ).rowcount
             
-            removed_count = len(history) - len(filtered_history)
-            self.logger.info(f"清理了 {removed_count} 条旧历史记录")
+            if removed_count:
+                self.logger.info(f"清理了 {removed_count} 条旧历史记录")
             
         except Exception as e:
-            self.logger.error(f"清理历史记录失败: {e}")
\ No newline at end of file
+            self.logger.error(f"清理历史记录失败: {e}")
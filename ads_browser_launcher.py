@@ -10,7 +10,8 @@ import logging
 import psutil
 import subprocess
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from adspower_health import health_monitor
 # 配置将从调用方传入，不再直接导入
 
 class AdsPowerLauncher:
@@ -60,13 +61,10 @@ class AdsPowerLauncher:
             if not self.check_system_resources():
                 raise Exception("系统资源不足，无法启动浏览器。请关闭其他应用程序或等待系统负载降低。")
             
-            # 2. 检查并修复AdsPower进程
+            # 2. 检查并修复AdsPower进程（修复后会自行等待系统稳定）
             if not self.restart_adspower_if_needed():
                 raise Exception("AdsPower进程异常，无法自动修复。请手动重启AdsPower应用程序。")
             
-            # 3. 等待系统稳定
-            time.sleep(2)
-            
             self.logger.info("健康检查通过，开始启动浏览器...")
         
         try:
@@ -286,19 +284,16 @@ class AdsPowerLauncher:
         }
         
         try:
-            # 系统资源信息
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            # 系统资源信息（短时间内复用缓存的探测结果）
+            resources = health_monitor.system_resources()
+            cpu_percent = resources['cpu_percent']
+            memory_percent = resources['memory_percent']
             
             report['system_resources'] = {
-                'cpu_percent': cpu_percent,
-                'memory_percent': memory.percent,
-                'memory_available_gb': memory.available / (1024**3),
-                'disk_free_gb': disk.free / (1024**3),
+                **resources,
                 'cpu_healthy': cpu_percent < self.max_cpu_threshold,
-                'memory_healthy': memory.percent < self.max_memory_threshold,
-                'disk_healthy': disk.free / (1024**3) > 1.0
+                'memory_healthy': memory_percent < self.max_memory_threshold,
+                'disk_healthy': resources['disk_free_gb'] > 1.0
             }
             
             # AdsPower进程信息
@@ -309,8 +304,8 @@ class AdsPowerLauncher:
             if cpu_percent > self.max_cpu_threshold:
                 report['recommendations'].append(f"CPU使用率过高({cpu_percent:.1f}%)，建议关闭其他应用程序")
             
-            if memory.percent > self.max_memory_threshold:
-                report['recommendations'].append(f"内存使用率过高({memory.percent:.1f}%)，建议释放内存")
+            if memory_percent > self.max_memory_threshold:
+                report['recommendations'].append(f"内存使用率过高({memory_percent:.1f}%)，建议释放内存")
             
             if process_info['high_cpu_processes']:
                 report['recommendations'].append(f"发现{len(process_info['high_cpu_processes'])}个高CPU使用率的RPA进程，建议终止")
@@ -401,6 +396,54 @@ class AdsPowerLauncher:
             self.logger.error(f"获取浏览器状态失败: {e}")
             raise Exception(f"无法获取浏览器状态: {e}")
     
+    def get_active_browser_info(self, user_id: Optional[str] = None, timeout: float = 5) -> Optional[Dict[str, Any]]:
+        """
+        轻量探测配置文件对应的浏览器是否仍在运行
+        
+        Args:
+            user_id: AdsPower 用户ID
+            timeout: 请求超时时间（秒）
+            
+        Returns:
+            浏览器处于Active状态时返回浏览器信息（含ws调试地址），否则返回None
+        """
+        target_user_id = user_id or self.user_id
+        if not target_user_id:
+            return None
+        
+        headers = {}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+        
+        try:
+            response = requests.get(
+                f"{self.api_url}/api/v1/browser/active",
+                params={'user_id': target_user_id}, headers=headers, timeout=timeout
+            )
+            result = response.json()
+        except (requests.RequestException, ValueError) as e:
+            self.logger.debug(f"探测浏览器状态失败: {e}")
+            return None
+        
+        data = result.get('data') or {}
+        if result.get('code') == 0 and data.get('status') == 'Active':
+            self.browser_info = data
+            return data
+        return None
+    
+    def get_profile_statuses(self, user_ids: List[str], max_age: float = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        并发查询多个配置文件的浏览器状态（结果短时间缓存）
+        
+        Args:
+            user_ids: AdsPower 用户ID列表
+            max_age: 缓存时间（秒）
+            
+        Returns:
+            {用户ID: 运行中时的浏览器信息，否则为None}
+        """
+        return health_monitor.profile_statuses(self.get_active_browser_info, user_ids, max_age=max_age)
+    
     def get_debug_port(self) -> Optional[str]:
         """
         获取浏览器调试端口
@@ -448,26 +491,28 @@ class AdsPowerLauncher:
             系统资源是否充足
         """
         try:
+            # 非阻塞采样，短时间内的重复检查直接复用缓存结果
+            resources = health_monitor.system_resources()
+            
             # 检查CPU使用率
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = resources['cpu_percent']
             if cpu_percent > self.max_cpu_threshold:
                 self.logger.warning(f"CPU使用率过高: {cpu_percent:.1f}% (阈值: {self.max_cpu_threshold}%)")
                 return False
             
             # 检查内存使用率
-            memory = psutil.virtual_memory()
-            if memory.percent > self.max_memory_threshold:
-                self.logger.warning(f"内存使用率过高: {memory.percent:.1f}% (阈值: {self.max_memory_threshold}%)")
+            memory_percent = resources['memory_percent']
+            if memory_percent > self.max_memory_threshold:
+                self.logger.warning(f"内存使用率过高: {memory_percent:.1f}% (阈值: {self.max_memory_threshold}%)")
                 return False
             
             # 检查可用磁盘空间（至少需要1GB）
-            disk = psutil.disk_usage('/')
-            free_gb = disk.free / (1024**3)
+            free_gb = resources['disk_free_gb']
             if free_gb < 1.0:
                 self.logger.warning(f"磁盘空间不足: {free_gb:.1f}GB")
                 return False
             
-            self.logger.debug(f"系统资源检查通过 - CPU: {cpu_percent:.1f}%, 内存: {memory.percent:.1f}%, 磁盘: {free_gb:.1f}GB")
+            self.logger.debug(f"系统资源检查通过 - CPU: {cpu_percent:.1f}%, 内存: {memory_percent:.1f}%, 磁盘: {free_gb:.1f}GB")
             return True
             
         except Exception as e:
@@ -481,43 +526,19 @@ class AdsPowerLauncher:
         Returns:
             进程状态信息
         """
-        process_info = {
-            'adspower_running': False,
-            'rpa_processes': [],
-            'high_cpu_processes': [],
-            'total_processes': 0
-        }
-        
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-                try:
-                    pinfo = proc.info
-                    if 'adspower' in pinfo['name'].lower() or 'AdsPower' in pinfo['name']:
-                        process_info['adspower_running'] = True
-                        process_info['total_processes'] += 1
-                        
-                        # 检查RPA进程
-                        if 'rpa' in pinfo['name'].lower():
-                            process_info['rpa_processes'].append({
-                                'pid': pinfo['pid'],
-                                'name': pinfo['name'],
-                                'cpu_percent': pinfo['cpu_percent'],
-                                'memory_percent': pinfo['memory_percent']
-                            })
-                            
-                            # 检查高CPU使用率的RPA进程
-                            if pinfo['cpu_percent'] > self.max_cpu_threshold:
-                                process_info['high_cpu_processes'].append(pinfo['pid'])
-                                self.logger.warning(f"发现高CPU使用率RPA进程: PID {pinfo['pid']}, CPU: {pinfo['cpu_percent']:.1f}%")
-                                
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
-            return process_info
+            # 只检查已跟踪的AdsPower进程PID，结果短时间缓存，必要时才全量扫描进程表
+            health_monitor.cpu_threshold = self.max_cpu_threshold
+            return health_monitor.adspower_processes()
             
         except Exception as e:
             self.logger.error(f"检查AdsPower进程时发生错误: {e}")
-            return process_info
+            return {
+                'adspower_running': False,
+                'rpa_processes': [],
+                'high_cpu_processes': [],
+                'total_processes': 0
+            }
     
     def terminate_high_cpu_rpa_processes(self) -> bool:
         """
@@ -551,7 +572,8 @@ class AdsPowerLauncher:
                             
                     except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
                         self.logger.warning(f"无法终止进程 {pid}: {e}")
-                        
+                
+                health_monitor.invalidate()
                 return True
             
             return True
@@ -591,7 +613,8 @@ class AdsPowerLauncher:
                     # 等待AdsPower启动
                     time.sleep(10)
                     
-                    # 验证是否启动成功
+                    # 验证是否启动成功（新进程需要重新扫描进程表）
+                    health_monitor.invalidate(rescan=True)
                     new_process_info = self.check_adspower_processes()
                     if new_process_info['adspower_running']:
                         self.logger.info("AdsPower启动成功")
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+AdsPower 健康探测
+缓存系统资源和AdsPower进程的探测结果（短TTL），进程检查只跟踪已知的AdsPower进程PID，
+必要时才全量扫描进程表；多个配置文件的浏览器状态并发查询
+"""
+
+import time
+import logging
+import threading
+import psutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class AdsPowerHealthMonitor:
+    """进程内共享的健康探测缓存"""
+
+    def __init__(self, cache_ttl: float = 10.0, rescan_interval: float = 120.0,
+                 cpu_threshold: float = 80.0, max_status_workers: int = 8):
+        """
+        Args:
+            cache_ttl: 探测结果缓存时间（秒）
+            rescan_interval: 两次全量扫描进程表之间的最小间隔（秒），期间只检查已跟踪的PID
+            cpu_threshold: RPA进程判定为高CPU的阈值（%）
+            max_status_workers: 并发查询配置文件状态的最大线程数
+        """
+        self.cache_ttl = cache_ttl
+        self.rescan_interval = rescan_interval
+        self.cpu_threshold = cpu_threshold
+        self.max_status_workers = max_status_workers
+
+        self._lock = threading.Lock()
+        self._resources: Optional[Dict[str, Any]] = None
+        self._resources_at = 0.0
+        self._processes: Optional[Dict[str, Any]] = None
+        self._processes_at = 0.0
+        self._tracked: Dict[int, psutil.Process] = {}  # 已知的AdsPower进程
+        self._last_rescan = 0.0
+        self._profile_status: Dict[str, tuple] = {}  # user_id -> (探测时间, 浏览器信息或None)
+
+        # 非阻塞CPU采样以上一次调用为基准，这里先记录一次基准
+        psutil.cpu_percent(interval=None)
+        self._cpu_primed_at = time.monotonic()
+
+    def system_resources(self, max_age: float = None) -> Dict[str, Any]:
+        """CPU/内存/磁盘使用情况，缓存max_age秒（默认cache_ttl）"""
+        max_age = self.cache_ttl if max_age is None else max_age
+        with self._lock:
+            now = time.monotonic()
+            if self._resources is not None and now - self._resources_at < max_age:
+                return self._resources
+
+            # 距离上次采样太近时非阻塞结果不可靠，补一个短采样窗口
+            if now - self._cpu_primed_at < 0.1:
+                cpu_percent = psutil.cpu_percent(interval=0.1)
+            else:
+                cpu_percent = psutil.cpu_percent(interval=None)
+            self._cpu_primed_at = time.monotonic()
+
+            memory = psutil.virtual_memory()
+            disk = psutil.disk_usage('/')
+            self._resources = {
+                'cpu_percent': cpu_percent,
+                'memory_percent': memory.percent,
+                'memory_available_gb': memory.available / (1024**3),
+                'disk_free_gb': disk.free / (1024**3)
+            }
+            self._resources_at = time.monotonic()
+            return self._resources
+
+    def adspower_processes(self, max_age: float = None) -> Dict[str, Any]:
+        """
+        AdsPower相关进程状态，结构与 AdsPowerLauncher.check_adspower_processes 相同
+
+        只检查已跟踪的PID；没有存活的已跟踪进程或超过rescan_interval时才全量扫描进程表
+        """
+        max_age = self.cache_ttl if max_age is None else max_age
+        with self._lock:
+            now = time.monotonic()
+            if self._processes is not None and now - self._processes_at < max_age:
+                return self._processes
+
+            alive = {pid: proc for pid, proc in self._tracked.items() if self._is_adspower(proc)}
+            if not alive or now - self._last_rescan >= self.rescan_interval:
+                alive = self._rescan(alive)
+            self._tracked = alive
+
+            process_info = {
+                'adspower_running': bool(alive),
+                'rpa_processes': [],
+                'high_cpu_processes': [],
+                'total_processes': len(alive)
+            }
+            for pid, proc in alive.items():
+                try:
+                    name = proc.name()
+                    if 'rpa' not in name.lower():
+                        continue
+                    # 已跟踪的Process对象返回的是自上次调用以来的CPU占用
+                    cpu_percent = proc.cpu_percent(interval=None)
+                    process_info['rpa_processes'].append({
+                        'pid': pid,
+                        'name': name,
+                        'cpu_percent': cpu_percent,
+                        'memory_percent': proc.memory_percent()
+                    })
+                    if cpu_percent > self.cpu_threshold:
+                        process_info['high_cpu_processes'].append(pid)
+                        logger.warning(f"发现高CPU使用率RPA进程: PID {pid}, CPU: {cpu_percent:.1f}%")
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+
+            self._processes = process_info
+            self._processes_at = time.monotonic()
+            return process_info
+
+    def _rescan(self, known: Dict[int, psutil.Process]) -> Dict[int, psutil.Process]:
+        """全量扫描进程表，只取pid和name，发现新的AdsPower进程"""
+        found = dict(known)
+        for proc in psutil.process_iter(['pid', 'name']):
+            try:
+                name = proc.info['name'] or ''
+                if 'adspower' in name.lower() and proc.pid not in found:
+                    proc.cpu_percent(interval=None)  # 建立CPU采样基准
+                    found[proc.pid] = proc
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        self._last_rescan = time.monotonic()
+        logger.debug(f"全量扫描进程表，跟踪 {len(found)} 个AdsPower进程")
+        return found
+
+    @staticmethod
+    def _is_adspower(proc: psutil.Process) -> bool:
+        try:
+            return proc.is_running() and 'adspower' in proc.name().lower()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def profile_statuses(self, probe: Callable[[str], Optional[Dict[str, Any]]],
+                         user_ids: List[str], max_age: float = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        并发查询多个配置文件的浏览器状态
+
+        Args:
+            probe: 单个配置文件的探测函数，运行中返回浏览器信息，否则返回None
+            user_ids: AdsPower用户ID列表
+            max_age: 缓存时间（秒），默认cache_ttl
+        """
+        max_age = self.cache_ttl if max_age is None else max_age
+        now = time.monotonic()
+        results = {}
+        stale = []
+        with self._lock:
+            for user_id in user_ids:
+                cached = self._profile_status.get(user_id)
+                if cached and now - cached[0] < max_age:
+                    results[user_id] = cached[1]
+                else:
+                    stale.append(user_id)
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(self.max_status_workers, len(stale))) as pool:
+                fresh = dict(zip(stale, pool.map(probe, stale)))
+            probed_at = time.monotonic()
+            with self._lock:
+                for user_id, info in fresh.items():
+                    self._profile_status[user_id] = (probed_at, info)
+            results.update(fresh)
+        return results
+
+    def invalidate(self, processes: bool = True, resources: bool = False, rescan: bool = False):
+        """使缓存失效（终止或启动进程之后调用）"""
+        with self._lock:
+            if processes:
+                self._processes = None
+            if resources:
+                self._resources = None
+            if rescan:
+                self._last_rescan = 0.0
+
+
+# 进程内共享实例：每次启动都会新建AdsPowerLauncher，缓存放在模块级
+health_monitor = AdsPowerHealthMonitor()
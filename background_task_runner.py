@@ -8,10 +8,13 @@
 import sys
 import os
 import json
+import time
 import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
+from typing import Optional, Callable, List
+from multiprocessing.connection import Client
 
 # 添加当前目录到 Python 路径
 sys.path.insert(0, str(Path(__file__).parent))
@@ -19,8 +22,13 @@ sys.path.insert(0, str(Path(__file__).parent))
 # 导入数据库和应用配置
 from web_app import app, db, ScrapingTask, TweetData
 from ads_browser_launcher import AdsPowerLauncher
+from browser_session_registry import BrowserSessionRegistry
+from lease_service import lease_held_check, PROFILE
+from profile_fanout import ProfileFanOut, WorkItem, build_work_items
+from account_state_tracker import AccountStateTracker
+from rate_controller import AdaptiveRateController
+from stage_metrics import stage_context, stage_metrics
 from twitter_parser import TwitterParser
-from cloud_sync import CloudSyncManager
 from excel_writer import ExcelWriter
 from exception_handler import ExceptionHandler, resilient_task_execution
 
@@ -93,10 +101,30 @@ def load_adspower_config_from_db():
             'group_id': ''
         }
 
+# 进程内的浏览器会话注册表：常驻工作进程中跨任务复用已启动的配置文件和CDP连接，
+# 空闲但已被其他工作进程借用（调度进程的租约表中有记录）的配置文件不会被清理线程停止
+browser_sessions = BrowserSessionRegistry(
+    lambda: AdsPowerLauncher(load_adspower_config_from_db()),
+    idle_ttl=float(os.environ.get('ADSPOWER_SESSION_IDLE_TTL', 600)),
+    busy_check=lease_held_check(PROFILE, app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', ''))
+)
+
 @resilient_task_execution()
-async def execute_scraping_task(task_id: int, user_id: str):
-    """执行抓取任务的核心逻辑"""
+async def execute_scraping_task(task_id: int, user_id: str,
+                                progress: Optional[Callable[..., None]] = None,
+                                extra_user_ids: Optional[List[str]] = None):
+    """
+    执行抓取任务的核心逻辑
+    
+    Args:
+        task_id: 任务ID
+        user_id: AdsPower用户ID
+        progress: 进度回调 progress(stage, **info)
+        extra_user_ids: 任务内并发借用的额外AdsPower用户ID
+    """
     logger = logging.getLogger(__name__)
+    report = progress or (lambda stage, **info: None)
+    browser_healthy = True
     
     with app.app_context():
         logger.info(f"="*60)
@@ -137,66 +165,11 @@ async def execute_scraping_task(task_id: int, user_id: str):
             logger.info(f"   - 目标关键词数量: {len(target_keywords)}")
             logger.info(f"   - 目标关键词列表: {target_keywords}")
             
-            # 启动浏览器
-            logger.info(f"🌐 步骤4: 启动AdsPower浏览器")
+            # 启动浏览器并连接解析器（复用会话注册表中仍然存活的配置文件）
+            logger.info(f"🌐 步骤4: 获取AdsPower浏览器会话")
             logger.info(f"   - 使用用户ID: {user_id}")
-            
-            # 从数据库加载配置
-            adspower_config = load_adspower_config_from_db()
-            logger.info(f"   - AdsPower配置加载完成")
-            logger.info(f"   - API URL: {adspower_config.get('local_api_url', 'N/A')}")
-            logger.info(f"   - 用户ID: {adspower_config.get('user_id', 'N/A')}")
-            browser_manager = AdsPowerLauncher(adspower_config)
-            
-            try:
-                # 进行完整的健康检查和浏览器启动
-                logger.info(f"🔍 步骤4.1: 进行AdsPower健康检查")
-                logger.info(f"   - 检查AdsPower服务状态")
-                logger.info(f"   - 检查用户配置文件")
-                logger.info(f"   - 验证浏览器环境")
-                
-                browser_info = browser_manager.start_browser(user_id, skip_health_check=False)
-                if not browser_info:
-                    logger.error(f"❌ 浏览器启动失败：未返回浏览器信息")
-                    raise Exception("浏览器启动失败：未返回浏览器信息")
-                
-                logger.info(f"✅ 浏览器启动成功:")
-                logger.info(f"   - 浏览器信息: {browser_info}")
-                logger.info(f"   - WebSocket端口: {browser_info.get('ws', {}).get('puppeteer', 'N/A')}")
-                logger.info(f"   - 调试端口: {browser_info.get('debug_port', 'N/A')}")
-                logger.info(f"   - 浏览器状态: 已启动并就绪")
-                
-            except Exception as e:
-                logger.error(f"AdsPower浏览器启动失败: {str(e)}")
-                
-                # 获取详细的健康报告
-                try:
-                    health_report = browser_manager.get_health_report()
-                    logger.error(f"系统健康报告: {health_report}")
-                    
-                    # 尝试自动修复
-                    logger.info("尝试自动修复系统问题...")
-                    if browser_manager.auto_optimize_system():
-                        logger.info("系统优化完成，重新尝试启动浏览器...")
-                        browser_info = browser_manager.start_browser(user_id, skip_health_check=True)
-                        if browser_info:
-                            logger.info("浏览器启动成功（修复后）")
-                        else:
-                            raise Exception("浏览器启动失败（修复后仍然失败）")
-                    else:
-                        raise Exception(f"AdsPower浏览器启动失败且自动修复失败: {str(e)}")
-                        
-                except Exception as repair_error:
-                    logger.error(f"自动修复过程中发生错误: {str(repair_error)}")
-                    raise Exception(f"AdsPower浏览器启动失败: {str(e)}。修复尝试也失败: {str(repair_error)}")
-            
-            debug_port = browser_info.get('ws', {}).get('puppeteer')
-            
-            # 连接解析器
-            logger.info(f"🔗 步骤5: 连接Twitter解析器")
-            logger.info(f"   - 使用调试端口: {debug_port}")
-            parser = TwitterParser(debug_port)
-            await parser.connect_browser()
+            parser = await browser_sessions.acquire(user_id)
+            logger.info(f"🔗 步骤5: Twitter解析器已连接")
             
             # 确保优化功能已启用
             parser.enable_optimizations()
@@ -205,119 +178,77 @@ async def execute_scraping_task(task_id: int, user_id: str):
             logger.info(f"   - 已见推文ID集合大小: {len(parser.seen_tweet_ids)}")
             logger.info(f"   - 内容缓存大小: {len(parser.content_cache)}")
             
-            all_tweets = []
             content_shortage_details = []  # 记录内容不足的详细信息
             
-            # 抓取推文
+            # 构建筛选条件
+            filter_criteria = {
+                'min_likes': task.min_likes,
+                'min_comments': task.min_comments,
+                'min_retweets': task.min_retweets
+            }
+            
+            async def scrape_item(item_parser: TwitterParser, item: WorkItem):
+                """抓取单个账号或关键词（可能在任一借用的配置文件上执行）"""
+                if item.kind == 'account':
+                    logger.info(f"📱 步骤6.{item.index}: 抓取博主 @{item.account} 的推文")
+                    logger.info(f"   - 进度: {item.index}/{item.total}")
+                    report('account', current=item.index, total=item.total, name=item.account)
+                    await item_parser.navigate_to_profile(item.account)
+                    logger.info(f"   - 已导航到用户主页")
+                    target_label = f"博主 @{item.account}"
+                else:
+                    logger.info(f"🔎 步骤7.{item.index}: 搜索关键词 '{item.keyword}'")
+                    logger.info(f"   - 进度: {item.index}/{item.total}")
+                    report('keyword', current=item.index, total=item.total, name=item.keyword)
+                    await item_parser.search_tweets(item.keyword)
+                    logger.info(f"   - 已导航到搜索页面")
+                    target_label = f"关键词 '{item.keyword}'"
+                
+                # 使用带筛选条件的抓取方法
+                tweets = await item_parser.scrape_tweets(max_tweets=task.max_tweets, filter_criteria=filter_criteria)
+                logger.info(f"   - {target_label} 抓取到满足条件的推文数: {len(tweets)}")
+                
+                # 检查是否达到目标数量
+                if len(tweets) < task.max_tweets:
+                    shortage_count = task.max_tweets - len(tweets)
+                    content_shortage_details.append(
+                        f"{target_label}: 目标{task.max_tweets}条，实际{len(tweets)}条，不足{shortage_count}条")
+                    logger.warning(f"⚠️ {target_label} 满足条件的推文不足：目标 {task.max_tweets} 条，实际 {len(tweets)} 条，不足 {shortage_count} 条")
+                return tweets
+            
+            # 抓取推文：工作列表在主配置文件和借用的配置文件之间并发分配，共享结果和去重索引
+            work_items = build_work_items(target_accounts, target_keywords)
             logger.info(f"📊 步骤6: 开始数据抓取")
             logger.info(f"   - 总计需要抓取 {len(target_accounts)} 个账号")
             logger.info(f"   - 总计需要搜索 {len(target_keywords)} 个关键词")
+            logger.info(f"   - 筛选条件: 最小点赞{task.min_likes}, 最小评论{task.min_comments}, 最小转发{task.min_retweets}")
+            if extra_user_ids:
+                logger.info(f"   - 并发借用的配置文件: {extra_user_ids}")
             
-            for i, account in enumerate(target_accounts, 1):
-                try:
-                    # 清理用户名，去除@符号
-                    clean_username = account.lstrip('@') if account.startswith('@') else account
-                    logger.info(f"📱 步骤6.{i}: 抓取博主 @{clean_username} 的推文")
-                    logger.info(f"   - 进度: {i}/{len(target_accounts)}")
-                    logger.info(f"   - 目标推文数: {task.max_tweets}")
-                    logger.info(f"   - 原始输入: {account}")
-                    logger.info(f"   - 清理后用户名: {clean_username}")
-                    
-                    await parser.navigate_to_profile(clean_username)
-                    logger.info(f"   - 已导航到用户主页")
-                    
-                    # 构建筛选条件
-                    filter_criteria = {
-                        'min_likes': task.min_likes,
-                        'min_comments': task.min_comments,
-                        'min_retweets': task.min_retweets
-                    }
-                    logger.info(f"   - 筛选条件: 最小点赞{task.min_likes}, 最小评论{task.min_comments}, 最小转发{task.min_retweets}")
-                    
-                    # 使用带筛选条件的抓取方法
-                    tweets = await parser.scrape_tweets(max_tweets=task.max_tweets, filter_criteria=filter_criteria)
-                    logger.info(f"   - 抓取到满足条件的推文数: {len(tweets)}")
-                    
-                    # 检查是否达到目标数量
-                    if len(tweets) < task.max_tweets:
-                        shortage_count = task.max_tweets - len(tweets)
-                        shortage_info = f"博主 @{clean_username}: 目标{task.max_tweets}条，实际{len(tweets)}条，不足{shortage_count}条"
-                        content_shortage_details.append(shortage_info)
-                        logger.warning(f"⚠️ 博主 @{clean_username} 满足条件的推文不足：")
-                        logger.warning(f"   - 目标数量: {task.max_tweets} 条")
-                        logger.warning(f"   - 实际满足条件数量: {len(tweets)} 条")
-                        logger.warning(f"   - 不足 {shortage_count} 条")
-                        logger.info(f"📊 将使用所有可用的 {len(tweets)} 条满足条件的推文")
-                    
-                    # 直接添加到结果中（已经过筛选）
-                    all_tweets.extend(tweets)
-                    logger.info(f"✅ 博主 @{clean_username} 抓取完成:")
-                    logger.info(f"   - 满足条件推文数: {len(tweets)}")
-                    logger.info(f"   - 累计有效推文数: {len(all_tweets)}")
-                    
-                    # 如果满足条件的推文不足，记录到任务结果中
-                    if len(tweets) < task.max_tweets:
-                        logger.info(f"📝 记录满足条件推文不足信息到任务结果")
-                    
-                except Exception as e:
-                    logger.error(f"❌ 抓取博主 @{clean_username} 失败: {e}")
-                    continue
-            
-            # 抓取关键词推文
-            if target_keywords:
-                logger.info(f"🔍 步骤7: 开始关键词搜索")
-                for j, keyword in enumerate(target_keywords, 1):
-                    try:
-                        logger.info(f"🔎 步骤7.{j}: 搜索关键词 '{keyword}'")
-                        logger.info(f"   - 进度: {j}/{len(target_keywords)}")
-                        logger.info(f"   - 目标推文数: {task.max_tweets}")
-                        
-                        await parser.search_tweets(keyword)
-                        logger.info(f"   - 已导航到搜索页面")
-                        
-                        # 构建筛选条件
-                        filter_criteria = {
-                            'min_likes': task.min_likes,
-                            'min_comments': task.min_comments,
-                            'min_retweets': task.min_retweets
-                        }
-                        logger.info(f"   - 筛选条件: 最小点赞{task.min_likes}, 最小评论{task.min_comments}, 最小转发{task.min_retweets}")
-                        
-                        # 使用带筛选条件的抓取方法
-                        tweets = await parser.scrape_tweets(max_tweets=task.max_tweets, filter_criteria=filter_criteria)
-                        logger.info(f"   - 抓取到满足条件的推文数: {len(tweets)}")
-                        
-                        # 检查是否达到目标数量
-                        if len(tweets) < task.max_tweets:
-                            shortage_count = task.max_tweets - len(tweets)
-                            shortage_info = f"关键词 '{keyword}': 目标{task.max_tweets}条，实际{len(tweets)}条，不足{shortage_count}条"
-                            content_shortage_details.append(shortage_info)
-                            logger.warning(f"⚠️ 关键词 '{keyword}' 满足条件的推文不足：")
-                            logger.warning(f"   - 目标数量: {task.max_tweets} 条")
-                            logger.warning(f"   - 实际满足条件数量: {len(tweets)} 条")
-                            logger.warning(f"   - 不足 {shortage_count} 条")
-                            logger.info(f"📊 将使用所有可用的 {len(tweets)} 条满足条件的推文")
-                        
-                        # 直接添加到结果中（已经过筛选）
-                        all_tweets.extend(tweets)
-                        logger.info(f"✅ 关键词 '{keyword}' 搜索完成:")
-                        logger.info(f"   - 满足条件推文数: {len(tweets)}")
-                        logger.info(f"   - 累计有效推文数: {len(all_tweets)}")
-                        
-                    except Exception as e:
-                        logger.error(f"❌ 搜索关键词 '{keyword}' 失败: {e}")
-                        continue
-            else:
-                logger.info(f"ℹ️ 跳过关键词搜索：未配置关键词")
+            fanout = ProfileFanOut(
+                browser_sessions, extra_user_ids or [], scrape_item,
+                item_interval=float(os.environ.get('ADSPOWER_FANOUT_ITEM_INTERVAL', ProfileFanOut.DEFAULT_ITEM_INTERVAL)),
+                on_parser_ready=lambda extra_parser: extra_parser.enable_optimizations(),
+                tracker=AccountStateTracker(),
+                rate_controller=AdaptiveRateController()
+            )
+            sink = await fanout.run(parser, work_items, primary_user_id=user_id)
+            all_tweets = sink.tweets
+            logger.info(f"✅ 数据抓取完成: 有效推文 {len(all_tweets)} 条，跨配置文件重复 {sink.duplicate_count} 条，失败 {len(sink.errors)} 项")
+            for timing in sorted(sink.timings, key=lambda t: t['duration'], reverse=True)[:3]:
+                logger.info(f"   - 耗时最长: {timing['target']} {timing['duration']}s（预估 {timing['estimated'] or 0:.1f}s），"
+                            f"推文 {timing['tweets_found']} 条，滚动 {timing['scrolls']} 次，配置文件 {timing['profile']}")
             
             # 保存到数据库
             logger.info(f"💾 步骤8: 保存数据到数据库")
+            report('saving', tweet_count=len(all_tweets))
             logger.info(f"   - 总计抓取推文数: {len(all_tweets)}")
             logger.info(f"   - 开始去重和保存")
             
             saved_count = 0
             duplicate_count = 0
             error_count = 0
+            save_started = time.perf_counter()
             
             for i, tweet in enumerate(all_tweets, 1):
                 try:
@@ -352,6 +283,7 @@ async def execute_scraping_task(task_id: int, user_id: str):
                     continue
             
             db.session.commit()
+            stage_metrics.observe('save_tweets', time.perf_counter() - save_started)
             logger.info(f"✅ 数据库保存完成:")
             logger.info(f"   - 总处理推文数: {len(all_tweets)}")
             logger.info(f"   - 成功保存数: {saved_count}")
@@ -402,9 +334,10 @@ async def execute_scraping_task(task_id: int, user_id: str):
             
             # 同步到云端（飞书）
             logger.info(f"☁️ 步骤11: 同步数据到飞书")
+            report('syncing', saved_count=saved_count)
             try:
                 # 检查飞书配置
-                from web_app import FEISHU_CONFIG
+                from web_app import FEISHU_CONFIG, FEISHU_SYNC_PAGE_SIZE, sync_task_to_feishu
                 logger.info(f"   - 检查飞书配置状态")
                 logger.info(f"   - 飞书同步启用: {FEISHU_CONFIG.get('enabled', False)}")
                 
@@ -420,46 +353,19 @@ async def execute_scraping_task(task_id: int, user_id: str):
                     elif not table_id:
                         logger.warning(f"⚠️ 飞书表格ID未配置，跳过同步")
                     else:
-                        logger.info(f"   - 开始飞书同步，推文数量: {len(all_tweets)}")
+                        logger.info(f"   - 开始飞书分页同步，每页 {FEISHU_SYNC_PAGE_SIZE} 条，模式: {FEISHU_CONFIG.get('sync_mode', 'create')}")
                         logger.info(f"   - 表格Token: {spreadsheet_token[:10]}...")
                         logger.info(f"   - 表格ID: {table_id}")
-                        logger.info(f"   - 最大重试次数: 3")
-                        logger.info(f"   - 失败时继续执行: True")
-                        
-                        # 构建飞书配置
-                        feishu_sync_config = {
-                            'feishu': {
-                                'app_id': FEISHU_CONFIG.get('app_id'),
-                                'app_secret': FEISHU_CONFIG.get('app_secret'),
-                                'base_url': 'https://open.feishu.cn/open-apis'
-                            }
-                        }
                         
-                        cloud_sync = CloudSyncManager(feishu_sync_config)
-                        sync_result = cloud_sync.sync_to_feishu(
-                            all_tweets, 
-                            spreadsheet_token=spreadsheet_token,
-                            table_id=table_id,
-                            max_retries=3, 
-                            continue_on_failure=True
-                        )
+                        # 从数据库分页读取本任务的推文，每页成功后立即标记已同步
+                        sync_result = sync_task_to_feishu(task_id)
                         
-                        if sync_result:
+                        if sync_result['success']:
                             logger.info(f"✅ 飞书同步完成")
-                            logger.info(f"   - 同步状态: 成功")
-                            logger.info(f"   - 同步推文数: {len(all_tweets)}")
-                            
-                            # 更新数据库中的同步状态
-                            try:
-                                synced_tweets = db.session.query(TweetData).filter_by(task_id=task_id).all()
-                                for tweet_data in synced_tweets:
-                                    tweet_data.synced_to_feishu = True
-                                db.session.commit()
-                                logger.info(f"✅ 数据库同步状态更新完成，共更新 {len(synced_tweets)} 条记录")
-                            except Exception as update_e:
-                                logger.warning(f"⚠️ 更新数据库同步状态失败: {update_e}")
+                            logger.info(f"   - 同步推文数: {sync_result['synced_count']}")
+                            logger.info(f"   - 同步页数: {sync_result['page_count']}")
                         else:
-                            logger.warning(f"⚠️ 飞书同步失败，但任务继续执行")
+                            logger.warning(f"⚠️ 飞书同步失败，但任务继续执行: {sync_result['error']}")
                         
             except Exception as e:
                 logger.warning(f"⚠️ 飞书同步异常，但任务继续执行: {e}")
@@ -486,14 +392,85 @@ async def execute_scraping_task(task_id: int, user_id: str):
             task.completed_at = datetime.utcnow()
             task.error_message = str(e)
             db.session.commit()
+            browser_healthy = False
             raise
         
         finally:
-            # 关闭浏览器
+            # 归还浏览器会话（空闲TTL内保留给下一个任务，任务失败时停止配置文件）
             try:
-                browser_manager.stop_browser(user_id)
-            except:
-                pass
+                await browser_sessions.release(user_id, healthy=browser_healthy)
+            except Exception as e:
+                logger.warning(f"归还浏览器会话失败: {e}")
+
+def save_task_result(task_id: int, result_file: str):
+    """保存任务结果文件"""
+    with open(f"task_result_{task_id}.json", 'w', encoding='utf-8') as f:
+        json.dump({
+            'task_id': task_id,
+            'success': True,
+            'completed_at': datetime.now().isoformat(),
+            'result_file': result_file
+        }, f, ensure_ascii=False, indent=2)
+
+def save_task_error(task_id, error: Exception):
+    """保存任务错误信息文件"""
+    with open(f"task_error_{task_id}.json", 'w', encoding='utf-8') as f:
+        json.dump({
+            'task_id': task_id,
+            'error': str(error),
+            'failed_at': datetime.now().isoformat()
+        }, f, ensure_ascii=False, indent=2)
+
+async def run_worker(user_id: str, address: str):
+    """
+    常驻工作进程主循环
+    连接任务管理器的本地socket，逐个接收任务ID执行，并上报进度和结果；
+    浏览器会话在任务之间保持，收到shutdown或连接断开时退出
+    """
+    from worker_pool import WORKER_AUTHKEY_ENV
+    
+    logger = setup_logging()
+    host, port = address.rsplit(':', 1)
+    conn = Client((host, int(port)), authkey=bytes.fromhex(os.environ[WORKER_AUTHKEY_ENV]))
+    conn.send({'type': 'hello', 'user_id': user_id, 'pid': os.getpid()})
+    logger.info(f"常驻工作进程已就绪，用户ID: {user_id}，PID: {os.getpid()}")
+    
+    loop = asyncio.get_running_loop()
+    
+    try:
+        while True:
+            # 阻塞读取放到线程池，等待期间不占用事件循环
+            message = await loop.run_in_executor(None, conn.recv)
+            if message.get('type') == 'shutdown':
+                break
+            if message.get('type') != 'run':
+                continue
+            
+            task_id = message['task_id']
+            logger.info(f"工作进程开始执行任务 {task_id}，用户ID: {user_id}")
+            
+            def progress(stage, **info):
+                conn.send({'type': 'progress', 'task_id': task_id, 'stage': stage, **info})
+            
+            try:
+                with stage_context(task=task_id):
+                    result = await execute_scraping_task(task_id, user_id, progress=progress,
+                                                         extra_user_ids=message.get('extra_user_ids'))
+                save_task_result(task_id, result)
+                conn.send({'type': 'result', 'task_id': task_id, 'success': True, 'result_file': result})
+            except Exception as e:
+                logger.error(f"工作进程执行任务 {task_id} 失败: {e}")
+                save_task_error(task_id, e)
+                conn.send({'type': 'result', 'task_id': task_id, 'success': False, 'error': str(e)})
+            finally:
+                stage_metrics.flush()
+    except (EOFError, OSError):
+        logger.info("任务管理器连接已断开，工作进程退出")
+    finally:
+        await browser_sessions.close_all()
+        conn.close()
+    
+    return 0
 
 async def run_background_task(config_file: str):
     """运行后台任务"""
@@ -511,19 +488,14 @@ async def run_background_task(config_file: str):
         logger.info(f"开始执行后台任务 {task_id}，用户ID: {user_id}")
         
         # 执行任务
-        result = await execute_scraping_task(task_id, user_id)
+        with stage_context(task=task_id):
+            result = await execute_scraping_task(task_id, user_id,
+                                                 extra_user_ids=task_config['kwargs'].get('extra_user_ids'))
         
         logger.info(f"后台任务 {task_id} 执行完成，结果: {result}")
         
         # 保存结果
-        result_file = f"task_result_{task_id}.json"
-        with open(result_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'task_id': task_id,
-                'success': True,
-                'completed_at': datetime.now().isoformat(),
-                'result_file': result
-            }, f, ensure_ascii=False, indent=2)
+        save_task_result(task_id, result)
         
         return 0
         
@@ -532,17 +504,15 @@ async def run_background_task(config_file: str):
         
         # 保存错误信息
         task_id = task_config.get('task_id', 'unknown') if task_config else 'unknown'
-        error_file = f"task_error_{task_id}.json"
-        with open(error_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'task_id': task_id,
-                'error': str(e),
-                'failed_at': datetime.now().isoformat()
-            }, f, ensure_ascii=False, indent=2)
+        save_task_error(task_id, e)
         
         return 1
     
     finally:
+        # 一次性进程退出前停止浏览器
+        await browser_sessions.close_all()
+        stage_metrics.flush()
+        
         # 清理配置文件
         try:
             if Path(config_file).exists():
@@ -552,19 +522,25 @@ async def run_background_task(config_file: str):
 
 def main():
     """主函数"""
-    if len(sys.argv) != 2:
+    if len(sys.argv) == 4 and sys.argv[1] == '--worker':
+        # 常驻工作进程模式
+        coroutine = run_worker(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) == 2:
+        config_file = sys.argv[1]
+        
+        if not Path(config_file).exists():
+            print(f"配置文件不存在: {config_file}")
+            sys.exit(1)
+        
+        coroutine = run_background_task(config_file)
+    else:
         print("用法: python background_task_runner.py <config_file>")
-        sys.exit(1)
-    
-    config_file = sys.argv[1]
-    
-    if not Path(config_file).exists():
-        print(f"配置文件不存在: {config_file}")
+        print("      python background_task_runner.py --worker <user_id> <host:port>")
         sys.exit(1)
     
     # 运行异步任务
     try:
-        exit_code = asyncio.run(run_background_task(config_file))
+        exit_code = asyncio.run(coroutine)
         sys.exit(exit_code)
     except KeyboardInterrupt:
         print("任务被用户中断")
@@ -6,9 +6,12 @@
 """
 
 import asyncio
+import itertools
 import logging
 import time
+import uuid
 import psutil
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
@@ -64,6 +67,9 @@ class BrowserInstance:
     error_count: int = 0
     restart_count: int = 0
     
+    # 本次被借出的时刻（time.monotonic），空闲时为None
+    checked_out_at: Optional[float] = None
+    
     @property
     def success_rate(self) -> float:
         """成功率"""
@@ -90,7 +96,8 @@ class BrowserManager:
     """浏览器管理器"""
     
     def __init__(self, max_instances: int = 3, headless: bool = True, 
-                 user_data_dir: str = None, proxy_config: Dict[str, str] = None):
+                 user_data_dir: str = None, proxy_config: Dict[str, str] = None,
+                 max_concurrent_creations: int = 1):
         self.max_instances = max_instances
         self.headless = headless
         self.user_data_dir = Path(user_data_dir) if user_data_dir else None
@@ -99,7 +106,28 @@ class BrowserManager:
         self.logger = logging.getLogger(__name__)
         self.playwright = None
         self.instances: Dict[str, BrowserInstance] = {}
-        self.instance_pool: List[str] = []  # 可用实例池
+        self.instance_pool: deque = deque()  # 可用实例池（空闲实例ID）
+        
+        # 等待实例的调用方（先进先出），释放的实例直接交给队首等待者
+        self._waiters: deque = deque()
+        # 已预留容量、正在创建的实例数；容量判断与预留之间没有await，不会超过max_instances
+        self._creating = 0
+        # 限制同时启动的浏览器数量
+        self._creation_semaphore = asyncio.Semaphore(max(1, max_concurrent_creations))
+        self._id_counter = itertools.count(1)
+        self._id_prefix = uuid.uuid4().hex[:6]
+        self._closed = False
+        
+        # 池指标：等待时间和利用率
+        self._pool_started_at = time.monotonic()
+        self._busy_seconds = 0.0
+        self._wait_stats = {
+            'acquisitions': 0,
+            'waited_acquisitions': 0,
+            'timeouts': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+        }
         
         # 配置参数
         self.browser_config = {
@@ -151,14 +179,40 @@ class BrowserManager:
     
     async def _create_initial_instances(self, count: int = 1):
         """创建初始浏览器实例"""
-        for i in range(min(count, self.max_instances)):
+        for _ in range(min(count, self.max_instances)):
+            if not self._reserve_capacity():
+                break
             try:
-                instance_id = f"browser_{int(time.time())}_{i}"
-                await self._create_browser_instance(instance_id)
-                self.logger.info(f"创建初始浏览器实例: {instance_id}")
+                instance = await self._create_reserved_instance()
+                self._return_idle(instance)
+                self.logger.info(f"创建初始浏览器实例: {instance.instance_id}")
             except Exception as e:
                 self.logger.error(f"创建初始实例失败: {e}")
     
+    def _new_instance_id(self) -> str:
+        """生成进程内唯一的实例ID"""
+        return f"browser_{self._id_prefix}_{next(self._id_counter)}"
+    
+    def _reserve_capacity(self) -> bool:
+        """未达到最大实例数时预留一个创建名额"""
+        if len(self.instances) + self._creating >= self.max_instances:
+            return False
+        self._creating += 1
+        return True
+    
+    async def _create_reserved_instance(self) -> BrowserInstance:
+        """使用已预留的名额创建实例；失败时名额转交给下一个等待者"""
+        created = False
+        try:
+            async with self._creation_semaphore:
+                instance = await self._create_browser_instance(self._new_instance_id())
+            created = True
+            return instance
+        finally:
+            self._creating -= 1
+            if not created:
+                self._wake_waiter_for_capacity()
+    
     @async_retry_on_error(max_retries=3, delay=2.0)
     async def _create_browser_instance(self, instance_id: str) -> BrowserInstance:
         """创建浏览器实例"""
@@ -208,9 +262,8 @@ class BrowserManager:
                 status=BrowserStatus.IDLE
             )
             
-            # 注册实例
+            # 注册实例（由调用方决定放回空闲池还是直接借出）
             self.instances[instance_id] = instance
-            self.instance_pool.append(instance_id)
             
             self.logger.info(f"浏览器实例创建成功: {instance_id}")
             return instance
@@ -275,53 +328,142 @@ class BrowserManager:
             self.logger.warning(f"页面配置失败: {e}")
     
     async def get_available_instance(self, timeout: float = 30.0) -> Optional[BrowserInstance]:
-        """获取可用的浏览器实例"""
-        start_time = time.time()
+        """
+        获取可用的浏览器实例
         
-        while time.time() - start_time < timeout:
-            # 检查现有可用实例
-            for instance_id in self.instance_pool.copy():
-                if instance_id in self.instances:
-                    instance = self.instances[instance_id]
-                    if instance.status == BrowserStatus.IDLE and instance.is_healthy:
-                        # 标记为忙碌
-                        instance.status = BrowserStatus.BUSY
-                        instance.last_used_at = datetime.now()
-                        self.instance_pool.remove(instance_id)
-                        
-                        self.logger.debug(f"分配浏览器实例: {instance_id}")
-                        return instance
+        优先使用空闲实例，其次在容量内新建实例，否则按先来先到排队，
+        实例释放时直接交给队首等待者；超时返回None
+        """
+        start_time = time.monotonic()
+        
+        while not self._closed:
+            # 检查现有可用实例（有等待者时空闲池必为空，新调用方不会插队）
+            while self.instance_pool:
+                instance = self.instances.get(self.instance_pool.popleft())
+                if instance and instance.status == BrowserStatus.IDLE and instance.is_healthy:
+                    return self._check_out(instance, start_time)
             
             # 如果没有可用实例且未达到最大数量，创建新实例
-            if len(self.instances) < self.max_instances:
+            if self._reserve_capacity():
                 try:
-                    instance_id = f"browser_{int(time.time())}_{len(self.instances)}"
-                    instance = await self._create_browser_instance(instance_id)
-                    instance.status = BrowserStatus.BUSY
-                    instance.last_used_at = datetime.now()
-                    return instance
+                    instance = await self._create_reserved_instance()
+                    return self._check_out(instance, start_time)
                 except Exception as e:
                     self.logger.error(f"创建新实例失败: {e}")
+                    # 创建失败的名额已转交，自己排队等待
+            
+            # 排队等待释放的实例或空出的创建名额
+            remaining = timeout - (time.monotonic() - start_time)
+            if remaining <= 0:
+                break
             
-            # 等待一段时间后重试
-            await asyncio.sleep(1.0)
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait([waiter], timeout=remaining)
+            except asyncio.CancelledError:
+                self._abandon_waiter(waiter)
+                raise
+            
+            if not waiter.done():
+                self._abandon_waiter(waiter)
+                break
+            
+            instance = waiter.result()
+            if instance is not None:
+                return self._check_out(instance, start_time)
+            if self._closed:
+                break
+            # 结果为None表示已为本等待者预留了创建名额
+            try:
+                instance = await self._create_reserved_instance()
+                return self._check_out(instance, start_time)
+            except Exception as e:
+                self.logger.error(f"创建新实例失败: {e}")
         
+        self._wait_stats['timeouts'] += 1
         self.logger.warning("获取可用浏览器实例超时")
         return None
     
+    def _check_out(self, instance: BrowserInstance, start_time: float) -> BrowserInstance:
+        """标记实例为忙碌并记录等待时间"""
+        now = time.monotonic()
+        waited = now - start_time
+        
+        instance.status = BrowserStatus.BUSY
+        instance.last_used_at = datetime.now()
+        instance.checked_out_at = now
+        
+        stats = self._wait_stats
+        stats['acquisitions'] += 1
+        stats['total_wait_seconds'] += waited
+        stats['max_wait_seconds'] = max(stats['max_wait_seconds'], waited)
+        if waited >= 0.01:
+            stats['waited_acquisitions'] += 1
+        
+        self.logger.debug(f"分配浏览器实例: {instance.instance_id}，等待 {waited:.2f} 秒")
+        return instance
+    
+    def _return_idle(self, instance: BrowserInstance):
+        """实例变为空闲：有等待者时直接交给队首，否则放回空闲池"""
+        instance.status = BrowserStatus.IDLE
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(instance)
+                return
+        if instance.instance_id not in self.instance_pool:
+            self.instance_pool.append(instance.instance_id)
+    
+    def _wake_waiter_for_capacity(self):
+        """有实例被移除、空出容量时，为队首等待者预留创建名额并唤醒"""
+        while self._waiters and len(self.instances) + self._creating < self.max_instances:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._creating += 1
+                waiter.set_result(None)
+                return
+    
+    def _abandon_waiter(self, waiter: asyncio.Future):
+        """等待者超时或被取消：退出队列，已交到手上的实例或名额转交出去"""
+        if waiter.done() and not waiter.cancelled():
+            instance = waiter.result()
+            if instance is not None:
+                self._return_idle(instance)
+            elif not self._closed:
+                self._creating -= 1
+                self._wake_waiter_for_capacity()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+    
+    def _remove_instance(self, instance_id: str):
+        """从管理器中移除实例并把空出的容量交给等待者"""
+        instance = self.instances.pop(instance_id, None)
+        if instance is not None and instance.checked_out_at is not None:
+            self._busy_seconds += time.monotonic() - instance.checked_out_at
+            instance.checked_out_at = None
+        if instance_id in self.instance_pool:
+            self.instance_pool.remove(instance_id)
+        self._wake_waiter_for_capacity()
+    
     async def release_instance(self, instance: BrowserInstance):
         """释放浏览器实例"""
         try:
-            if instance.instance_id in self.instances:
-                instance.status = BrowserStatus.IDLE
+            if self.instances.get(instance.instance_id) is instance:
+                if instance.checked_out_at is not None:
+                    self._busy_seconds += time.monotonic() - instance.checked_out_at
+                    instance.checked_out_at = None
                 
                 # 更新性能指标
                 await self._update_performance_metrics(instance)
                 
                 # 检查实例健康状态
                 if instance.is_healthy:
-                    if instance.instance_id not in self.instance_pool:
-                        self.instance_pool.append(instance.instance_id)
+                    self._return_idle(instance)
                     self.logger.debug(f"释放浏览器实例: {instance.instance_id}")
                 else:
                     # 不健康的实例需要重启
@@ -369,14 +511,12 @@ class BrowserManager:
             new_instance.restart_count = instance.restart_count
             
             self.logger.info(f"浏览器实例重启成功: {instance.instance_id}")
+            self._return_idle(new_instance)
             
         except Exception as e:
             self.logger.error(f"重启实例失败: {e}")
             # 从池中移除失败的实例
-            if instance.instance_id in self.instances:
-                del self.instances[instance.instance_id]
-            if instance.instance_id in self.instance_pool:
-                self.instance_pool.remove(instance.instance_id)
+            self._remove_instance(instance.instance_id)
     
     async def _close_instance(self, instance: BrowserInstance):
         """关闭浏览器实例"""
@@ -513,10 +653,7 @@ class BrowserManager:
             for instance_id in instances_to_remove:
                 if instance_id in self.instances:
                     await self._close_instance(self.instances[instance_id])
-                    del self.instances[instance_id]
-                
-                if instance_id in self.instance_pool:
-                    self.instance_pool.remove(instance_id)
+                self._remove_instance(instance_id)
             
             self.last_cleanup_time = current_time
             
@@ -526,11 +663,37 @@ class BrowserManager:
         except Exception as e:
             self.logger.error(f"清理实例失败: {e}")
     
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """实例池的等待时间和利用率指标"""
+        now = time.monotonic()
+        busy_seconds = self._busy_seconds + sum(
+            now - instance.checked_out_at for instance in self.instances.values()
+            if instance.checked_out_at is not None
+        )
+        capacity_seconds = (now - self._pool_started_at) * self.max_instances
+        busy_instances = sum(1 for instance in self.instances.values() if instance.status == BrowserStatus.BUSY)
+        stats = self._wait_stats
+        
+        return {
+            "max_instances": self.max_instances,
+            "busy_instances": busy_instances,
+            "idle_instances": len(self.instance_pool),
+            "creating_instances": self._creating,
+            "waiting_callers": sum(1 for waiter in self._waiters if not waiter.done()),
+            "current_utilization": busy_instances / self.max_instances if self.max_instances else 0.0,
+            "average_utilization": busy_seconds / capacity_seconds if capacity_seconds > 0 else 0.0,
+            "acquisitions": stats['acquisitions'],
+            "waited_acquisitions": stats['waited_acquisitions'],
+            "timeouts": stats['timeouts'],
+            "average_wait_seconds": stats['total_wait_seconds'] / stats['acquisitions'] if stats['acquisitions'] else 0.0,
+            "max_wait_seconds": stats['max_wait_seconds'],
+        }
+    
     async def get_statistics(self) -> Dict[str, Any]:
         """获取统计信息"""
         total_instances = len(self.instances)
         if total_instances == 0:
-            return {"total_instances": 0}
+            return {"total_instances": 0, "pool": self.get_pool_metrics()}
         
         # 状态分布
         status_counts = {}
@@ -556,6 +719,7 @@ class BrowserManager:
             "total_memory_mb": total_memory,
             "average_cpu_percent": avg_cpu,
             "average_uptime_hours": sum(instance.uptime_hours for instance in self.instances.values()) / total_instances,
+            "pool": self.get_pool_metrics(),
         }
     
     async def close_all(self):
@@ -563,6 +727,13 @@ class BrowserManager:
         try:
             self.logger.info("关闭所有浏览器实例")
             
+            # 唤醒所有等待者，它们会返回None
+            self._closed = True
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+            
             # 关闭所有实例
             for instance in self.instances.values():
                 await self._close_instance(instance)
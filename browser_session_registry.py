@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AdsPower浏览器会话注册表
+按AdsPower用户ID保存已启动的配置文件及其CDP连接，在空闲TTL内供后续任务复用，
+复用时只做轻量探测，避免每个任务都重新执行健康检查、启动和停止浏览器
+"""
+
+import asyncio
+import threading
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Callable
+
+from ads_browser_launcher import AdsPowerLauncher
+from twitter_parser import TwitterParser
+from playwright_driver import driver_manager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BrowserSession:
+    """单个AdsPower配置文件的浏览器会话"""
+    user_id: str
+    launcher: AdsPowerLauncher
+    browser_info: Dict[str, Any]
+    parser: Optional[TwitterParser] = None
+    loop: Optional[asyncio.AbstractEventLoop] = None  # parser所属的事件循环
+    in_use: bool = False
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def ws_endpoint(self) -> Optional[str]:
+        ws_info = self.browser_info.get('ws', {})
+        return ws_info.get('puppeteer') or ws_info.get('playwright')
+
+
+class BrowserSessionRegistry:
+    """按用户ID复用AdsPower浏览器会话，空闲超过TTL的配置文件由后台线程停止"""
+
+    def __init__(self, launcher_factory: Callable[[], AdsPowerLauncher],
+                 idle_ttl: float = 600.0, health_check_interval: float = 1800.0,
+                 probe_timeout: float = 5.0, busy_check: Callable[[str], bool] = None):
+        """
+        Args:
+            launcher_factory: 创建AdsPowerLauncher的工厂函数
+            idle_ttl: 会话空闲多久后停止配置文件（秒），0表示任务结束后立即停止
+            health_check_interval: 两次完整健康检查之间的最小间隔（秒）
+            probe_timeout: 复用前探测CDP连接的超时时间（秒）
+            busy_check: busy_check(user_id)返回True表示配置文件正被其他任务使用
+                        （例如被其他工作进程借用），此时即使本进程中空闲也不停止
+        """
+        self.launcher_factory = launcher_factory
+        self.idle_ttl = idle_ttl
+        self.health_check_interval = health_check_interval
+        self.probe_timeout = probe_timeout
+        self.busy_check = busy_check
+
+        self._sessions: Dict[str, BrowserSession] = {}
+        self._last_health_check: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._reaper_thread: Optional[threading.Thread] = None
+
+    async def acquire(self, user_id: str) -> TwitterParser:
+        """
+        获取用户ID对应的已连接解析器
+
+        依次尝试：复用当前事件循环中的CDP连接 → 配置文件仍在运行时重新连接CDP → 启动配置文件
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is not None:
+                if session.in_use:
+                    raise RuntimeError(f"用户ID {user_id} 的浏览器会话正在被其他任务使用")
+                session.in_use = True
+
+        try:
+            if session is not None and session.loop is loop and await self._probe_parser(session.parser):
+                logger.info(f"♻️ 复用浏览器会话，用户ID: {user_id}")
+                return session.parser
+
+            if session is not None:
+                await self._detach(session)
+            else:
+                session = self._attach_or_start(user_id)
+
+            try:
+                session.parser = await self._connect(session.ws_endpoint)
+            except Exception as e:
+                # CDP连接失败：配置文件可能已失效，重新启动后再连接一次
+                logger.warning(f"连接浏览器会话失败，重新启动配置文件: {e}")
+                session.launcher.stop_browser(user_id)
+                session.browser_info = self._start_profile(session.launcher, user_id)
+                session.parser = await self._connect(session.ws_endpoint)
+
+            session.loop = loop
+            session.in_use = True
+            with self._lock:
+                self._sessions[user_id] = session
+            self._ensure_reaper()
+            return session.parser
+
+        except Exception:
+            with self._lock:
+                self._sessions.pop(user_id, None)
+            raise
+
+    async def release(self, user_id: str, detach: bool = False, healthy: bool = True,
+                      retain: bool = True):
+        """
+        任务结束后归还会话
+
+        Args:
+            user_id: AdsPower用户ID
+            detach: 断开CDP连接但保留配置文件运行（调用方的事件循环即将关闭时使用）
+            healthy: 为False时立即停止配置文件，下次重新启动
+            retain: 为False时断开连接并从注册表移除，不停止配置文件
+                    （借用其他工作进程的配置文件时使用，由其所属进程继续管理）
+        """
+        with self._lock:
+            session = self._sessions.get(user_id)
+        if session is None:
+            return
+
+        if not retain:
+            with self._lock:
+                self._sessions.pop(user_id, None)
+            await self._detach(session)
+            return
+
+        if not healthy or self.idle_ttl <= 0:
+            await self.close(user_id)
+            return
+
+        if detach:
+            await self._detach(session)
+        session.last_used = time.monotonic()
+        session.in_use = False
+
+    async def close(self, user_id: str):
+        """断开连接并停止配置文件"""
+        with self._lock:
+            session = self._sessions.pop(user_id, None)
+        if session is None:
+            return
+        await self._detach(session)
+        session.launcher.stop_browser(user_id)
+        logger.info(f"浏览器会话已关闭，用户ID: {user_id}")
+
+    async def close_all(self):
+        """关闭所有会话（进程退出前调用）"""
+        for user_id in list(self._sessions.keys()):
+            await self.close(user_id)
+        self._stop_event.set()
+        # 停止当前事件循环中的共享Playwright驱动（包括未经注册表创建的解析器留下的连接）
+        await driver_manager.close_all()
+
+    def reap_idle(self) -> int:
+        """停止空闲超过TTL的配置文件，返回停止的数量"""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                session for session in self._sessions.values()
+                if not session.in_use and now - session.last_used >= self.idle_ttl
+            ]
+
+        # 在锁外查询是否被其他任务借用，被借用的会话重新计时
+        busy = {session.user_id for session in candidates if self._is_busy(session.user_id)}
+        with self._lock:
+            expired = []
+            for session in candidates:
+                if self._sessions.get(session.user_id) is not session or session.in_use:
+                    continue
+                if session.user_id in busy:
+                    session.last_used = now
+                    continue
+                del self._sessions[session.user_id]
+                expired.append(session)
+
+        for session in expired:
+            # parser属于其他事件循环，不在这里关闭；停止配置文件后CDP连接随之断开
+            session.parser = None
+            session.launcher.stop_browser(session.user_id)
+            logger.info(f"浏览器会话空闲超过 {self.idle_ttl:.0f} 秒，已停止，用户ID: {session.user_id}")
+        return len(expired)
+
+    def _is_busy(self, user_id: str) -> bool:
+        if self.busy_check is None:
+            return False
+        try:
+            return bool(self.busy_check(user_id))
+        except Exception as e:
+            # 无法确认时按占用处理，宁可晚停止也不中断其他任务
+            logger.warning(f"查询配置文件占用状态失败，暂不停止，用户ID: {user_id}: {e}")
+            return True
+
+    def _ensure_reaper(self):
+        if self.idle_ttl <= 0 or (self._reaper_thread and self._reaper_thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._reaper_thread = threading.Thread(target=self._reap_loop, daemon=True)
+        self._reaper_thread.start()
+
+    def _reap_loop(self):
+        interval = max(self.idle_ttl / 2, 1.0)
+        while not self._stop_event.wait(interval):
+            try:
+                self.reap_idle()
+            except Exception as e:
+                logger.warning(f"清理空闲浏览器会话失败: {e}")
+
+    async def _probe_parser(self, parser: Optional[TwitterParser]) -> bool:
+        """轻量探测：连接仍在、页面未关闭且能在超时内执行脚本"""
+        if parser is None or parser.browser is None or parser.page is None:
+            return False
+        if not parser.browser.is_connected() or parser.page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(parser.page.evaluate('1'), timeout=self.probe_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def _detach(self, session: BrowserSession):
+        """断开CDP连接（仅当parser属于当前事件循环时才能安全关闭）"""
+        parser, session.parser = session.parser, None
+        loop, session.loop = session.loop, None
+        if parser is not None and loop is asyncio.get_running_loop():
+            await parser.close()
+
+    @staticmethod
+    async def _connect(ws_endpoint: Optional[str]) -> TwitterParser:
+        if not ws_endpoint:
+            raise Exception("浏览器信息中缺少调试地址")
+        parser = TwitterParser(ws_endpoint)
+        await parser.connect_browser()
+        return parser
+
+    def _attach_or_start(self, user_id: str) -> BrowserSession:
+        """配置文件仍在运行（例如上一个进程留下的）时直接接管，否则启动"""
+        launcher = self.launcher_factory()
+        browser_info = launcher.get_active_browser_info(user_id)
+        if browser_info:
+            logger.info(f"♻️ 配置文件仍在运行，直接连接，用户ID: {user_id}")
+        else:
+            browser_info = self._start_profile(launcher, user_id)
+        return BrowserSession(user_id=user_id, launcher=launcher, browser_info=browser_info, in_use=True)
+
+    def _start_profile(self, launcher: AdsPowerLauncher, user_id: str) -> Dict[str, Any]:
+        """启动配置文件；完整健康检查按间隔执行，失败时尝试自动修复后重试"""
+        now = time.monotonic()
+        last_check = self._last_health_check.get(user_id)
+        full_check = last_check is None or now - last_check >= self.health_check_interval
+
+        try:
+            logger.info(f"启动AdsPower浏览器，用户ID: {user_id}，完整健康检查: {full_check}")
+            browser_info = launcher.start_browser(user_id, skip_health_check=not full_check)
+            if not browser_info:
+                raise Exception("浏览器启动失败：未返回浏览器信息")
+        except Exception as e:
+            logger.error(f"AdsPower浏览器启动失败: {str(e)}")
+            try:
+                logger.error(f"系统健康报告: {launcher.get_health_report()}")
+                logger.info("尝试自动修复系统问题...")
+                if not launcher.auto_optimize_system():
+                    raise Exception(f"AdsPower浏览器启动失败且自动修复失败: {str(e)}")
+                browser_info = launcher.start_browser(user_id, skip_health_check=True)
+                if not browser_info:
+                    raise Exception("浏览器启动失败（修复后仍然失败）")
+                logger.info("浏览器启动成功（修复后）")
+            except Exception as repair_error:
+                raise Exception(f"AdsPower浏览器启动失败: {str(e)}。修复尝试也失败: {str(repair_error)}")
+
+        if full_check:
+            self._last_health_check[user_id] = now
+        return browser_info
@@ -15,6 +15,17 @@ import random
 import os
 import threading
 import traceback
+import hashlib
+import re
+from collections import deque
+
+from stage_metrics import stage_metrics
+from sync_trace import SyncTracer
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 try:
     import gspread
@@ -23,6 +34,9 @@ except ImportError:
     gspread = None
     Credentials = None
 
+# 调试输出默认关闭，设置环境变量CLOUD_SYNC_DEBUG=1或配置项debug开启
+trace = SyncTracer('cloud_sync')
+
 class FeishuRateLimiter:
     """
     飞书API频率限制控制器
@@ -40,312 +54,629 @@ class FeishuRateLimiter:
     
     def _clean_old_calls(self, call_times: list, current_time: float):
         """清理1秒前的调用记录"""
-        print(f"\n🧹 [RateLimit] 清理旧调用记录:")
-        print(f"   - 方法: _clean_old_calls")
-        print(f"   - call_times 参数类型: {type(call_times)}")
-        print(f"   - call_times 参数长度: {len(call_times)}")
-        print(f"   - call_times 参数内容: {call_times}")
-        print(f"   - current_time 参数: {current_time} (类型: {type(current_time)})")
-        print(f"   - current_time 格式化: {datetime.fromtimestamp(current_time).strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        print(f"   - 清理开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
-        removed_count = 0
-        original_length = len(call_times)
-        
         while call_times and current_time - call_times[0] > 1.0:
-            removed_time = call_times.pop(0)
-            removed_count += 1
-            print(f"   - 移除第 {removed_count} 个旧记录: {removed_time} ({datetime.fromtimestamp(removed_time).strftime('%Y-%m-%d %H:%M:%S.%f')})")
-            print(f"     * 时间差: {current_time - removed_time:.6f} 秒")
-            print(f"     * 是否超过1秒: {current_time - removed_time > 1.0}")
-            print(f"     * 剩余记录数: {len(call_times)}")
-        
-        print(f"   - 清理结果:")
-        print(f"     * 原始记录数: {original_length}")
-        print(f"     * 移除记录数: {removed_count}")
-        print(f"     * 剩余记录数: {len(call_times)}")
-        print(f"     * 剩余记录内容: {call_times}")
-        print(f"   - 清理完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            call_times.pop(0)
     
     def can_make_app_call(self) -> bool:
         """检查是否可以进行应用级API调用"""
-        print(f"\n🔍 [RateLimit] 检查应用级API调用权限:")
-        print(f"   - 方法: can_make_app_call")
-        print(f"   - 检查开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
-        current_time = time.time()
-        print(f"   - 当前时间戳: {current_time} (类型: {type(current_time)})")
-        print(f"   - 当前时间格式化: {datetime.fromtimestamp(current_time).strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        print(f"   - 应用级调用记录 (清理前): {self.app_call_times}")
-        print(f"   - 应用级调用记录长度 (清理前): {len(self.app_call_times)}")
-        print(f"   - 最大应用级调用数/秒: {self.max_app_calls_per_second}")
-        
-        print(f"\n🧹 [RateLimit] 调用清理方法...")
-        self._clean_old_calls(self.app_call_times, current_time)
-        
-        print(f"\n📊 [RateLimit] 清理后状态检查:")
-        print(f"   - 应用级调用记录 (清理后): {self.app_call_times}")
-        print(f"   - 应用级调用记录长度 (清理后): {len(self.app_call_times)}")
-        print(f"   - 当前调用数: {len(self.app_call_times)}")
-        print(f"   - 最大允许调用数: {self.max_app_calls_per_second}")
-        print(f"   - 比较结果: {len(self.app_call_times)} < {self.max_app_calls_per_second} = {len(self.app_call_times) < self.max_app_calls_per_second}")
-        
+        self._clean_old_calls(self.app_call_times, time.time())
         result = len(self.app_call_times) < self.max_app_calls_per_second
-        print(f"   - 最终结果: {result} (类型: {type(result)})")
-        print(f"   - 检查完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
+        trace.debug("🔍 [RateLimit] 应用级调用检查: 1秒内 %s/%s 次，允许: %s",
+                    len(self.app_call_times), self.max_app_calls_per_second, result)
         return result
     
     def can_make_doc_call(self, doc_id: str) -> bool:
         """检查是否可以进行文档级API调用"""
-        print(f"\n🔍 [RateLimit] 检查文档级API调用权限:")
-        print(f"   - 方法: can_make_doc_call")
-        print(f"   - doc_id 参数: '{doc_id}' (类型: {type(doc_id)}, 长度: {len(doc_id)})")
-        print(f"   - 检查开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
-        current_time = time.time()
-        print(f"   - 当前时间戳: {current_time} (类型: {type(current_time)})")
-        print(f"   - 当前时间格式化: {datetime.fromtimestamp(current_time).strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        print(f"   - 文档调用记录字典: {self.doc_call_times}")
-        print(f"   - 文档调用记录字典长度: {len(self.doc_call_times)}")
-        print(f"   - 文档调用记录字典键: {list(self.doc_call_times.keys())}")
-        print(f"   - doc_id 是否在记录中: {doc_id in self.doc_call_times}")
-        
-        if doc_id not in self.doc_call_times:
-            print(f"   - 🆕 文档ID不存在，创建新记录")
-            self.doc_call_times[doc_id] = []
-            print(f"   - 创建后文档调用记录: {self.doc_call_times[doc_id]}")
-        else:
-            print(f"   - ✅ 文档ID已存在")
-        
-        print(f"   - 当前文档调用记录 (清理前): {self.doc_call_times[doc_id]}")
-        print(f"   - 当前文档调用记录长度 (清理前): {len(self.doc_call_times[doc_id])}")
-        print(f"   - 最大文档级调用数/秒: {self.max_doc_calls_per_second}")
-        
-        print(f"\n🧹 [RateLimit] 调用清理方法...")
-        self._clean_old_calls(self.doc_call_times[doc_id], current_time)
-        
-        print(f"\n📊 [RateLimit] 清理后状态检查:")
-        print(f"   - 当前文档调用记录 (清理后): {self.doc_call_times[doc_id]}")
-        print(f"   - 当前文档调用记录长度 (清理后): {len(self.doc_call_times[doc_id])}")
-        print(f"   - 当前调用数: {len(self.doc_call_times[doc_id])}")
-        print(f"   - 最大允许调用数: {self.max_doc_calls_per_second}")
-        print(f"   - 比较结果: {len(self.doc_call_times[doc_id])} < {self.max_doc_calls_per_second} = {len(self.doc_call_times[doc_id]) < self.max_doc_calls_per_second}")
-        
-        result = len(self.doc_call_times[doc_id]) < self.max_doc_calls_per_second
-        print(f"   - 最终结果: {result} (类型: {type(result)})")
-        print(f"   - 检查完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
+        doc_calls = self.doc_call_times.setdefault(doc_id, [])
+        self._clean_old_calls(doc_calls, time.time())
+        result = len(doc_calls) < self.max_doc_calls_per_second
+        trace.debug("🔍 [RateLimit] 文档级调用检查 %s: 1秒内 %s/%s 次，允许: %s",
+                    doc_id, len(doc_calls), self.max_doc_calls_per_second, result)
         return result
     
     def record_app_call(self):
         """记录应用级API调用"""
-        print(f"\n📝 [RateLimit] 记录应用级API调用:")
-        print(f"   - 方法: record_app_call")
-        print(f"   - 记录开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
-        current_time = time.time()
-        print(f"   - 当前时间戳: {current_time} (类型: {type(current_time)})")
-        print(f"   - 当前时间格式化: {datetime.fromtimestamp(current_time).strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        print(f"   - 应用级调用记录 (添加前): {self.app_call_times}")
-        print(f"   - 应用级调用记录长度 (添加前): {len(self.app_call_times)}")
-        
-        self.app_call_times.append(current_time)
-        
-        print(f"   - 应用级调用记录 (添加后): {self.app_call_times}")
-        print(f"   - 应用级调用记录长度 (添加后): {len(self.app_call_times)}")
-        print(f"   - 新增记录: {current_time} ({datetime.fromtimestamp(current_time).strftime('%Y-%m-%d %H:%M:%S.%f')})")
-        print(f"   - 记录完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+        self.app_call_times.append(time.time())
     
     def record_doc_call(self, doc_id: str):
         """记录文档级API调用"""
-        print(f"\n📝 [RateLimit] 记录文档级API调用:")
-        print(f"   - 方法: record_doc_call")
-        print(f"   - doc_id 参数: '{doc_id}' (类型: {type(doc_id)}, 长度: {len(doc_id)})")
-        print(f"   - 记录开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
-        current_time = time.time()
-        print(f"   - 当前时间戳: {current_time} (类型: {type(current_time)})")
-        print(f"   - 当前时间格式化: {datetime.fromtimestamp(current_time).strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        print(f"   - 文档调用记录字典: {self.doc_call_times}")
-        print(f"   - 文档调用记录字典长度: {len(self.doc_call_times)}")
-        print(f"   - doc_id 是否在记录中: {doc_id in self.doc_call_times}")
-        
-        if doc_id not in self.doc_call_times:
-            print(f"   - 🆕 文档ID不存在，创建新记录")
-            self.doc_call_times[doc_id] = []
-            print(f"   - 创建后文档调用记录: {self.doc_call_times[doc_id]}")
-        else:
-            print(f"   - ✅ 文档ID已存在")
-        
-        print(f"   - 当前文档调用记录 (添加前): {self.doc_call_times[doc_id]}")
-        print(f"   - 当前文档调用记录长度 (添加前): {len(self.doc_call_times[doc_id])}")
-        
-        self.doc_call_times[doc_id].append(current_time)
-        
-        print(f"   - 当前文档调用记录 (添加后): {self.doc_call_times[doc_id]}")
-        print(f"   - 当前文档调用记录长度 (添加后): {len(self.doc_call_times[doc_id])}")
-        print(f"   - 新增记录: {current_time} ({datetime.fromtimestamp(current_time).strftime('%Y-%m-%d %H:%M:%S.%f')})")
-        print(f"   - 记录完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+        self.doc_call_times.setdefault(doc_id, []).append(time.time())
     
     def wait_for_app_call(self):
         """等待直到可以进行应用级API调用"""
-        print(f"\n⏳ [RateLimit] 等待应用级API调用权限:")
-        print(f"   - 方法: wait_for_app_call")
-        print(f"   - 等待开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
         wait_count = 0
         total_wait_time = 0.0
         
         while not self.can_make_app_call():
             wait_count += 1
-            current_time = time.time()
-            
-            print(f"\n   等待循环 {wait_count}:")
-            print(f"     - 当前时间: {datetime.fromtimestamp(current_time).strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            print(f"     - 应用级调用记录: {self.app_call_times}")
-            print(f"     - 应用级调用记录长度: {len(self.app_call_times)}")
-            
             if self.app_call_times:
-                oldest_call = self.app_call_times[0]
-                time_since_oldest = current_time - oldest_call
-                sleep_time = 1.0 - time_since_oldest
-                
-                print(f"     - 最早调用时间: {oldest_call} ({datetime.fromtimestamp(oldest_call).strftime('%Y-%m-%d %H:%M:%S.%f')})")
-                print(f"     - 距离最早调用时间: {time_since_oldest:.6f} 秒")
-                print(f"     - 计算等待时间: 1.0 - {time_since_oldest:.6f} = {sleep_time:.6f} 秒")
+                sleep_time = 1.0 - (time.time() - self.app_call_times[0])
             else:
                 sleep_time = 0.1
-                print(f"     - 无调用记录，使用默认等待时间: {sleep_time} 秒")
             
             if sleep_time > 0:
-                print(f"     - 实际等待时间: {sleep_time:.6f} 秒")
-                print(f"     - 等待开始: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-                print(f"⏳ [RateLimit] 应用级频率限制，等待 {sleep_time:.2f} 秒")
                 self.logger.debug(f"应用级频率限制，等待 {sleep_time:.2f} 秒")
-                
                 time.sleep(sleep_time)
                 total_wait_time += sleep_time
-                
-                print(f"     - 等待结束: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
             else:
-                print(f"     - 无需等待 (sleep_time <= 0)")
                 time.sleep(0.01)  # 短暂休眠避免忙等待
         
-        print(f"\n✅ [RateLimit] 应用级API调用权限获得:")
-        print(f"   - 总等待次数: {wait_count}")
-        print(f"   - 总等待时间: {total_wait_time:.6f} 秒")
-        print(f"   - 等待完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+        if wait_count:
+            trace.debug("⏳ [RateLimit] 应用级频率限制: 等待 %s 次，共 %.3f 秒", wait_count, total_wait_time)
     
     def wait_for_doc_call(self, doc_id: str):
         """等待直到可以进行文档级API调用"""
-        print(f"\n⏳ [RateLimit] 等待文档级API调用权限:")
-        print(f"   - 方法: wait_for_doc_call")
-        print(f"   - doc_id 参数: '{doc_id}' (类型: {type(doc_id)}, 长度: {len(doc_id)})")
-        print(f"   - 等待开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
         wait_count = 0
         total_wait_time = 0.0
         
         while not self.can_make_doc_call(doc_id):
             wait_count += 1
-            current_time = time.time()
-            
-            print(f"\n   等待循环 {wait_count}:")
-            print(f"     - 当前时间: {datetime.fromtimestamp(current_time).strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            print(f"     - 文档调用记录字典: {self.doc_call_times}")
-            print(f"     - doc_id 是否在记录中: {doc_id in self.doc_call_times}")
-            
-            if doc_id in self.doc_call_times and self.doc_call_times[doc_id]:
-                doc_calls = self.doc_call_times[doc_id]
-                oldest_call = doc_calls[0]
-                time_since_oldest = current_time - oldest_call
-                sleep_time = 1.0 - time_since_oldest
-                
-                print(f"     - 文档调用记录: {doc_calls}")
-                print(f"     - 文档调用记录长度: {len(doc_calls)}")
-                print(f"     - 最早调用时间: {oldest_call} ({datetime.fromtimestamp(oldest_call).strftime('%Y-%m-%d %H:%M:%S.%f')})")
-                print(f"     - 距离最早调用时间: {time_since_oldest:.6f} 秒")
-                print(f"     - 计算等待时间: 1.0 - {time_since_oldest:.6f} = {sleep_time:.6f} 秒")
-                
+            doc_calls = self.doc_call_times.get(doc_id)
+            if doc_calls:
+                sleep_time = 1.0 - (time.time() - doc_calls[0])
                 if sleep_time > 0:
-                    print(f"     - 实际等待时间: {sleep_time:.6f} 秒")
-                    print(f"     - 等待开始: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-                    print(f"⏳ [RateLimit] 文档级频率限制，等待 {sleep_time:.2f} 秒")
                     self.logger.debug(f"文档级频率限制，等待 {sleep_time:.2f} 秒")
-                    
                     time.sleep(sleep_time)
                     total_wait_time += sleep_time
-                    
-                    print(f"     - 等待结束: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
                 else:
-                    print(f"     - 无需等待 (sleep_time <= 0)")
                     time.sleep(0.01)  # 短暂休眠避免忙等待
             else:
-                print(f"     - 无文档调用记录，使用默认等待时间: 0.1 秒")
                 time.sleep(0.1)
                 total_wait_time += 0.1
         
-        print(f"\n✅ [RateLimit] 文档级API调用权限获得:")
-        print(f"   - 总等待次数: {wait_count}")
-        print(f"   - 总等待时间: {total_wait_time:.6f} 秒")
-        print(f"   - 等待完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+        if wait_count:
+            trace.debug("⏳ [RateLimit] 文档级频率限制 %s: 等待 %s 次，共 %.3f 秒", doc_id, wait_count, total_wait_time)
     
     def exponential_backoff(self, attempt: int, base_delay: float = None) -> float:
         """指数退避算法"""
-        print(f"\n📈 [RateLimit] 计算指数退避延迟:")
-        print(f"   - 方法: exponential_backoff")
-        print(f"   - attempt 参数: {attempt} (类型: {type(attempt)})")
-        print(f"   - base_delay 参数: {base_delay} (类型: {type(base_delay)})")
-        print(f"   - 计算开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
         if base_delay is None:
             base_delay = self.base_delay
-            print(f"   - 使用默认基础延迟: {base_delay} 秒")
-        else:
-            print(f"   - 使用传入基础延迟: {base_delay} 秒")
-        
-        print(f"   - 实例配置:")
-        print(f"     * self.base_delay: {self.base_delay} 秒")
-        print(f"     * self.max_delay: {self.max_delay} 秒")
-        print(f"     * 最终使用的 base_delay: {base_delay} 秒")
         
         # 指数退避：delay = base_delay * (2 ^ attempt) + random_jitter
-        print(f"\n🧮 [RateLimit] 指数退避计算过程:")
-        power_result = 2 ** attempt
-        print(f"   - 指数计算: 2 ^ {attempt} = {power_result}")
+        delay = base_delay * (2 ** attempt)
+        # 添加随机抖动，避免雷群效应
+        jitter = random.uniform(0, delay * 0.1)
+        total_delay = min(delay + jitter, self.max_delay)
         
-        delay = base_delay * power_result
-        print(f"   - 基础延迟计算: {base_delay} * {power_result} = {delay} 秒")
+        trace.debug("📈 [RateLimit] 指数退避: 尝试 %s，基础 %s 秒，抖动 %.3f 秒，最终 %.2f 秒（上限 %s 秒）",
+                    attempt + 1, base_delay, jitter, total_delay, self.max_delay)
+        self.logger.info(f"指数退避延迟: {total_delay:.2f} 秒 (尝试次数: {attempt + 1})")
+        return total_delay
+
+class AsyncFeishuRateLimiter:
+    """
+    飞书API异步频率限制控制器
+    与FeishuRateLimiter相同的每秒3次滑动窗口限制，但通过asyncio.sleep等待，不阻塞事件循环
+    """
+    
+    def __init__(self, max_calls_per_second: int = 3, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_calls_per_second = max_calls_per_second
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.app_call_times = deque()  # 应用级调用时间记录
+        self.doc_call_times = {}  # 文档级调用时间记录
+        self.total_wait_time = 0.0  # 累计等待时间（秒）
+        self._lock = None  # 延迟到事件循环内创建
+        self.logger = logging.getLogger(__name__)
+    
+    async def _acquire(self, call_times: deque):
+        """在滑动窗口内占用一个调用名额，名额不足时异步等待"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        
+        while True:
+            async with self._lock:
+                current_time = time.monotonic()
+                while call_times and current_time - call_times[0] > 1.0:
+                    call_times.popleft()
+                
+                if len(call_times) < self.max_calls_per_second:
+                    call_times.append(current_time)
+                    return
+                
+                sleep_time = max(1.0 - (current_time - call_times[0]), 0.01)
+            
+            self.logger.debug(f"飞书API频率限制，异步等待 {sleep_time:.2f} 秒")
+            self.total_wait_time += sleep_time
+            await asyncio.sleep(sleep_time)
+    
+    async def wait_for_app_call(self):
+        """等待并占用应用级API调用名额"""
+        await self._acquire(self.app_call_times)
+    
+    async def wait_for_doc_call(self, doc_id: str):
+        """等待并占用文档级API调用名额"""
+        if doc_id not in self.doc_call_times:
+            self.doc_call_times[doc_id] = deque()
+        await self._acquire(self.doc_call_times[doc_id])
+    
+    def exponential_backoff(self, attempt: int, base_delay: float = None) -> float:
+        """指数退避算法（带随机抖动）"""
+        if base_delay is None:
+            base_delay = self.base_delay
+        
+        delay = base_delay * (2 ** attempt)
+        delay += random.uniform(0, delay * 0.1)
+        total_delay = min(delay, self.max_delay)
         
-        # 添加随机抖动，避免雷群效应
-        jitter_range = delay * 0.1
-        print(f"   - 抖动范围计算: {delay} * 0.1 = {jitter_range}")
-        
-        jitter = random.uniform(0, jitter_range)
-        print(f"   - 随机抖动值: random.uniform(0, {jitter_range}) = {jitter} 秒")
-        
-        delay_with_jitter = delay + jitter
-        print(f"   - 加抖动延迟: {delay} + {jitter} = {delay_with_jitter} 秒")
-        
-        total_delay = min(delay_with_jitter, self.max_delay)
-        print(f"   - 最终延迟: min({delay_with_jitter}, {self.max_delay}) = {total_delay} 秒")
-        
-        print(f"\n📊 [RateLimit] 指数退避结果:")
-        print(f"   - 尝试次数: {attempt + 1}")
-        print(f"   - 基础延迟: {base_delay} 秒")
-        print(f"   - 指数倍数: {power_result}")
-        print(f"   - 基础计算延迟: {delay} 秒")
-        print(f"   - 随机抖动: {jitter} 秒")
-        print(f"   - 最大允许延迟: {self.max_delay} 秒")
-        print(f"   - 最终延迟: {total_delay} 秒")
-        print(f"   - 延迟类型: {type(total_delay)}")
-        print(f"   - 计算完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        
-        print(f"⏳ [RateLimit] 指数退避延迟: {total_delay:.2f} 秒 (尝试次数: {attempt + 1})")
         self.logger.info(f"指数退避延迟: {total_delay:.2f} 秒 (尝试次数: {attempt + 1})")
         return total_delay
 
+
+class AsyncFeishuClient:
+    """
+    飞书开放平台异步客户端
+    基于httpx.AsyncClient复用连接、缓存tenant_access_token，频率限制与重试等待全部异步执行
+    """
+    
+    RATE_LIMIT_CODE = 99991400
+    PERMISSION_ERROR_CODES = (99991663, 99991664, 99991665)
+    BATCH_CREATE_LIMIT = 500  # 飞书batch_create单次最多500条记录
+    
+    def __init__(self, app_id: str, app_secret: str,
+                 base_url: str = 'https://open.feishu.cn/open-apis',
+                 rate_limiter: AsyncFeishuRateLimiter = None,
+                 timeout: float = 30.0):
+        if httpx is None:
+            raise ImportError("httpx依赖未安装，请运行: pip install httpx")
+        
+        self.app_id = app_id
+        self.app_secret = app_secret
+        trace.register_secret(app_secret)
+        self.base_url = base_url.rstrip('/')
+        self.rate_limiter = rate_limiter or AsyncFeishuRateLimiter()
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        
+        self._client = None
+        self._access_token = None
+        self._token_expires_at = 0.0
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+        return self._client
+    
+    async def close(self):
+        """关闭底层HTTP连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    @staticmethod
+    def _parse_json(response) -> Dict[str, Any]:
+        try:
+            return response.json()
+        except ValueError:
+            return {'code': -1, 'msg': f"HTTP {response.status_code}: {response.text[:200]}"}
+    
+    async def get_access_token(self, max_retries: int = 3) -> Optional[str]:
+        """
+        获取飞书访问令牌（缓存至过期前5分钟）
+        
+        Args:
+            max_retries: 最大重试次数
+            
+        Returns:
+            访问令牌或None
+        """
+        if self._access_token and time.time() < self._token_expires_at:
+            return self._access_token
+        
+        if not self.app_id or not self.app_secret:
+            self.logger.error("飞书配置未设置")
+            return None
+        
+        payload = {'app_id': self.app_id, 'app_secret': self.app_secret}
+        
+        for attempt in range(max_retries):
+            await self.rate_limiter.wait_for_app_call()
+            try:
+                response = await self._get_client().post(
+                    '/auth/v3/tenant_access_token/internal', json=payload
+                )
+            except httpx.HTTPError as e:
+                self.logger.error(f"获取飞书令牌网络异常: {e}")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(self.rate_limiter.exponential_backoff(attempt, 3.0))
+                    continue
+                return None
+            
+            result = self._parse_json(response)
+            
+            if response.status_code == 429 or result.get('code') == self.RATE_LIMIT_CODE:
+                self.logger.warning("⚠️ 应用频率限制触发，使用指数退避")
+                await asyncio.sleep(self.rate_limiter.exponential_backoff(attempt))
+                continue
+            
+            if result.get('code') == 0 and result.get('tenant_access_token'):
+                self._access_token = result['tenant_access_token']
+                trace.register_secret(self._access_token)
+                expire = int(result.get('expire', 7200))
+                self._token_expires_at = time.time() + max(expire - 300, 60)
+                return self._access_token
+            
+            self.logger.error(f"获取飞书令牌失败: {result.get('msg')}")
+            if result.get('code') in self.PERMISSION_ERROR_CODES:
+                return None
+            if attempt < max_retries - 1:
+                await asyncio.sleep(self.rate_limiter.exponential_backoff(attempt, 2.0))
+        
+        self.logger.error("❌ 获取飞书访问令牌失败，已用尽所有重试次数")
+        return None
+    
+    async def request(self, method: str, path: str, doc_id: str,
+                      max_retries: int = 3, **kwargs) -> Dict[str, Any]:
+        """
+        发送文档级API请求（带频率限制和退避重试）
+        
+        Args:
+            method: HTTP方法
+            path: 相对于base_url的接口路径
+            doc_id: 文档token，用于文档级频率限制
+            max_retries: 最大重试次数
+            **kwargs: 透传给httpx的参数（json、params等）
+            
+        Returns:
+            飞书接口返回的JSON（code为0表示成功）
+        """
+        result = {'code': -1, 'msg': '请求未发送'}
+        
+        for attempt in range(max_retries):
+            access_token = await self.get_access_token()
+            if not access_token:
+                return {'code': -1, 'msg': '无法获取飞书访问令牌'}
+            
+            await self.rate_limiter.wait_for_doc_call(doc_id)
+            headers = {'Authorization': f'Bearer {access_token}'}
+            
+            try:
+                response = await self._get_client().request(method, path, headers=headers, **kwargs)
+            except httpx.HTTPError as e:
+                self.logger.error(f"飞书API网络异常 (尝试 {attempt + 1}/{max_retries}): {e}")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(min(5 * (attempt + 1), 30))
+                    continue
+                raise
+            
+            result = self._parse_json(response)
+            
+            if response.status_code == 429 or result.get('code') == self.RATE_LIMIT_CODE:
+                self.logger.warning(f"⚠️ 飞书频率限制触发 (HTTP {response.status_code})")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(self.rate_limiter.exponential_backoff(attempt, 3.0))
+                    continue
+            elif response.status_code == 401:
+                # 令牌失效，清除缓存后重试
+                self._access_token = None
+                if attempt < max_retries - 1:
+                    continue
+            
+            return result
+        
+        return result
+    
+    async def list_fields(self, app_token: str, table_id: str) -> List[Dict[str, Any]]:
+        """获取多维表格字段列表"""
+        result = await self.request(
+            'GET', f'/bitable/v1/apps/{app_token}/tables/{table_id}/fields',
+            doc_id=app_token, params={'page_size': 100}
+        )
+        if result.get('code') != 0:
+            self.logger.error(f"❌ 获取字段信息失败: {result.get('msg')}")
+            return []
+        return result.get('data', {}).get('items', [])
+    
+    async def batch_create_records(self, app_token: str, table_id: str,
+                                   records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量创建多维表格记录，超过单次上限时自动分批
+        
+        Returns:
+            飞书返回的已创建记录（包含record_id）
+        """
+        created_records = []
+        path = f'/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_create'
+        
+        for start in range(0, len(records), self.BATCH_CREATE_LIMIT):
+            chunk = records[start:start + self.BATCH_CREATE_LIMIT]
+            result = await self.request('POST', path, doc_id=app_token,
+                                        json={'records': chunk}, timeout=60.0)
+            if result.get('code') != 0:
+                raise RuntimeError(f"飞书批量创建记录失败: {result.get('msg')}")
+            created_records.extend(result.get('data', {}).get('records', []))
+        
+        return created_records
+    
+    async def get_first_sheet_id(self, spreadsheet_token: str) -> Optional[str]:
+        """获取电子表格第一个工作表的ID"""
+        result = await self.request(
+            'GET', f'/sheets/v3/spreadsheets/{spreadsheet_token}/sheets/query',
+            doc_id=spreadsheet_token
+        )
+        sheets = result.get('data', {}).get('sheets') if result.get('code') == 0 else None
+        if not sheets:
+            self.logger.error(f"❌ 无法获取飞书工作表信息: {result.get('msg')}")
+            return None
+        return sheets[0]['sheet_id']
+    
+    async def write_sheet_values(self, spreadsheet_token: str, sheet_id: str,
+                                 values: List[List[Any]]) -> bool:
+        """清空工作表并写入values"""
+        await self.request(
+            'POST', f'/sheets/v2/spreadsheets/{spreadsheet_token}/values_batch_clear',
+            doc_id=spreadsheet_token, json={'ranges': [f'{sheet_id}!A:Z']}
+        )
+        result = await self.request(
+            'POST', f'/sheets/v2/spreadsheets/{spreadsheet_token}/values_batch_update',
+            doc_id=spreadsheet_token,
+            json={'value_ranges': [{'range': f'{sheet_id}!A1:J{len(values)}', 'values': values}]}
+        )
+        if result.get('code') != 0:
+            self.logger.error(f"❌ 飞书表格同步失败: {result.get('msg')}")
+            return False
+        return True
+
+
+class GoogleSheetsSyncEngine:
+    """
+    Google Sheets增量同步引擎
+    缓存表格和工作表句柄，新行通过values_append分块追加，已有行按推文链接定位后
+    只用values_batch_update改写变化的单元格区间，避免整表清空重写触发每分钟配额
+    """
+    
+    HEADERS = [
+        '序号', '用户名', '推文内容', '发布时间', '点赞数',
+        '评论数', '转发数', '链接', '标签', '筛选状态'
+    ]
+    LINK_COLUMN = 7          # '链接'列的下标
+    LEGACY_TIMESTAMP_PREFIX = '最后同步时间'  # 旧版全量同步在表尾写入的时间戳行
+    APPEND_CHUNK_ROWS = 500  # 单次values_append的最大行数
+    UPDATE_CHUNK_RANGES = 500  # 单次values_batch_update的最大区间数
+    
+    def __init__(self, client, spreadsheet_id: str, worksheet_name: str = None,
+                 max_retries: int = 5, base_delay: float = 2.0, max_delay: float = 64.0):
+        """
+        Args:
+            client: 已授权的gspread客户端（或实现open_by_key的同接口对象）
+            spreadsheet_id: Google表格ID
+            worksheet_name: 工作表名称，为空时使用第一个工作表
+        """
+        self.client = client
+        self.spreadsheet_id = spreadsheet_id
+        self.worksheet_name = worksheet_name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.logger = logging.getLogger('CloudSync')
+        
+        self._spreadsheet = None
+        self._worksheet = None
+        self._row_index = None  # 推文链接 -> (行号, 该行单元格值)
+        self._next_row = 1
+    
+    @property
+    def spreadsheet(self):
+        if self._spreadsheet is None:
+            self._spreadsheet = self._call_with_backoff(self.client.open_by_key, self.spreadsheet_id)
+        return self._spreadsheet
+    
+    @property
+    def worksheet(self):
+        if self._worksheet is None:
+            if self.worksheet_name:
+                try:
+                    self._worksheet = self._call_with_backoff(self.spreadsheet.worksheet, self.worksheet_name)
+                except Exception as e:
+                    if gspread is not None and not isinstance(e, gspread.exceptions.WorksheetNotFound):
+                        raise
+                    self.logger.info(f"工作表 '{self.worksheet_name}' 不存在，创建新工作表")
+                    self._worksheet = self._call_with_backoff(
+                        self.spreadsheet.add_worksheet,
+                        title=self.worksheet_name, rows=1000, cols=len(self.HEADERS)
+                    )
+            else:
+                self._worksheet = self.spreadsheet.sheet1
+        return self._worksheet
+    
+    def reset(self):
+        """丢弃缓存的句柄和行索引（表格被外部修改后调用）"""
+        self._spreadsheet = None
+        self._worksheet = None
+        self._row_index = None
+        self._next_row = 1
+    
+    @staticmethod
+    def _is_quota_error(error: Exception) -> bool:
+        response = getattr(error, 'response', None)
+        return getattr(response, 'status_code', None) in (429, 500, 503)
+    
+    def _call_with_backoff(self, func, *args, **kwargs):
+        """调用Sheets API，遇到配额限制(429)或服务端繁忙时指数退避重试"""
+        for attempt in range(self.max_retries):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not self._is_quota_error(e) or attempt == self.max_retries - 1:
+                    raise
+                delay = min(self.base_delay * (2 ** attempt), self.max_delay) + random.uniform(0, 1)
+                self.logger.warning(f"⚠️ Google Sheets配额受限，{delay:.1f}秒后重试 (尝试 {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+    
+    @staticmethod
+    def column_letter(column: int) -> str:
+        """把从1开始的列号转换为A1记法的列字母"""
+        letters = ''
+        while column > 0:
+            column, remainder = divmod(column - 1, 26)
+            letters = chr(ord('A') + remainder) + letters
+        return letters
+    
+    def _a1_range(self, row: int, first_column: int, last_column: int) -> str:
+        title = self.worksheet.title.replace("'", "''")
+        return f"'{title}'!{self.column_letter(first_column)}{row}:{self.column_letter(last_column)}{row}"
+    
+    @classmethod
+    def build_row(cls, tweet: Dict[str, Any], serial: Any) -> List[str]:
+        """把推文转换为工作表的一行（统一为字符串，便于与表格中读取的值比对）"""
+        tags = tweet.get('tags') or []
+        row = [
+            serial,
+            tweet.get('username', ''),
+            tweet.get('content', ''),
+            tweet.get('timestamp', ''),
+            tweet.get('likes', 0),
+            tweet.get('comments', 0),
+            tweet.get('retweets', 0),
+            tweet.get('link', ''),
+            ', '.join(tags) if isinstance(tags, list) else tags,
+            tweet.get('filter_status', '')
+        ]
+        return ['' if value is None else str(value) for value in row]
+    
+    def load_row_index(self) -> Dict[str, Any]:
+        """读取工作表现有内容，建立 推文链接 -> 行号 的本地索引"""
+        title = self.worksheet.title.replace("'", "''")
+        result = self._call_with_backoff(self.spreadsheet.values_get, f"'{title}'")
+        values = result.get('values', [])
+        
+        # 旧版全量同步在数据下方隔一行写入"最后同步时间"，不清除的话新行会追加到它之后
+        timestamp_rows = [row_number for row_number, row in enumerate(values, 1)
+                          if row and str(row[0]).startswith(self.LEGACY_TIMESTAMP_PREFIX)]
+        if timestamp_rows:
+            self._call_with_backoff(
+                self.spreadsheet.values_batch_clear,
+                body={'ranges': [self._a1_range(row_number, 1, len(self.HEADERS)) for row_number in timestamp_rows]}
+            )
+            for row_number in timestamp_rows:
+                values[row_number - 1] = []
+            while values and not any(values[-1]):
+                values.pop()
+            self.logger.info(f"已清除 {len(timestamp_rows)} 行旧版同步时间戳")
+        
+        self._row_index = {}
+        for row_number, row in enumerate(values, 1):
+            if row_number == 1 and row[:1] == self.HEADERS[:1]:
+                continue
+            link = row[self.LINK_COLUMN] if len(row) > self.LINK_COLUMN else ''
+            if link:
+                padded = list(row) + [''] * (len(self.HEADERS) - len(row))
+                self._row_index[link] = (row_number, padded[:len(self.HEADERS)])
+        self._next_row = len(values) + 1
+        
+        self.logger.info(f"Google Sheets行索引加载完成: {len(self._row_index)} 条链接，下一空行 {self._next_row}")
+        return self._row_index
+    
+    def _changed_ranges(self, row_number: int, old_row: List[str], new_row: List[str]) -> List[Dict[str, Any]]:
+        """比较新旧行，把连续变化的单元格合并成区间（序号列保持不变）"""
+        ranges = []
+        start = None
+        for column in range(1, len(new_row) + 1):
+            changed = old_row[column - 1] != new_row[column - 1]
+            if changed and start is None:
+                start = column
+            if start is not None and (not changed or column == len(new_row)):
+                end = column if changed else column - 1
+                ranges.append({
+                    'range': self._a1_range(row_number, start, end),
+                    'values': [new_row[start - 1:end]]
+                })
+                start = None
+        return ranges
+    
+    def sync(self, data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        增量同步推文到工作表
+        
+        Args:
+            data: 推文数据列表
+            
+        Returns:
+            统计字典: appended（新增行数）、updated（改写行数）、unchanged、requests（API写请求数）
+        """
+        if self._row_index is None:
+            self.load_row_index()
+        
+        stats = {'appended': 0, 'updated': 0, 'unchanged': 0, 'requests': 0}
+        new_rows = []
+        new_links = []
+        update_ranges = []
+        
+        if self._next_row == 1:
+            new_rows.append(list(self.HEADERS))
+            new_links.append(None)
+        
+        pending_links = {}
+        for tweet in data:
+            link = tweet.get('link') or ''
+            if link and link in self._row_index:
+                row_number, old_row = self._row_index[link]
+                new_row = self.build_row(tweet, old_row[0])
+                changed = self._changed_ranges(row_number, old_row, new_row)
+                if changed:
+                    update_ranges.extend(changed)
+                    self._row_index[link] = (row_number, new_row)
+                    stats['updated'] += 1
+                else:
+                    stats['unchanged'] += 1
+            elif link and link in pending_links:
+                # 同一批次内重复的链接，以最后一条为准
+                position = pending_links[link]
+                new_rows[position] = self.build_row(tweet, new_rows[position][0])
+            else:
+                serial = self._next_row + len(new_rows) - 1
+                if link:
+                    pending_links[link] = len(new_rows)
+                new_rows.append(self.build_row(tweet, serial))
+                new_links.append(link)
+        
+        # 已有行：只改写变化的区间
+        for start in range(0, len(update_ranges), self.UPDATE_CHUNK_RANGES):
+            chunk = update_ranges[start:start + self.UPDATE_CHUNK_RANGES]
+            self._call_with_backoff(
+                self.spreadsheet.values_batch_update,
+                body={'valueInputOption': 'RAW', 'data': chunk}
+            )
+            stats['requests'] += 1
+        
+        # 新行：分块追加到表尾
+        title = self.worksheet.title.replace("'", "''")
+        for start in range(0, len(new_rows), self.APPEND_CHUNK_ROWS):
+            chunk = new_rows[start:start + self.APPEND_CHUNK_ROWS]
+            response = self._call_with_backoff(
+                self.spreadsheet.values_append, f"'{title}'!A1",
+                params={'valueInputOption': 'RAW', 'insertDataOption': 'INSERT_ROWS'},
+                body={'values': chunk}
+            )
+            stats['requests'] += 1
+            
+            first_row = self._appended_first_row(response) or self._next_row
+            for offset, link in enumerate(new_links[start:start + self.APPEND_CHUNK_ROWS]):
+                if link:
+                    self._row_index[link] = (first_row + offset, chunk[offset])
+            self._next_row = first_row + len(chunk)
+        
+        stats['appended'] = sum(1 for link in new_links if link is not None)
+        self.logger.info(
+            f"Google Sheets增量同步完成: 新增 {stats['appended']} 行，改写 {stats['updated']} 行，"
+            f"未变化 {stats['unchanged']} 行，写请求 {stats['requests']} 次"
+        )
+        return stats
+    
+    @staticmethod
+    def _appended_first_row(response: Dict[str, Any]) -> Optional[int]:
+        """从values_append响应的updatedRange（如 'Sheet1'!A12:J40）解析实际写入的起始行"""
+        updated_range = (response or {}).get('updates', {}).get('updatedRange', '')
+        match = re.search(r'![A-Z]+(\d+)', updated_range)
+        return int(match.group(1)) if match else None
+
+
 try:
     import requests
 except ImportError:
@@ -358,79 +689,81 @@ class CloudSyncManager:
     """
     
     def __init__(self, config: Dict[str, Any] = None):
-        print(f"\n🚀 [CloudSync] 初始化云端同步管理器:")
-        print(f"   - 类: CloudSyncManager")
-        print(f"   - 方法: __init__")
-        print(f"   - config 参数: {config} (类型: {type(config)})")
-        print(f"   - config 是否为 None: {config is None}")
-        print(f"   - 初始化开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        print(f"   - 当前工作目录: {os.getcwd()}")
-        print(f"   - 进程ID: {os.getpid() if 'os' in globals() else 'N/A'}")
-        print(f"   - 线程ID: {threading.current_thread().ident if 'threading' in globals() else 'N/A'}")
-        
-        print(f"\n📋 [CloudSync] 处理配置参数...")
+        trace.debug("🚀 [CloudSync] 初始化云端同步管理器:")
+        trace.debug("   - 类: CloudSyncManager")
+        trace.debug("   - 方法: __init__")
+        trace.debug("   - config 参数: %s (类型: %s)", config, type(config))
+        trace.debug("   - config 是否为 None: %s", config is None)
+        trace.debug("   - 当前工作目录: %s", os.getcwd())
+        trace.debug("   - 进程ID: %s", os.getpid() if 'os' in globals() else 'N/A')
+        trace.debug("   - 线程ID: %s", threading.current_thread().ident if 'threading' in globals() else 'N/A')
+        
+        trace.debug("📋 [CloudSync] 处理配置参数...")
         if config is None:
-            print(f"   - config 为 None，使用空字典")
+            trace.debug("   - config 为 None，使用空字典")
             self.config = {}
         else:
-            print(f"   - config 不为 None，使用传入配置")
+            trace.debug("   - config 不为 None，使用传入配置")
             self.config = config
         
-        print(f"   - 设置 self.config: {self.config} (类型: {type(self.config)})")
-        print(f"   - 配置键数量: {len(self.config) if isinstance(self.config, dict) else 'N/A'}")
-        print(f"   - 配置键列表: {list(self.config.keys()) if isinstance(self.config, dict) else 'N/A'}")
+        if 'debug' in self.config:
+            trace.configure(debug=bool(self.config.get('debug')))
+        trace.debug("   - 设置 self.config: %s (类型: %s)", trace.json(self.config), type(self.config))
+        trace.debug("   - 配置键数量: %s", len(self.config) if isinstance(self.config, dict) else 'N/A')
+        trace.debug("   - 配置键列表: %s", list(self.config.keys()) if isinstance(self.config, dict) else 'N/A')
         
-        print(f"\n📝 [CloudSync] 设置日志记录器...")
+        trace.debug("📝 [CloudSync] 设置日志记录器...")
         self.logger = logging.getLogger('CloudSync')
-        print(f"   - 日志记录器类型: {type(self.logger)}")
-        print(f"   - 日志记录器名称: {self.logger.name if hasattr(self.logger, 'name') else 'N/A'}")
-        print(f"   - 日志记录器级别: {self.logger.level if hasattr(self.logger, 'level') else 'N/A'}")
-        print(f"   - 日志记录器处理器数量: {len(self.logger.handlers) if hasattr(self.logger, 'handlers') else 'N/A'}")
+        trace.debug("   - 日志记录器类型: %s", type(self.logger))
+        trace.debug("   - 日志记录器名称: %s", self.logger.name if hasattr(self.logger, 'name') else 'N/A')
+        trace.debug("   - 日志记录器级别: %s", self.logger.level if hasattr(self.logger, 'level') else 'N/A')
+        trace.debug("   - 日志记录器处理器数量: %s", len(self.logger.handlers) if hasattr(self.logger, 'handlers') else 'N/A')
         
-        print(f"\n🔗 [CloudSync] 初始化Google客户端...")
+        trace.debug("🔗 [CloudSync] 初始化Google客户端...")
         self.google_client = None
-        print(f"   - 设置 self.google_client: {self.google_client} (类型: {type(self.google_client)})")
+        trace.debug("   - 设置 self.google_client: %s (类型: %s)", self.google_client, type(self.google_client))
+        self._google_sheets_engines = {}  # (spreadsheet_id, worksheet_name) -> GoogleSheetsSyncEngine
         
-        print(f"\n🚁 [CloudSync] 提取飞书配置...")
+        trace.debug("🚁 [CloudSync] 提取飞书配置...")
         feishu_config_raw = self.config.get('feishu', {})
-        print(f"   - 原始飞书配置: {feishu_config_raw} (类型: {type(feishu_config_raw)})")
-        print(f"   - 飞书配置键: {list(feishu_config_raw.keys()) if isinstance(feishu_config_raw, dict) else 'N/A'}")
-        print(f"   - 飞书配置长度: {len(feishu_config_raw) if isinstance(feishu_config_raw, dict) else 'N/A'}")
+        trace.debug("   - 原始飞书配置: %s (类型: %s)", trace.json(feishu_config_raw), type(feishu_config_raw))
+        trace.debug("   - 飞书配置键: %s", list(feishu_config_raw.keys()) if isinstance(feishu_config_raw, dict) else 'N/A')
+        trace.debug("   - 飞书配置长度: %s", len(feishu_config_raw) if isinstance(feishu_config_raw, dict) else 'N/A')
         
         self.feishu_config = feishu_config_raw
-        print(f"   - 设置 self.feishu_config: {self.feishu_config}")
+        trace.debug("   - 设置 self.feishu_config: %s", trace.json(self.feishu_config))
         
         if isinstance(self.feishu_config, dict):
-            print(f"   - 飞书配置详情:")
+            trace.debug("   - 飞书配置详情:")
             for key, value in self.feishu_config.items():
                 if 'secret' in key.lower() or 'token' in key.lower():
-                    print(f"     * {key}: '{str(value)[:10]}...' (长度: {len(str(value))})")
+                    trace.register_secret(str(value))
+                    trace.debug("     * %s: *** (长度: %s)", key, len(str(value)))
                 else:
-                    print(f"     * {key}: '{value}' (类型: {type(value)})")
+                    trace.debug("     * %s: '%s' (类型: %s)", key, value, type(value))
         
-        print(f"\n⏱️ [CloudSync] 初始化频率限制器...")
+        trace.debug("⏱️ [CloudSync] 初始化频率限制器...")
         self.rate_limiter = FeishuRateLimiter()  # 添加频率限制器
-        print(f"   - 频率限制器类型: {type(self.rate_limiter)}")
-        print(f"   - 频率限制器配置:")
-        print(f"     * 最大应用级调用数/秒: {self.rate_limiter.max_app_calls_per_second}")
-        print(f"     * 最大文档级调用数/秒: {self.rate_limiter.max_doc_calls_per_second}")
-        print(f"     * 基础延迟: {self.rate_limiter.base_delay} 秒")
-        print(f"     * 最大延迟: {self.rate_limiter.max_delay} 秒")
-        print(f"     * 应用调用记录: {self.rate_limiter.app_call_times}")
-        print(f"     * 文档调用记录: {self.rate_limiter.doc_call_times}")
-        
-        print(f"\n🎉 [CloudSync] 云端同步管理器初始化完成:")
-        print(f"   - 配置状态: 已设置 ({len(self.config)} 个配置项)")
-        print(f"   - 日志记录器: 已设置 (名称: {self.logger.name})")
-        print(f"   - Google客户端: 已初始化为 None")
-        print(f"   - 飞书配置: 已设置 ({len(self.feishu_config)} 个配置项)")
-        print(f"   - 频率限制器: 已初始化")
-        print(f"   - 初始化完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        print(f"   - 实例ID: {id(self)}")
-        print(f"   - 实例类型: {type(self)}")
-        print(f"   - 实例属性: {[attr for attr in dir(self) if not attr.startswith('_')]}")
-        print(f"="*100)
-        
+        trace.debug("   - 频率限制器类型: %s", type(self.rate_limiter))
+        trace.debug("   - 频率限制器配置:")
+        trace.debug("     * 最大应用级调用数/秒: %s", self.rate_limiter.max_app_calls_per_second)
+        trace.debug("     * 最大文档级调用数/秒: %s", self.rate_limiter.max_doc_calls_per_second)
+        trace.debug("     * 基础延迟: %s 秒", self.rate_limiter.base_delay)
+        trace.debug("     * 最大延迟: %s 秒", self.rate_limiter.max_delay)
+        trace.debug("     * 应用调用记录: %s", self.rate_limiter.app_call_times)
+        trace.debug("     * 文档调用记录: %s", self.rate_limiter.doc_call_times)
+        
+        trace.info("🎉 [CloudSync] 云端同步管理器初始化完成:")
+        trace.debug("   - 配置状态: 已设置 (%s 个配置项)", len(self.config))
+        trace.debug("   - 日志记录器: 已设置 (名称: %s)", self.logger.name)
+        trace.debug("   - Google客户端: 已初始化为 None")
+        trace.debug("   - 飞书配置: 已设置 (%s 个配置项)", len(self.feishu_config))
+        trace.debug("   - 频率限制器: 已初始化")
+        trace.debug("   - 实例ID: %s", id(self))
+        trace.debug("   - 实例类型: %s", type(self))
+        trace.debug("   - 实例属性: %s", [attr for attr in dir(self) if not attr.startswith('_')])
+        
+    @trace.traced('google_sheets.setup')
     def setup_google_sheets(self, credentials_file: str, scopes: List[str] = None) -> bool:
         """
         设置Google Sheets连接
@@ -442,105 +775,101 @@ class CloudSyncManager:
         Returns:
             是否设置成功
         """
-        print(f"\n📊 [CloudSync] 设置Google Sheets连接:")
-        print(f"   - 方法: setup_google_sheets")
-        print(f"   - credentials_file 参数: '{credentials_file}' (类型: {type(credentials_file)}, 长度: {len(credentials_file)})")
-        print(f"   - scopes 参数: {scopes} (类型: {type(scopes)})")
-        print(f"   - scopes 是否为 None: {scopes is None}")
-        print(f"   - 设置开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        print(f"   - 凭证文件绝对路径: {os.path.abspath(credentials_file)}")
-        print(f"   - 凭证文件是否存在: {os.path.exists(credentials_file)}")
-        
-        print(f"\n🔍 [CloudSync] 检查依赖模块...")
-        print(f"   - gspread 模块: {gspread} (类型: {type(gspread)})")
-        print(f"   - gspread 是否可用: {gspread is not None}")
-        print(f"   - Credentials 模块: {Credentials} (类型: {type(Credentials)})")
-        print(f"   - Credentials 是否可用: {Credentials is not None}")
+        trace.debug("📊 [CloudSync] 设置Google Sheets连接:")
+        trace.debug("   - 方法: setup_google_sheets")
+        trace.debug("   - credentials_file 参数: '%s' (类型: %s, 长度: %s)", credentials_file, type(credentials_file), len(credentials_file))
+        trace.debug("   - scopes 参数: %s (类型: %s)", scopes, type(scopes))
+        trace.debug("   - scopes 是否为 None: %s", scopes is None)
+        trace.debug("   - 凭证文件绝对路径: %s", os.path.abspath(credentials_file))
+        trace.debug("   - 凭证文件是否存在: %s", os.path.exists(credentials_file))
+        
+        trace.debug("🔍 [CloudSync] 检查依赖模块...")
+        trace.debug("   - gspread 模块: %s (类型: %s)", gspread, type(gspread))
+        trace.debug("   - gspread 是否可用: %s", gspread is not None)
+        trace.debug("   - Credentials 模块: %s (类型: %s)", Credentials, type(Credentials))
+        trace.debug("   - Credentials 是否可用: %s", Credentials is not None)
         
         if not gspread or not Credentials:
-            print(f"❌ [CloudSync] 依赖检查失败")
-            print(f"   - gspread 可用: {gspread is not None}")
-            print(f"   - Credentials 可用: {Credentials is not None}")
-            print(f"   - 错误消息: Google Sheets依赖未安装")
-            print(f"   - 建议操作: pip install gspread google-auth")
+            trace.error("❌ [CloudSync] 依赖检查失败")
+            trace.debug("   - gspread 可用: %s", gspread is not None)
+            trace.debug("   - Credentials 可用: %s", Credentials is not None)
+            trace.debug("   - 错误消息: Google Sheets依赖未安装")
+            trace.debug("   - 建议操作: pip install gspread google-auth")
             self.logger.error("Google Sheets依赖未安装，请运行: pip install gspread google-auth")
             return False
         
-        print(f"✅ [CloudSync] 依赖检查通过")
+        trace.info("✅ [CloudSync] 依赖检查通过")
         
         try:
-            print(f"\n🔧 [CloudSync] 处理权限范围...")
+            trace.debug("🔧 [CloudSync] 处理权限范围...")
             if scopes is None:
-                print(f"   - scopes 为 None，使用默认权限范围")
+                trace.debug("   - scopes 为 None，使用默认权限范围")
                 scopes = [
                     'https://www.googleapis.com/auth/spreadsheets',
                     'https://www.googleapis.com/auth/drive'
                 ]
-                print(f"   - 默认权限范围: {scopes}")
+                trace.debug("   - 默认权限范围: %s", scopes)
             else:
-                print(f"   - 使用传入的权限范围: {scopes}")
+                trace.debug("   - 使用传入的权限范围: %s", scopes)
             
-            print(f"   - 最终权限范围:")
+            trace.debug("   - 最终权限范围:")
             for i, scope in enumerate(scopes, 1):
-                print(f"     {i}. {scope}")
-            print(f"   - 权限范围数量: {len(scopes)}")
+                trace.debug("     %s. %s", i, scope)
+            trace.debug("   - 权限范围数量: %s", len(scopes))
             
-            print(f"\n🔑 [CloudSync] 加载服务账号凭证...")
-            print(f"   - 凭证文件: {credentials_file}")
-            print(f"   - 权限范围: {scopes}")
-            print(f"   - 加载开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            trace.debug("🔑 [CloudSync] 加载服务账号凭证...")
+            trace.debug("   - 凭证文件: %s", credentials_file)
+            trace.debug("   - 权限范围: %s", scopes)
             
             credentials = Credentials.from_service_account_file(
                 credentials_file, scopes=scopes
             )
             
-            print(f"   - 凭证加载成功")
-            print(f"   - 凭证类型: {type(credentials)}")
-            print(f"   - 凭证有效: {credentials.valid if hasattr(credentials, 'valid') else 'N/A'}")
-            print(f"   - 凭证过期: {credentials.expired if hasattr(credentials, 'expired') else 'N/A'}")
-            print(f"   - 加载完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            trace.debug("   - 凭证加载成功")
+            trace.debug("   - 凭证类型: %s", type(credentials))
+            trace.debug("   - 凭证有效: %s", credentials.valid if hasattr(credentials, 'valid') else 'N/A')
+            trace.debug("   - 凭证过期: %s", credentials.expired if hasattr(credentials, 'expired') else 'N/A')
             
-            print(f"\n🔗 [CloudSync] 授权Google客户端...")
-            print(f"   - 授权开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            trace.debug("🔗 [CloudSync] 授权Google客户端...")
             
             self.google_client = gspread.authorize(credentials)
+            self._google_sheets_engines = {}  # 客户端已更换，旧句柄作废
             
-            print(f"   - 授权成功")
-            print(f"   - Google客户端类型: {type(self.google_client)}")
-            print(f"   - Google客户端: {self.google_client}")
-            print(f"   - 授权完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            trace.debug("   - 授权成功")
+            trace.debug("   - Google客户端类型: %s", type(self.google_client))
+            trace.debug("   - Google客户端: %s", self.google_client)
             
-            print(f"\n✅ [CloudSync] Google Sheets设置成功:")
-            print(f"   - 凭证文件: {credentials_file}")
-            print(f"   - 权限范围数量: {len(scopes)}")
-            print(f"   - 客户端状态: 已授权")
-            print(f"   - 设置完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            trace.info("✅ [CloudSync] Google Sheets设置成功:")
+            trace.debug("   - 凭证文件: %s", credentials_file)
+            trace.debug("   - 权限范围数量: %s", len(scopes))
+            trace.debug("   - 客户端状态: 已授权")
             
             self.logger.info("Google Sheets连接设置成功")
             return True
             
         except Exception as e:
-            print(f"\n❌ [CloudSync] Google Sheets设置失败:")
-            print(f"   - 异常类型: {type(e).__name__}")
-            print(f"   - 异常消息: {str(e)}")
-            print(f"   - 异常详情: {repr(e)}")
-            print(f"   - 凭证文件: {credentials_file}")
-            print(f"   - 权限范围: {scopes}")
-            print(f"   - 失败时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            trace.error("❌ [CloudSync] Google Sheets设置失败:")
+            trace.debug("   - 异常类型: %s", type(e).__name__)
+            trace.debug("   - 异常消息: %s", str(e))
+            trace.debug("   - 异常详情: %s", repr(e))
+            trace.debug("   - 凭证文件: %s", credentials_file)
+            trace.debug("   - 权限范围: %s", scopes)
             
             if hasattr(e, '__traceback__'):
                 import traceback
-                print(f"   - 堆栈跟踪:")
+                trace.debug("   - 堆栈跟踪:")
                 traceback.print_exc()
             
             self.logger.error(f"Google Sheets设置失败: {e}")
             return False
     
+    @trace.traced('google_sheets.sync')
+    @stage_metrics.timed('google_sheets_sync')
     def sync_to_google_sheets(self, data: List[Dict[str, Any]], 
                              spreadsheet_id: str, 
                              worksheet_name: str = None) -> bool:
         """
-        同步数据到Google Sheets
+        同步数据到Google Sheets（按推文链接增量追加或改写，不再清空整表）
         
         Args:
             data: 要同步的数据
@@ -550,200 +879,86 @@ class CloudSyncManager:
         Returns:
             是否同步成功
         """
-        print(f"\n📊 [CloudSync] 同步数据到Google Sheets:")
-        print(f"   - 方法: sync_to_google_sheets")
-        print(f"   - data 参数: {type(data)} (长度: {len(data) if data else 0})")
-        print(f"   - spreadsheet_id 参数: '{spreadsheet_id}' (类型: {type(spreadsheet_id)}, 长度: {len(spreadsheet_id)})")
-        print(f"   - worksheet_name 参数: '{worksheet_name}' (类型: {type(worksheet_name)})")
-        print(f"   - worksheet_name 是否为 None: {worksheet_name is None}")
-        print(f"   - 同步开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+        trace.debug("📊 [CloudSync] 同步数据到Google Sheets:")
+        trace.debug("   - 方法: sync_to_google_sheets")
+        trace.debug("   - data 参数: %s (长度: %s)", type(data), len(data) if data else 0)
+        trace.debug("   - spreadsheet_id 参数: '%s' (类型: %s, 长度: %s)", spreadsheet_id, type(spreadsheet_id), len(spreadsheet_id))
+        trace.debug("   - worksheet_name 参数: '%s' (类型: %s)", worksheet_name, type(worksheet_name))
+        trace.debug("   - worksheet_name 是否为 None: %s", worksheet_name is None)
         
         if data:
-            print(f"   - 数据示例 (前3条):")
+            trace.debug("   - 数据示例 (前3条):")
             for i, item in enumerate(data[:3], 1):
-                print(f"     {i}. {item} (类型: {type(item)})")
+                trace.debug("     %s. %s (类型: %s)", i, item, type(item))
         else:
-            print(f"   - 数据为空或None")
+            trace.debug("   - 数据为空或None")
         
-        print(f"\n🔍 [CloudSync] 检查Google客户端状态...")
-        print(f"   - self.google_client: {self.google_client} (类型: {type(self.google_client)})")
-        print(f"   - Google客户端是否已初始化: {self.google_client is not None}")
+        trace.debug("🔍 [CloudSync] 检查Google客户端状态...")
+        trace.debug("   - self.google_client: %s (类型: %s)", self.google_client, type(self.google_client))
+        trace.debug("   - Google客户端是否已初始化: %s", self.google_client is not None)
         
         if not self.google_client:
-            print(f"❌ [CloudSync] Google客户端检查失败")
-            print(f"   - 错误: Google Sheets未初始化")
-            print(f"   - 建议: 先调用 setup_google_sheets() 方法")
-            print(f"   - 失败时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            trace.error("❌ [CloudSync] Google客户端检查失败")
+            trace.debug("   - 错误: Google Sheets未初始化")
+            trace.debug("   - 建议: 先调用 setup_google_sheets() 方法")
             self.logger.error("Google Sheets未初始化")
             return False
         
-        print(f"✅ [CloudSync] Google客户端检查通过")
+        trace.info("✅ [CloudSync] Google客户端检查通过")
+        
+        if not data:
+            trace.warning("⚠️ [CloudSync] 没有数据需要同步")
+            self.logger.warning("没有数据需要同步")
+            return True
         
         try:
-            print(f"\n📋 [CloudSync] 打开Google表格...")
-            print(f"   - 表格ID: {spreadsheet_id}")
-            print(f"   - 打开开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            
-            # 打开表格
-            spreadsheet = self.google_client.open_by_key(spreadsheet_id)
-            
-            print(f"   - 表格打开成功")
-            print(f"   - 表格对象: {spreadsheet} (类型: {type(spreadsheet)})")
-            print(f"   - 表格标题: {spreadsheet.title if hasattr(spreadsheet, 'title') else 'N/A'}")
-            print(f"   - 打开完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            
-            print(f"\n📄 [CloudSync] 获取或创建工作表...")
-            print(f"   - 工作表名称: '{worksheet_name}'")
-            print(f"   - 是否指定工作表名称: {worksheet_name is not None}")
-            
-            # 获取或创建工作表
-            if worksheet_name:
-                print(f"   - 尝试获取指定工作表: '{worksheet_name}'")
-                try:
-                    worksheet = spreadsheet.worksheet(worksheet_name)
-                    print(f"   - 工作表获取成功: '{worksheet_name}'")
-                    print(f"   - 工作表对象: {worksheet} (类型: {type(worksheet)})")
-                except Exception as worksheet_error:
-                    print(f"   - 工作表不存在，创建新工作表")
-                    print(f"   - 获取失败原因: {worksheet_error}")
-                    print(f"   - 创建参数: title='{worksheet_name}', rows=1000, cols=20")
-                    
-                    worksheet = spreadsheet.add_worksheet(
-                        title=worksheet_name, rows=1000, cols=20
-                    )
-                    
-                    print(f"   - 工作表创建成功: '{worksheet_name}'")
-                    print(f"   - 新工作表对象: {worksheet} (类型: {type(worksheet)})")
-            else:
-                print(f"   - 使用默认工作表 (sheet1)")
-                worksheet = spreadsheet.sheet1
-                print(f"   - 默认工作表获取成功")
-                print(f"   - 工作表对象: {worksheet} (类型: {type(worksheet)})")
-            
-            print(f"   - 最终工作表: {worksheet}")
-            print(f"   - 工作表标题: {worksheet.title if hasattr(worksheet, 'title') else 'N/A'}")
-            
-            print(f"\n🧹 [CloudSync] 清空现有数据...")
-            print(f"   - 清空开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            
-            # 清空现有数据
-            worksheet.clear()
-            
-            print(f"   - 数据清空成功")
-            print(f"   - 清空完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            
-            print(f"\n📊 [CloudSync] 检查数据状态...")
-            print(f"   - 数据是否为空: {not data}")
-            print(f"   - 数据长度: {len(data) if data else 0}")
-            
-            if not data:
-                print(f"⚠️ [CloudSync] 没有数据需要同步")
-                print(f"   - 数据状态: 空")
-                print(f"   - 处理结果: 返回成功 (无数据同步)")
-                print(f"   - 完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-                self.logger.warning("没有数据需要同步")
-                return True
-            
-            print(f"✅ [CloudSync] 数据检查通过，开始处理")
-            
-            print(f"\n📋 [CloudSync] 准备表头...")
-            # 准备表头
-            headers = [
-                '序号', '用户名', '推文内容', '发布时间', '点赞数', 
-                '评论数', '转发数', '链接', '标签', '筛选状态'
-            ]
-            
-            print(f"   - 表头列表: {headers}")
-            print(f"   - 表头数量: {len(headers)}")
-            print(f"   - 表头类型: {type(headers)}")
-            
-            print(f"\n📝 [CloudSync] 准备数据行...")
-            print(f"   - 数据处理开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            
-            # 准备数据行
-            rows = [headers]
-            print(f"   - 初始化行数据，包含表头: {len(rows)} 行")
-            
-            for i, tweet in enumerate(data, 1):
-                row = [
-                    i,
-                    tweet.get('username', ''),
-                    tweet.get('content', ''),
-                    tweet.get('timestamp', ''),
-                    tweet.get('likes', 0),
-                    tweet.get('comments', 0),
-                    tweet.get('retweets', 0),
-                    tweet.get('link', ''),
-                    ', '.join(tweet.get('tags', [])),
-                    tweet.get('filter_status', '')
-                ]
-                rows.append(row)
-                
-                if i <= 3:  # 只打印前3行的详细信息
-                    print(f"   - 第 {i} 行数据:")
-                    print(f"     * 原始推文: {tweet}")
-                    print(f"     * 处理后行: {row}")
-                    print(f"     * 行长度: {len(row)}")
-            
-            print(f"   - 数据行处理完成")
-            print(f"   - 总行数 (含表头): {len(rows)}")
-            print(f"   - 数据行数: {len(rows) - 1}")
-            print(f"   - 数据处理完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            
-            print(f"\n📤 [CloudSync] 批量更新数据到工作表...")
-            print(f"   - 更新范围: A1")
-            print(f"   - 更新行数: {len(rows)}")
-            print(f"   - 更新列数: {len(headers)}")
-            print(f"   - 更新开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            
-            # 批量更新数据
-            worksheet.update('A1', rows)
-            
-            print(f"   - 数据更新成功")
-            print(f"   - 更新完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            
-            print(f"\n🕒 [CloudSync] 添加同步时间戳...")
-            # 添加同步时间戳
-            timestamp_cell = f"A{len(rows) + 2}"
-            timestamp_value = f"最后同步时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            engine = self.get_google_sheets_engine(spreadsheet_id, worksheet_name)
             
-            print(f"   - 时间戳单元格: {timestamp_cell}")
-            print(f"   - 时间戳内容: '{timestamp_value}'")
-            print(f"   - 时间戳添加开始: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            trace.debug("📤 [CloudSync] 增量同步数据到工作表...")
             
-            worksheet.update(timestamp_cell, timestamp_value)
+            stats = engine.sync(data)
             
-            print(f"   - 时间戳添加成功")
-            print(f"   - 时间戳添加完成: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            
-            print(f"\n✅ [CloudSync] Google Sheets同步成功:")
-            print(f"   - 表格ID: {spreadsheet_id}")
-            print(f"   - 工作表: {worksheet.title if hasattr(worksheet, 'title') else worksheet_name or 'sheet1'}")
-            print(f"   - 同步数据量: {len(data)} 条")
-            print(f"   - 总行数: {len(rows)} 行 (含表头)")
-            print(f"   - 同步完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            trace.info("✅ [CloudSync] Google Sheets同步成功:")
+            trace.debug("   - 表格ID: %s", spreadsheet_id)
+            trace.debug("   - 工作表: %s", engine.worksheet.title)
+            trace.debug("   - 新增行数: %s", stats['appended'])
+            trace.debug("   - 改写行数: %s", stats['updated'])
+            trace.debug("   - 未变化行数: %s", stats['unchanged'])
+            trace.debug("   - 写请求次数: %s", stats['requests'])
             
             self.logger.info(f"成功同步 {len(data)} 条数据到Google Sheets")
             return True
             
         except Exception as e:
-            print(f"\n❌ [CloudSync] Google Sheets同步失败:")
-            print(f"   - 异常类型: {type(e).__name__}")
-            print(f"   - 异常消息: {str(e)}")
-            print(f"   - 异常详情: {repr(e)}")
-            print(f"   - 表格ID: {spreadsheet_id}")
-            print(f"   - 工作表名称: {worksheet_name}")
-            print(f"   - 数据长度: {len(data) if data else 0}")
-            print(f"   - 失败时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-            
-            if hasattr(e, '__traceback__'):
-                import traceback
-                print(f"   - 堆栈跟踪:")
-                traceback.print_exc()
-            
+            trace.error("❌ [CloudSync] Google Sheets同步失败:")
+            trace.debug("   - 异常类型: %s", type(e).__name__)
+            trace.debug("   - 异常消息: %s", str(e))
+            trace.debug("   - 表格ID: %s", spreadsheet_id)
+            trace.debug("   - 工作表名称: %s", worksheet_name)
+            trace.debug("   - 数据长度: %s", len(data) if data else 0)
+            traceback.print_exc()
+            
+            # 表格状态未知，丢弃缓存的行索引，下次同步时重新加载
+            self._google_sheets_engines.pop((spreadsheet_id, worksheet_name), None)
             self.logger.error(f"Google Sheets同步失败: {e}")
             return False
     
+    def get_google_sheets_engine(self, spreadsheet_id: str, worksheet_name: str = None) -> GoogleSheetsSyncEngine:
+        """
+        获取（或创建）指定工作表的增量同步引擎，表格句柄和行索引在多次同步间复用
+        
+        Args:
+            spreadsheet_id: Google表格ID
+            worksheet_name: 工作表名称
+        """
+        key = (spreadsheet_id, worksheet_name)
+        engine = self._google_sheets_engines.get(key)
+        if engine is None:
+            engine = GoogleSheetsSyncEngine(self.google_client, spreadsheet_id, worksheet_name)
+            self._google_sheets_engines[key] = engine
+        return engine
+    
+    @trace.traced('feishu.setup')
     def setup_feishu(self, app_id: str, app_secret: str) -> bool:
         """
         设置飞书应用配置
@@ -755,63 +970,60 @@ class CloudSyncManager:
         Returns:
             是否设置成功
         """
-        print(f"\n🚁 [CloudSync] 设置飞书应用配置:")
-        print(f"   - 方法: setup_feishu")
-        print(f"   - app_id 参数: '{app_id}' (类型: {type(app_id)}, 长度: {len(app_id)})")
-        print(f"   - app_secret 参数: '{app_secret[:10]}...' (类型: {type(app_secret)}, 长度: {len(app_secret)})")
-        print(f"   - 设置开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+        trace.debug("🚁 [CloudSync] 设置飞书应用配置:")
+        trace.debug("   - 方法: setup_feishu")
+        trace.debug("   - app_id 参数: '%s' (类型: %s, 长度: %s)", app_id, type(app_id), len(app_id))
         
-        print(f"\n🔍 [CloudSync] 检查requests依赖...")
-        print(f"   - requests 模块: {requests} (类型: {type(requests)})")
-        print(f"   - requests 是否可用: {requests is not None}")
+        trace.debug("🔍 [CloudSync] 检查requests依赖...")
+        trace.debug("   - requests 模块: %s (类型: %s)", requests, type(requests))
+        trace.debug("   - requests 是否可用: %s", requests is not None)
         
         if not requests:
-            print(f"❌ [CloudSync] requests依赖检查失败")
-            print(f"   - requests 可用: {requests is not None}")
-            print(f"   - 错误消息: requests依赖未安装")
-            print(f"   - 建议操作: pip install requests")
-            print(f"   - 失败时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+            trace.error("❌ [CloudSync] requests依赖检查失败")
+            trace.debug("   - requests 可用: %s", requests is not None)
+            trace.debug("   - 错误消息: requests依赖未安装")
+            trace.debug("   - 建议操作: pip install requests")
             self.logger.error("requests依赖未安装，请运行: pip install requests")
             return False
         
-        print(f"✅ [CloudSync] requests依赖检查通过")
+        trace.info("✅ [CloudSync] requests依赖检查通过")
         
-        print(f"\n🔧 [CloudSync] 构建飞书配置...")
-        print(f"   - 原始 self.feishu_config: {self.feishu_config}")
+        trace.debug("🔧 [CloudSync] 构建飞书配置...")
+        trace.debug("   - 原始 self.feishu_config: %s", trace.json(self.feishu_config))
         
+        trace.register_secret(app_secret)
         new_config = {
             'app_id': app_id,
             'app_secret': app_secret,
             'base_url': 'https://open.feishu.cn/open-apis'
         }
         
-        print(f"   - 新配置构建:")
-        print(f"     * app_id: '{new_config['app_id']}' (长度: {len(new_config['app_id'])})")
-        print(f"     * app_secret: '{new_config['app_secret'][:10]}...' (长度: {len(new_config['app_secret'])})")
-        print(f"     * base_url: '{new_config['base_url']}' (长度: {len(new_config['base_url'])})")
-        print(f"   - 新配置键数量: {len(new_config)}")
-        print(f"   - 新配置类型: {type(new_config)}")
+        trace.debug("   - 新配置构建:")
+        trace.debug("     * app_id: '%s' (长度: %s)", new_config['app_id'], len(new_config['app_id']))
+        trace.debug("     * base_url: '%s' (长度: %s)", new_config['base_url'], len(new_config['base_url']))
+        trace.debug("   - 新配置键数量: %s", len(new_config))
+        trace.debug("   - 新配置类型: %s", type(new_config))
         
-        print(f"\n💾 [CloudSync] 保存飞书配置...")
+        trace.debug("💾 [CloudSync] 保存飞书配置...")
         self.feishu_config = new_config
         
-        print(f"   - 配置保存成功")
-        print(f"   - 更新后 self.feishu_config: {self.feishu_config}")
-        print(f"   - 配置验证:")
-        print(f"     * app_id 存在: {bool(self.feishu_config.get('app_id'))}")
-        print(f"     * app_secret 存在: {bool(self.feishu_config.get('app_secret'))}")
-        print(f"     * base_url 存在: {bool(self.feishu_config.get('base_url'))}")
-        print(f"     * 配置完整: {all([self.feishu_config.get('app_id'), self.feishu_config.get('app_secret'), self.feishu_config.get('base_url')])}")
+        trace.debug("   - 配置保存成功")
+        trace.debug("   - 更新后 self.feishu_config: %s", trace.json(self.feishu_config))
+        trace.debug("   - 配置验证:")
+        trace.debug("     * app_id 存在: %s", bool(self.feishu_config.get('app_id')))
+        trace.debug("     * app_secret 存在: %s", bool(self.feishu_config.get('app_secret')))
+        trace.debug("     * base_url 存在: %s", bool(self.feishu_config.get('base_url')))
+        trace.debug("     * 配置完整: %s", all([self.feishu_config.get('app_id'), self.feishu_config.get('app_secret'), self.feishu_config.get('base_url')]))
         
-        print(f"\n✅ [CloudSync] 飞书配置设置成功:")
-        print(f"   - App ID: '{self.feishu_config['app_id']}'")
-        print(f"   - App Secret: 已设置 (长度: {len(self.feishu_config['app_secret'])})")
-        print(f"   - Base URL: '{self.feishu_config['base_url']}'")
-        print(f"   - 设置完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+        trace.info("✅ [CloudSync] 飞书配置设置成功:")
+        trace.debug("   - App ID: '%s'", self.feishu_config['app_id'])
+        trace.debug("   - App Secret: 已设置 (长度: %s)", len(self.feishu_config['app_secret']))
+        trace.debug("   - Base URL: '%s'", self.feishu_config['base_url'])
         
         self.logger.info("飞书配置设置成功")
         return True
     
+    @trace.traced('feishu.token')
     def get_feishu_access_token(self, max_retries: int = 3) -> Optional[str]:
         """
         获取飞书访问令牌（带频率限制和重试机制）
@@ -822,84 +1034,79 @@ class CloudSyncManager:
         Returns:
             访问令牌或None
         """
-        print(f"\n" + "="*100)
-        print(f"🔑 [CloudSync] 开始获取飞书访问令牌 - 详细流程")
-        print(f"📋 [CloudSync] 函数调用参数详情:")
-        print(f"   - 函数名: get_feishu_access_token")
-        print(f"   - max_retries 参数: {max_retries} (类型: {type(max_retries)})")
-        print(f"   - self.feishu_config 状态: {type(self.feishu_config)}")
-        print(f"   - self.feishu_config 内容: {json.dumps(self.feishu_config, indent=4, ensure_ascii=False)}")
-        print(f"   - self.rate_limiter 状态: {type(self.rate_limiter)}")
-        print(f"   - 当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        print(f"   - 进程ID: {os.getpid() if 'os' in globals() else 'N/A'}")
-        print(f"   - 线程ID: {threading.current_thread().ident if 'threading' in globals() else 'N/A'}")
+        trace.debug("🔑 [CloudSync] 开始获取飞书访问令牌 - 详细流程")
+        trace.debug("📋 [CloudSync] 函数调用参数详情:")
+        trace.debug("   - 函数名: get_feishu_access_token")
+        trace.debug("   - max_retries 参数: %s (类型: %s)", max_retries, type(max_retries))
+        trace.debug("   - self.feishu_config 状态: %s", type(self.feishu_config))
+        trace.debug("   - self.feishu_config 内容: %s", trace.json(self.feishu_config))
+        trace.debug("   - self.rate_limiter 状态: %s", type(self.rate_limiter))
+        trace.debug("   - 进程ID: %s", os.getpid() if 'os' in globals() else 'N/A')
+        trace.debug("   - 线程ID: %s", threading.current_thread().ident if 'threading' in globals() else 'N/A')
         
         if not self.feishu_config.get('app_id'):
-            print(f"❌ [CloudSync] 飞书配置检查失败")
-            print(f"   - app_id 存在: {bool(self.feishu_config.get('app_id'))}")
-            print(f"   - app_id 值: '{self.feishu_config.get('app_id', 'N/A')}'")
-            print(f"   - app_secret 存在: {bool(self.feishu_config.get('app_secret'))}")
-            print(f"   - base_url 存在: {bool(self.feishu_config.get('base_url'))}")
-            print(f"   - 完整配置: {self.feishu_config}")
+            trace.error("❌ [CloudSync] 飞书配置检查失败")
+            trace.debug("   - app_id 存在: %s", bool(self.feishu_config.get('app_id')))
+            trace.debug("   - app_id 值: '%s'", self.feishu_config.get('app_id', 'N/A'))
+            trace.debug("   - app_secret 存在: %s", bool(self.feishu_config.get('app_secret')))
+            trace.debug("   - base_url 存在: %s", bool(self.feishu_config.get('base_url')))
+            trace.debug("   - 完整配置: %s", trace.json(self.feishu_config))
             self.logger.error("飞书配置未设置")
             return None
         
-        print(f"✅ [CloudSync] 飞书配置检查通过")
-        print(f"   - App ID: '{self.feishu_config['app_id']}' (长度: {len(self.feishu_config['app_id'])})")
-        print(f"   - App Secret: '{self.feishu_config['app_secret'][:10]}...' (长度: {len(self.feishu_config['app_secret'])})")
-        print(f"   - Base URL: '{self.feishu_config['base_url']}' (长度: {len(self.feishu_config['base_url'])})")
-        print(f"   - 最大重试次数: {max_retries}")
-        print(f"   - 配置完整性: {all([self.feishu_config.get('app_id'), self.feishu_config.get('app_secret'), self.feishu_config.get('base_url')])}")
+        trace.info("✅ [CloudSync] 飞书配置检查通过")
+        trace.debug("   - App ID: '%s' (长度: %s)", self.feishu_config['app_id'], len(self.feishu_config['app_id']))
+        trace.debug("   - Base URL: '%s' (长度: %s)", self.feishu_config['base_url'], len(self.feishu_config['base_url']))
+        trace.debug("   - 最大重试次数: %s", max_retries)
+        trace.debug("   - 配置完整性: %s", all([self.feishu_config.get('app_id'), self.feishu_config.get('app_secret'), self.feishu_config.get('base_url')]))
         
-        print(f"\n🔄 [CloudSync] 开始令牌获取重试循环")
-        print(f"   - 重试范围: range({max_retries}) = {list(range(max_retries))}")
-        print(f"   - 循环类型: for attempt in range(max_retries)")
+        trace.debug("🔄 [CloudSync] 开始令牌获取重试循环")
+        trace.debug("   - 重试范围: range(%s) = %s", max_retries, list(range(max_retries)))
+        trace.debug("   - 循环类型: for attempt in range(max_retries)")
         
         for attempt in range(max_retries):
             try:
-                print(f"\n" + "-"*80)
-                print(f"🔄 [CloudSync] 开始第 {attempt + 1}/{max_retries} 次尝试")
-                print(f"📊 [CloudSync] 尝试详细信息:")
-                print(f"   - attempt 变量: {attempt} (类型: {type(attempt)})")
-                print(f"   - 尝试编号: {attempt + 1}")
-                print(f"   - 总尝试次数: {max_retries}")
-                print(f"   - 剩余尝试次数: {max_retries - attempt - 1}")
-                print(f"   - 是否最后一次尝试: {attempt == max_retries - 1}")
-                print(f"   - 当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+                trace.debug("🔄 [CloudSync] 开始第 %s/%s 次尝试", attempt + 1, max_retries)
+                trace.debug("📊 [CloudSync] 尝试详细信息:")
+                trace.debug("   - attempt 变量: %s (类型: %s)", attempt, type(attempt))
+                trace.debug("   - 尝试编号: %s", attempt + 1)
+                trace.debug("   - 总尝试次数: %s", max_retries)
+                trace.debug("   - 剩余尝试次数: %s", max_retries - attempt - 1)
+                trace.debug("   - 是否最后一次尝试: %s", attempt == max_retries - 1)
                 
                 # 应用频率限制控制
-                print(f"\n⏱️ [CloudSync] 应用级频率限制检查详情")
-                print(f"   - rate_limiter 对象: {self.rate_limiter}")
-                print(f"   - app_call_times 列表: {self.rate_limiter.app_call_times}")
-                print(f"   - 当前应用调用记录数: {len(self.rate_limiter.app_call_times)}")
-                print(f"   - 应用级最大调用数: {self.rate_limiter.max_app_calls_per_second}")
-                print(f"   - 可以调用: {self.rate_limiter.can_make_app_call()}")
-                print(f"   - 当前时间戳: {time.time()}")
+                trace.debug("⏱️ [CloudSync] 应用级频率限制检查详情")
+                trace.debug("   - rate_limiter 对象: %s", self.rate_limiter)
+                trace.debug("   - app_call_times 列表: %s", self.rate_limiter.app_call_times)
+                trace.debug("   - 当前应用调用记录数: %s", len(self.rate_limiter.app_call_times))
+                trace.debug("   - 应用级最大调用数: %s", self.rate_limiter.max_app_calls_per_second)
+                trace.debug("   - 可以调用: %s", self.rate_limiter.can_make_app_call())
+                trace.debug("   - 当前时间戳: %s", time.time())
                 
                 if self.rate_limiter.app_call_times:
-                    print(f"   - 最早调用时间: {self.rate_limiter.app_call_times[0]}")
-                    print(f"   - 最晚调用时间: {self.rate_limiter.app_call_times[-1]}")
-                    print(f"   - 时间差: {time.time() - self.rate_limiter.app_call_times[0]:.3f} 秒")
+                    trace.debug("   - 最早调用时间: %s", self.rate_limiter.app_call_times[0])
+                    trace.debug("   - 最晚调用时间: %s", self.rate_limiter.app_call_times[-1])
+                    trace.debug("   - 时间差: %.3f 秒", time.time() - self.rate_limiter.app_call_times[0])
                 
                 self.rate_limiter.wait_for_app_call()
-                print(f"   - ✅ 频率限制检查通过")
-                print(f"   - 检查后调用记录数: {len(self.rate_limiter.app_call_times)}")
+                trace.debug("   - ✅ 频率限制检查通过")
+                trace.debug("   - 检查后调用记录数: %s", len(self.rate_limiter.app_call_times))
                 
-                print(f"\n🔧 [CloudSync] 构建API请求参数")
+                trace.debug("🔧 [CloudSync] 构建API请求参数")
                 base_url = self.feishu_config['base_url']
                 endpoint = "/auth/v3/tenant_access_token/internal"
                 url = f"{base_url}{endpoint}"
                 
-                print(f"   - base_url: '{base_url}' (长度: {len(base_url)})")
-                print(f"   - endpoint: '{endpoint}' (长度: {len(endpoint)})")
-                print(f"   - 完整URL: '{url}' (长度: {len(url)})")
-                print(f"   - URL构建方式: f\"{base_url}{endpoint}\"")
+                trace.debug("   - base_url: '%s' (长度: %s)", base_url, len(base_url))
+                trace.debug("   - endpoint: '%s' (长度: %s)", endpoint, len(endpoint))
+                trace.debug("   - 完整URL: '%s' (长度: %s)", url, len(url))
+                trace.debug('   - URL构建方式: f"%s%s"', base_url, endpoint)
                 
                 headers = {
                     'Content-Type': 'application/json'
                 }
-                print(f"   - 请求头构建: {json.dumps(headers, indent=6, ensure_ascii=False)}")
-                print(f"   - Content-Type: {headers['Content-Type']}")
+                trace.debug("   - 请求头构建: %s", trace.json(headers))
+                trace.debug("   - Content-Type: %s", headers['Content-Type'])
                 
                 app_id = self.feishu_config['app_id']
                 app_secret = self.feishu_config['app_secret']
@@ -908,190 +1115,180 @@ class CloudSyncManager:
                     'app_secret': app_secret
                 }
                 
-                print(f"   - 载荷构建详情:")
-                print(f"     - app_id 来源: self.feishu_config['app_id']")
-                print(f"     - app_id 值: '{app_id}' (长度: {len(app_id)})")
-                print(f"     - app_secret 来源: self.feishu_config['app_secret']")
-                print(f"     - app_secret 长度: {len(app_secret)}")
-                print(f"     - app_secret 前缀: '{app_secret[:10]}...'")
-                print(f"     - 载荷字典: {json.dumps({'app_id': app_id, 'app_secret': '***'}, indent=6, ensure_ascii=False)}")
-                print(f"     - 载荷大小: {len(str(payload))} 字符")
+                trace.debug("   - 载荷构建详情:")
+                trace.debug("     - app_id 来源: self.feishu_config['app_id']")
+                trace.debug("     - app_id 值: '%s' (长度: %s)", app_id, len(app_id))
+                trace.debug("     - app_secret 来源: self.feishu_config['app_secret']")
+                trace.debug("     - app_secret 长度: %s", len(app_secret))
+                trace.debug("     - 载荷字典: %s", trace.json({'app_id': app_id, 'app_secret': '***'}))
+                trace.debug("     - 载荷大小: %s 字符", len(str(payload)))
                 
-                print(f"\n🌐 [CloudSync] 发送令牌请求详情 (尝试 {attempt + 1}/{max_retries})")
-                print(f"   - 请求时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-                print(f"   - 请求URL: '{url}'")
-                print(f"   - 请求方法: POST")
-                print(f"   - 请求头: {json.dumps(headers, indent=4, ensure_ascii=False)}")
-                print(f"   - 请求载荷: {json.dumps({'app_id': payload['app_id'], 'app_secret': '***'}, indent=4, ensure_ascii=False)}")
-                print(f"   - 超时设置: 30秒")
-                print(f"   - requests 模块: {requests}")
-                print(f"   - requests.post 方法: {requests.post}")
+                trace.debug("🌐 [CloudSync] 发送令牌请求详情 (尝试 %s/%s)", attempt + 1, max_retries)
+                trace.debug("   - 请求URL: '%s'", url)
+                trace.debug("   - 请求方法: POST")
+                trace.debug("   - 请求头: %s", trace.json(headers))
+                trace.debug("   - 请求载荷: %s", trace.json({'app_id': payload['app_id'], 'app_secret': '***'}))
+                trace.debug("   - 超时设置: 30秒")
+                trace.debug("   - requests 模块: %s", requests)
+                trace.debug("   - requests.post 方法: %s", requests.post)
                 
                 # 记录API调用
-                print(f"\n📝 [CloudSync] 记录API调用")
-                print(f"   - 调用前记录数: {len(self.rate_limiter.app_call_times)}")
-                print(f"   - 调用前记录列表: {self.rate_limiter.app_call_times}")
+                trace.debug("📝 [CloudSync] 记录API调用")
+                trace.debug("   - 调用前记录数: %s", len(self.rate_limiter.app_call_times))
+                trace.debug("   - 调用前记录列表: %s", self.rate_limiter.app_call_times)
                 call_time = time.time()
-                print(f"   - 当前时间戳: {call_time}")
+                trace.debug("   - 当前时间戳: %s", call_time)
                 
                 self.rate_limiter.record_app_call()
                 
-                print(f"   - 调用后记录数: {len(self.rate_limiter.app_call_times)}")
-                print(f"   - 调用后记录列表: {self.rate_limiter.app_call_times}")
-                print(f"   - 记录成功: {call_time in self.rate_limiter.app_call_times}")
+                trace.debug("   - 调用后记录数: %s", len(self.rate_limiter.app_call_times))
+                trace.debug("   - 调用后记录列表: %s", self.rate_limiter.app_call_times)
+                trace.debug("   - 记录成功: %s", call_time in self.rate_limiter.app_call_times)
                 
-                print(f"\n🚀 [CloudSync] 执行HTTP请求")
-                print(f"   - 请求参数详情:")
-                print(f"     - url: '{url}'")
-                print(f"     - headers: {headers}")
-                print(f"     - json: {json.dumps({'app_id': payload['app_id'], 'app_secret': '***'}, ensure_ascii=False)}")
-                print(f"     - timeout: 30")
-                print(f"   - 请求执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+                trace.debug("🚀 [CloudSync] 执行HTTP请求")
+                trace.debug("   - 请求参数详情:")
+                trace.debug("     - url: '%s'", url)
+                trace.debug("     - headers: %s", headers)
+                trace.debug("     - json: %s", trace.json({'app_id': payload['app_id'], 'app_secret': '***'}))
+                trace.debug("     - timeout: 30")
                 
                 response = requests.post(url, headers=headers, json=payload, timeout=30)
                 
-                print(f"\n📊 [CloudSync] HTTP响应接收完成")
-                print(f"   - 响应接收时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-                print(f"   - 响应对象类型: {type(response)}")
-                print(f"   - 响应状态码: {response.status_code} (类型: {type(response.status_code)})")
-                print(f"   - 响应状态文本: '{response.reason}'")
-                print(f"   - 响应URL: '{response.url}'")
-                print(f"   - 响应编码: '{response.encoding}'")
-                print(f"   - 响应头数量: {len(response.headers)}")
-                print(f"   - 响应头详情: {json.dumps(dict(response.headers), indent=4, ensure_ascii=False)}")
-                print(f"   - 响应内容长度: {len(response.text)} 字符")
-                print(f"   - 响应内容类型: {type(response.text)}")
-                print(f"   - 响应原始内容: '{response.text}'")
-                print(f"   - 响应是否成功: {response.ok}")
-                print(f"   - 响应历史: {response.history}")
+                trace.debug("📊 [CloudSync] HTTP响应接收完成")
+                trace.debug("   - 响应对象类型: %s", type(response))
+                trace.debug("   - 响应状态码: %s (类型: %s)", response.status_code, type(response.status_code))
+                trace.debug("   - 响应状态文本: '%s'", response.reason)
+                trace.debug("   - 响应URL: '%s'", response.url)
+                trace.debug("   - 响应编码: '%s'", response.encoding)
+                trace.debug("   - 响应头数量: %s", len(response.headers))
+                trace.debug("   - 响应头详情: %s", trace.json(dict(response.headers)))
+                trace.debug("   - 响应内容长度: %s 字符", len(response.text))
+                trace.debug("   - 响应内容类型: %s", type(response.text))
+                trace.debug("   - 响应原始内容: '%s'", response.text)
+                trace.debug("   - 响应是否成功: %s", response.ok)
+                trace.debug("   - 响应历史: %s", response.history)
                 
                 # 处理频率限制错误
                 if response.status_code == 400:
                     result = response.json()
                     if result.get('code') == 99991400:  # 应用频率限制
-                        print(f"⚠️ [CloudSync] 应用频率限制触发，使用指数退避")
                         self.logger.warning(f"⚠️ 应用频率限制触发，使用指数退避")
                         delay = self.rate_limiter.exponential_backoff(attempt)
                         time.sleep(delay)
                         continue
                 elif response.status_code == 429:
-                    print(f"⚠️ [CloudSync] 服务器返回429，使用指数退避")
                     self.logger.warning(f"⚠️ 服务器返回429，使用指数退避")
                     delay = self.rate_limiter.exponential_backoff(attempt)
                     time.sleep(delay)
                     continue
                 
-                print(f"\n🔍 [CloudSync] 检查HTTP状态")
-                print(f"   - 状态码检查: {response.status_code}")
-                print(f"   - 是否需要raise_for_status: {not response.ok}")
+                trace.debug("🔍 [CloudSync] 检查HTTP状态")
+                trace.debug("   - 状态码检查: %s", response.status_code)
+                trace.debug("   - 是否需要raise_for_status: %s", not response.ok)
                 
                 try:
                     response.raise_for_status()
-                    print(f"   - ✅ HTTP状态检查通过")
+                    trace.debug("   - ✅ HTTP状态检查通过")
                 except Exception as status_error:
-                    print(f"   - ❌ HTTP状态检查失败: {status_error}")
+                    trace.debug("   - ❌ HTTP状态检查失败: %s", status_error)
                     raise status_error
                 
-                print(f"\n📊 [CloudSync] 解析JSON响应")
-                print(f"   - 响应文本: '{response.text}'")
-                print(f"   - 文本长度: {len(response.text)}")
-                print(f"   - 文本类型: {type(response.text)}")
+                trace.debug("📊 [CloudSync] 解析JSON响应")
+                trace.debug("   - 响应文本: '%s'", response.text)
+                trace.debug("   - 文本长度: %s", len(response.text))
+                trace.debug("   - 文本类型: %s", type(response.text))
                 
                 try:
                     result = response.json()
-                    print(f"   - ✅ JSON解析成功")
-                    print(f"   - 解析结果类型: {type(result)}")
-                    print(f"   - 解析结果: {json.dumps(result, indent=4, ensure_ascii=False)}")
+                    trace.debug("   - ✅ JSON解析成功")
+                    trace.debug("   - 解析结果类型: %s", type(result))
+                    trace.debug("   - 解析结果: %s", trace.json(result))
                 except json.JSONDecodeError as json_error:
-                    print(f"   - ❌ JSON解析失败: {json_error}")
-                    print(f"   - 原始响应: '{response.text}'")
+                    trace.debug("   - ❌ JSON解析失败: %s", json_error)
+                    trace.debug("   - 原始响应: '%s'", response.text)
                     raise json_error
                 
-                print(f"\n🔍 [CloudSync] 分析API响应")
+                trace.debug("🔍 [CloudSync] 分析API响应")
                 response_code = result.get('code')
                 response_msg = result.get('msg', 'N/A')
-                print(f"   - 响应代码: {response_code} (类型: {type(response_code)})")
-                print(f"   - 响应消息: '{response_msg}' (类型: {type(response_msg)})")
-                print(f"   - 代码是否为0: {response_code == 0}")
-                print(f"   - 响应字段: {list(result.keys())}")
+                trace.debug("   - 响应代码: %s (类型: %s)", response_code, type(response_code))
+                trace.debug("   - 响应消息: '%s' (类型: %s)", response_msg, type(response_msg))
+                trace.debug("   - 代码是否为0: %s", response_code == 0)
+                trace.debug("   - 响应字段: %s", list(result.keys()))
                 
                 if response_code == 0:
-                    print(f"\n✅ [CloudSync] API调用成功，提取令牌")
+                    trace.info("✅ [CloudSync] API调用成功，提取令牌")
                     token = result.get('tenant_access_token')
-                    print(f"   - 令牌字段: 'tenant_access_token'")
-                    print(f"   - 令牌值: '{token}'")
-                    print(f"   - 令牌类型: {type(token)}")
-                    print(f"   - 令牌长度: {len(token) if token else 0} 字符")
-                    print(f"   - 令牌前缀: '{token[:10] if token else 'N/A'}...'")
-                    print(f"   - 令牌是否有效: {bool(token and len(token) > 0)}")
+                    trace.register_secret(token)
+                    trace.debug("   - 令牌字段: 'tenant_access_token'")
+                    trace.debug("   - 令牌类型: %s", type(token))
+                    trace.debug("   - 令牌长度: %s 字符", len(token) if token else 0)
+                    trace.debug("   - 令牌是否有效: %s", bool(token and len(token) > 0))
                     
                     if token:
-                        print(f"✅ [CloudSync] 成功获取飞书访问令牌")
-                        print(f"   - 完整令牌: '{token}'")
-                        print(f"   - 令牌摘要: '{token[:10]}...'")
-                        print(f"   - 令牌完整长度: {len(token)} 字符")
-                        print(f"   - 令牌类型: {type(token)}")
-                        print(f"   - 返回时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+                        trace.info("✅ [CloudSync] 成功获取飞书访问令牌")
+                        trace.debug("   - 令牌完整长度: %s 字符", len(token))
+                        trace.debug("   - 令牌类型: %s", type(token))
                         return token
                     else:
-                        print(f"❌ [CloudSync] 令牌为空")
+                        trace.error("❌ [CloudSync] 令牌为空")
                         return None
                 else:
                     error_msg = f"获取飞书令牌失败: {result.get('msg')}"
-                    print(f"❌ [CloudSync] {error_msg}")
-                    print(f"❌ [CloudSync] 错误代码: {result.get('code')}")
-                    print(f"❌ [CloudSync] 完整错误信息: {json.dumps(result, indent=4, ensure_ascii=False)}")
+                    trace.error("❌ [CloudSync] %s", error_msg)
+                    trace.error("❌ [CloudSync] 错误代码: %s", result.get('code'))
+                    trace.debug("❌ [CloudSync] 完整错误信息: %s", trace.json(result))
                     self.logger.error(error_msg)
                     
                     # 如果是权限或配置错误，不需要重试
                     if result.get('code') in [99991663, 99991664, 99991665]:  # 权限相关错误
-                        print(f"❌ [CloudSync] 权限相关错误，不进行重试")
+                        trace.error("❌ [CloudSync] 权限相关错误，不进行重试")
                         return None
                     
                     if attempt < max_retries - 1:
                         delay = self.rate_limiter.exponential_backoff(attempt, 2.0)
-                        print(f"   - {delay:.2f}秒后重试...")
+                        trace.debug("   - %.2f秒后重试...", delay)
                         time.sleep(delay)
                         continue
                     return None
                     
             except requests.exceptions.RequestException as e:
                 error_msg = f"获取飞书令牌网络异常: {e}"
-                print(f"❌ [CloudSync] {error_msg}")
-                print(f"❌ [CloudSync] 异常类型: {type(e).__name__}")
-                print(f"❌ [CloudSync] 异常详情: {str(e)}")
+                trace.error("❌ [CloudSync] %s", error_msg)
+                trace.error("❌ [CloudSync] 异常类型: %s", type(e).__name__)
+                trace.error("❌ [CloudSync] 异常详情: %s", str(e))
                 if hasattr(e, 'response') and e.response is not None:
-                    print(f"❌ [CloudSync] 响应状态码: {e.response.status_code}")
-                    print(f"❌ [CloudSync] 响应内容: {e.response.text[:500]}...")
+                    trace.error("❌ [CloudSync] 响应状态码: %s", e.response.status_code)
+                    trace.error("❌ [CloudSync] 响应内容: %s...", e.response.text[:500])
                 self.logger.error(error_msg)
                 
                 if attempt < max_retries - 1:
                     delay = self.rate_limiter.exponential_backoff(attempt, 3.0)
-                    print(f"   - {delay:.2f}秒后重试...")
+                    trace.debug("   - %.2f秒后重试...", delay)
                     time.sleep(delay)
                     continue
                 return None
                 
             except Exception as e:
                 error_msg = f"获取飞书令牌异常: {e}"
-                print(f"❌ [CloudSync] {error_msg}")
-                print(f"❌ [CloudSync] 异常类型: {type(e).__name__}")
-                print(f"❌ [CloudSync] 异常详情: {str(e)}")
+                trace.error("❌ [CloudSync] %s", error_msg)
+                trace.error("❌ [CloudSync] 异常类型: %s", type(e).__name__)
+                trace.error("❌ [CloudSync] 异常详情: %s", str(e))
                 self.logger.error(error_msg)
                 import traceback
-                print(f"   - 异常堆栈: {traceback.format_exc()}")
+                trace.debug("   - 异常堆栈: %s", traceback.format_exc())
                 
                 if attempt < max_retries - 1:
                     delay = self.rate_limiter.exponential_backoff(attempt, 5.0)
-                    print(f"   - {delay:.2f}秒后重试...")
+                    trace.debug("   - %.2f秒后重试...", delay)
                     time.sleep(delay)
                     continue
                 return None
         
-        print(f"❌ [CloudSync] 获取飞书访问令牌失败，已用尽所有重试次数")
         self.logger.error(f"❌ 获取飞书访问令牌失败，已用尽所有重试次数")
         return None
     
+    @trace.traced('feishu.sync')
     def sync_to_feishu(self, data: List[Dict[str, Any]], 
                       spreadsheet_token: str, 
                       table_id: str = None,
@@ -1110,34 +1307,32 @@ class CloudSyncManager:
         Returns:
             是否同步成功
         """
-        print(f"\n" + "="*100)
-        print(f"🚀 [CloudSync] 开始飞书多维表格同步流程 - 详细参数")
-        print(f"📋 [CloudSync] 函数调用参数详情:")
-        print(f"   - 函数名: sync_to_feishu")
-        print(f"   - data 参数类型: {type(data)}")
-        print(f"   - data 参数长度: {len(data)}")
-        print(f"   - spreadsheet_token 参数: '{spreadsheet_token}' (类型: {type(spreadsheet_token)}, 长度: {len(spreadsheet_token)})")
-        print(f"   - table_id 参数: '{table_id}' (类型: {type(table_id)})")
-        print(f"   - max_retries 参数: {max_retries} (类型: {type(max_retries)})")
-        print(f"   - continue_on_failure 参数: {continue_on_failure} (类型: {type(continue_on_failure)})")
-        print(f"   - 调用时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
-        print(f"   - 进程ID: {os.getpid()}")
-        print(f"   - 线程ID: {threading.current_thread().ident}")
+        trace.debug("🚀 [CloudSync] 开始飞书多维表格同步流程 - 详细参数")
+        trace.debug("📋 [CloudSync] 函数调用参数详情:")
+        trace.debug("   - 函数名: sync_to_feishu")
+        trace.debug("   - data 参数类型: %s", type(data))
+        trace.debug("   - data 参数长度: %s", len(data))
+        trace.debug("   - spreadsheet_token 参数: '%s' (类型: %s, 长度: %s)", spreadsheet_token, type(spreadsheet_token), len(spreadsheet_token))
+        trace.debug("   - table_id 参数: '%s' (类型: %s)", table_id, type(table_id))
+        trace.debug("   - max_retries 参数: %s (类型: %s)", max_retries, type(max_retries))
+        trace.debug("   - continue_on_failure 参数: %s (类型: %s)", continue_on_failure, type(continue_on_failure))
+        trace.debug("   - 进程ID: %s", os.getpid())
+        trace.debug("   - 线程ID: %s", threading.current_thread().ident)
         
         # 详细打印前3条数据
-        print(f"\n📝 [CloudSync] 输入数据详细分析:")
+        trace.debug("📝 [CloudSync] 输入数据详细分析:")
         for i, item in enumerate(data[:3]):
-            print(f"   数据项 {i+1}:")
-            print(f"     - 数据类型: {type(item)}")
-            print(f"     - 数据字段数: {len(item) if isinstance(item, dict) else 'N/A'}")
+            trace.debug("   数据项 %s:", i+1)
+            trace.debug("     - 数据类型: %s", type(item))
+            trace.debug("     - 数据字段数: %s", len(item) if isinstance(item, dict) else 'N/A')
             if isinstance(item, dict):
-                print(f"     - 所有字段: {list(item.keys())}")
+                trace.debug("     - 所有字段: %s", list(item.keys()))
                 for key, value in item.items():
-                    print(f"       * {key}: '{str(value)[:100]}...' (类型: {type(value)}, 长度: {len(str(value))})")
+                    trace.debug("       * %s: '%s...' (类型: %s, 长度: %s)", key, str(value)[:100], type(value), len(str(value)))
             else:
-                print(f"     - 数据内容: {str(item)[:200]}...")
+                trace.debug("     - 数据内容: %s...", str(item)[:200])
         if len(data) > 3:
-            print(f"   ... 还有 {len(data) - 3} 条数据项")
+            trace.debug("   ... 还有 %s 条数据项", len(data) - 3)
         
         self.logger.info(f"🚀 [CloudSync] 开始飞书同步流程")
         self.logger.info(f"   - 数据条数: {len(data)}")
@@ -1146,83 +1341,72 @@ class CloudSyncManager:
         self.logger.info(f"   - 最大重试次数: {max_retries}")
         self.logger.info(f"   - 失败时继续执行: {continue_on_failure}")
         
-        print(f"\n🔄 [CloudSync] 开始飞书同步重试循环")
-        print(f"   - 重试范围: range({max_retries}) = {list(range(max_retries))}")
-        print(f"   - 循环类型: for attempt in range(max_retries)")
+        trace.debug("🔄 [CloudSync] 开始飞书同步重试循环")
+        trace.debug("   - 重试范围: range(%s) = %s", max_retries, list(range(max_retries)))
+        trace.debug("   - 循环类型: for attempt in range(max_retries)")
         
         for attempt in range(max_retries):
             try:
-                print(f"\n" + "-"*80)
-                print(f"🔑 [CloudSync] 尝试获取飞书访问令牌 (第{attempt + 1}/{max_retries}次)")
-                print(f"📊 [CloudSync] 令牌获取尝试详情:")
-                print(f"   - attempt 变量: {attempt} (类型: {type(attempt)})")
-                print(f"   - 尝试编号: {attempt + 1}")
-                print(f"   - 总尝试次数: {max_retries}")
-                print(f"   - 剩余尝试次数: {max_retries - attempt - 1}")
-                print(f"   - 是否最后一次尝试: {attempt == max_retries - 1}")
-                print(f"   - 令牌获取重试次数: 2")
-                print(f"   - 当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+                trace.debug("🔑 [CloudSync] 尝试获取飞书访问令牌 (第%s/%s次)", attempt + 1, max_retries)
+                trace.debug("📊 [CloudSync] 令牌获取尝试详情:")
+                trace.debug("   - attempt 变量: %s (类型: %s)", attempt, type(attempt))
+                trace.debug("   - 尝试编号: %s", attempt + 1)
+                trace.debug("   - 总尝试次数: %s", max_retries)
+                trace.debug("   - 剩余尝试次数: %s", max_retries - attempt - 1)
+                trace.debug("   - 是否最后一次尝试: %s", attempt == max_retries - 1)
+                trace.debug("   - 令牌获取重试次数: 2")
                 
                 self.logger.info(f"🔑 [CloudSync] 尝试获取飞书访问令牌 (第{attempt + 1}次)")
                 
-                print(f"\n🚀 [CloudSync] 调用 get_feishu_access_token 方法")
-                print(f"   - 方法参数: max_retries=2")
-                print(f"   - 调用时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+                trace.debug("🚀 [CloudSync] 调用 get_feishu_access_token 方法")
+                trace.debug("   - 方法参数: max_retries=2")
                 
                 access_token = self.get_feishu_access_token(max_retries=2)  # 令牌获取使用较少重试次数
                 
-                print(f"\n📊 [CloudSync] 令牌获取结果分析")
-                print(f"   - 返回值: '{access_token}' (类型: {type(access_token)})")
-                print(f"   - 令牌长度: {len(access_token) if access_token else 0}")
-                print(f"   - 令牌是否有效: {bool(access_token)}")
-                print(f"   - 返回时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+                trace.debug("📊 [CloudSync] 令牌获取结果分析")
+                trace.debug("   - 令牌长度: %s", len(access_token) if access_token else 0)
+                trace.debug("   - 令牌是否有效: %s", bool(access_token))
                 
                 if not access_token:
-                    print(f"\n❌ [CloudSync] 令牌获取失败处理")
-                    print(f"   - 当前尝试: {attempt + 1}/{max_retries}")
-                    print(f"   - 是否还有重试机会: {attempt < max_retries - 1}")
+                    trace.error("❌ [CloudSync] 令牌获取失败处理")
+                    trace.debug("   - 当前尝试: %s/%s", attempt + 1, max_retries)
+                    trace.debug("   - 是否还有重试机会: %s", attempt < max_retries - 1)
                     
                     if attempt < max_retries - 1:
-                        print(f"   - 🔄 准备重试")
+                        trace.debug("   - 🔄 准备重试")
                         delay = self.rate_limiter.exponential_backoff(attempt, 5.0)
-                        print(f"   - 计算延迟: {delay:.2f}秒")
-                        print(f"   - 延迟类型: {type(delay)}")
+                        trace.debug("   - 计算延迟: %.2f秒", delay)
+                        trace.debug("   - 延迟类型: %s", type(delay))
                         self.logger.warning(f"⚠️ [CloudSync] 获取飞书令牌失败，{delay:.2f}秒后重试 (尝试 {attempt + 1}/{max_retries})")
-                        print(f"   - 开始等待: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
                         time.sleep(delay)
-                        print(f"   - 等待结束: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
                         continue
                     else:
-                        print(f"   - ❌ 已用尽所有重试机会")
-                        print(f"   - continue_on_failure: {continue_on_failure}")
+                        trace.debug("   - ❌ 已用尽所有重试机会")
+                        trace.debug("   - continue_on_failure: %s", continue_on_failure)
                         if continue_on_failure:
-                            print(f"   - 选择: 继续执行任务")
+                            trace.debug("   - 选择: 继续执行任务")
                             self.logger.error("❌ [CloudSync] 飞书令牌获取失败，但继续执行任务")
                             return False
                         else:
-                            print(f"   - 选择: 抛出异常")
+                            trace.debug("   - 选择: 抛出异常")
                             self.logger.error("❌ [CloudSync] 飞书令牌获取失败，抛出异常")
                             raise Exception("无法获取飞书访问令牌")
                 
-                print(f"\n✅ [CloudSync] 飞书访问令牌获取成功")
-                print(f"   - 令牌摘要: '{access_token[:10]}...'")
-                print(f"   - 令牌完整长度: {len(access_token)}")
+                trace.info("✅ [CloudSync] 飞书访问令牌获取成功")
+                trace.debug("   - 令牌完整长度: %s", len(access_token))
                 self.logger.info(f"✅ [CloudSync] 飞书访问令牌获取成功")
                 
-                print(f"\n🚀 [CloudSync] 调用 _execute_feishu_sync 方法")
-                print(f"   - 方法参数详情:")
-                print(f"     - data: {type(data)} (长度: {len(data)})")
-                print(f"     - spreadsheet_token: '{spreadsheet_token}'")
-                print(f"     - table_id: '{table_id}'")
-                print(f"     - access_token: '{access_token[:10]}...'")
-                print(f"   - 调用时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+                trace.debug("🚀 [CloudSync] 调用 _execute_feishu_sync 方法")
+                trace.debug("   - 方法参数详情:")
+                trace.debug("     - data: %s (长度: %s)", type(data), len(data))
+                trace.debug("     - spreadsheet_token: '%s'", spreadsheet_token)
+                trace.debug("     - table_id: '%s'", table_id)
                 
                 result = self._execute_feishu_sync(data, spreadsheet_token, table_id, access_token)
                 
-                print(f"\n📊 [CloudSync] 同步执行结果分析")
-                print(f"   - 返回值: {result} (类型: {type(result)})")
-                print(f"   - 是否成功: {bool(result)}")
-                print(f"   - 返回时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+                trace.debug("📊 [CloudSync] 同步执行结果分析")
+                trace.debug("   - 返回值: %s (类型: %s)", result, type(result))
+                trace.debug("   - 是否成功: %s", bool(result))
                 self.logger.info(f"📊 [CloudSync] 同步执行结果: {result}")
                 return result
                 
@@ -1269,6 +1453,8 @@ class CloudSyncManager:
         self.logger.error("❌ [CloudSync] 所有重试尝试都已用尽")
         return False
     
+    @trace.traced('feishu.execute')
+    @stage_metrics.timed('feishu_sync')
     def _execute_feishu_sync(self, data: List[Dict[str, Any]], 
                            spreadsheet_token: str, 
                            table_id: str,
@@ -1286,90 +1472,79 @@ class CloudSyncManager:
             是否同步成功
         """
         try:
-             print("\n" + "="*80)
-             print("🔧 [CloudSync] 开始执行飞书同步核心逻辑")
-             print(f"📋 [CloudSync] 输入参数详细信息:")
-             print(f"   - data 参数类型: {type(data)}")
-             print(f"   - data 参数长度: {len(data)}")
-             print(f"   - spreadsheet_token 参数: '{spreadsheet_token}' (类型: {type(spreadsheet_token)}, 长度: {len(spreadsheet_token)})")
-             print(f"   - table_id 参数: '{table_id}' (类型: {type(table_id)})")
-             print(f"   - access_token 参数: '{access_token[:15]}...' (类型: {type(access_token)}, 长度: {len(access_token)})")
+             trace.debug("🔧 [CloudSync] 开始执行飞书同步核心逻辑")
+             trace.debug("📋 [CloudSync] 输入参数详细信息:")
+             trace.debug("   - data 参数类型: %s", type(data))
+             trace.debug("   - data 参数长度: %s", len(data))
+             trace.debug("   - spreadsheet_token 参数: '%s' (类型: %s, 长度: %s)", spreadsheet_token, type(spreadsheet_token), len(spreadsheet_token))
+             trace.debug("   - table_id 参数: '%s' (类型: %s)", table_id, type(table_id))
              
              # 详细打印前3条数据
-             print(f"\n📝 [CloudSync] 输入数据详细内容:")
-             for i, item in enumerate(data[:3]):
-                 print(f"   数据项 {i+1}:")
-                 print(f"     - 数据类型: {type(item)}")
-                 print(f"     - 数据字段数: {len(item) if isinstance(item, dict) else 'N/A'}")
-                 if isinstance(item, dict):
-                     print(f"     - 所有字段: {list(item.keys())}")
-                     for key, value in item.items():
-                         print(f"       * {key}: '{str(value)[:100]}...' (类型: {type(value)})")
-                 else:
-                     print(f"     - 数据内容: {str(item)[:200]}...")
-             if len(data) > 3:
-                 print(f"   ... 还有 {len(data) - 3} 条数据项")
-             print("="*80)
+             if trace.debug_enabled:
+                 trace.debug("📝 [CloudSync] 输入数据详细内容:")
+                 for i, item in enumerate(data[:3]):
+                     trace.debug("   数据项 %s:", i+1)
+                     trace.debug("     - 数据类型: %s", type(item))
+                     trace.debug("     - 数据字段数: %s", len(item) if isinstance(item, dict) else 'N/A')
+                     if isinstance(item, dict):
+                         trace.debug("     - 所有字段: %s", list(item.keys()))
+                         for key, value in item.items():
+                             trace.debug("       * %s: '%s...' (类型: %s)", key, str(value)[:100], type(value))
+                     else:
+                         trace.debug("     - 数据内容: %s...", str(item)[:200])
+                 if len(data) > 3:
+                     trace.debug("   ... 还有 %s 条数据项", len(data) - 3)
              
              self.logger.info(f"🔧 [CloudSync] 开始执行飞书同步核心逻辑")
              self.logger.info(f"   - 数据条数: {len(data)}")
              self.logger.info(f"   - 表格Token: {spreadsheet_token[:10]}...")
              self.logger.info(f"   - 表格ID: {table_id}")
              
-             # 打印前3条数据的详细信息用于调试
-             self.logger.info(f"📋 [CloudSync] 输入数据示例:")
-             for i, item in enumerate(data[:3]):
-                 self.logger.info(f"   - 第{i+1}条数据字段: {list(item.keys())}")
-                 self.logger.info(f"   - 第{i+1}条数据内容: {str(item)[:200]}...")
-             
              # 设置请求头
              headers = {
                  'Authorization': f'Bearer {access_token}',
                  'Content-Type': 'application/json'
              }
-             print(f"\n🔑 [CloudSync] 请求头设置完成")
-             print(f"   - Authorization: Bearer {access_token[:10]}...")
+             trace.debug("🔑 [CloudSync] 请求头设置完成")
              self.logger.info(f"🔑 [CloudSync] 请求头设置完成")
              
              # 获取表格字段信息以确定字段类型
-             print(f"\n📋 [CloudSync] 开始获取飞书表格字段信息")
+             trace.debug("📋 [CloudSync] 开始获取飞书表格字段信息")
              fields_url = f"{self.feishu_config['base_url']}/bitable/v1/apps/{spreadsheet_token}/tables/{table_id}/fields"
-             print(f"📋 [CloudSync] 字段查询详细参数:")
-             print(f"   - base_url: {self.feishu_config['base_url']}")
-             print(f"   - spreadsheet_token: {spreadsheet_token}")
-             print(f"   - table_id: {table_id}")
-             print(f"   - 完整URL: {fields_url}")
-             print(f"   - URL长度: {len(fields_url)} 字符")
-             print(f"   - 请求方法: GET")
-             print(f"   - 请求头: {json.dumps(headers, indent=4, ensure_ascii=False)}")
-             print(f"   - 超时设置: 30秒")
+             trace.debug("📋 [CloudSync] 字段查询详细参数:")
+             trace.debug("   - base_url: %s", self.feishu_config['base_url'])
+             trace.debug("   - spreadsheet_token: %s", spreadsheet_token)
+             trace.debug("   - table_id: %s", table_id)
+             trace.debug("   - 完整URL: %s", fields_url)
+             trace.debug("   - URL长度: %s 字符", len(fields_url))
+             trace.debug("   - 请求方法: GET")
+             trace.debug("   - 请求头: %s", trace.json(headers))
+             trace.debug("   - 超时设置: 30秒")
              self.logger.info(f"📋 [CloudSync] 开始获取飞书表格字段信息")
              self.logger.info(f"   - 字段查询URL: {fields_url}")
              
              # 应用文档级频率限制
-             print(f"\n⏱️ [CloudSync] 应用文档级频率限制检查...")
-             print(f"   - 文档Token: {spreadsheet_token}")
-             print(f"   - 当前文档调用记录: {self.rate_limiter.doc_call_times.get(spreadsheet_token, [])}")
-             print(f"   - 文档级最大调用数: {self.rate_limiter.max_doc_calls_per_second}")
+             trace.debug("⏱️ [CloudSync] 应用文档级频率限制检查...")
+             trace.debug("   - 文档Token: %s", spreadsheet_token)
+             trace.debug("   - 当前文档调用记录: %s", self.rate_limiter.doc_call_times.get(spreadsheet_token, []))
+             trace.debug("   - 文档级最大调用数: %s", self.rate_limiter.max_doc_calls_per_second)
              self.rate_limiter.wait_for_doc_call(spreadsheet_token)
-             print(f"   - 频率限制检查通过")
+             trace.debug("   - 频率限制检查通过")
              
-             print(f"\n🌐 [CloudSync] 发送字段查询请求...")
-             print(f"   - 请求时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+             trace.debug("🌐 [CloudSync] 发送字段查询请求...")
              self.logger.info(f"🌐 发送字段查询请求...")
              # 记录文档级API调用
              self.rate_limiter.record_doc_call(spreadsheet_token)
-             print(f"   - 已记录文档级API调用")
-             print(f"   - 更新后文档调用记录: {self.rate_limiter.doc_call_times.get(spreadsheet_token, [])}")
+             trace.debug("   - 已记录文档级API调用")
+             trace.debug("   - 更新后文档调用记录: %s", self.rate_limiter.doc_call_times.get(spreadsheet_token, []))
              
              fields_response = requests.get(fields_url, headers=headers, timeout=30)
-             print(f"\n📊 [CloudSync] 字段查询响应详情:")
-             print(f"   - 响应状态码: {fields_response.status_code}")
-             print(f"   - 响应状态文本: {fields_response.reason}")
-             print(f"   - 响应头: {json.dumps(dict(fields_response.headers), indent=4, ensure_ascii=False)}")
-             print(f"   - 响应内容长度: {len(fields_response.text)} 字符")
-             print(f"   - 响应内容: {fields_response.text}")
-             print(f"   - 响应时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+             trace.debug("📊 [CloudSync] 字段查询响应详情:")
+             trace.debug("   - 响应状态码: %s", fields_response.status_code)
+             trace.debug("   - 响应状态文本: %s", fields_response.reason)
+             trace.debug("   - 响应头: %s", trace.json(dict(fields_response.headers)))
+             trace.debug("   - 响应内容长度: %s 字符", len(fields_response.text))
+             trace.debug("   - 响应内容: %s", fields_response.text)
              self.logger.info(f"   - 字段查询响应状态: {fields_response.status_code}")
              
              # 处理频率限制错误
@@ -1387,51 +1562,50 @@ class CloudSyncManager:
              field_name_to_id = {}
              
              if fields_response.status_code == 200:
-                 print(f"\n✅ [CloudSync] 字段查询请求成功，开始解析响应...")
+                 trace.info("✅ [CloudSync] 字段查询请求成功，开始解析响应...")
                  try:
                      fields_result = fields_response.json()
-                     print(f"📊 [CloudSync] 字段响应JSON解析成功:")
-                     print(f"   - 响应类型: {type(fields_result)}")
-                     print(f"   - 响应代码: {fields_result.get('code')}")
-                     print(f"   - 响应消息: {fields_result.get('msg', 'N/A')}")
-                     print(f"   - 完整响应: {json.dumps(fields_result, indent=4, ensure_ascii=False)}")
+                     trace.debug("📊 [CloudSync] 字段响应JSON解析成功:")
+                     trace.debug("   - 响应类型: %s", type(fields_result))
+                     trace.debug("   - 响应代码: %s", fields_result.get('code'))
+                     trace.debug("   - 响应消息: %s", fields_result.get('msg', 'N/A'))
+                     trace.debug("   - 完整响应: %s", trace.json(fields_result))
                      self.logger.info(f"   - 字段查询响应解析: code={fields_result.get('code')}, msg={fields_result.get('msg', 'N/A')}")
                      
                      if fields_result.get('code') == 0:
-                         print(f"\n🔍 [CloudSync] 解析字段数据...")
+                         trace.debug("🔍 [CloudSync] 解析字段数据...")
                          data_section = fields_result.get('data', {})
-                         print(f"   - data 部分类型: {type(data_section)}")
-                         print(f"   - data 部分内容: {json.dumps(data_section, indent=4, ensure_ascii=False)}")
+                         trace.debug("   - data 部分类型: %s", type(data_section))
+                         trace.debug("   - data 部分内容: %s", trace.json(data_section))
                          
                          fields_data = data_section.get('items', [])
-                         print(f"   - items 部分类型: {type(fields_data)}")
-                         print(f"   - items 部分长度: {len(fields_data)}")
+                         trace.debug("   - items 部分类型: %s", type(fields_data))
+                         trace.debug("   - items 部分长度: %s", len(fields_data))
                          
                          field_types = {}
                          available_fields = []
                          field_name_to_id = {}
                          
-                         print(f"\n📋 [CloudSync] 逐个解析字段信息:")
+                         trace.debug("📋 [CloudSync] 逐个解析字段信息:")
                          for i, field in enumerate(fields_data):
                              field_name = field.get('field_name')
                              field_id = field.get('field_id')
                              field_type = field.get('type')
                              
-                             print(f"   字段 {i+1}:")
-                             print(f"     - 原始字段数据: {json.dumps(field, indent=6, ensure_ascii=False)}")
-                             print(f"     - 字段名: '{field_name}' (类型: {type(field_name)})")
-                             print(f"     - 字段ID: '{field_id}' (类型: {type(field_id)})")
-                             print(f"     - 字段类型: {field_type} (类型: {type(field_type)})")
+                             trace.debug("   字段 %s:", i+1)
+                             trace.debug("     - 原始字段数据: %s", trace.json(field))
+                             trace.debug("     - 字段名: '%s' (类型: %s)", field_name, type(field_name))
+                             trace.debug("     - 字段ID: '%s' (类型: %s)", field_id, type(field_id))
+                             trace.debug("     - 字段类型: %s (类型: %s)", field_type, type(field_type))
                              
                              field_types[field_name] = field_type
                              available_fields.append(field_name)
                              field_name_to_id[field_name] = field_id
                          
-                         print(f"\n✅ [CloudSync] 字段信息解析完成:")
-                         print(f"   - 字段总数: {len(available_fields)}")
-                         print(f"   - 可用字段列表: {available_fields}")
-                         print(f"   - 字段类型映射: {json.dumps(field_types, indent=4, ensure_ascii=False)}")
-                         print(f"   - 字段名到ID映射: {json.dumps(field_name_to_id, indent=4, ensure_ascii=False)}")
+                         trace.info("✅ [CloudSync] 字段信息解析完成:")
+                         trace.debug("   - 字段总数: %s", len(available_fields))
+                         trace.debug("   - 字段类型映射: %s", trace.json(field_types))
+                         trace.debug("   - 字段名到ID映射: %s", trace.json(field_name_to_id))
                          
                          self.logger.info(f"✅ 飞书表格字段信息获取成功:")
                          self.logger.info(f"   - 可用字段数量: {len(available_fields)}")
@@ -1439,33 +1613,32 @@ class CloudSyncManager:
                          self.logger.info(f"   - 字段类型映射: {field_types}")
                          self.logger.info(f"   - 字段名到ID映射: {field_name_to_id}")
                      else:
-                         print(f"\n❌ [CloudSync] 字段查询API返回错误:")
-                         print(f"   - 错误代码: {fields_result.get('code')}")
-                         print(f"   - 错误消息: {fields_result.get('msg')}")
-                         print(f"   - 完整错误响应: {json.dumps(fields_result, indent=4, ensure_ascii=False)}")
+                         trace.error("❌ [CloudSync] 字段查询API返回错误:")
+                         trace.debug("   - 错误代码: %s", fields_result.get('code'))
+                         trace.debug("   - 错误消息: %s", fields_result.get('msg'))
+                         trace.debug("   - 完整错误响应: %s", trace.json(fields_result))
                          self.logger.error(f"❌ 获取字段信息失败: {fields_result.get('msg')}")
                  except json.JSONDecodeError as e:
-                     print(f"\n❌ [CloudSync] 字段响应JSON解析失败:")
-                     print(f"   - JSON错误: {str(e)}")
-                     print(f"   - 原始响应内容: {fields_response.text}")
+                     trace.error("❌ [CloudSync] 字段响应JSON解析失败:")
+                     trace.debug("   - JSON错误: %s", str(e))
+                     trace.debug("   - 原始响应内容: %s", fields_response.text)
                      self.logger.error(f"❌ 字段响应JSON解析失败: {str(e)}")
              else:
-                 print(f"\n❌ [CloudSync] 字段查询请求失败:")
-                 print(f"   - HTTP状态码: {fields_response.status_code}")
-                 print(f"   - 状态文本: {fields_response.reason}")
-                 print(f"   - 响应头: {json.dumps(dict(fields_response.headers), indent=4, ensure_ascii=False)}")
-                 print(f"   - 响应内容: {fields_response.text}")
+                 trace.error("❌ [CloudSync] 字段查询请求失败:")
+                 trace.debug("   - HTTP状态码: %s", fields_response.status_code)
+                 trace.debug("   - 状态文本: %s", fields_response.reason)
+                 trace.debug("   - 响应头: %s", trace.json(dict(fields_response.headers)))
+                 trace.debug("   - 响应内容: %s", fields_response.text)
                  self.logger.error(f"❌ 获取字段信息请求失败: HTTP {fields_response.status_code}")
                  self.logger.error(f"   - 响应内容: {fields_response.text[:200]}...")
              
              # 准备数据记录
-             print(f"\n🔄 [CloudSync] 开始准备数据记录")
-             print(f"📝 [CloudSync] 数据记录准备参数:")
-             print(f"   - 待处理数据条数: {len(data)}")
-             print(f"   - 数据类型: {type(data)}")
-             print(f"   - 可用字段: {available_fields if 'available_fields' in locals() else 'N/A'}")
-             print(f"   - 字段类型映射: {field_types if 'field_types' in locals() else 'N/A'}")
-             print(f"   - 字段名到ID映射: {field_name_to_id if 'field_name_to_id' in locals() else 'N/A'}")
+             trace.debug("🔄 [CloudSync] 开始准备数据记录")
+             trace.debug("📝 [CloudSync] 数据记录准备参数:")
+             trace.debug("   - 数据类型: %s", type(data))
+             trace.debug("   - 可用字段: %s", available_fields if 'available_fields' in locals() else 'N/A')
+             trace.debug("   - 字段类型映射: %s", field_types if 'field_types' in locals() else 'N/A')
+             trace.debug("   - 字段名到ID映射: %s", field_name_to_id if 'field_name_to_id' in locals() else 'N/A')
              self.logger.info(f"🔄 开始准备数据记录")
              self.logger.info(f"   - 待处理数据条数: {len(data)}")
              
@@ -1473,27 +1646,28 @@ class CloudSyncManager:
              skipped_fields = set()
              processed_fields = set()
              
-             print(f"\n📋 [CloudSync] 逐条处理数据记录:")
+             trace.debug("📋 [CloudSync] 逐条处理数据记录:")
              for idx, tweet in enumerate(data):
-                 print(f"\n   处理数据项 {idx + 1}/{len(data)}:")
-                 print(f"     - 数据类型: {type(tweet)}")
-                 print(f"     - 数据字段数: {len(tweet) if isinstance(tweet, dict) else 'N/A'}")
-                 if isinstance(tweet, dict):
-                     print(f"     - 原始数据字段: {list(tweet.keys())}")
-                     print(f"     - 原始数据内容: {json.dumps(tweet, indent=8, ensure_ascii=False)[:500]}...")
-                     for key, value in tweet.items():
-                         print(f"       * {key}: '{str(value)[:100]}...' (类型: {type(value)})")
-                 else:
-                     print(f"     - 数据内容: {str(tweet)[:200]}...")
+                 if trace.debug_enabled:
+                     trace.debug("   处理数据项 %s/%s:", idx + 1, len(data))
+                     trace.debug("     - 数据类型: %s", type(tweet))
+                     trace.debug("     - 数据字段数: %s", len(tweet) if isinstance(tweet, dict) else 'N/A')
+                     if isinstance(tweet, dict):
+                         trace.debug("     - 原始数据字段: %s", list(tweet.keys()))
+                         trace.debug("     - 原始数据内容: %s...", trace.json(tweet, limit=500))
+                         for key, value in tweet.items():
+                             trace.debug("       * %s: '%s...' (类型: %s)", key, str(value)[:100], type(value))
+                     else:
+                         trace.debug("     - 数据内容: %s...", str(tweet)[:200])
                  
                  self.logger.info(f"   - 处理第 {idx + 1}/{len(data)} 条数据")
                  self.logger.debug(f"     - 原始数据字段: {list(tweet.keys()) if isinstance(tweet, dict) else 'N/A'}")
                  
                  # 数据已经在web_app.py中正确处理，直接使用传入的数据
-                 print(f"     - 📋 使用已处理的数据字段")
-                 print(f"       - 推文原文内容: '{str(tweet.get('推文原文内容', ''))[:100]}...' (长度: {len(str(tweet.get('推文原文内容', '')))})")
-                 print(f"       - 作者: '{tweet.get('作者（账号）', '')}' (类型: {type(tweet.get('作者（账号）', ''))})")
-                 print(f"       - 发布时间: {tweet.get('发布时间', 0)} (类型: {type(tweet.get('发布时间', 0))})")
+                 if trace.debug_enabled:
+                     trace.debug("       - 推文原文内容: '%s...' (长度: %s)", str(tweet.get('推文原文内容', ''))[:100], len(str(tweet.get('推文原文内容', ''))))
+                     trace.debug("       - 作者: '%s' (类型: %s)", tweet.get('作者（账号）', ''), type(tweet.get('作者（账号）', '')))
+                     trace.debug("       - 发布时间: %s (类型: %s)", tweet.get('发布时间', 0), type(tweet.get('发布时间', 0)))
                  self.logger.info(f"     - 📋 使用已处理的数据字段")
                  self.logger.debug(f"       - 推文原文内容: {str(tweet.get('推文原文内容', ''))[:50]}...")
                  self.logger.debug(f"       - 作者: {tweet.get('作者（账号）', '')}")
@@ -1530,7 +1704,7 @@ class CloudSyncManager:
                          return str(value) if value is not None else ''
                  
                  # 构建所有字段值
-                 print(f"     - 🔧 构建字段值...")
+                 trace.debug("     - 🔧 构建字段值...")
                  
                  all_possible_fields = {
                      '推文原文内容': format_field_value('推文原文内容', tweet.get('推文原文内容', ''), field_types.get('推文原文内容', 1) if 'field_types' in locals() else 1),
@@ -1543,33 +1717,35 @@ class CloudSyncManager:
                      '转发': format_field_value('转发', tweet.get('转发', 0), field_types.get('转发', 2) if 'field_types' in locals() else 2)
                  }
                  
-                 print(f"     - 📋 所有可能字段: {json.dumps(all_possible_fields, indent=8, ensure_ascii=False)[:300]}...")
+                 trace.debug("     - 📋 所有可能字段: %s...", trace.json(all_possible_fields, limit=300))
                  
                  # 只保留飞书表格中实际存在的字段，使用字段名作为键
                  # 根据飞书API文档，应该使用字段名而不是字段ID
-                 print(f"     - 🔍 检查字段是否存在于飞书表格...")
+                 trace.debug("     - 🔍 检查字段是否存在于飞书表格...")
                  record_fields = {}
                  for field_name, field_value in all_possible_fields.items():
-                     print(f"       检查字段 '{field_name}':")
-                     print(f"         - 字段值: '{str(field_value)[:100]}...'")
-                     print(f"         - 可用字段列表: {available_fields if 'available_fields' in locals() else 'N/A'}")
+                     if trace.debug_enabled:
+                         trace.debug("       检查字段 '%s':", field_name)
+                         trace.debug("         - 字段值: '%s...'", str(field_value)[:100])
+                         trace.debug("         - 可用字段列表: %s", available_fields if 'available_fields' in locals() else 'N/A')
                      
                      if 'available_fields' in locals() and field_name in available_fields:
                          # 直接使用字段名作为键
                          record_fields[field_name] = field_value
                          processed_fields.add(field_name)
-                         print(f"         - ✅ 字段存在，已添加到记录")
-                         print(f"         - 添加的值: '{str(field_value)[:100]}...'")
+                         if trace.debug_enabled:
+                             trace.debug("         - ✅ 字段存在，已添加到记录")
+                             trace.debug("         - 添加的值: '%s...'", str(field_value)[:100])
                          self.logger.debug(f"     - 字段 {field_name}: {str(field_value)[:50]}...")
                      else:
                          skipped_fields.add(field_name)
-                         print(f"         - ❌ 字段不存在于飞书表格，跳过")
+                         trace.debug("         - ❌ 字段不存在于飞书表格，跳过")
                          self.logger.debug(f"     - 跳过字段 '{field_name}' (不存在于飞书表格)")
                  
-                 print(f"     - 📊 记录字段处理结果:")
-                 print(f"       - 使用字段数: {len(record_fields)}")
-                 print(f"       - 使用字段列表: {list(record_fields.keys())}")
-                 print(f"       - 记录字段内容: {json.dumps(record_fields, indent=8, ensure_ascii=False)}")
+                 trace.debug("     - 📊 记录字段处理结果:")
+                 trace.debug("       - 使用字段数: %s", len(record_fields))
+                 trace.debug("       - 使用字段列表: %s", list(record_fields.keys()))
+                 trace.debug("       - 记录字段内容: %s", trace.json(record_fields))
                  
                  self.logger.info(f"     - 第 {idx + 1} 条记录使用字段数: {len(record_fields)}")
                  self.logger.debug(f"     - 使用字段: {list(record_fields.keys())}")
@@ -1577,10 +1753,10 @@ class CloudSyncManager:
                  if record_fields:
                      record = {'fields': record_fields}
                      records.append(record)
-                     print(f"     - ✅ 记录已添加到批量列表")
-                     print(f"       - 记录结构: {json.dumps(record, indent=8, ensure_ascii=False)}")
+                     trace.debug("     - ✅ 记录已添加到批量列表")
+                     trace.debug("       - 记录结构: %s", trace.json(record))
                  else:
-                     print(f"     - ⚠️ 没有匹配的字段，跳过此记录")
+                     trace.debug("     - ⚠️ 没有匹配的字段，跳过此记录")
                      self.logger.warning(f"⚠️ 第 {idx + 1} 条数据没有匹配的字段，跳过")
              
              self.logger.info(f"✅ 数据记录准备完成:")
@@ -1597,69 +1773,64 @@ class CloudSyncManager:
                  return False
              
              # 批量创建记录
-             print(f"\n📤 [CloudSync] 开始批量创建飞书记录")
+             trace.debug("📤 [CloudSync] 开始批量创建飞书记录")
              url = f"{self.feishu_config['base_url']}/bitable/v1/apps/{spreadsheet_token}/tables/{table_id}/records/batch_create"
-             print(f"📤 [CloudSync] 批量创建API详细参数:")
-             print(f"   - base_url: {self.feishu_config['base_url']}")
-             print(f"   - spreadsheet_token: {spreadsheet_token}")
-             print(f"   - table_id: {table_id}")
-             print(f"   - 完整URL: {url}")
-             print(f"   - URL长度: {len(url)} 字符")
-             print(f"   - 请求方法: POST")
-             print(f"   - 请求头: {json.dumps(headers, indent=4, ensure_ascii=False)}")
-             print(f"   - 超时设置: 60秒")
+             trace.debug("📤 [CloudSync] 批量创建API详细参数:")
+             trace.debug("   - base_url: %s", self.feishu_config['base_url'])
+             trace.debug("   - spreadsheet_token: %s", spreadsheet_token)
+             trace.debug("   - table_id: %s", table_id)
+             trace.debug("   - 完整URL: %s", url)
+             trace.debug("   - URL长度: %s 字符", len(url))
+             trace.debug("   - 请求方法: POST")
+             trace.debug("   - 请求头: %s", trace.json(headers))
+             trace.debug("   - 超时设置: 60秒")
              self.logger.info(f"📤 [CloudSync] 开始批量创建飞书记录")
              self.logger.info(f"   - 创建URL: {url}")
              
              payload = {
                  'records': records
              }
-             print(f"\n📋 [CloudSync] 请求载荷详细信息:")
-             print(f"   - 载荷类型: {type(payload)}")
-             print(f"   - 记录数量: {len(records)}")
-             print(f"   - 载荷大小: {len(str(payload))} 字符")
-             print(f"   - 载荷JSON大小: {len(json.dumps(payload, ensure_ascii=False))} 字符")
-             print(f"   - 完整载荷内容: {json.dumps(payload, indent=4, ensure_ascii=False)}")
+             trace.debug("📋 [CloudSync] 请求载荷详细信息:")
+             trace.debug("   - 载荷类型: %s", type(payload))
+             trace.debug("   - 完整载荷内容: %s", trace.json(payload))
              
              # 详细打印每条记录
-             print(f"\n📝 [CloudSync] 载荷中的记录详情:")
-             for i, record in enumerate(records):
-                 print(f"   记录 {i+1}:")
-                 print(f"     - 记录类型: {type(record)}")
-                 print(f"     - 记录结构: {json.dumps(record, indent=6, ensure_ascii=False)}")
-                 if 'fields' in record:
-                     print(f"     - 字段数量: {len(record['fields'])}")
-                     for field_name, field_value in record['fields'].items():
-                         print(f"       * {field_name}: '{str(field_value)[:100]}...' (类型: {type(field_value)})")
+             if trace.debug_enabled:
+                 trace.debug("📝 [CloudSync] 载荷中的记录详情:")
+                 for i, record in enumerate(records):
+                     trace.debug("   记录 %s:", i+1)
+                     trace.debug("     - 记录类型: %s", type(record))
+                     trace.debug("     - 记录结构: %s", trace.json(record))
+                     if 'fields' in record:
+                         trace.debug("     - 字段数量: %s", len(record['fields']))
+                         for field_name, field_value in record['fields'].items():
+                             trace.debug("       * %s: '%s...' (类型: %s)", field_name, str(field_value)[:100], type(field_value))
              
              self.logger.info(f"   - 记录数量: {len(records)}")
-             self.logger.info(f"   - 载荷大小: {len(str(payload))} 字符")
-             self.logger.info(f"   - 载荷示例: {str(payload)[:500]}...")
+             trace.debug("   - 载荷示例: %s", trace.json(payload, limit=500))
              
              # 应用文档级频率限制
-             print(f"\n⏱️ [CloudSync] 应用文档级频率限制检查...")
-             print(f"   - 文档Token: {spreadsheet_token}")
-             print(f"   - 当前文档调用记录: {self.rate_limiter.doc_call_times.get(spreadsheet_token, [])}")
-             print(f"   - 文档级最大调用数: {self.rate_limiter.max_doc_calls_per_second}")
+             trace.debug("⏱️ [CloudSync] 应用文档级频率限制检查...")
+             trace.debug("   - 文档Token: %s", spreadsheet_token)
+             trace.debug("   - 当前文档调用记录: %s", self.rate_limiter.doc_call_times.get(spreadsheet_token, []))
+             trace.debug("   - 文档级最大调用数: %s", self.rate_limiter.max_doc_calls_per_second)
              self.rate_limiter.wait_for_doc_call(spreadsheet_token)
-             print(f"   - 频率限制检查通过")
+             trace.debug("   - 频率限制检查通过")
              
-             print(f"\n🌐 [CloudSync] 发送飞书API请求...")
-             print(f"   - 请求时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+             trace.debug("🌐 [CloudSync] 发送飞书API请求...")
              self.logger.info(f"🌐 [CloudSync] 发送飞书API请求...")
              # 记录文档级API调用
              self.rate_limiter.record_doc_call(spreadsheet_token)
-             print(f"   - 已记录文档级API调用")
-             print(f"   - 更新后文档调用记录: {self.rate_limiter.doc_call_times.get(spreadsheet_token, [])}")
+             trace.debug("   - 已记录文档级API调用")
+             trace.debug("   - 更新后文档调用记录: %s", self.rate_limiter.doc_call_times.get(spreadsheet_token, []))
              
              response = requests.post(url, headers=headers, json=payload, timeout=60)
-             print(f"\n📊 [CloudSync] 批量创建API响应详情:")
-             print(f"   - 响应状态码: {response.status_code}")
-             print(f"   - 响应状态文本: {response.reason}")
-             print(f"   - 响应头: {json.dumps(dict(response.headers), indent=4, ensure_ascii=False)}")
-             print(f"   - 响应内容长度: {len(response.text)} 字符")
-             print(f"   - 响应内容: {response.text}")
-             print(f"   - 响应时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
+             trace.debug("📊 [CloudSync] 批量创建API响应详情:")
+             trace.debug("   - 响应状态码: %s", response.status_code)
+             trace.debug("   - 响应状态文本: %s", response.reason)
+             trace.debug("   - 响应头: %s", trace.json(dict(response.headers)))
+             trace.debug("   - 响应内容长度: %s 字符", len(response.text))
+             trace.debug("   - 响应内容: %s", response.text)
              self.logger.info(f"📊 [CloudSync] 飞书API响应状态码: {response.status_code}")
              
              # 处理频率限制错误
@@ -1672,96 +1843,88 @@ class CloudSyncManager:
                      self.logger.warning(f"⚠️ 应用级频率限制触发 (HTTP 400)")
                      raise requests.exceptions.RequestException(f"应用频率限制: {result.get('msg')}")
              
-             print(f"\n🔍 [CloudSync] 检查HTTP响应状态...")
+             trace.debug("🔍 [CloudSync] 检查HTTP响应状态...")
              try:
                  response.raise_for_status()
-                 print(f"   - ✅ HTTP状态检查通过")
+                 trace.debug("   - ✅ HTTP状态检查通过")
              except requests.exceptions.HTTPError as e:
-                 print(f"   - ❌ HTTP状态检查失败: {str(e)}")
-                 print(f"   - 响应状态码: {response.status_code}")
-                 print(f"   - 响应内容: {response.text}")
+                 trace.debug("   - ❌ HTTP状态检查失败: %s", str(e))
+                 trace.debug("   - 响应状态码: %s", response.status_code)
+                 trace.debug("   - 响应内容: %s", response.text)
                  raise e
              
-             print(f"\n📊 [CloudSync] 解析响应JSON...")
+             trace.debug("📊 [CloudSync] 解析响应JSON...")
              try:
                  result = response.json()
-                 print(f"   - ✅ JSON解析成功")
-                 print(f"   - 响应类型: {type(result)}")
-                 print(f"   - 响应代码: {result.get('code')}")
-                 print(f"   - 响应消息: {result.get('msg', 'N/A')}")
-                 print(f"   - 完整响应: {json.dumps(result, indent=4, ensure_ascii=False)}")
+                 trace.debug("   - ✅ JSON解析成功")
+                 trace.debug("   - 响应类型: %s", type(result))
+                 trace.debug("   - 响应代码: %s", result.get('code'))
+                 trace.debug("   - 响应消息: %s", result.get('msg', 'N/A'))
+                 trace.debug("   - 完整响应: %s", trace.json(result))
              except json.JSONDecodeError as e:
-                 print(f"   - ❌ JSON解析失败: {str(e)}")
-                 print(f"   - 原始响应内容: {response.text}")
+                 trace.debug("   - ❌ JSON解析失败: %s", str(e))
+                 trace.debug("   - 原始响应内容: %s", response.text)
                  raise e
              
              self.logger.info(f"📊 [CloudSync] 飞书API响应解析: code={result.get('code')}, msg={result.get('msg', 'N/A')}")
              
-             print(f"\n🔍 [CloudSync] 检查API响应结果...")
+             trace.debug("🔍 [CloudSync] 检查API响应结果...")
              if result.get('code') == 0:
-                 print(f"   - ✅ API调用成功 (code=0)")
+                 trace.debug("   - ✅ API调用成功 (code=0)")
                  data_section = result.get('data', {})
-                 print(f"   - data 部分类型: {type(data_section)}")
-                 print(f"   - data 部分内容: {json.dumps(data_section, indent=4, ensure_ascii=False)}")
+                 trace.debug("   - data 部分类型: %s", type(data_section))
+                 trace.debug("   - data 部分内容: %s", trace.json(data_section))
                  
                  created_records = data_section.get('records', [])
-                 print(f"   - 创建的记录类型: {type(created_records)}")
-                 print(f"   - 创建的记录数量: {len(created_records)}")
+                 trace.debug("   - 创建的记录类型: %s", type(created_records))
+                 trace.debug("   - 创建的记录数量: %s", len(created_records))
                  
                  # 详细打印创建的记录
-                 print(f"\n📝 [CloudSync] 创建的记录详情:")
+                 trace.debug("📝 [CloudSync] 创建的记录详情:")
                  for i, created_record in enumerate(created_records[:3]):  # 只打印前3条
-                     print(f"   创建记录 {i+1}:")
-                     print(f"     - 记录类型: {type(created_record)}")
-                     print(f"     - 记录内容: {json.dumps(created_record, indent=6, ensure_ascii=False)}")
+                     trace.debug("   创建记录 %s:", i+1)
+                     trace.debug("     - 记录类型: %s", type(created_record))
+                     trace.debug("     - 记录内容: %s", trace.json(created_record))
                  if len(created_records) > 3:
-                     print(f"   ... 还有 {len(created_records) - 3} 条创建记录")
+                     trace.debug("   ... 还有 %s 条创建记录", len(created_records) - 3)
                  
-                 print(f"\n✅ [CloudSync] 成功同步到飞书多维表格:")
-                 print(f"   - 原始数据条数: {len(data)}")
-                 print(f"   - 有效记录数: {len(records)}")
-                 print(f"   - 创建成功数: {len(created_records)}")
-                 print(f"   - 成功率: {len(created_records)/len(data)*100:.1f}%")
-                 print("="*80)
+                 trace.info("✅ [CloudSync] 成功同步到飞书多维表格:")
+                 trace.debug("   - 成功率: %.1f%%", len(created_records)/len(data)*100)
                  self.logger.info(f"✅ [CloudSync] 成功同步到飞书多维表格:")
                  self.logger.info(f"   - 原始数据条数: {len(data)}")
                  self.logger.info(f"   - 有效记录数: {len(records)}")
                  self.logger.info(f"   - 创建成功数: {len(created_records)}")
                  return True
              else:
-                 print(f"   - ❌ API调用失败 (code={result.get('code')})")
-                 print(f"   - 错误代码: {result.get('code')}")
-                 print(f"   - 错误消息: {result.get('msg')}")
-                 print(f"   - 完整错误响应: {json.dumps(result, indent=4, ensure_ascii=False)}")
+                 trace.debug("   - ❌ API调用失败 (code=%s)", result.get('code'))
+                 trace.debug("   - 错误代码: %s", result.get('code'))
+                 trace.debug("   - 错误消息: %s", result.get('msg'))
+                 trace.debug("   - 完整错误响应: %s", trace.json(result))
                  
-                 print(f"\n❌ [CloudSync] 飞书同步失败: {result.get('msg')}")
-                 print(f"   - 错误详情: {result}")
-                 print("="*80)
+                 trace.error("❌ [CloudSync] 飞书同步失败: %s", result.get('msg'))
                  self.logger.error(f"❌ [CloudSync] 飞书同步失败: {result.get('msg')}")
                  self.logger.error(f"   - 错误详情: {result}")
                  return False
                  
         except requests.exceptions.RequestException as e:
-            print(f"\n❌ [CloudSync] 飞书同步网络请求异常详情:")
-            print(f"   - 异常类型: {type(e).__name__}")
-            print(f"   - 异常模块: {type(e).__module__}")
-            print(f"   - 异常消息: {str(e)}")
-            print(f"   - 异常参数: {e.args}")
+            trace.error("❌ [CloudSync] 飞书同步网络请求异常详情:")
+            trace.debug("   - 异常模块: %s", type(e).__module__)
+            trace.debug("   - 异常消息: %s", str(e))
+            trace.debug("   - 异常参数: %s", e.args)
             if hasattr(e, 'response') and e.response is not None:
-                print(f"   - 响应状态码: {e.response.status_code}")
-                print(f"   - 响应状态文本: {e.response.reason}")
-                print(f"   - 响应头: {dict(e.response.headers)}")
-                print(f"   - 响应内容长度: {len(e.response.text)}")
-                print(f"   - 响应内容: {e.response.text[:1000]}...")
+                trace.debug("   - 响应状态码: %s", e.response.status_code)
+                trace.debug("   - 响应状态文本: %s", e.response.reason)
+                trace.debug("   - 响应头: %s", dict(e.response.headers))
+                trace.debug("   - 响应内容长度: %s", len(e.response.text))
+                trace.debug("   - 响应内容: %s...", e.response.text[:1000])
             if hasattr(e, 'request') and e.request is not None:
-                print(f"   - 请求方法: {e.request.method}")
-                print(f"   - 请求URL: {e.request.url}")
-                print(f"   - 请求头: {dict(e.request.headers)}")
+                trace.debug("   - 请求方法: %s", e.request.method)
+                trace.debug("   - 请求URL: %s", e.request.url)
+                trace.debug("   - 请求头: %s", dict(e.request.headers))
                 if hasattr(e.request, 'body') and e.request.body:
-                    print(f"   - 请求体长度: {len(str(e.request.body))}")
-                    print(f"   - 请求体内容: {str(e.request.body)[:500]}...")
-            print(f"   - 异常堆栈: {traceback.format_exc()}")
-            print("="*80)
+                    trace.debug("   - 请求体长度: %s", len(str(e.request.body)))
+                    trace.debug("   - 请求体内容: %s...", str(e.request.body)[:500])
+            trace.debug("   - 异常堆栈: %s", traceback.format_exc())
             
             self.logger.error(f"❌ 飞书同步网络请求异常:")
             self.logger.error(f"   - 异常类型: {type(e).__name__}")
@@ -1771,20 +1934,17 @@ class CloudSyncManager:
                 self.logger.error(f"   - 响应内容: {e.response.text[:500]}...")
             raise e  # 重新抛出异常，让上层处理重试逻辑
         except Exception as e:
-            print(f"\n❌ [CloudSync] 飞书同步未知异常详情:")
-            print(f"   - 异常类型: {type(e).__name__}")
-            print(f"   - 异常模块: {type(e).__module__}")
-            print(f"   - 异常消息: {str(e)}")
-            print(f"   - 异常参数: {e.args}")
-            print(f"   - 异常属性: {[attr for attr in dir(e) if not attr.startswith('_')]}")
-            print(f"   - 异常堆栈: {traceback.format_exc()}")
-            print(f"   - 当前变量状态:")
-            print(f"     - data 长度: {len(data) if 'data' in locals() else 'N/A'}")
-            print(f"     - records 长度: {len(records) if 'records' in locals() else 'N/A'}")
-            print(f"     - access_token 长度: {len(access_token) if 'access_token' in locals() else 'N/A'}")
-            print(f"     - spreadsheet_token: {spreadsheet_token if 'spreadsheet_token' in locals() else 'N/A'}")
-            print(f"     - table_id: {table_id if 'table_id' in locals() else 'N/A'}")
-            print("="*80)
+            trace.error("❌ [CloudSync] 飞书同步未知异常详情:")
+            trace.debug("   - 异常模块: %s", type(e).__module__)
+            trace.debug("   - 异常消息: %s", str(e))
+            trace.debug("   - 异常参数: %s", e.args)
+            trace.debug("   - 异常属性: %s", [attr for attr in dir(e) if not attr.startswith('_')])
+            trace.debug("   - 当前变量状态:")
+            trace.debug("     - data 长度: %s", len(data) if 'data' in locals() else 'N/A')
+            trace.debug("     - records 长度: %s", len(records) if 'records' in locals() else 'N/A')
+            trace.debug("     - access_token 长度: %s", len(access_token) if 'access_token' in locals() else 'N/A')
+            trace.debug("     - spreadsheet_token: %s", spreadsheet_token if 'spreadsheet_token' in locals() else 'N/A')
+            trace.debug("     - table_id: %s", table_id if 'table_id' in locals() else 'N/A')
             
             self.logger.error(f"❌ 飞书同步过程中发生未知错误:")
             self.logger.error(f"   - 异常类型: {type(e).__name__}")
@@ -1793,6 +1953,171 @@ class CloudSyncManager:
             self.logger.error(f"   - 异常堆栈: {traceback.format_exc()}")
             raise e  # 重新抛出异常，让上层处理重试逻辑
     
+    FEISHU_BATCH_LIMIT = 500  # 飞书batch_create/batch_update单次最多500条记录
+    FEISHU_RECORD_NOT_FOUND_CODE = 1254043  # 记录已在飞书中被删除
+    
+    def _feishu_doc_request(self, method: str, url: str, headers: Dict[str, str],
+                            spreadsheet_token: str, max_retries: int = 3,
+                            **kwargs) -> Dict[str, Any]:
+        """
+        发送文档级飞书请求，频率限制时指数退避重试
+        
+        Returns:
+            飞书接口返回的JSON
+        """
+        for attempt in range(max_retries):
+            self.rate_limiter.wait_for_doc_call(spreadsheet_token)
+            self.rate_limiter.record_doc_call(spreadsheet_token)
+            response = requests.request(method, url, headers=headers, timeout=60, **kwargs)
+            
+            try:
+                result = response.json()
+            except ValueError:
+                response.raise_for_status()
+                raise
+            
+            if response.status_code == 429 or result.get('code') == 99991400:
+                if attempt < max_retries - 1:
+                    self.logger.warning(f"⚠️ 飞书频率限制触发 (HTTP {response.status_code})，退避后重试")
+                    time.sleep(self.rate_limiter.exponential_backoff(attempt, 3.0))
+                    continue
+                raise requests.exceptions.RequestException(f"频率限制: {result.get('msg')}")
+            
+            return result
+        
+        return {}
+    
+    def get_feishu_field_types(self, spreadsheet_token: str, table_id: str,
+                               headers: Dict[str, str]) -> Dict[str, int]:
+        """获取多维表格字段名到字段类型的映射"""
+        url = f"{self.feishu_config['base_url']}/bitable/v1/apps/{spreadsheet_token}/tables/{table_id}/fields"
+        result = self._feishu_doc_request('GET', url, headers, spreadsheet_token,
+                                          params={'page_size': 100})
+        if result.get('code') != 0:
+            raise Exception(f"获取飞书字段信息失败: {result.get('msg')}")
+        return {field.get('field_name'): field.get('type')
+                for field in result.get('data', {}).get('items', [])}
+    
+    @staticmethod
+    def feishu_field_digests(record_fields: Dict[str, Any]) -> Dict[str, str]:
+        """计算每个字段值的短摘要，用于判断下次同步时哪些字段发生了变化"""
+        return {
+            field_name: hashlib.blake2b(
+                json.dumps(value, ensure_ascii=False, sort_keys=True).encode('utf-8'),
+                digest_size=8
+            ).hexdigest()
+            for field_name, value in record_fields.items()
+        }
+    
+    @trace.traced('feishu.upsert')
+    def upsert_to_feishu(self, data: Dict[str, Dict[str, Any]],
+                         spreadsheet_token: str,
+                         table_id: str,
+                         record_ids: Dict[str, str],
+                         field_digests: Dict[str, Dict[str, str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        按推文键批量更新或创建飞书多维表格记录（增量更新）
+        
+        已知record_id的推文与上次同步时的字段摘要逐字段比较，只把变化的字段通过records/batch_update
+        发送，没有变化的记录不发送；其余推文通过records/batch_create创建，新建记录的record_id从
+        batch_create响应中获取（响应顺序与请求顺序一致）。batch_update因个别记录已在飞书中被删除而整批失败时
+        逐条重试，只重新创建确实缺失的记录。
+        
+        Args:
+            data: {推文键: 已处理的推文数据}，推文键通常为推文链接
+            spreadsheet_token: 飞书表格token
+            table_id: 多维表格ID
+            record_ids: {推文键: record_id}，本地已知的映射
+            field_digests: {推文键: {字段名: 摘要}}，上次同步的字段摘要，缺失时发送全部字段
+            
+        Returns:
+            {推文键: {'record_id': str, 'field_digests': Dict[str, str], 'action': 'created'|'updated'|'unchanged'}}
+        """
+        field_digests = field_digests or {}
+        access_token = self.get_feishu_access_token()
+        if not access_token:
+            raise Exception("无法获取飞书访问令牌")
+        
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json'
+        }
+        field_types = self.get_feishu_field_types(spreadsheet_token, table_id, headers)
+        
+        synced = {}
+        updates = []
+        creates = []
+        for key, tweet in data.items():
+            record_fields = self._build_feishu_record_fields(tweet, field_types)
+            if not record_fields:
+                continue
+            digests = self.feishu_field_digests(record_fields)
+            
+            if key not in record_ids:
+                creates.append((key, record_fields, digests))
+                continue
+            
+            previous = field_digests.get(key) or {}
+            changed_fields = {name: value for name, value in record_fields.items()
+                              if previous.get(name) != digests[name]}
+            if changed_fields:
+                updates.append((key, record_fields, digests, changed_fields))
+            else:
+                synced[key] = {'record_id': record_ids[key], 'field_digests': digests, 'action': 'unchanged'}
+        
+        records_url = f"{self.feishu_config['base_url']}/bitable/v1/apps/{spreadsheet_token}/tables/{table_id}/records"
+        
+        for start in range(0, len(updates), self.FEISHU_BATCH_LIMIT):
+            chunk = updates[start:start + self.FEISHU_BATCH_LIMIT]
+            payload = {'records': [{'record_id': record_ids[key], 'fields': changed_fields}
+                                   for key, _, _, changed_fields in chunk]}
+            result = self._feishu_doc_request('POST', f"{records_url}/batch_update", headers,
+                                              spreadsheet_token, json=payload)
+            if result.get('code') == self.FEISHU_RECORD_NOT_FOUND_CODE and len(chunk) > 1:
+                # 整批因个别记录已被删除而失败，逐条重试找出缺失的记录
+                retried = []
+                for item in chunk:
+                    key, _, _, changed_fields = item
+                    single = self._feishu_doc_request(
+                        'POST', f"{records_url}/batch_update", headers, spreadsheet_token,
+                        json={'records': [{'record_id': record_ids[key], 'fields': changed_fields}]}
+                    )
+                    retried.append((item, single))
+            else:
+                retried = [(item, result) for item in chunk]
+            
+            missing = 0
+            for (key, record_fields, digests, _), item_result in retried:
+                if item_result.get('code') == self.FEISHU_RECORD_NOT_FOUND_CODE:
+                    # 远端记录已被删除，改为用完整字段重新创建
+                    creates.append((key, record_fields, digests))
+                    missing += 1
+                    continue
+                if item_result.get('code') != 0:
+                    raise Exception(f"飞书批量更新记录失败: {item_result.get('msg')}")
+                synced[key] = {'record_id': record_ids[key], 'field_digests': digests, 'action': 'updated'}
+            if missing:
+                self.logger.warning(f"⚠️ 飞书中有 {missing} 条映射记录不存在，改为重新创建")
+        
+        for start in range(0, len(creates), self.FEISHU_BATCH_LIMIT):
+            chunk = creates[start:start + self.FEISHU_BATCH_LIMIT]
+            payload = {'records': [{'fields': record_fields} for _, record_fields, _ in chunk]}
+            result = self._feishu_doc_request('POST', f"{records_url}/batch_create", headers,
+                                              spreadsheet_token, json=payload)
+            if result.get('code') != 0:
+                raise Exception(f"飞书批量创建记录失败: {result.get('msg')}")
+            created_records = result.get('data', {}).get('records', [])
+            for (key, _, digests), created in zip(chunk, created_records):
+                synced[key] = {'record_id': created.get('record_id'), 'field_digests': digests, 'action': 'created'}
+        
+        actions = [item['action'] for item in synced.values()]
+        self.logger.info(
+            f"✅ 飞书upsert完成: 新建 {actions.count('created')} 条，增量更新 {actions.count('updated')} 条，"
+            f"未变化跳过 {actions.count('unchanged')} 条"
+        )
+        return synced
+    
+    @trace.traced('feishu.sheet_sync')
     def sync_to_feishu_sheet(self, data: List[Dict[str, Any]], 
                             spreadsheet_token: str, 
                             sheet_id: str = None) -> bool:
@@ -1807,26 +2132,21 @@ class CloudSyncManager:
         Returns:
             是否同步成功
         """
-        print("\n" + "="*60)
-        print("📊 开始飞书表格同步流程")
-        print(f"   - 表格Token: {spreadsheet_token[:10]}...")
-        print(f"   - 工作表ID: {sheet_id}")
-        print(f"   - 数据条数: {len(data)}")
-        print("="*60)
+        trace.debug("📊 开始飞书表格同步流程")
         
         self.logger.info(f"📊 开始飞书表格同步流程")
         self.logger.info(f"   - 表格Token: {spreadsheet_token[:10]}...")
         self.logger.info(f"   - 工作表ID: {sheet_id}")
         self.logger.info(f"   - 数据条数: {len(data)}")
         
-        print("\n🔑 获取飞书访问令牌...")
+        trace.debug("🔑 获取飞书访问令牌...")
         self.logger.info(f"🔑 获取飞书访问令牌")
         access_token = self.get_feishu_access_token()
         if not access_token:
-            print("❌ 飞书访问令牌获取失败")
+            trace.error("❌ 飞书访问令牌获取失败")
             self.logger.error(f"❌ 飞书访问令牌获取失败")
             return False
-        print("✅ 飞书访问令牌获取成功")
+        trace.info("✅ 飞书访问令牌获取成功")
         self.logger.info(f"✅ 飞书访问令牌获取成功")
             
         try:
@@ -1834,67 +2154,57 @@ class CloudSyncManager:
                 'Authorization': f'Bearer {access_token}',
                 'Content-Type': 'application/json'
             }
-            print("✅ 请求头设置完成")
+            trace.info("✅ 请求头设置完成")
             self.logger.info(f"✅ 请求头设置完成")
             
             # 如果没有指定sheet_id，获取第一个工作表
             if not sheet_id:
-                print("\n🔍 未指定工作表ID，获取第一个工作表")
+                trace.debug("🔍 未指定工作表ID，获取第一个工作表")
                 self.logger.info(f"🔍 未指定工作表ID，获取第一个工作表")
                 url = f"{self.feishu_config['base_url']}/sheets/v3/spreadsheets/{spreadsheet_token}/sheets/query"
-                print(f"   - 查询URL: {url}")
                 self.logger.info(f"   - 查询URL: {url}")
                 
                 response = requests.get(url, headers=headers)
-                print(f"   - 响应状态码: {response.status_code}")
                 self.logger.info(f"   - 响应状态码: {response.status_code}")
                 response.raise_for_status()
                 
                 result = response.json()
-                print(f"   - 响应结果: code={result.get('code')}")
                 self.logger.info(f"   - 响应结果: code={result.get('code')}")
                 
                 if result.get('code') == 0 and result.get('data', {}).get('sheets'):
                     sheet_id = result['data']['sheets'][0]['sheet_id']
-                    print(f"✅ 获取到工作表ID: {sheet_id}")
                     self.logger.info(f"✅ 获取到工作表ID: {sheet_id}")
                 else:
-                    print(f"❌ 无法获取飞书工作表信息: {result.get('msg')}")
                     self.logger.error(f"❌ 无法获取飞书工作表信息: {result.get('msg')}")
                     return False
             else:
-                print(f"ℹ️ 使用指定的工作表ID: {sheet_id}")
                 self.logger.info(f"ℹ️ 使用指定的工作表ID: {sheet_id}")
             
             # 清空现有数据
-            print("\n🧹 清空现有数据")
+            trace.debug("🧹 清空现有数据")
             self.logger.info(f"🧹 清空现有数据")
             clear_url = f"{self.feishu_config['base_url']}/sheets/v2/spreadsheets/{spreadsheet_token}/values_batch_clear"
             clear_payload = {
                 'ranges': [f'{sheet_id}!A:Z']
             }
-            print(f"   - 清空URL: {clear_url}")
-            print(f"   - 清空范围: {clear_payload['ranges']}")
             self.logger.info(f"   - 清空URL: {clear_url}")
             self.logger.info(f"   - 清空范围: {clear_payload['ranges']}")
             
             clear_response = requests.post(clear_url, headers=headers, json=clear_payload)
-            print(f"   - 清空响应状态码: {clear_response.status_code}")
             self.logger.info(f"   - 清空响应状态码: {clear_response.status_code}")
             
             if not data:
-                print("⚠️ 没有数据需要同步")
+                trace.warning("⚠️ 没有数据需要同步")
                 self.logger.warning(f"⚠️ 没有数据需要同步")
                 return True
             
             # 准备数据
-            print("\n🔄 开始准备表格数据")
+            trace.debug("🔄 开始准备表格数据")
             self.logger.info(f"🔄 开始准备表格数据")
             values = [[
                 '序号', '用户名', '推文内容', '发布时间', '评论数', 
                 '转发数', '点赞数', '链接', '标签', '筛选状态'
             ]]
-            print(f"   - 表头设置完成: {values[0]}")
             self.logger.info(f"   - 表头设置完成: {values[0]}")
             
             for i, tweet in enumerate(data, 1):
@@ -1912,18 +2222,15 @@ class CloudSyncManager:
                 ]
                 values.append(row)
                 if i <= 3:  # 只记录前3行的详细信息
-                    print(f"   - 第 {i} 行数据: {row[:3]}...")  # 只显示前3个字段
                     self.logger.debug(f"   - 第 {i} 行数据: {row[:3]}...")  # 只显示前3个字段
             
-            print(f"\n✅ 表格数据准备完成:")
-            print(f"   - 总行数: {len(values)} (包含表头)")
-            print(f"   - 数据行数: {len(values) - 1}")
+            trace.info("✅ 表格数据准备完成:")
             self.logger.info(f"✅ 表格数据准备完成:")
             self.logger.info(f"   - 总行数: {len(values)} (包含表头)")
             self.logger.info(f"   - 数据行数: {len(values) - 1}")
             
             # 批量更新数据
-            print("\n📤 开始批量更新表格数据")
+            trace.debug("📤 开始批量更新表格数据")
             self.logger.info(f"📤 开始批量更新表格数据")
             update_url = f"{self.feishu_config['base_url']}/sheets/v2/spreadsheets/{spreadsheet_token}/values_batch_update"
             update_payload = {
@@ -1933,61 +2240,52 @@ class CloudSyncManager:
                 }]
             }
             
-            print(f"   - 更新URL: {update_url}")
-            print(f"   - 更新范围: {update_payload['value_ranges'][0]['range']}")
-            print(f"   - 载荷大小: {len(values)} 行数据")
             self.logger.info(f"   - 更新URL: {update_url}")
             self.logger.info(f"   - 更新范围: {update_payload['value_ranges'][0]['range']}")
             self.logger.info(f"   - 载荷大小: {len(values)} 行数据")
             
-            print("\n🌐 发送表格更新请求...")
+            trace.debug("🌐 发送表格更新请求...")
             self.logger.info(f"🌐 发送表格更新请求...")
             response = requests.post(update_url, headers=headers, json=update_payload)
-            print(f"   - 响应状态码: {response.status_code}")
             self.logger.info(f"   - 响应状态码: {response.status_code}")
             response.raise_for_status()
             
             result = response.json()
-            print(f"   - 响应结果: code={result.get('code')}, msg={result.get('msg', 'N/A')}")
             self.logger.info(f"   - 响应结果: code={result.get('code')}, msg={result.get('msg', 'N/A')}")
             
             if result.get('code') == 0:
-                print(f"\n✅ 成功同步 {len(data)} 条数据到飞书表格")
-                print("="*60)
+                trace.info("✅ 成功同步 %s 条数据到飞书表格", len(data))
                 self.logger.info(f"✅ 成功同步 {len(data)} 条数据到飞书表格")
                 return True
             else:
-                print(f"\n❌ 飞书表格同步失败: {result.get('msg')}")
-                print("="*60)
+                trace.error("❌ 飞书表格同步失败: %s", result.get('msg'))
                 self.logger.error(f"❌ 飞书表格同步失败: {result.get('msg')}")
                 return False
                 
         except requests.exceptions.RequestException as e:
-            print(f"\n❌ [CloudSync] 飞书表格同步网络请求异常详情:")
-            print(f"   - 异常类型: {type(e).__name__}")
-            print(f"   - 异常模块: {type(e).__module__}")
-            print(f"   - 异常消息: {str(e)}")
-            print(f"   - 异常参数: {e.args}")
+            trace.error("❌ [CloudSync] 飞书表格同步网络请求异常详情:")
+            trace.debug("   - 异常模块: %s", type(e).__module__)
+            trace.debug("   - 异常消息: %s", str(e))
+            trace.debug("   - 异常参数: %s", e.args)
             if hasattr(e, 'response') and e.response is not None:
-                print(f"   - 响应状态码: {e.response.status_code}")
-                print(f"   - 响应状态文本: {e.response.reason}")
-                print(f"   - 响应头: {dict(e.response.headers)}")
-                print(f"   - 响应内容长度: {len(e.response.text)}")
-                print(f"   - 响应内容: {e.response.text[:1000]}...")
+                trace.debug("   - 响应状态码: %s", e.response.status_code)
+                trace.debug("   - 响应状态文本: %s", e.response.reason)
+                trace.debug("   - 响应头: %s", dict(e.response.headers))
+                trace.debug("   - 响应内容长度: %s", len(e.response.text))
+                trace.debug("   - 响应内容: %s...", e.response.text[:1000])
             if hasattr(e, 'request') and e.request is not None:
-                print(f"   - 请求方法: {e.request.method}")
-                print(f"   - 请求URL: {e.request.url}")
-                print(f"   - 请求头: {dict(e.request.headers)}")
+                trace.debug("   - 请求方法: %s", e.request.method)
+                trace.debug("   - 请求URL: %s", e.request.url)
+                trace.debug("   - 请求头: %s", dict(e.request.headers))
                 if hasattr(e.request, 'body') and e.request.body:
-                    print(f"   - 请求体长度: {len(str(e.request.body))}")
-                    print(f"   - 请求体内容: {str(e.request.body)[:500]}...")
-            print(f"   - 异常堆栈: {traceback.format_exc()}")
-            print(f"   - 当前变量状态:")
-            print(f"     - data 长度: {len(data) if 'data' in locals() else 'N/A'}")
-            print(f"     - spreadsheet_token: {spreadsheet_token if 'spreadsheet_token' in locals() else 'N/A'}")
-            print(f"     - sheet_id: {sheet_id if 'sheet_id' in locals() else 'N/A'}")
-            print(f"     - access_token 长度: {len(access_token) if 'access_token' in locals() else 'N/A'}")
-            print("="*80)
+                    trace.debug("   - 请求体长度: %s", len(str(e.request.body)))
+                    trace.debug("   - 请求体内容: %s...", str(e.request.body)[:500])
+            trace.debug("   - 异常堆栈: %s", traceback.format_exc())
+            trace.debug("   - 当前变量状态:")
+            trace.debug("     - data 长度: %s", len(data) if 'data' in locals() else 'N/A')
+            trace.debug("     - spreadsheet_token: %s", spreadsheet_token if 'spreadsheet_token' in locals() else 'N/A')
+            trace.debug("     - sheet_id: %s", sheet_id if 'sheet_id' in locals() else 'N/A')
+            trace.debug("     - access_token 长度: %s", len(access_token) if 'access_token' in locals() else 'N/A')
             
             self.logger.error(f"❌ 飞书表格同步网络请求异常:")
             self.logger.error(f"   - 异常类型: {type(e).__name__}")
@@ -1997,20 +2295,17 @@ class CloudSyncManager:
                 self.logger.error(f"   - 响应内容: {e.response.text[:500]}...")
             return False
         except Exception as e:
-            print(f"\n❌ [CloudSync] 飞书表格同步未知异常详情:")
-            print(f"   - 异常类型: {type(e).__name__}")
-            print(f"   - 异常模块: {type(e).__module__}")
-            print(f"   - 异常消息: {str(e)}")
-            print(f"   - 异常参数: {e.args}")
-            print(f"   - 异常属性: {[attr for attr in dir(e) if not attr.startswith('_')]}")
-            print(f"   - 异常堆栈: {traceback.format_exc()}")
-            print(f"   - 当前变量状态:")
-            print(f"     - data 长度: {len(data) if 'data' in locals() else 'N/A'}")
-            print(f"     - spreadsheet_token: {spreadsheet_token if 'spreadsheet_token' in locals() else 'N/A'}")
-            print(f"     - sheet_id: {sheet_id if 'sheet_id' in locals() else 'N/A'}")
-            print(f"     - access_token 长度: {len(access_token) if 'access_token' in locals() else 'N/A'}")
-            print(f"     - values 长度: {len(values) if 'values' in locals() else 'N/A'}")
-            print("="*80)
+            trace.error("❌ [CloudSync] 飞书表格同步未知异常详情:")
+            trace.debug("   - 异常模块: %s", type(e).__module__)
+            trace.debug("   - 异常消息: %s", str(e))
+            trace.debug("   - 异常参数: %s", e.args)
+            trace.debug("   - 异常属性: %s", [attr for attr in dir(e) if not attr.startswith('_')])
+            trace.debug("   - 当前变量状态:")
+            trace.debug("     - data 长度: %s", len(data) if 'data' in locals() else 'N/A')
+            trace.debug("     - spreadsheet_token: %s", spreadsheet_token if 'spreadsheet_token' in locals() else 'N/A')
+            trace.debug("     - sheet_id: %s", sheet_id if 'sheet_id' in locals() else 'N/A')
+            trace.debug("     - access_token 长度: %s", len(access_token) if 'access_token' in locals() else 'N/A')
+            trace.debug("     - values 长度: %s", len(values) if 'values' in locals() else 'N/A')
             
             self.logger.error(f"❌ 飞书表格同步过程中发生未知错误:")
             self.logger.error(f"   - 异常类型: {type(e).__name__}")
@@ -2019,11 +2314,221 @@ class CloudSyncManager:
             self.logger.error(f"   - 异常堆栈: {traceback.format_exc()}")
             return False
     
+    # 飞书多维表格同步字段及默认字段类型（1=文本，2=数字）
+    FEISHU_TABLE_FIELDS = {
+        '推文原文内容': 1,
+        '作者（账号）': 1,
+        '推文链接': 1,
+        '话题标签（Hashtag）': 1,
+        '类型标签': 1,
+        '评论': 2,
+        '点赞': 2,
+        '转发': 2,
+    }
+    
+    # 采集结果（英文字段名）到飞书列名的对应关系，web_app已转换为中文列名的数据直接使用
+    FEISHU_FIELD_SOURCES = {
+        '推文原文内容': ('content',),
+        '作者（账号）': ('username',),
+        '推文链接': ('link',),
+        '话题标签（Hashtag）': ('hashtags', 'tags'),
+        '类型标签': ('content_type',),
+        '评论': ('comments',),
+        '点赞': ('likes',),
+        '转发': ('retweets',),
+    }
+    
+    @classmethod
+    def _get_feishu_source_value(cls, tweet: Dict[str, Any], field_name: str) -> Any:
+        """按飞书列名取值，没有中文列名时回退到采集结果的英文字段名"""
+        if field_name in tweet:
+            return tweet[field_name]
+        for source_key in cls.FEISHU_FIELD_SOURCES.get(field_name, ()):
+            value = tweet.get(source_key)
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                return ', '.join(str(item) for item in value)
+            return value
+        return None
+    
+    @staticmethod
+    def _format_feishu_value(value: Any, field_type: int) -> Any:
+        """根据飞书字段类型格式化字段值"""
+        if field_type == 2:  # 数字字段
+            try:
+                if value is None or value == '':
+                    return 0
+                return int(float(str(value)))
+            except (ValueError, TypeError):
+                return 0
+        elif field_type == 5:  # 日期时间字段，需要毫秒级时间戳
+            if isinstance(value, (int, float)) and value > 0:
+                return int(value)
+            return 0
+        return str(value) if value is not None else ''
+    
+    def _build_feishu_record_fields(self, tweet: Dict[str, Any],
+                                    field_types: Dict[str, int]) -> Dict[str, Any]:
+        """将推文数据（中文列名或采集结果的英文字段名）转换为飞书记录字段，只保留表格中存在的字段"""
+        record_fields = {}
+        for field_name, default_type in self.FEISHU_TABLE_FIELDS.items():
+            if field_name not in field_types:
+                continue
+            value = self._get_feishu_source_value(tweet, field_name)
+            if value is None:
+                value = 0 if default_type == 2 else ''
+            record_fields[field_name] = self._format_feishu_value(
+                value, field_types.get(field_name, default_type)
+            )
+        return record_fields
+    
+    @staticmethod
+    def _build_feishu_sheet_values(data: List[Dict[str, Any]]) -> List[List[Any]]:
+        """构建飞书电子表格的行数据（含表头）"""
+        values = [[
+            '序号', '用户名', '推文内容', '发布时间', '评论数',
+            '转发数', '点赞数', '链接', '标签', '筛选状态'
+        ]]
+        for i, tweet in enumerate(data, 1):
+            values.append([
+                str(i),
+                tweet.get('username', ''),
+                tweet.get('content', ''),
+                tweet.get('timestamp', ''),
+                str(tweet.get('comments', 0)),
+                str(tweet.get('retweets', 0)),
+                str(tweet.get('likes', 0)),
+                tweet.get('link', ''),
+                ', '.join(tweet.get('tags', [])),
+                tweet.get('filter_status', '')
+            ])
+        return values
+    
+    def create_async_feishu_client(self) -> AsyncFeishuClient:
+        """基于当前飞书配置创建异步客户端"""
+        return AsyncFeishuClient(
+            app_id=self.feishu_config.get('app_id', ''),
+            app_secret=self.feishu_config.get('app_secret', ''),
+            base_url=self.feishu_config.get('base_url', 'https://open.feishu.cn/open-apis')
+        )
+    
+    @trace.traced('feishu.sync_async')
+    async def sync_to_feishu_async(self, data: List[Dict[str, Any]],
+                                   spreadsheet_token: str,
+                                   table_id: str,
+                                   client: AsyncFeishuClient = None) -> bool:
+        """
+        异步同步数据到飞书多维表格（不阻塞事件循环）
+        
+        Args:
+            data: 要同步的数据（飞书中文列名或采集结果的英文字段名）
+            spreadsheet_token: 飞书表格token
+            table_id: 多维表格ID
+            client: 可复用的异步客户端，为None时自动创建并在结束后关闭
+            
+        Returns:
+            是否同步成功
+        """
+        owns_client = client is None
+        client = client or self.create_async_feishu_client()
+        
+        try:
+            fields = await client.list_fields(spreadsheet_token, table_id)
+            field_types = {field.get('field_name'): field.get('type') for field in fields}
+            
+            records = []
+            for tweet in data:
+                record_fields = self._build_feishu_record_fields(tweet, field_types)
+                if record_fields:
+                    records.append({'fields': record_fields})
+            
+            if not records:
+                self.logger.warning("⚠️ 没有有效的数据记录可以同步")
+                return False
+            
+            created_records = await client.batch_create_records(spreadsheet_token, table_id, records)
+            self.logger.info(f"✅ 成功异步同步 {len(created_records)} 条记录到飞书多维表格")
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ 飞书异步同步失败: {e}")
+            return False
+        finally:
+            if owns_client:
+                await client.close()
+    
+    @trace.traced('feishu.sheet_sync_async')
+    async def sync_to_feishu_sheet_async(self, data: List[Dict[str, Any]],
+                                         spreadsheet_token: str,
+                                         sheet_id: str = None,
+                                         client: AsyncFeishuClient = None) -> bool:
+        """
+        异步同步数据到飞书电子表格（不阻塞事件循环）
+        
+        Args:
+            data: 要同步的数据
+            spreadsheet_token: 飞书表格token
+            sheet_id: 工作表ID，为None时使用第一个工作表
+            client: 可复用的异步客户端，为None时自动创建并在结束后关闭
+            
+        Returns:
+            是否同步成功
+        """
+        owns_client = client is None
+        client = client or self.create_async_feishu_client()
+        
+        try:
+            if not sheet_id:
+                sheet_id = await client.get_first_sheet_id(spreadsheet_token)
+                if not sheet_id:
+                    return False
+            
+            values = self._build_feishu_sheet_values(data)
+            success = await client.write_sheet_values(spreadsheet_token, sheet_id, values)
+            if success:
+                self.logger.info(f"✅ 成功同步 {len(data)} 条数据到飞书表格")
+            return success
+        except Exception as e:
+            self.logger.error(f"❌ 飞书表格异步同步失败: {e}")
+            return False
+        finally:
+            if owns_client:
+                await client.close()
+    
+    async def _sync_google_sheets_in_executor(self, data: List[Dict[str, Any]],
+                                              google_config: Dict[str, Any]) -> bool:
+        """gspread为阻塞库，放到线程池中执行以免阻塞事件循环"""
+        def run_sync() -> bool:
+            # 复用已授权的客户端，保留工作表句柄和行索引缓存
+            if not self.google_client and not self.setup_google_sheets(google_config.get('credentials_file')):
+                return False
+            return self.sync_to_google_sheets(
+                data, google_config.get('spreadsheet_id'), google_config.get('worksheet_name')
+            )
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, run_sync)
+    
+    async def _sync_feishu_platform_async(self, data: List[Dict[str, Any]],
+                                          feishu_config: Dict[str, Any]) -> bool:
+        """根据配置选择飞书多维表格或电子表格进行异步同步"""
+        if not self.setup_feishu(feishu_config.get('app_id', ''), feishu_config.get('app_secret', '')):
+            return False
+        
+        spreadsheet_token = feishu_config.get('spreadsheet_token', '')
+        if feishu_config.get('table_id'):
+            return await self.sync_to_feishu_async(data, spreadsheet_token, feishu_config['table_id'])
+        return await self.sync_to_feishu_sheet_async(data, spreadsheet_token, feishu_config.get('sheet_id'))
+    
+    @trace.traced('sync_all')
     async def sync_all_platforms(self, data: List[Dict[str, Any]], 
                                 sync_config: Dict[str, Any]) -> Dict[str, bool]:
         """
         同步到所有配置的平台
         
+        Google Sheets在线程池中执行，飞书使用异步客户端，两者通过asyncio.gather并发运行，
+        整个过程不会阻塞调用方（如采集任务）的事件循环。
+        
         Args:
             data: 要同步的数据
             sync_config: 同步配置
@@ -2031,132 +2536,33 @@ class CloudSyncManager:
         Returns:
             各平台同步结果
         """
-        print("\n" + "="*80)
-        print("🌐 [CloudSync] 开始多平台同步流程详情")
-        print(f"   - 输入参数类型:")
-        print(f"     - data 类型: {type(data)}")
-        print(f"     - data 长度: {len(data)}")
-        print(f"     - sync_config 类型: {type(sync_config)}")
-        print(f"     - sync_config 键: {list(sync_config.keys())}")
-        print(f"   - 数据详情:")
-        for i, item in enumerate(data[:3]):  # 只显示前3条
-            print(f"     数据项 {i+1}: {type(item)} - {list(item.keys()) if isinstance(item, dict) else 'N/A'}")
-        if len(data) > 3:
-            print(f"     ... 还有 {len(data) - 3} 条数据")
-        print(f"   - 配置详情:")
-        for platform, config in sync_config.items():
-            print(f"     {platform}: {type(config)} - enabled={config.get('enabled', False) if isinstance(config, dict) else 'N/A'}")
-        print("="*80)
+        platform_syncs = {}
         
-        results = {}
-        
-        # Google Sheets同步
-        print("\n🔍 [CloudSync] 检查 Google Sheets 配置...")
         google_config = sync_config.get('google_sheets', {})
-        print(f"   - google_config 类型: {type(google_config)}")
-        print(f"   - google_config 内容: {google_config}")
-        print(f"   - enabled 状态: {google_config.get('enabled', False)}")
-        
         if google_config.get('enabled', False):
-            print("\n📊 [CloudSync] Google Sheets 同步开始...")
-            credentials_file = google_config.get('credentials_file')
-            spreadsheet_id = google_config.get('spreadsheet_id')
-            worksheet_name = google_config.get('worksheet_name')
-            
-            print(f"   - 凭证文件: {credentials_file}")
-            print(f"   - 表格ID: {spreadsheet_id}")
-            print(f"   - 工作表名: {worksheet_name}")
-            
-            print(f"\n🔧 [CloudSync] 设置 Google Sheets 配置...")
-            setup_result = self.setup_google_sheets(credentials_file)
-            print(f"   - 配置结果: {setup_result}")
-            
-            if setup_result:
-                print("   - ✅ Google Sheets 配置成功")
-                print(f"\n🚀 [CloudSync] 执行 Google Sheets 同步...")
-                print(f"   - 传入参数:")
-                print(f"     - data 长度: {len(data)}")
-                print(f"     - spreadsheet_id: {spreadsheet_id}")
-                print(f"     - worksheet_name: {worksheet_name}")
-                
-                sync_result = self.sync_to_google_sheets(data, spreadsheet_id, worksheet_name)
-                results['google_sheets'] = sync_result
-                print(f"   - ✅ Google Sheets 同步结果: {'成功' if sync_result else '失败'}")
-            else:
-                print("   - ❌ Google Sheets 配置失败")
-                results['google_sheets'] = False
-        else:
-            print("\n📊 [CloudSync] Google Sheets 同步已禁用")
-            print(f"   - 原因: enabled={google_config.get('enabled', False)}")
+            platform_syncs['google_sheets'] = self._sync_google_sheets_in_executor(data, google_config)
         
-        # 飞书同步
-        print("\n🔍 [CloudSync] 检查飞书配置...")
         feishu_config = sync_config.get('feishu', {})
-        print(f"   - feishu_config 类型: {type(feishu_config)}")
-        print(f"   - feishu_config 内容: {feishu_config}")
-        print(f"   - enabled 状态: {feishu_config.get('enabled', False)}")
-        
         if feishu_config.get('enabled', False):
-            print("\n🚀 [CloudSync] 飞书同步开始...")
-            app_id = feishu_config.get('app_id', '')
-            app_secret = feishu_config.get('app_secret', '')
-            spreadsheet_token = feishu_config.get('spreadsheet_token', '')
-            sheet_id = feishu_config.get('sheet_id')
-            
-            print(f"   - App ID: {app_id[:10] if app_id else 'N/A'}...")
-            print(f"   - App Secret: {app_secret[:10] if app_secret else 'N/A'}...")
-            print(f"   - 表格Token: {spreadsheet_token[:10] if spreadsheet_token else 'N/A'}...")
-            print(f"   - 工作表ID: {sheet_id}")
-            
-            print(f"\n🔧 [CloudSync] 设置飞书配置...")
-            print(f"   - 传入参数:")
-            print(f"     - app_id 长度: {len(app_id) if app_id else 0}")
-            print(f"     - app_secret 长度: {len(app_secret) if app_secret else 0}")
-            
-            setup_result = self.setup_feishu(app_id, app_secret)
-            print(f"   - 配置结果: {setup_result}")
-            
-            if setup_result:
-                print("   - ✅ 飞书配置成功")
-                print(f"\n🚀 [CloudSync] 执行飞书同步...")
-                print(f"   - 传入参数:")
-                print(f"     - data 长度: {len(data)}")
-                print(f"     - spreadsheet_token: {spreadsheet_token}")
-                print(f"     - sheet_id: {sheet_id}")
-                
-                sync_result = self.sync_to_feishu_sheet(data, spreadsheet_token, sheet_id)
-                results['feishu'] = sync_result
-                print(f"   - ✅ 飞书同步结果: {'成功' if sync_result else '失败'}")
+            platform_syncs['feishu'] = self._sync_feishu_platform_async(data, feishu_config)
+        
+        results = {}
+        if not platform_syncs:
+            self.logger.info("没有启用的云端同步平台")
+            return results
+        
+        self.logger.info(f"🌐 开始多平台并发同步: {list(platform_syncs.keys())}，数据条数: {len(data)}")
+        outcomes = await asyncio.gather(*platform_syncs.values(), return_exceptions=True)
+        
+        for platform, outcome in zip(platform_syncs.keys(), outcomes):
+            if isinstance(outcome, Exception):
+                self.logger.error(f"❌ {platform} 同步异常: {outcome}")
+                results[platform] = False
             else:
-                print("   - ❌ 飞书配置失败")
-                results['feishu'] = False
-        else:
-            print("\n🚀 [CloudSync] 飞书同步已禁用")
-            print(f"   - 原因: enabled={feishu_config.get('enabled', False)}")
-        
-        print("\n" + "="*80)
-        print("🏁 [CloudSync] 多平台同步完成详情")
-        print(f"   - 结果类型: {type(results)}")
-        print(f"   - 结果内容: {results}")
-        print(f"   - 详细结果分析:")
-        
-        success_count = 0
-        total_count = len(results)
-        
-        for platform, result in results.items():
-            status = "✅ 成功" if result else "❌ 失败"
-            print(f"     {platform}: {status} (值: {result}, 类型: {type(result)})")
-            if result:
-                success_count += 1
-        
-        print(f"   - 统计信息:")
-        print(f"     - 成功平台数: {success_count}")
-        print(f"     - 总平台数: {total_count}")
-        print(f"     - 成功率: {success_count}/{total_count} ({success_count/total_count*100:.1f}% if total_count > 0 else 0)")
-        print(f"   - 返回值类型: {type(results)}")
-        print(f"   - 返回值内容: {results}")
-        print("="*80)
+                results[platform] = bool(outcome)
         
+        success_count = sum(1 for result in results.values() if result)
+        self.logger.info(f"🏁 多平台同步完成: {success_count}/{len(results)} 成功，结果: {results}")
         return results
 
 # 使用示例
@@ -2174,7 +2580,8 @@ if __name__ == "__main__":
             'app_id': 'your-feishu-app-id',
             'app_secret': 'your-feishu-app-secret',
             'spreadsheet_token': 'your-feishu-spreadsheet-token',
-            'sheet_id': 'your-sheet-id'  # 可选
+            'sheet_id': 'your-sheet-id',  # 可选
+            'table_id': 'your-table-id'  # 可选，填写后同步到多维表格
         }
     }
     
@@ -2198,6 +2605,6 @@ if __name__ == "__main__":
     
     async def main():
         results = await sync_manager.sync_all_platforms(sample_data, sync_config)
-        print(f"同步结果: {results}")
+        trace.debug("同步结果: %s", results)
     
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式导出
+把TweetData写成zstd压缩的Parquet或Arrow IPC文件，供pandas/DuckDB等分析工具直接读取：
+互动数为整数列，话题标签为字符串列表，多媒体内容为结构体列表。
+写入按批次进行，内存占用与数据总量无关；数据按任务和抓取时间排序写入，
+行组统计信息可让读取端按任务、日期范围和点赞数跳过无关行组
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Iterable, List
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_PARQUET = 'parquet'
+FORMAT_ARROW = 'arrow'
+FORMAT_EXTENSIONS = {FORMAT_PARQUET: '.parquet', FORMAT_ARROW: '.arrow'}
+
+DEFAULT_EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'exports', 'columnar')
+
+
+def tweet_schema():
+    """导出文件的列定义"""
+    media_type = pa.struct([
+        ('type', pa.string()),
+        ('url', pa.string()),
+        ('original_url', pa.string()),
+        ('poster', pa.string()),
+        ('description', pa.string()),
+    ])
+    return pa.schema([
+        ('id', pa.int64()),
+        ('task_id', pa.int64()),
+        ('task_name', pa.string()),
+        ('username', pa.string()),
+        ('content', pa.string()),
+        ('full_content', pa.string()),
+        ('likes', pa.int64()),
+        ('comments', pa.int64()),
+        ('retweets', pa.int64()),
+        ('publish_time', pa.string()),
+        ('link', pa.string()),
+        ('hashtags', pa.list_(pa.string())),
+        ('content_type', pa.string()),
+        ('media', pa.list_(media_type)),
+        ('quoted_tweet', pa.string()),
+        ('scraped_at', pa.timestamp('us')),
+        ('synced_to_feishu', pa.bool_()),
+        ('has_detailed_content', pa.bool_()),
+        ('detail_error', pa.string()),
+    ])
+
+
+def _load_json(value, default):
+    if not value:
+        return default
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return default
+
+
+def _normalize_hashtags(value) -> List[str]:
+    tags = _load_json(value, [])
+    if isinstance(tags, str):
+        tags = [tags]
+    if not isinstance(tags, list):
+        return []
+    return [str(tag).lstrip('#') for tag in tags if tag]
+
+
+def _normalize_media(value) -> List[Dict[str, Optional[str]]]:
+    """多媒体内容可能是列表，也可能是按类型分组的字典（{'images': [...], 'videos': [...]}）"""
+    media = _load_json(value, [])
+    if isinstance(media, dict):
+        media = [item for items in media.values() if isinstance(items, list) for item in items]
+    if not isinstance(media, list):
+        return []
+    fields = ('type', 'url', 'original_url', 'poster', 'description')
+    return [
+        {name: (str(item[name]) if item.get(name) is not None else None) for name in fields}
+        for item in media if isinstance(item, dict)
+    ]
+
+
+def tweet_to_row(tweet, task_name: str = '') -> Dict[str, Any]:
+    """把TweetData对象转换为导出行"""
+    quoted = tweet.quoted_tweet
+    if quoted is not None and not isinstance(quoted, str):
+        quoted = json.dumps(quoted, ensure_ascii=False)
+    return {
+        'id': tweet.id,
+        'task_id': tweet.task_id,
+        'task_name': task_name,
+        'username': tweet.username,
+        'content': tweet.content,
+        'full_content': tweet.full_content,
+        'likes': tweet.likes or 0,
+        'comments': tweet.comments or 0,
+        'retweets': tweet.retweets or 0,
+        'publish_time': tweet.publish_time if isinstance(tweet.publish_time, str) or tweet.publish_time is None
+        else str(tweet.publish_time),
+        'link': tweet.link,
+        'hashtags': _normalize_hashtags(tweet.hashtags),
+        'content_type': tweet.content_type,
+        'media': _normalize_media(tweet.media_content),
+        'quoted_tweet': quoted,
+        'scraped_at': tweet.scraped_at,
+        'synced_to_feishu': bool(tweet.synced_to_feishu),
+        'has_detailed_content': bool(tweet.has_detailed_content),
+        'detail_error': tweet.detail_error,
+    }
+
+
+def parse_date_range(start_date: Optional[str], end_date: Optional[str]):
+    """把YYYY-MM-DD的起止日期转换为抓取时间的[开始, 结束)区间，结束日期包含在内"""
+    start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+    end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+    return start, end
+
+
+class ColumnarExporter:
+    """按批次把推文行写入Parquet/Arrow IPC文件"""
+
+    def __init__(self, export_dir: str = DEFAULT_EXPORT_DIR, batch_size: int = 5000,
+                 compression: str = 'zstd'):
+        """
+        Args:
+            export_dir: 导出文件目录
+            batch_size: 每批（每个Parquet行组）的行数
+            compression: 压缩算法
+        """
+        if pa is None:
+            raise ImportError("列式导出需要pyarrow: pip install pyarrow")
+        self.export_dir = export_dir
+        self.batch_size = batch_size
+        self.compression = compression
+        self.schema = tweet_schema()
+        os.makedirs(export_dir, exist_ok=True)
+
+    def export(self, rows: Iterable[Dict[str, Any]], filename: str,
+               fmt: str = FORMAT_PARQUET) -> Dict[str, Any]:
+        """
+        写入导出文件
+
+        Args:
+            rows: 导出行（按task_id、scraped_at排序时行组统计最有效）
+            filename: 不含扩展名的文件名
+            fmt: FORMAT_PARQUET 或 FORMAT_ARROW
+
+        Returns:
+            {'path', 'rows', 'bytes'}
+        """
+        if fmt not in FORMAT_EXTENSIONS:
+            raise ValueError(f"不支持的导出格式: {fmt}")
+        self.cleanup()
+        # 同一秒内的多次导出不互相覆盖
+        path = os.path.join(self.export_dir, f"{filename}_{uuid.uuid4().hex[:6]}{FORMAT_EXTENSIONS[fmt]}")
+        tmp_path = path + '.tmp'
+
+        if fmt == FORMAT_PARQUET:
+            writer = pq.ParquetWriter(tmp_path, self.schema, compression=self.compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            writer = pa.ipc.new_file(tmp_path, self.schema, options=options)
+
+        total = 0
+        try:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=self.schema))
+                    total += len(batch)
+                    batch = []
+            if batch:
+                writer.write_table(pa.Table.from_pylist(batch, schema=self.schema))
+                total += len(batch)
+        except Exception:
+            writer.close()
+            os.remove(tmp_path)
+            raise
+        writer.close()
+        os.replace(tmp_path, path)
+
+        size = os.path.getsize(path)
+        logger.info(f"列式导出完成: {path}，{total} 行，{size / 1024:.1f} KB")
+        return {'path': path, 'rows': total, 'bytes': size}
+
+    def cleanup(self, max_age_hours: float = 24.0) -> int:
+        """删除超过保留时间的导出文件，返回删除数量"""
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        for name in os.listdir(self.export_dir):
+            path = os.path.join(self.export_dir, name)
+            try:
+                if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"删除过期导出文件失败 {path}: {e}")
+        return removed
+
+    @staticmethod
+    def read(path: str, task_id: int = None, start: datetime = None, end: datetime = None,
+             min_likes: int = None, columns: List[str] = None):
+        """
+        读取导出文件，筛选条件下推到数据集扫描（Parquet按行组统计跳过不相关的行组）
+
+        Returns:
+            pyarrow.Table
+        """
+        if ds is None:
+            raise ImportError("读取列式导出需要pyarrow: pip install pyarrow")
+        file_format = 'ipc' if path.endswith(FORMAT_EXTENSIONS[FORMAT_ARROW]) else 'parquet'
+        dataset = ds.dataset(path, format=file_format)
+        return dataset.to_table(columns=columns,
+                                filter=build_filter(task_id=task_id, start=start, end=end, min_likes=min_likes))
+
+
+def build_filter(task_id: int = None, start: datetime = None, end: datetime = None,
+                 min_likes: int = None):
+    """构建数据集筛选表达式，没有条件时返回None"""
+    conditions = []
+    if task_id is not None:
+        conditions.append(ds.field('task_id') == task_id)
+    if start is not None:
+        conditions.append(ds.field('scraped_at') >= pa.scalar(start, type=pa.timestamp('us')))
+    if end is not None:
+        conditions.append(ds.field('scraped_at') < pa.scalar(end, type=pa.timestamp('us')))
+    if min_likes is not None:
+        conditions.append(ds.field('likes') >= min_likes)
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
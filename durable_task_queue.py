@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化任务队列
+任务请求保存在SQLite的task_queue表中，带优先级、最早开始时间、尝试次数和租约/心跳字段。
+调度方通过带索引的"领取下一个"事务获取任务，多个Web进程或工作进程可以安全共享同一个队列；
+进程重启后排队中的任务不会丢失，持有租约的进程退出后任务在租约过期时重新排队
+"""
+
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, List, Dict
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueueEntry:
+    """队列中的一条任务请求"""
+    id: int
+    task_id: int
+    priority: int
+    not_before: float
+    use_background_process: bool
+    fanout: int
+    attempts: int
+    max_attempts: int
+    status: str
+    enqueued_at: float
+
+    @property
+    def scheduled_time(self) -> datetime:
+        return datetime.utcfromtimestamp(self.not_before)
+
+    @property
+    def queued_at(self) -> datetime:
+        return datetime.utcfromtimestamp(self.enqueued_at)
+
+
+class DurableTaskQueue:
+    """基于SQLite的任务队列，priority数值越小越先执行"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS task_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            not_before REAL NOT NULL,
+            use_background_process INTEGER NOT NULL DEFAULT 1,
+            fanout INTEGER NOT NULL DEFAULT 1,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            status TEXT NOT NULL DEFAULT 'queued',
+            lease_owner TEXT,
+            lease_expires_at REAL,
+            heartbeat_at REAL,
+            enqueued_at REAL NOT NULL,
+            finished_at REAL,
+            last_error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_task_queue_ready
+            ON task_queue (status, priority, not_before, id);
+        CREATE INDEX IF NOT EXISTS idx_task_queue_lease
+            ON task_queue (status, lease_expires_at);
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_task_queue_active_task
+            ON task_queue (task_id) WHERE status IN ('queued', 'leased');
+    """
+
+    COLUMNS = ('id, task_id, priority, not_before, use_background_process, fanout, '
+               'attempts, max_attempts, status, enqueued_at')
+
+    def __init__(self, db_path: str, lease_seconds: float = 300.0):
+        """
+        Args:
+            db_path: SQLite数据库文件路径（与业务数据库共用同一个文件即可）
+            lease_seconds: 领取后的租约时长（秒），持有方需在过期前续约
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # 每次操作使用独立连接（自动提交模式），调度线程、清理线程和请求线程互不干扰
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _entry(self, row: sqlite3.Row) -> QueueEntry:
+        return QueueEntry(
+            id=row['id'], task_id=row['task_id'], priority=row['priority'],
+            not_before=row['not_before'], use_background_process=bool(row['use_background_process']),
+            fanout=row['fanout'], attempts=row['attempts'], max_attempts=row['max_attempts'],
+            status=row['status'], enqueued_at=row['enqueued_at']
+        )
+
+    def enqueue(self, task_id: int, priority: int = 0, not_before: Optional[datetime] = None,
+                use_background_process: bool = True, fanout: int = 1,
+                max_attempts: int = 3) -> Optional[int]:
+        """
+        加入队列，not_before之前不会被领取
+
+        Returns:
+            队列记录ID；任务已在排队或执行中时返回None
+        """
+        now = time.time()
+        start_at = (not_before - datetime.utcnow()).total_seconds() + now if not_before else now
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO task_queue (task_id, priority, not_before, use_background_process, "
+                    "fanout, max_attempts, enqueued_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (task_id, priority, start_at, int(use_background_process), fanout, max_attempts, now)
+                )
+                return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            return None
+
+    def claim_next(self) -> Optional[QueueEntry]:
+        """
+        领取下一个可执行的任务（priority最小、最早可开始的），并取得租约
+
+        先把租约已过期的记录放回队列（超过最大尝试次数的标记为失败），
+        然后在同一个写事务内选中并更新，多个进程同时领取也不会拿到同一条
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE task_queue SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+                    "lease_owner = NULL, lease_expires_at = NULL, last_error = '租约过期' "
+                    "WHERE status = 'leased' AND lease_expires_at < ?",
+                    (now,)
+                )
+                row = conn.execute(
+                    f"SELECT {self.COLUMNS} FROM task_queue "
+                    "WHERE status = 'queued' AND not_before <= ? "
+                    "ORDER BY priority, not_before, id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE task_queue SET status = 'leased', lease_owner = ?, lease_expires_at = ?, "
+                        "heartbeat_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        (self.owner, now + self.lease_seconds, now, row['id'])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        entry = self._entry(row)
+        entry.status = 'leased'
+        entry.attempts += 1
+        return entry
+
+    def heartbeat(self, entry_ids: List[int]) -> int:
+        """为本进程持有的租约续期，返回续期成功的数量"""
+        if not entry_ids:
+            return 0
+        now = time.time()
+        placeholders = ','.join('?' * len(entry_ids))
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE task_queue SET lease_expires_at = ?, heartbeat_at = ? "
+                f"WHERE status = 'leased' AND lease_owner = ? AND id IN ({placeholders})",
+                (now + self.lease_seconds, now, self.owner, *entry_ids)
+            )
+            return cursor.rowcount
+
+    def complete(self, entry_id: int, success: bool = True, error: str = None):
+        """结束本进程持有的租约"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE task_queue SET status = ?, finished_at = ?, last_error = ?, "
+                "lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                ('done' if success else 'failed', time.time(), error, entry_id, self.owner)
+            )
+
+    def release(self, entry_id: int):
+        """把本进程领取但未能执行的任务放回队列（不计入尝试次数）"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE task_queue SET status = 'queued', attempts = MAX(attempts - 1, 0), "
+                "lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (entry_id, self.owner)
+            )
+
+    def next_ready_in(self) -> Optional[float]:
+        """距离最早一条排队任务可以开始还有多少秒（没有排队任务时返回None）"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MIN(not_before) FROM task_queue WHERE status = 'queued'"
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(row[0] - time.time(), 0.0)
+
+    def queued_entries(self) -> List[QueueEntry]:
+        """按执行顺序列出排队中的任务"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {self.COLUMNS} FROM task_queue WHERE status = 'queued' "
+                "ORDER BY priority, not_before, id"
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM task_queue WHERE status = 'queued'").fetchone()[0]
+
+    def position(self, entry_id: int) -> int:
+        """排队位置（从1开始）"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT priority, not_before FROM task_queue WHERE id = ?", (entry_id,)
+            ).fetchone()
+            if row is None:
+                return 0
+            return conn.execute(
+                "SELECT COUNT(*) FROM task_queue WHERE status = 'queued' AND "
+                "(priority < ? OR (priority = ? AND (not_before < ? OR (not_before = ? AND id <= ?))))",
+                (row['priority'], row['priority'], row['not_before'], row['not_before'], entry_id)
+            ).fetchone()[0]
+
+    def cancel_queued(self, task_id: int = None) -> int:
+        """取消排队中的任务（不指定task_id时清空整个队列），返回取消数量"""
+        with self._connect() as conn:
+            if task_id is None:
+                cursor = conn.execute(
+                    "UPDATE task_queue SET status = 'cancelled', finished_at = ? WHERE status = 'queued'",
+                    (time.time(),)
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE task_queue SET status = 'cancelled', finished_at = ? "
+                    "WHERE status = 'queued' AND task_id = ?",
+                    (time.time(), task_id)
+                )
+            return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM task_queue GROUP BY status").fetchall()
+        return {row[0]: row[1] for row in rows}
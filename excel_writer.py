@@ -2,17 +2,51 @@
 """
 Excel 输出器
 将筛选后的推文数据导出到 Excel 文件
+
+数据量较大（或传入迭代器）时使用openpyxl的只写模式：行按迭代顺序流式写出，
+单元格使用共享的命名样式，列宽按前若干行的样本计算，内存占用不随行数增长
 """
 
 import os
+import itertools
 import logging
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Callable, Tuple
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 # 配置将从调用方传入或使用默认配置
 
+# 只写模式使用的命名样式
+HEADER_STYLE = 'tweet_header'
+DATA_STYLE = 'tweet_data'
+DATA_ALT_STYLE = 'tweet_data_alt'
+
+class StyledRowWriter:
+    """
+    只写工作表的带样式行写入
+    
+    每种样式每列只创建一个单元格对象并复用（只写工作表的append会立即写出该行），
+    避免为每个单元格重复创建对象和查找命名样式
+    """
+    
+    def __init__(self, ws):
+        self.ws = ws
+        self._cells: Dict[str, List[WriteOnlyCell]] = {}
+    
+    def append(self, values: List[Any], style: str):
+        cells = self._cells.setdefault(style, [])
+        while len(cells) < len(values):
+            cell = WriteOnlyCell(self.ws)
+            cell.style = style
+            cells.append(cell)
+        
+        row = cells[:len(values)]
+        for cell, value in zip(row, values):
+            cell.value = value
+        self.ws.append(row)
+
 class ExcelWriter:
     def __init__(self, config=None):
         # 使用默认配置
@@ -26,6 +60,10 @@ class ExcelWriter:
         self.data_dir = config.get('data_dir', 'data')
         self.filename_format = config.get('excel_filename_format', 'twitter_daily_{date}.xlsx')
         self.sheet_name = config.get('sheet_name', 'Twitter数据')
+        # 推文数达到该值时自动使用只写模式
+        self.write_only_threshold = config.get('write_only_threshold', 5000)
+        # 只写模式下计算列宽采样的行数
+        self.width_sample_rows = config.get('width_sample_rows', 200)
         self.logger = logging.getLogger(__name__)
         
         # 确保数据目录存在
@@ -47,18 +85,52 @@ class ExcelWriter:
         filename = self.filename_format.format(date=date)
         return os.path.join(self.data_dir, filename)
     
-    def create_workbook(self) -> Workbook:
+    def create_workbook(self, write_only: bool = False) -> Workbook:
         """
         创建新的工作簿
         
+        Args:
+            write_only: 是否创建只写工作簿（没有默认工作表，已注册命名样式）
+        
         Returns:
             Excel 工作簿对象
         """
+        if write_only:
+            wb = Workbook(write_only=True)
+            self._register_named_styles(wb)
+            return wb
+        
         wb = Workbook()
         ws = wb.active
         ws.title = self.sheet_name
         return wb
     
+    @staticmethod
+    def _register_named_styles(wb: Workbook):
+        """注册表头、数据行、交替数据行三种命名样式，所有单元格共享"""
+        border = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
+        
+        header = NamedStyle(name=HEADER_STYLE)
+        header.font = Font(bold=True, color='FFFFFF')
+        header.fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+        header.alignment = Alignment(horizontal='center', vertical='center')
+        header.border = border
+        
+        data = NamedStyle(name=DATA_STYLE)
+        data.border = border
+        
+        data_alt = NamedStyle(name=DATA_ALT_STYLE)
+        data_alt.border = border
+        data_alt.fill = PatternFill(start_color='F2F2F2', end_color='F2F2F2', fill_type='solid')
+        
+        for style in (header, data, data_alt):
+            wb.add_named_style(style)
+    
     def setup_header_style(self, ws, header_row: int = 1):
         """
         设置表头样式
@@ -133,6 +205,22 @@ class ExcelWriter:
             adjusted_width = min(max(max_length + 2, 10), 50)
             ws.column_dimensions[column_letter].width = adjusted_width
     
+    def set_sampled_column_width(self, ws, sample_rows: List[List[Any]]):
+        """
+        按样本行设置列宽（只写模式下必须在写入数据前设置）
+        
+        Args:
+            ws: 工作表对象
+            sample_rows: 表头和前若干行数据
+        """
+        widths: Dict[int, int] = {}
+        for row in sample_rows:
+            for col, value in enumerate(row, 1):
+                widths[col] = max(widths.get(col, 0), len(str(value)))
+        
+        for col, max_length in widths.items():
+            ws.column_dimensions[get_column_letter(col)].width = min(max(max_length + 2, 10), 50)
+    
     def format_tweet_content(self, content: str, max_length: int = 100) -> str:
         """
         格式化推文内容
@@ -172,77 +260,131 @@ class ExcelWriter:
         except:
             return datetime_str
     
-    def write_tweets_to_excel(self, tweets: List[Dict[str, Any]], filename: Optional[str] = None) -> str:
+    def tweet_columns(self, engagement_order: Tuple[str, ...] = ('comments', 'retweets', 'likes')
+                      ) -> List[Tuple[str, Callable[[Dict[str, Any]], Any]]]:
+        """
+        推文表的列定义（不含序号列）
+        
+        Args:
+            engagement_order: 互动数列的顺序
+            
+        Returns:
+            [(表头, 取值函数)]
+        """
+        engagement_headers = {'comments': '评论数', 'retweets': '转发数', 'likes': '点赞数'}
+        columns = [
+            ('账号', lambda tweet: f"@{tweet.get('username', '')}"),
+            ('推文内容', lambda tweet: self.format_tweet_content(tweet.get('content', ''))),
+            ('发布时间', lambda tweet: self.format_datetime(tweet.get('publish_time', ''))),
+        ]
+        columns.extend(
+            (engagement_headers[field], lambda tweet, field=field: tweet.get(field, 0))
+            for field in engagement_order
+        )
+        columns.extend([
+            ('推文链接', lambda tweet: tweet.get('link', '')),
+            ('来源', lambda tweet: tweet.get('source', '')),
+            ('来源类型', lambda tweet: tweet.get('source_type', '')),
+            ('筛选原因', lambda tweet: ', '.join(tweet.get('filter_reasons', []))),
+        ])
+        return columns
+    
+    def _resolve_filename(self, filename: Optional[str]) -> str:
+        if not filename:
+            return self.generate_filename()
+        # 如果传入了filename，确保它在data目录下
+        if not os.path.dirname(filename):
+            return os.path.join(self.data_dir, filename)
+        return filename
+    
+    def _use_write_only(self, tweets: Iterable[Dict[str, Any]], write_only: Optional[bool]) -> bool:
+        if write_only is not None:
+            return write_only
+        if not isinstance(tweets, (list, tuple)):
+            return True
+        return len(tweets) >= self.write_only_threshold
+    
+    @staticmethod
+    def _peek_empty(tweets: Iterable[Dict[str, Any]]) -> Tuple[bool, Iterable[Dict[str, Any]]]:
+        """判断推文是否为空；迭代器取出第一项后重新拼回"""
+        if isinstance(tweets, (list, tuple)):
+            return not tweets, tweets
+        iterator = iter(tweets)
+        try:
+            first = next(iterator)
+        except StopIteration:
+            return True, iterator
+        return False, itertools.chain([first], iterator)
+    
+    def _write_tweet_sheet(self, wb: Workbook, tweets: Iterable[Dict[str, Any]],
+                           columns: List[Tuple[str, Callable]], write_only: bool) -> int:
+        """写入推文工作表，返回写入的推文数"""
+        headers = ['序号'] + [header for header, _ in columns]
+        rows = (
+            [index] + [extract(tweet) for _, extract in columns]
+            for index, tweet in enumerate(tweets, 1)
+        )
+        
+        if not write_only:
+            ws = wb.active
+            ws.append(headers)
+            count = 0
+            for row in rows:
+                ws.append(row)
+                count += 1
+            
+            # 应用样式
+            self.setup_header_style(ws)
+            self.setup_data_style(ws)
+            self.auto_adjust_column_width(ws)
+            return count
+        
+        ws = wb.create_sheet(title=self.sheet_name)
+        sample = list(itertools.islice(rows, self.width_sample_rows))
+        self.set_sampled_column_width(ws, [headers] + sample)
+        writer = StyledRowWriter(ws)
+        writer.append(headers, HEADER_STYLE)
+        
+        count = 0
+        for excel_row, row in enumerate(itertools.chain(sample, rows), 2):
+            # 交替行颜色（与普通模式一致：偶数行加底色）
+            writer.append(row, DATA_ALT_STYLE if excel_row % 2 == 0 else DATA_STYLE)
+            count += 1
+        return count
+    
+    def write_tweets_to_excel(self, tweets: Iterable[Dict[str, Any]], filename: Optional[str] = None,
+                              write_only: Optional[bool] = None) -> str:
         """
         将推文数据写入 Excel 文件
         
         Args:
-            tweets: 推文数据列表
+            tweets: 推文数据列表或迭代器（迭代器按顺序流式写入）
             filename: 输出文件名，如果不提供则自动生成
+            write_only: 是否使用只写模式，None时按数据量自动选择（迭代器总是使用只写模式）
             
         Returns:
             生成的文件路径
         """
-        if not tweets:
+        empty, tweets = self._peek_empty(tweets)
+        if empty:
             self.logger.warning("没有推文数据需要写入 Excel")
             return ''
         
         # 生成文件名
-        if not filename:
-            filename = self.generate_filename()
-        else:
-            # 如果传入了filename，确保它在data目录下
-            if not os.path.dirname(filename):
-                filename = os.path.join(self.data_dir, filename)
+        filename = self._resolve_filename(filename)
+        write_only = self._use_write_only(tweets, write_only)
         
-        self.logger.info(f"开始写入 {len(tweets)} 条推文数据到 Excel: {filename}")
+        size_info = f"{len(tweets)} 条" if isinstance(tweets, (list, tuple)) else "流式"
+        self.logger.info(f"开始写入{size_info}推文数据到 Excel: {filename}（只写模式: {write_only}）")
         
         try:
-            # 创建工作簿
-            wb = self.create_workbook()
-            ws = wb.active
-            
-            # 定义列标题
-            headers = [
-                '序号',
-                '账号',
-                '推文内容',
-                '发布时间',
-                '评论数',
-                '转发数',
-                '点赞数',
-                '推文链接',
-                '来源',
-                '来源类型',
-                '筛选原因'
-            ]
-            
-            # 写入表头
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=1, column=col, value=header)
-            
-            # 写入数据
-            for row, tweet in enumerate(tweets, 2):
-                ws.cell(row=row, column=1, value=row - 1)  # 序号
-                ws.cell(row=row, column=2, value=f"@{tweet.get('username', '')}")
-                ws.cell(row=row, column=3, value=self.format_tweet_content(tweet.get('content', '')))
-                ws.cell(row=row, column=4, value=self.format_datetime(tweet.get('publish_time', '')))
-                ws.cell(row=row, column=5, value=tweet.get('comments', 0))
-                ws.cell(row=row, column=6, value=tweet.get('retweets', 0))
-                ws.cell(row=row, column=7, value=tweet.get('likes', 0))
-                ws.cell(row=row, column=8, value=tweet.get('link', ''))
-                ws.cell(row=row, column=9, value=tweet.get('source', ''))
-                ws.cell(row=row, column=10, value=tweet.get('source_type', ''))
-                ws.cell(row=row, column=11, value=', '.join(tweet.get('filter_reasons', [])))
-            
-            # 应用样式
-            self.setup_header_style(ws)
-            self.setup_data_style(ws)
-            self.auto_adjust_column_width(ws)
+            # 创建工作簿并写入推文数据
+            wb = self.create_workbook(write_only=write_only)
+            count = self._write_tweet_sheet(wb, tweets, self.tweet_columns(), write_only)
             
             # 保存文件
             wb.save(filename)
-            self.logger.info(f"Excel 文件保存成功: {filename}")
+            self.logger.info(f"Excel 文件保存成功: {filename}，共 {count} 条推文")
             
             return filename
             
@@ -250,147 +392,101 @@ class ExcelWriter:
             self.logger.error(f"写入 Excel 文件失败: {e}")
             raise
     
+    def _summary_rows(self, statistics: Dict[str, Any]) -> List[List[Any]]:
+        """汇总统计表的行（空列表表示空行）"""
+        engagement_stats = statistics.get('engagement_stats', {})
+        rows = [
+            ['统计项目', '数值'],
+            ['总推文数', statistics.get('total_tweets', 0)],
+            ['通过筛选推文数', statistics.get('passed_tweets', 0)],
+            ['筛选通过率', f"{statistics.get('pass_rate', 0):.2%}"],
+            [],
+            # 互动数据统计
+            ['总点赞数', engagement_stats.get('total_likes', 0)],
+            ['总评论数', engagement_stats.get('total_comments', 0)],
+            ['总转发数', engagement_stats.get('total_retweets', 0)],
+            ['平均点赞数', f"{engagement_stats.get('avg_likes', 0):.1f}"],
+            ['平均评论数', f"{engagement_stats.get('avg_comments', 0):.1f}"],
+            ['平均转发数', f"{engagement_stats.get('avg_retweets', 0):.1f}"],
+        ]
+        
+        # 筛选原因统计
+        filter_reasons = statistics.get('filter_reasons', {})
+        if filter_reasons:
+            rows.append([])
+            rows.append(['筛选原因统计'])
+            rows.extend([reason, count] for reason, count in filter_reasons.items())
+        return rows
+    
     def create_summary_sheet(self, wb: Workbook, statistics: Dict[str, Any]):
         """
         创建汇总统计表
         
         Args:
-            wb: 工作簿对象
+            wb: 工作簿对象（普通或只写工作簿）
             statistics: 统计信息
         """
         try:
             # 创建汇总表
             summary_ws = wb.create_sheet(title='汇总统计')
-            
-            # 基本统计信息
-            summary_ws.cell(row=1, column=1, value='统计项目')
-            summary_ws.cell(row=1, column=2, value='数值')
-            
-            row = 2
-            summary_ws.cell(row=row, column=1, value='总推文数')
-            summary_ws.cell(row=row, column=2, value=statistics.get('total_tweets', 0))
-            
-            row += 1
-            summary_ws.cell(row=row, column=1, value='通过筛选推文数')
-            summary_ws.cell(row=row, column=2, value=statistics.get('passed_tweets', 0))
-            
-            row += 1
-            summary_ws.cell(row=row, column=1, value='筛选通过率')
-            summary_ws.cell(row=row, column=2, value=f"{statistics.get('pass_rate', 0):.2%}")
-            
-            # 互动数据统计
-            engagement_stats = statistics.get('engagement_stats', {})
-            row += 2
-            summary_ws.cell(row=row, column=1, value='总点赞数')
-            summary_ws.cell(row=row, column=2, value=engagement_stats.get('total_likes', 0))
-            
-            row += 1
-            summary_ws.cell(row=row, column=1, value='总评论数')
-            summary_ws.cell(row=row, column=2, value=engagement_stats.get('total_comments', 0))
-            
-            row += 1
-            summary_ws.cell(row=row, column=1, value='总转发数')
-            summary_ws.cell(row=row, column=2, value=engagement_stats.get('total_retweets', 0))
-            
-            row += 1
-            summary_ws.cell(row=row, column=1, value='平均点赞数')
-            summary_ws.cell(row=row, column=2, value=f"{engagement_stats.get('avg_likes', 0):.1f}")
-            
-            row += 1
-            summary_ws.cell(row=row, column=1, value='平均评论数')
-            summary_ws.cell(row=row, column=2, value=f"{engagement_stats.get('avg_comments', 0):.1f}")
-            
-            row += 1
-            summary_ws.cell(row=row, column=1, value='平均转发数')
-            summary_ws.cell(row=row, column=2, value=f"{engagement_stats.get('avg_retweets', 0):.1f}")
-            
-            # 筛选原因统计
-            filter_reasons = statistics.get('filter_reasons', {})
-            if filter_reasons:
-                row += 2
-                summary_ws.cell(row=row, column=1, value='筛选原因统计')
-                row += 1
-                for reason, count in filter_reasons.items():
-                    summary_ws.cell(row=row, column=1, value=reason)
-                    summary_ws.cell(row=row, column=2, value=count)
-                    row += 1
-            
-            # 应用样式
-            self.setup_header_style(summary_ws, 1)
-            self.auto_adjust_column_width(summary_ws)
+            rows = self._summary_rows(statistics)
+            
+            if wb.write_only:
+                self.set_sampled_column_width(summary_ws, rows)
+                StyledRowWriter(summary_ws).append(rows[0], HEADER_STYLE)
+                for row in rows[1:]:
+                    summary_ws.append(row)
+            else:
+                for row in rows:
+                    summary_ws.append(row)
+                
+                # 应用样式
+                self.setup_header_style(summary_ws, 1)
+                self.auto_adjust_column_width(summary_ws)
             
             self.logger.info("汇总统计表创建成功")
             
         except Exception as e:
             self.logger.error(f"创建汇总统计表失败: {e}")
     
-    def write_tweets_with_summary(self, tweets: List[Dict[str, Any]], statistics: Dict[str, Any], 
-                                 filename: Optional[str] = None) -> str:
+    def write_tweets_with_summary(self, tweets: Iterable[Dict[str, Any]], statistics: Dict[str, Any], 
+                                 filename: Optional[str] = None, write_only: Optional[bool] = None) -> str:
         """
         将推文数据和统计信息写入 Excel 文件
         
         Args:
-            tweets: 推文数据列表
+            tweets: 推文数据列表或迭代器（迭代器按顺序流式写入）
             statistics: 统计信息
             filename: 输出文件名
+            write_only: 是否使用只写模式，None时按数据量自动选择（迭代器总是使用只写模式）
             
         Returns:
             生成的文件路径
         """
-        if not tweets:
+        empty, tweets = self._peek_empty(tweets)
+        if empty:
             self.logger.warning("没有推文数据需要写入 Excel")
             return ''
         
         # 生成文件名
-        if not filename:
-            filename = self.generate_filename()
-        else:
-            # 如果传入了filename，确保它在data目录下
-            if not os.path.dirname(filename):
-                filename = os.path.join(self.data_dir, filename)
+        filename = self._resolve_filename(filename)
+        write_only = self._use_write_only(tweets, write_only)
         
-        self.logger.info(f"开始写入 {len(tweets)} 条推文数据和统计信息到 Excel: {filename}")
+        size_info = f"{len(tweets)} 条" if isinstance(tweets, (list, tuple)) else "流式"
+        self.logger.info(f"开始写入{size_info}推文数据和统计信息到 Excel: {filename}（只写模式: {write_only}）")
         
         try:
             # 创建工作簿并写入推文数据
-            wb = self.create_workbook()
-            ws = wb.active
-            
-            # 定义列标题
-            headers = [
-                '序号', '账号', '推文内容', '发布时间', '点赞数', '评论数', '转发数',
-                '推文链接', '来源', '来源类型', '筛选原因'
-            ]
-            
-            # 写入表头
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=1, column=col, value=header)
-            
-            # 写入数据
-            for row, tweet in enumerate(tweets, 2):
-                ws.cell(row=row, column=1, value=row - 1)
-                ws.cell(row=row, column=2, value=f"@{tweet.get('username', '')}")
-                ws.cell(row=row, column=3, value=self.format_tweet_content(tweet.get('content', '')))
-                ws.cell(row=row, column=4, value=self.format_datetime(tweet.get('publish_time', '')))
-                ws.cell(row=row, column=5, value=tweet.get('likes', 0))
-                ws.cell(row=row, column=6, value=tweet.get('comments', 0))
-                ws.cell(row=row, column=7, value=tweet.get('retweets', 0))
-                ws.cell(row=row, column=8, value=tweet.get('link', ''))
-                ws.cell(row=row, column=9, value=tweet.get('source', ''))
-                ws.cell(row=row, column=10, value=tweet.get('source_type', ''))
-                ws.cell(row=row, column=11, value=', '.join(tweet.get('filter_reasons', [])))
-            
-            # 应用样式
-            self.setup_header_style(ws)
-            self.setup_data_style(ws)
-            self.auto_adjust_column_width(ws)
+            wb = self.create_workbook(write_only=write_only)
+            columns = self.tweet_columns(engagement_order=('likes', 'comments', 'retweets'))
+            count = self._write_tweet_sheet(wb, tweets, columns, write_only)
             
             # 创建汇总统计表
             self.create_summary_sheet(wb, statistics)
             
             # 保存文件
             wb.save(filename)
-            self.logger.info(f"Excel 文件（含统计信息）保存成功: {filename}")
+            self.logger.info(f"Excel 文件（含统计信息）保存成功: {filename}，共 {count} 条推文")
             
             return filename
             
@@ -9,23 +9,57 @@
 import os
 import sys
 import json
+import hashlib
+import threading
 import requests
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterator, Iterable, Callable
 import logging
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from web_app import app, db, TweetData, FEISHU_CONFIG
+from web_app import app, db, TweetData, FEISHU_CONFIG, feishu_record_key, tweet_to_feishu_record
 from cloud_sync import CloudSyncManager
 
+# 后台抽样验证默认比例
+BACKGROUND_SAMPLE_RATE = 0.2
+# 保留最近多少个任务的后台验证结果
+BACKGROUND_RESULT_LIMIT = 100
+
+# 后台验证结果：任务ID -> 最近一次验证的状态和摘要，供 GET /api/data/validate_feishu/<task_id> 查询
+_background_results: Dict[Any, Dict[str, Any]] = OrderedDict()
+_background_results_lock = threading.Lock()
+
+
+def _store_background_result(task_id, entry: Dict[str, Any]):
+    with _background_results_lock:
+        _background_results.pop(task_id, None)
+        _background_results[task_id] = entry
+        while len(_background_results) > BACKGROUND_RESULT_LIMIT:
+            _background_results.popitem(last=False)
+
+
+def get_background_validation_result(task_id: int = None) -> Dict[str, Any]:
+    """获取任务最近一次后台验证的状态和摘要，没有记录时返回None"""
+    with _background_results_lock:
+        entry = _background_results.get(task_id)
+        return dict(entry) if entry else None
+
 class FeishuDataValidator:
     """
     飞书数据验证器
     负责获取飞书数据并与本地数据进行比对
     """
     
+    # 需要比对的字段
+    COMPARE_FIELDS = (
+        '推文原文内容', '作者（账号）', '推文链接', '话题标签（Hashtag）',
+        '类型标签', '评论', '点赞', '转发'
+    )
+    NUMERIC_FIELDS = ('评论', '点赞', '转发')
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.feishu_config = FEISHU_CONFIG
@@ -97,51 +131,60 @@ class FeishuDataValidator:
             self.logger.error(f"获取飞书表格字段异常: {e}")
             return {}
     
-    def get_feishu_table_records(self, access_token: str, page_size: int = 100) -> List[Dict[str, Any]]:
+    def iter_feishu_table_records(self, access_token: str, page_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
         """
-        获取飞书表格记录
+        逐页获取飞书表格记录（带文档级频率限制）
         
         Args:
             access_token: 飞书访问令牌
-            page_size: 每页记录数
+            page_size: 每页记录数（飞书上限500）
             
-        Returns:
-            记录列表
+        Yields:
+            每一页的原始记录列表
         """
         url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.feishu_config['spreadsheet_token']}/tables/{self.feishu_config['table_id']}/records"
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json; charset=utf-8"
         }
-        
-        all_records = []
         page_token = None
         
+        while True:
+            params = {"page_size": page_size}
+            if page_token:
+                params["page_token"] = page_token
+            
+            result = self.sync_manager._feishu_doc_request(
+                'GET', url, headers, self.feishu_config['spreadsheet_token'], params=params
+            )
+            if result.get('code') != 0:
+                raise Exception(f"获取飞书表格记录失败: {result.get('msg')}")
+            
+            data = result.get('data', {})
+            yield data.get('items') or []
+            
+            # 检查是否有下一页
+            page_token = data.get('page_token')
+            if not data.get('has_more') or not page_token:
+                break
+    
+    def get_feishu_table_records(self, access_token: str, page_size: int = 500) -> List[Dict[str, Any]]:
+        """
+        获取飞书表格的全部记录
+        
+        Args:
+            access_token: 飞书访问令牌
+            page_size: 每页记录数
+            
+        Returns:
+            记录列表
+        """
+        all_records = []
         try:
-            while True:
-                params = {"page_size": page_size}
-                if page_token:
-                    params["page_token"] = page_token
-                
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-                result = response.json()
-                
-                if result.get('code') == 0:
-                    data = result.get('data', {})
-                    records = data.get('items', [])
-                    all_records.extend(records)
-                    
-                    # 检查是否有下一页
-                    page_token = data.get('page_token')
-                    if not page_token:
-                        break
-                else:
-                    self.logger.error(f"获取飞书表格记录失败: {result}")
-                    break
-                    
+            for records in self.iter_feishu_table_records(access_token, page_size):
+                all_records.extend(records)
         except Exception as e:
             self.logger.error(f"获取飞书表格记录异常: {e}")
-            
         return all_records
     
     def parse_feishu_records(self, records: List[Dict[str, Any]], field_mapping: Dict[str, str]) -> List[Dict[str, Any]]:
@@ -184,6 +227,34 @@ class FeishuDataValidator:
         
         return parsed_records
     
+    def iter_local_sync_data(self, task_id: int = None, page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        按id分页读取本地同步的数据
+        
+        Args:
+            task_id: 任务ID，如果为None则读取所有数据
+            page_size: 每页记录数
+            
+        Yields:
+            与飞书同步格式一致的本地记录（附带id）
+        """
+        with app.app_context():
+            last_id = 0
+            while True:
+                query = TweetData.query.filter(TweetData.id > last_id)
+                if task_id:
+                    query = query.filter(TweetData.task_id == task_id)
+                tweets = query.order_by(TweetData.id).limit(page_size).all()
+                if not tweets:
+                    break
+                
+                last_id = tweets[-1].id
+                for tweet in tweets:
+                    tweet_data = tweet_to_feishu_record(tweet)
+                    tweet_data['id'] = tweet.id
+                    tweet_data['task_id'] = tweet.task_id
+                    yield tweet_data
+    
     def get_local_sync_data(self, task_id: int = None) -> List[Dict[str, Any]]:
         """
         获取本地同步的数据
@@ -195,174 +266,172 @@ class FeishuDataValidator:
             本地数据列表
         """
         try:
-            with app.app_context():
-                if task_id:
-                    tweets = TweetData.query.filter_by(task_id=task_id).all()
-                else:
-                    tweets = TweetData.query.all()
-                
-                local_data = []
-                for tweet in tweets:
-                    # 构建与飞书同步格式一致的数据
-                    tweet_data = {
-                        'id': tweet.id,
-                        'task_id': tweet.task_id,
-                        '推文原文内容': tweet.content or '',
-                        '作者（账号）': tweet.username or '',
-                        '推文链接': tweet.link or '',
-                        '话题标签（Hashtag）': tweet.hashtags or '',
-                        '类型标签': tweet.content_type or '',
-                        '评论': tweet.comments or 0,
-                        '点赞': tweet.likes or 0,
-                        '转发': tweet.retweets or 0,
-                        '发布时间': int(tweet.scraped_at.timestamp() * 1000) if tweet.scraped_at else 0
-                    }
-                    local_data.append(tweet_data)
-                
-                return local_data
+            return list(self.iter_local_sync_data(task_id))
         except Exception as e:
             self.logger.error(f"获取本地数据异常: {e}")
             return []
     
-    def compare_data(self, local_data: List[Dict[str, Any]], feishu_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    @staticmethod
+    def _normalize_field_value(field_name: str, value: Any) -> Any:
+        """把本地和飞书的字段值归一化为可比较的形式"""
+        if field_name in FeishuDataValidator.NUMERIC_FIELDS:
+            try:
+                return int(float(value)) if value not in (None, '') else 0
+            except (TypeError, ValueError):
+                return 0
+        
+        # 飞书文本字段可能返回富文本片段列表，超链接字段返回{'link', 'text'}
+        if isinstance(value, list):
+            value = ''.join(
+                item.get('text', '') if isinstance(item, dict) else str(item) for item in value
+            )
+        elif isinstance(value, dict):
+            value = value.get('link') or value.get('text') or ''
+        return str(value if value is not None else '').strip()
+    
+    @classmethod
+    def _record_digests(cls, fields: Dict[str, Any]) -> Dict[str, str]:
+        """计算需要比对的各字段的短摘要"""
+        return {
+            field_name: hashlib.blake2b(
+                str(cls._normalize_field_value(field_name, fields.get(field_name, ''))).encode('utf-8'),
+                digest_size=8
+            ).hexdigest()
+            for field_name in cls.COMPARE_FIELDS
+        }
+    
+    @staticmethod
+    def _in_sample(key: str, sample_rate: float) -> bool:
+        """按记录键的哈希做确定性抽样，保证本地和飞书两侧抽中同一批记录"""
+        if sample_rate >= 1.0:
+            return True
+        bucket = int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return bucket < sample_rate
+    
+    @staticmethod
+    def _content_preview(content: str) -> str:
+        content = (content or '').strip()
+        return content[:100] + '...' if len(content) > 100 else content
+    
+    def compare_streams(self, local_records: Iterable[Dict[str, Any]],
+                        feishu_pages: Iterable[List[Dict[str, Any]]],
+                        sample_rate: float = 1.0,
+                        max_samples: int = 50) -> Dict[str, Any]:
         """
-        比对本地数据和飞书数据
+        流式比对本地数据和飞书数据，只保留不一致的记录
+        
+        本地侧只在内存中保存 {记录键: (本地id, 各字段摘要)}，飞书侧逐页读取、逐条比对后即丢弃。
+        记录键优先使用推文链接，其次为作者+内容哈希，与同步时的去重键一致。
         
         Args:
-            local_data: 本地数据列表
-            feishu_data: 飞书数据列表
+            local_records: 本地记录迭代器（iter_local_sync_data）
+            feishu_pages: 飞书已解析记录的分页迭代器
+            sample_rate: 抽样比例 (0, 1]，1表示全量比对
+            max_samples: 每类不一致记录最多保留的样例数
             
         Returns:
             比对结果字典
         """
-        comparison_result = {
-            'local_count': len(local_data),
-            'feishu_count': len(feishu_data),
-            'matched_records': [],
-            'missing_in_feishu': [],
-            'extra_in_feishu': [],
-            'field_mismatches': [],
-            'summary': {}
-        }
-        
-        # 创建本地数据的内容索引（用推文原文内容作为唯一标识）
-        local_content_map = {}
-        for local_record in local_data:
-            content = local_record.get('推文原文内容', '').strip()
-            if content:
-                local_content_map[content] = local_record
-        
-        # 创建飞书数据的内容索引
-        feishu_content_map = {}
-        for feishu_record in feishu_data:
-            content = feishu_record.get('fields', {}).get('推文原文内容', '').strip()
-            if content:
-                feishu_content_map[content] = feishu_record
-        
-        # 查找匹配的记录
-        for content, local_record in local_content_map.items():
-            if content in feishu_content_map:
-                feishu_record = feishu_content_map[content]
-                
-                # 比对字段值
-                field_matches = self._compare_record_fields(local_record, feishu_record)
+        local_index = {}
+        for local_record in local_records:
+            key = feishu_record_key(local_record.get('推文链接'), local_record.get('作者（账号）'),
+                                    local_record.get('推文原文内容'))
+            if self._in_sample(key, sample_rate):
+                local_index[key] = (local_record['id'], self._record_digests(local_record))
+        
+        total_local = len(local_index)
+        counts = {'feishu': 0, 'matched': 0, 'extra': 0, 'mismatch': 0}
+        mismatched = {}  # 本地id -> (飞书字段, 不一致字段列表)
+        extra_in_feishu = []
+        
+        for page in feishu_pages:
+            for feishu_record in page:
+                fields = feishu_record.get('fields', {})
+                key = feishu_record_key(self._normalize_field_value('推文链接', fields.get('推文链接')),
+                                        self._normalize_field_value('作者（账号）', fields.get('作者（账号）')),
+                                        self._normalize_field_value('推文原文内容', fields.get('推文原文内容')))
+                if not self._in_sample(key, sample_rate):
+                    continue
+                counts['feishu'] += 1
                 
-                comparison_result['matched_records'].append({
-                    'content': content[:100] + '...' if len(content) > 100 else content,
-                    'local_record': local_record,
-                    'feishu_record': feishu_record,
-                    'field_matches': field_matches
-                })
+                local_entry = local_index.pop(key, None)
+                if local_entry is None:
+                    counts['extra'] += 1
+                    if len(extra_in_feishu) < max_samples:
+                        extra_in_feishu.append({
+                            'content': self._content_preview(self._normalize_field_value('推文原文内容', fields.get('推文原文内容'))),
+                            'record_id': feishu_record.get('record_id')
+                        })
+                    continue
                 
-                # 记录字段不匹配的情况
-                if not field_matches['all_match']:
-                    comparison_result['field_mismatches'].append({
-                        'content': content[:100] + '...' if len(content) > 100 else content,
-                        'mismatched_fields': field_matches['mismatched_fields']
-                    })
-            else:
-                # 本地有但飞书没有的记录
-                comparison_result['missing_in_feishu'].append({
-                    'content': content[:100] + '...' if len(content) > 100 else content,
-                    'local_record': local_record
-                })
-        
-        # 查找飞书中多出的记录
-        for content, feishu_record in feishu_content_map.items():
-            if content not in local_content_map:
-                comparison_result['extra_in_feishu'].append({
-                    'content': content[:100] + '...' if len(content) > 100 else content,
-                    'feishu_record': feishu_record
-                })
-        
-        # 生成摘要
-        comparison_result['summary'] = {
-            'total_local': len(local_data),
-            'total_feishu': len(feishu_data),
-            'matched_count': len(comparison_result['matched_records']),
-            'missing_in_feishu_count': len(comparison_result['missing_in_feishu']),
-            'extra_in_feishu_count': len(comparison_result['extra_in_feishu']),
-            'field_mismatch_count': len(comparison_result['field_mismatches']),
-            'sync_accuracy': len(comparison_result['matched_records']) / len(local_data) * 100 if local_data else 0
-        }
-        
-        return comparison_result
-    
-    def _compare_record_fields(self, local_record: Dict[str, Any], feishu_record: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        比对单条记录的字段值
-        
-        Args:
-            local_record: 本地记录
-            feishu_record: 飞书记录
-            
-        Returns:
-            字段比对结果
-        """
-        feishu_fields = feishu_record.get('fields', {})
-        
-        # 需要比对的字段
-        compare_fields = [
-            '推文原文内容', '作者（账号）', '推文链接', '话题标签（Hashtag）',
-            '类型标签', '评论', '点赞', '转发'
+                counts['matched'] += 1
+                local_id, local_digests = local_entry
+                remote_digests = self._record_digests(fields)
+                differing = [name for name in self.COMPARE_FIELDS if local_digests[name] != remote_digests[name]]
+                if differing:
+                    counts['mismatch'] += 1
+                    if len(mismatched) < max_samples:
+                        mismatched[local_id] = (
+                            {name: self._normalize_field_value(name, fields.get(name, '')) for name in differing},
+                            feishu_record.get('record_id')
+                        )
+        
+        # 只为不一致的样例回查本地记录的完整值
+        missing_ids = [local_id for local_id, _ in list(local_index.values())[:max_samples]]
+        with app.app_context():
+            sample_tweets = {
+                tweet.id: tweet_to_feishu_record(tweet)
+                for tweet in TweetData.query.filter(TweetData.id.in_(list(mismatched.keys()) + missing_ids)).all()
+            } if (mismatched or missing_ids) else {}
+        
+        field_mismatches = []
+        for local_id, (remote_values, record_id) in mismatched.items():
+            local_values = sample_tweets.get(local_id, {})
+            field_mismatches.append({
+                'content': self._content_preview(local_values.get('推文原文内容', '')),
+                'local_id': local_id,
+                'record_id': record_id,
+                'mismatched_fields': [
+                    {
+                        'field': name,
+                        'local_value': self._normalize_field_value(name, local_values.get(name, '')),
+                        'feishu_value': remote_value
+                    }
+                    for name, remote_value in remote_values.items()
+                ]
+            })
+        
+        missing_in_feishu = [
+            {'content': self._content_preview(sample_tweets.get(local_id, {}).get('推文原文内容', '')),
+             'local_id': local_id}
+            for local_id in missing_ids
         ]
         
-        matched_fields = []
-        mismatched_fields = []
-        
-        for field_name in compare_fields:
-            local_value = local_record.get(field_name, '')
-            feishu_value = feishu_fields.get(field_name, '')
-            
-            # 数值字段特殊处理
-            if field_name in ['评论', '点赞', '转发']:
-                local_value = int(local_value) if local_value else 0
-                feishu_value = int(feishu_value) if feishu_value else 0
-            else:
-                local_value = str(local_value).strip()
-                feishu_value = str(feishu_value).strip()
-            
-            if local_value == feishu_value:
-                matched_fields.append(field_name)
-            else:
-                mismatched_fields.append({
-                    'field': field_name,
-                    'local_value': local_value,
-                    'feishu_value': feishu_value
-                })
-        
         return {
-            'all_match': len(mismatched_fields) == 0,
-            'matched_fields': matched_fields,
-            'mismatched_fields': mismatched_fields
+            'local_count': total_local,
+            'feishu_count': counts['feishu'],
+            'missing_in_feishu': missing_in_feishu,
+            'extra_in_feishu': extra_in_feishu,
+            'field_mismatches': field_mismatches,
+            'summary': {
+                'total_local': total_local,
+                'total_feishu': counts['feishu'],
+                'matched_count': counts['matched'],
+                'missing_in_feishu_count': len(local_index),
+                'extra_in_feishu_count': counts['extra'],
+                'field_mismatch_count': counts['mismatch'],
+                'sync_accuracy': counts['matched'] / total_local * 100 if total_local else 0,
+                'sample_rate': sample_rate
+            }
         }
     
-    def validate_sync_data(self, task_id: int = None) -> Dict[str, Any]:
+    def validate_sync_data(self, task_id: int = None, sample_rate: float = 1.0) -> Dict[str, Any]:
         """
         验证同步数据的完整性和准确性
         
         Args:
             task_id: 任务ID，如果为None则验证所有数据
+            sample_rate: 抽样比例 (0, 1]，1表示全量验证
             
         Returns:
             验证结果字典
@@ -371,6 +440,7 @@ class FeishuDataValidator:
         print(f"🔍 开始飞书数据验证流程")
         print(f"📋 验证参数:")
         print(f"   - 任务ID: {task_id if task_id else '全部任务'}")
+        print(f"   - 抽样比例: {sample_rate:.0%}")
         print(f"   - 验证时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*80}")
         
@@ -395,10 +465,7 @@ class FeishuDataValidator:
                 return {'success': False, 'error': error_msg}
             
             print(f"✅ 飞书配置检查通过")
-            print(f"   - App ID: {self.feishu_config['app_id'][:10]}...")
-            print(f"   - 表格Token: {self.feishu_config['spreadsheet_token'][:10]}...")
             print(f"   - 表格ID: {self.feishu_config['table_id']}")
-            print(f"   - 启用状态: {self.feishu_config.get('enabled', False)}")
             
             # 1. 获取飞书访问令牌
             print(f"\n🔑 步骤1: 获取飞书访问令牌")
@@ -422,32 +489,23 @@ class FeishuDataValidator:
             field_id_to_name = field_info['field_id_to_name']
             print(f"✅ 获取到 {len(field_id_to_name)} 个字段")
             
-            # 3. 获取飞书表格记录
-            print(f"\n📊 步骤3: 获取飞书表格记录")
-            feishu_records = self.get_feishu_table_records(access_token)
-            print(f"✅ 获取到 {len(feishu_records)} 条飞书记录")
-            
-            # 4. 解析飞书记录
-            print(f"\n🔄 步骤4: 解析飞书记录")
-            parsed_feishu_data = self.parse_feishu_records(feishu_records, field_id_to_name)
-            print(f"✅ 解析完成 {len(parsed_feishu_data)} 条记录")
-            
-            # 5. 获取本地数据
-            print(f"\n💾 步骤5: 获取本地数据")
-            local_data = self.get_local_sync_data(task_id)
-            print(f"✅ 获取到 {len(local_data)} 条本地记录")
+            # 3. 流式比对：本地分页建立摘要索引，飞书逐页读取并比对
+            print(f"\n🔍 步骤3: 流式比对本地与飞书数据")
+            feishu_pages = (
+                self.parse_feishu_records(records, field_id_to_name)
+                for records in self.iter_feishu_table_records(access_token)
+            )
+            comparison_result = self.compare_streams(
+                self.iter_local_sync_data(task_id), feishu_pages, sample_rate=sample_rate
+            )
             
-            # 6. 数据比对
-            print(f"\n🔍 步骤6: 数据比对分析")
-            comparison_result = self.compare_data(local_data, parsed_feishu_data)
-            
-            # 7. 输出比对结果
+            # 4. 输出比对结果
             self._print_comparison_result(comparison_result)
             
             return {
                 'success': True,
                 'comparison_result': comparison_result,
-                'field_info': field_info,
+                'field_info': {key: value for key, value in field_info.items() if key != 'fields_data'},
                 'validation_time': datetime.now().isoformat()
             }
             
@@ -457,6 +515,51 @@ class FeishuDataValidator:
             self.logger.error(error_msg)
             return {'success': False, 'error': error_msg}
     
+    def start_background_validation(self, task_id: int = None,
+                                    sample_rate: float = BACKGROUND_SAMPLE_RATE,
+                                    callback: Callable[[Dict[str, Any]], None] = None) -> threading.Thread:
+        """
+        在后台线程中执行抽样验证，不阻塞调用方（如同步或采集任务）
+        
+        验证状态和结果摘要按任务ID保存，可通过get_background_validation_result查询。
+        
+        Args:
+            task_id: 任务ID，如果为None则验证所有数据
+            sample_rate: 抽样比例
+            callback: 验证完成后以验证结果调用的回调
+            
+        Returns:
+            已启动的后台线程
+        """
+        entry = {
+            'task_id': task_id,
+            'status': 'running',
+            'sample_rate': sample_rate,
+            'started_at': datetime.now().isoformat(),
+        }
+        _store_background_result(task_id, entry)
+        
+        def run_validation():
+            result = self.validate_sync_data(task_id=task_id, sample_rate=sample_rate)
+            finished = dict(entry, finished_at=datetime.now().isoformat())
+            if result.get('success'):
+                summary = result['comparison_result']['summary']
+                finished.update(status='completed', validation_time=result.get('validation_time'), summary=summary)
+                self.logger.info(
+                    f"后台抽样验证完成 (任务 {task_id}, 抽样 {sample_rate:.0%}): "
+                    f"准确率 {summary['sync_accuracy']:.2f}%，字段不匹配 {summary['field_mismatch_count']} 条"
+                )
+            else:
+                finished.update(status='failed', error=result.get('error'))
+                self.logger.warning(f"后台抽样验证失败 (任务 {task_id}): {result.get('error')}")
+            _store_background_result(task_id, finished)
+            if callback:
+                callback(result)
+        
+        thread = threading.Thread(target=run_validation, name=f"feishu-validate-{task_id}", daemon=True)
+        thread.start()
+        return thread
+    
     def _print_comparison_result(self, result: Dict[str, Any]):
         """
         打印比对结果
@@ -477,27 +580,27 @@ class FeishuDataValidator:
         
         # 显示详细的不匹配信息
         if result['missing_in_feishu']:
-            print(f"\n❌ 飞书中缺失的记录 ({len(result['missing_in_feishu'])} 条):")
+            print(f"\n❌ 飞书中缺失的记录 ({summary['missing_in_feishu_count']} 条):")
             for i, missing in enumerate(result['missing_in_feishu'][:5]):
                 print(f"   {i+1}. {missing['content']}")
-            if len(result['missing_in_feishu']) > 5:
-                print(f"   ... 还有 {len(result['missing_in_feishu']) - 5} 条")
+            if summary['missing_in_feishu_count'] > 5:
+                print(f"   ... 还有 {summary['missing_in_feishu_count'] - 5} 条")
         
         if result['extra_in_feishu']:
-            print(f"\n⚠️ 飞书中多余的记录 ({len(result['extra_in_feishu'])} 条):")
+            print(f"\n⚠️ 飞书中多余的记录 ({summary['extra_in_feishu_count']} 条):")
             for i, extra in enumerate(result['extra_in_feishu'][:5]):
                 print(f"   {i+1}. {extra['content']}")
-            if len(result['extra_in_feishu']) > 5:
-                print(f"   ... 还有 {len(result['extra_in_feishu']) - 5} 条")
+            if summary['extra_in_feishu_count'] > 5:
+                print(f"   ... 还有 {summary['extra_in_feishu_count'] - 5} 条")
         
         if result['field_mismatches']:
-            print(f"\n🔄 字段值不匹配的记录 ({len(result['field_mismatches'])} 条):")
+            print(f"\n🔄 字段值不匹配的记录 ({summary['field_mismatch_count']} 条):")
             for i, mismatch in enumerate(result['field_mismatches'][:3]):
                 print(f"   {i+1}. {mismatch['content']}")
                 for field_mismatch in mismatch['mismatched_fields'][:3]:
                     print(f"      - {field_mismatch['field']}: 本地='{field_mismatch['local_value']}' vs 飞书='{field_mismatch['feishu_value']}'")
-            if len(result['field_mismatches']) > 3:
-                print(f"   ... 还有 {len(result['field_mismatches']) - 3} 条")
+            if summary['field_mismatch_count'] > 3:
+                print(f"   ... 还有 {summary['field_mismatch_count'] - 3} 条")
         
         # 总体评估
         if summary['sync_accuracy'] >= 95:
@@ -515,6 +618,7 @@ def main():
     
     parser = argparse.ArgumentParser(description='飞书数据验证器')
     parser.add_argument('--task-id', type=int, help='指定任务ID进行验证')
+    parser.add_argument('--sample-rate', type=float, default=1.0, help='抽样比例 (0, 1]，默认全量验证')
     parser.add_argument('--verbose', action='store_true', help='详细输出')
     
     args = parser.parse_args()
@@ -527,7 +631,7 @@ def main():
     
     # 创建验证器并执行验证
     validator = FeishuDataValidator()
-    result = validator.validate_sync_data(task_id=args.task_id)
+    result = validator.validate_sync_data(task_id=args.task_id, sample_rate=args.sample_rate)
     
     if result['success']:
         print(f"\n🎉 数据验证完成")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨进程资源租约服务
+AdsPower配置文件、推特账号等资源的占用记录保存在SQLite的resource_leases表中。
+领取是原子的比较并设置（只有无人持有、租约已过期或本进程已持有时才成功），
+持有方定期续约，进程退出或失联后租约过期，资源自动可被其他进程领取
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Iterable, Set, Callable
+
+logger = logging.getLogger(__name__)
+
+# 与任务队列共用的默认数据库
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'twitter_scraper.db')
+
+# 资源类型
+PROFILE = 'adspower_profile'
+TWITTER_ACCOUNT = 'twitter_account'
+
+
+class LeaseService:
+    """基于SQLite的资源租约"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS resource_leases (
+            resource TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            owner TEXT NOT NULL,
+            acquired_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            heartbeat_at REAL NOT NULL,
+            metadata TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_resource_leases_kind
+            ON resource_leases (kind, expires_at);
+        CREATE INDEX IF NOT EXISTS idx_resource_leases_owner
+            ON resource_leases (owner);
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, ttl: float = 300.0):
+        """
+        Args:
+            db_path: SQLite数据库文件路径（与任务队列共用同一个文件即可）
+            ttl: 租约时长（秒），持有方需在过期前调用heartbeat续约
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def resource_key(kind: str, name: str) -> str:
+        return f"{kind}:{name}"
+
+    def try_acquire(self, kind: str, name: str, ttl: float = None,
+                    metadata: Dict[str, Any] = None) -> bool:
+        """领取单个资源，被其他进程持有且未过期时返回False"""
+        return bool(self.acquire_any(kind, [name], count=1, ttl=ttl, metadata=metadata))
+
+    def acquire_any(self, kind: str, names: Iterable[str], count: int = 1, ttl: float = None,
+                    metadata: Dict[str, Any] = None) -> List[str]:
+        """
+        按给定顺序领取最多count个可用资源
+
+        每个资源的领取都是一条带条件的UPSERT：只有记录不存在、已过期或本进程持有时才写入，
+        多个进程同时领取同一资源只有一个成功
+
+        Returns:
+            成功领取的资源名列表
+        """
+        if count <= 0:
+            return []
+        ttl = self.ttl if ttl is None else ttl
+        payload = json.dumps(metadata, ensure_ascii=False) if metadata else None
+        acquired = []
+        with self._connect() as conn:
+            for name in names:
+                now = time.time()
+                cursor = conn.execute(
+                    "INSERT INTO resource_leases (resource, kind, owner, acquired_at, expires_at, heartbeat_at, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(resource) DO UPDATE SET owner = excluded.owner, "
+                    "acquired_at = CASE WHEN resource_leases.owner = excluded.owner "
+                    "THEN resource_leases.acquired_at ELSE excluded.acquired_at END, "
+                    "expires_at = excluded.expires_at, heartbeat_at = excluded.heartbeat_at, "
+                    "metadata = excluded.metadata "
+                    "WHERE resource_leases.owner = excluded.owner OR resource_leases.expires_at < excluded.acquired_at",
+                    (self.resource_key(kind, name), kind, self.owner, now, now + ttl, now, payload)
+                )
+                if cursor.rowcount:
+                    acquired.append(name)
+                    if len(acquired) >= count:
+                        break
+        return acquired
+
+    def release(self, kind: str, names: Iterable[str]) -> int:
+        """释放本进程持有的资源，返回释放数量"""
+        keys = [self.resource_key(kind, name) for name in names]
+        if not keys:
+            return 0
+        placeholders = ','.join('?' * len(keys))
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"DELETE FROM resource_leases WHERE owner = ? AND resource IN ({placeholders})",
+                (self.owner, *keys)
+            )
+            return cursor.rowcount
+
+    def release_all(self) -> int:
+        """释放本进程持有的全部租约（进程退出前调用）"""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM resource_leases WHERE owner = ?", (self.owner,)).rowcount
+
+    def heartbeat(self, ttl: float = None) -> int:
+        """为本进程持有的全部租约续期，返回续期数量"""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE resource_leases SET expires_at = ?, heartbeat_at = ? WHERE owner = ?",
+                (now + ttl, now, self.owner)
+            )
+            return cursor.rowcount
+
+    def held_by_others(self, kind: str) -> Set[str]:
+        """其他进程持有且未过期的资源名"""
+        prefix_length = len(kind) + 1
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT resource FROM resource_leases WHERE kind = ? AND expires_at >= ? AND owner != ?",
+                (kind, time.time(), self.owner)
+            ).fetchall()
+        return {row[0][prefix_length:] for row in rows}
+
+    def holder(self, kind: str, name: str) -> Optional[str]:
+        """资源当前的持有方（未被持有或已过期时返回None）"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT owner FROM resource_leases WHERE resource = ? AND expires_at >= ?",
+                (self.resource_key(kind, name), time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def active_leases(self, kind: str = None) -> List[Dict[str, Any]]:
+        """未过期的租约列表"""
+        sql = ("SELECT resource, kind, owner, acquired_at, expires_at, heartbeat_at FROM resource_leases "
+               "WHERE expires_at >= ?")
+        params: List[Any] = [time.time()]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        with self._connect() as conn:
+            rows = conn.execute(sql + " ORDER BY kind, resource", params).fetchall()
+        return [
+            {'resource': resource, 'kind': row_kind, 'owner': owner, 'acquired_at': acquired_at,
+             'expires_at': expires_at, 'heartbeat_at': heartbeat_at, 'mine': owner == self.owner}
+            for resource, row_kind, owner, acquired_at, expires_at, heartbeat_at in rows
+        ]
+
+
+def lease_held_check(kind: str, db_path: str = DEFAULT_DB_PATH) -> Callable[[str], bool]:
+    """
+    返回check(name)：资源当前是否被任意进程持有（包括本进程）
+
+    用作BrowserSessionRegistry的busy_check，空闲但已被调度进程租出的配置文件不会被清理线程停止。
+    LeaseService在第一次查询时才创建，导入模块时不访问数据库
+    """
+    service: Optional[LeaseService] = None
+
+    def check(name: str) -> bool:
+        nonlocal service
+        if service is None:
+            service = LeaseService(db_path)
+        return service.holder(kind, name) is not None
+
+    return check
@@ -28,6 +28,7 @@ from excel_writer import ExcelWriter
 from cloud_sync import CloudSyncManager
 from ai_analyzer import AIContentAnalyzer as AIAnalyzer
 from account_manager import AccountManager
+from lease_service import LeaseService
 from system_monitor import SystemMonitor
 from performance_optimizer import HighSpeedCollector, EnhancedSearchOptimizer
 from exception_handler import ExceptionHandler, resilient_task_execution
@@ -51,7 +52,8 @@ class TwitterDailyScraper:
         
         # 加载账号配置
         accounts_config = self._load_accounts_config()
-        self.account_manager = AccountManager(accounts_config)
+        # 账号通过跨进程租约选取，与Web任务管理器和其他脚本互不冲突
+        self.account_manager = AccountManager(accounts_config, lease_service=LeaseService())
         
         self.system_monitor = SystemMonitor()
         self.logger = self.setup_logging()
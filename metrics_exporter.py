@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prometheus指标导出
+/metrics 端点在被抓取时汇总各处已有的状态，输出文本格式（text/plain; version=0.0.4）：
+MonitoringSystem的计数器和仪表、系统资源（SystemMonitor最近一次采集或psutil即时读数）、
+阶段耗时直方图（含限流等待、入库耗时）、限流器状态，以及应用注册的采集函数（任务队列、配置文件占用等）。
+所有序列只按取值有限的标签（阶段、配置文件、任务状态等）展开，不按任务或抓取目标展开；
+渲染结果短暂缓存，频繁抓取不会反复查询数据库
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from monitoring import MonitoringSystem, monitoring_system
+from stage_metrics import StageMetrics, stage_metrics
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METRIC_PREFIX = 'scraper_'
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class MetricFamily:
+    """同名指标的一组样本"""
+
+    def __init__(self, name: str, metric_type: str, help_text: str, max_series: int = 200):
+        """
+        Args:
+            name: 指标名（不含scraper_前缀）
+            metric_type: gauge 或 counter
+            help_text: 说明
+            max_series: 样本数上限，超出的样本丢弃，防止标签取值失控
+        """
+        self.name = METRIC_PREFIX + name
+        self.metric_type = metric_type
+        self.help_text = help_text
+        self.max_series = max_series
+        self.samples: List[tuple] = []
+        self.dropped = 0
+
+    def add(self, value, **labels):
+        if value is None:
+            return
+        if len(self.samples) >= self.max_series:
+            self.dropped += 1
+            return
+        self.samples.append((labels, value))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        for labels, value in self.samples:
+            label_text = ','.join(f'{key}="{_escape_label(item)}"' for key, item in labels.items())
+            series = f"{self.name}{{{label_text}}}" if label_text else self.name
+            lines.append(f"{series} {_format_value(value)}")
+        return lines
+
+
+Collector = Callable[[], Iterable[MetricFamily]]
+
+
+class PrometheusExporter:
+    """把监控数据汇总为Prometheus文本格式"""
+
+    def __init__(self, monitoring: MonitoringSystem = monitoring_system, system_monitor=None,
+                 stages: Optional[StageMetrics] = stage_metrics, rate_controller_factory: Callable = None,
+                 cache_seconds: float = 5.0):
+        """
+        Args:
+            monitoring: 进程内的MonitoringSystem
+            system_monitor: 正在运行的SystemMonitor（可选），有最近采集时优先使用其系统指标
+            stages: 阶段耗时直方图
+            rate_controller_factory: 返回AdaptiveRateController的函数，首次抓取时才调用
+            cache_seconds: 渲染结果缓存时间（秒）
+        """
+        self.monitoring = monitoring
+        self.system_monitor = system_monitor
+        self.stages = stages
+        self.rate_controller_factory = rate_controller_factory
+        self.cache_seconds = cache_seconds
+        self._rate_controller = None
+        self._collectors: Dict[str, Collector] = {}
+        self._cache = (0.0, '')
+        self._lock = threading.Lock()
+        self._process = psutil.Process(os.getpid()) if psutil else None
+
+        self.register('monitoring', self._collect_monitoring)
+        self.register('system', self._collect_system)
+        if rate_controller_factory is not None:
+            self.register('rate_limits', self._collect_rate_limits)
+
+    def register(self, name: str, collector: Collector):
+        """注册采集函数，每次渲染时调用，返回MetricFamily列表"""
+        self._collectors[name] = collector
+
+    def render(self) -> str:
+        """生成/metrics内容（缓存期内直接返回上次结果）"""
+        with self._lock:
+            rendered_at, text = self._cache
+            if text and time.monotonic() - rendered_at < self.cache_seconds:
+                return text
+            text = self._render()
+            self._cache = (time.monotonic(), text)
+            return text
+
+    def _render(self) -> str:
+        started = time.perf_counter()
+        lines: List[str] = []
+        status = MetricFamily('collector_up', 'gauge', '采集函数本次是否成功（1成功，0失败）')
+        dropped = MetricFamily('collector_dropped_series', 'gauge', '因超出序列上限被丢弃的样本数')
+        for name, collector in self._collectors.items():
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"指标采集失败 {name}: {e}")
+                status.add(0, collector=name)
+                continue
+            status.add(1, collector=name)
+            for family in families:
+                if family.samples:
+                    lines.extend(family.render())
+                if family.dropped:
+                    dropped.add(family.dropped, metric=family.name)
+
+        if self.stages is not None:
+            try:
+                lines.append(self.stages.render_prometheus(group_by=('stage', 'profile')).rstrip('\n'))
+                status.add(1, collector='stages')
+            except Exception as e:
+                logger.warning(f"指标采集失败 stages: {e}")
+                status.add(0, collector='stages')
+
+        lines.extend(status.render())
+        if dropped.samples:
+            lines.extend(dropped.render())
+        duration = MetricFamily('metrics_render_seconds', 'gauge', '本次生成指标的耗时（秒）')
+        duration.add(round(time.perf_counter() - started, 6))
+        lines.extend(duration.render())
+        return '\n'.join(lines) + '\n'
+
+    def _collect_monitoring(self) -> List[MetricFamily]:
+        uptime = MetricFamily('uptime_seconds', 'gauge', '进程运行时间（秒）')
+        uptime.add(round(self.monitoring.uptime, 3))
+        metrics = self.monitoring.metrics_collector.get_metrics()
+        counters = MetricFamily('events_total', 'counter', 'MonitoringSystem计数器')
+        for name, value in sorted(metrics['counters'].items()):
+            counters.add(value, name=name)
+        gauges = MetricFamily('monitoring_gauge', 'gauge', 'MonitoringSystem仪表值')
+        for name, value in sorted(metrics['gauges'].items()):
+            gauges.add(value, name=name)
+        return [uptime, counters, gauges]
+
+    def _collect_system(self) -> List[MetricFamily]:
+        cpu = MetricFamily('system_cpu_percent', 'gauge', '系统CPU使用率（%）')
+        memory = MetricFamily('system_memory_percent', 'gauge', '系统内存使用率（%）')
+        disk = MetricFamily('system_disk_percent', 'gauge', '根分区磁盘使用率（%）')
+        load = MetricFamily('system_load_average', 'gauge', '系统负载')
+        alerts = MetricFamily('system_active_alerts', 'gauge', 'SystemMonitor当前未恢复的告警数')
+        families = [cpu, memory, disk, load, alerts]
+
+        latest = self.system_monitor.get_current_metrics() if self.system_monitor is not None else None
+        if latest is not None:
+            cpu.add(latest.cpu_percent)
+            memory.add(latest.memory_percent)
+            disk.add(latest.disk_percent)
+            for period, value in zip(('1m', '5m', '15m'), latest.load_average):
+                load.add(value, period=period)
+            alerts.add(len(self.system_monitor.active_alerts))
+        elif psutil is not None:
+            # interval=None不阻塞，返回距上次调用以来的平均值
+            cpu.add(psutil.cpu_percent(interval=None))
+            memory.add(psutil.virtual_memory().percent)
+            disk.add(psutil.disk_usage('/').percent)
+            if hasattr(psutil, 'getloadavg'):
+                for period, value in zip(('1m', '5m', '15m'), psutil.getloadavg()):
+                    load.add(round(value, 3), period=period)
+
+        if self._process is not None:
+            rss = MetricFamily('process_resident_memory_bytes', 'gauge', '本进程常驻内存（字节）')
+            threads = MetricFamily('process_threads', 'gauge', '本进程线程数')
+            with self._process.oneshot():
+                rss.add(self._process.memory_info().rss)
+                threads.add(self._process.num_threads())
+            families.extend([rss, threads])
+        return families
+
+    def _collect_rate_limits(self) -> List[MetricFamily]:
+        if self._rate_controller is None:
+            self._rate_controller = self.rate_controller_factory()
+        controller = self._rate_controller
+        rate = MetricFamily('rate_limit_rate_per_minute', 'gauge', '各配置文件当前允许的请求速率（次/分钟）')
+        backoff = MetricFamily('rate_limit_backoff_seconds', 'gauge', '各配置文件剩余的限流退避时间（秒）')
+        for state in controller.get_stats(prefix='profile:'):
+            profile = state['key'].split(':', 1)[1]
+            rate.add(state['rate_per_minute'], profile=profile)
+            backoff.add(state['backoff_remaining'], profile=profile)
+        in_backoff = MetricFamily('rate_limit_keys_in_backoff', 'gauge', '正在限流退避的配置文件/抓取目标数')
+        counts = controller.backoff_counts()
+        for kind in ('profile', 'target'):
+            in_backoff.add(counts.get(kind, 0), kind=kind)
+        return [rate, backoff, in_backoff]
@@ -27,6 +27,10 @@ except ImportError:
     logger.warning("psutil not available, system metrics will be limited")
 
 from models import HealthStatus, PerformanceMetrics
+from stage_metrics import stage_metrics
+
+# 每个直方图最多保留的最近观测值，避免长时间运行后无限增长
+HISTOGRAM_WINDOW = 1000
 
 # 简化版本监控系统
 class MetricsCollector:
@@ -35,7 +39,7 @@ class MetricsCollector:
     def __init__(self):
         self.counters = defaultdict(int)
         self.gauges = defaultdict(float)
-        self.histograms = defaultdict(list)
+        self.histograms = defaultdict(lambda: deque(maxlen=HISTOGRAM_WINDOW))
         self._lock = threading.Lock()
     
     def increment_counter(self, name: str, value: int = 1):
@@ -120,10 +124,15 @@ class MonitoringSystem:
         """启动监控系统"""
         self.logger.info("监控系统已启动")
     
+    @property
+    def uptime(self) -> float:
+        """运行时间（秒）"""
+        return time.time() - self._start_time
+    
     def get_status(self) -> Dict[str, Any]:
         """获取系统状态"""
         return {
-            'uptime': time.time() - self._start_time,
+            'uptime': self.uptime,
             'metrics': self.metrics_collector.get_metrics(),
             'health': self.health_checker.run_checks()
         }
@@ -147,6 +156,7 @@ class MonitoringSystem:
         finally:
             duration = time.time() - start_time
             self.metrics_collector.record_histogram(f'duration_{operation}', duration)
+            stage_metrics.observe(operation, duration)
             self.logger.info(f"操作 {operation} 耗时: {duration:.2f}s")
     
     def update_system_metrics(self):
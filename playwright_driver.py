@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+进程内共享的Playwright驱动和CDP连接
+同一事件循环中的所有TwitterParser共用一个Playwright驱动进程，连接同一个调试地址时共用一个CDP连接，
+按引用计数在最后一个使用者释放时断开连接、停止驱动；页面按使用者分配，避免多个解析器抢同一个标签页
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+
+from playwright.async_api import async_playwright, Playwright, Browser, Page
+
+logger = logging.getLogger(__name__)
+
+# 没有现成上下文时新建上下文使用的参数
+DEFAULT_CONTEXT_OPTIONS = {
+    'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'viewport': {'width': 1920, 'height': 1080},
+    'extra_http_headers': {
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+    }
+}
+
+
+@dataclass
+class CDPConnection:
+    """到单个调试地址的共享连接"""
+    ws_endpoint: str
+    browser: Browser
+    refs: int = 0
+    pages_in_use: Set[Page] = field(default_factory=set)
+    owned_pages: Set[Page] = field(default_factory=set)  # 由本管理器新建、释放时需要关闭的页面
+
+
+@dataclass
+class _LoopState:
+    """单个事件循环内的驱动和连接（Playwright对象不能跨事件循环使用）"""
+    playwright: Optional[Playwright] = None
+    connections: Dict[str, CDPConnection] = field(default_factory=dict)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class PlaywrightDriverManager:
+    """按事件循环管理共享的Playwright驱动和CDP连接"""
+
+    def __init__(self):
+        self._states: Dict[asyncio.AbstractEventLoop, _LoopState] = {}
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            # 清理已关闭事件循环留下的记录（其驱动已随事件循环一起失效）
+            for closed_loop in [known for known in self._states if known.is_closed()]:
+                del self._states[closed_loop]
+            state = self._states[loop] = _LoopState()
+        return state
+
+    async def acquire_page(self, ws_endpoint: str) -> Page:
+        """
+        获取调试地址对应浏览器中的一个页面，连接不存在或已断开时重新连接
+
+        第一个使用者拿到浏览器已有的第一个标签页，同一连接上的其他使用者各自新建标签页
+        """
+        state = self._state()
+        async with state.lock:
+            connection = state.connections.get(ws_endpoint)
+            if connection is not None and not connection.browser.is_connected():
+                logger.warning(f"CDP连接已断开，重新连接: {ws_endpoint}")
+                del state.connections[ws_endpoint]
+                connection = None
+
+            if connection is None:
+                if state.playwright is None:
+                    logger.info("启动共享Playwright驱动")
+                    state.playwright = await async_playwright().start()
+                logger.info(f"连接到浏览器调试端口: {ws_endpoint}")
+                browser = await state.playwright.chromium.connect_over_cdp(ws_endpoint)
+                connection = state.connections[ws_endpoint] = CDPConnection(ws_endpoint, browser)
+
+            page = await self._assign_page(connection)
+            connection.refs += 1
+            connection.pages_in_use.add(page)
+            return page
+
+    async def _assign_page(self, connection: CDPConnection) -> Page:
+        contexts = connection.browser.contexts
+        if not contexts:
+            context = await connection.browser.new_context(**DEFAULT_CONTEXT_OPTIONS)
+            logger.info("创建新的浏览器上下文")
+        else:
+            context = contexts[0]
+            for page in context.pages:
+                if page not in connection.pages_in_use and not page.is_closed():
+                    logger.info(f"使用现有页面，当前URL: {page.url}")
+                    return page
+
+        page = await context.new_page()
+        connection.owned_pages.add(page)
+        logger.info("创建新页面")
+        return page
+
+    async def release_page(self, ws_endpoint: str, page: Optional[Page]):
+        """归还页面；连接上没有使用者时断开，当前事件循环没有连接时停止驱动"""
+        state = self._state()
+        async with state.lock:
+            connection = state.connections.get(ws_endpoint)
+            if connection is None:
+                return
+
+            if page is not None and page in connection.pages_in_use:
+                connection.pages_in_use.discard(page)
+                connection.refs -= 1
+                if page in connection.owned_pages:
+                    connection.owned_pages.discard(page)
+                    try:
+                        if not page.is_closed():
+                            await page.close()
+                    except Exception as e:
+                        logger.debug(f"关闭页面失败: {e}")
+
+            if connection.refs <= 0:
+                del state.connections[ws_endpoint]
+                await self._close_connection(connection)
+
+            if not state.connections:
+                await self._stop_driver(state)
+
+    async def close_all(self):
+        """断开当前事件循环中的所有连接并停止驱动（进程或事件循环结束前调用）"""
+        state = self._state()
+        async with state.lock:
+            connections = list(state.connections.values())
+            state.connections.clear()
+            for connection in connections:
+                await self._close_connection(connection)
+            await self._stop_driver(state)
+
+    @staticmethod
+    async def _close_connection(connection: CDPConnection):
+        try:
+            # 对CDP连接的浏览器调用close只会断开连接，不会关闭AdsPower浏览器
+            await connection.browser.close()
+            logger.info(f"CDP连接已断开: {connection.ws_endpoint}")
+        except Exception as e:
+            logger.warning(f"断开CDP连接失败: {e}")
+
+    @staticmethod
+    async def _stop_driver(state: _LoopState):
+        if state.playwright is None:
+            return
+        playwright, state.playwright = state.playwright, None
+        try:
+            await playwright.stop()
+            logger.info("共享Playwright驱动已停止")
+        except Exception as e:
+            logger.warning(f"停止Playwright驱动失败: {e}")
+
+    def connection_count(self) -> int:
+        """当前事件循环中的CDP连接数"""
+        state = self._states.get(asyncio.get_running_loop())
+        return len(state.connections) if state else 0
+
+
+# 进程内共享实例
+driver_manager = PlaywrightDriverManager()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务内多配置文件并发抓取
+把一个任务的账号/关键词工作列表拆分给多个AdsPower配置文件并发执行，
+各配置文件共享结果汇总和去重索引，并在各自的连续抓取之间保持间隔。
+工作项按历史耗时从长到短排队，空闲的配置文件从共享队列中取走剩余工作项，
+每项的耗时、推文数和滚动次数写回AccountStateTracker供下次估算。
+配置了限流控制器时，工作项之间的间隔由各配置文件和目标的自适应速率决定，抓取结果（限流/空结果/正常）反馈给控制器
+"""
+
+import asyncio
+import time
+import random
+import logging
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Callable, Awaitable
+
+from account_state_tracker import AccountStateTracker
+from browser_session_registry import BrowserSessionRegistry
+from rate_controller import (AdaptiveRateController, profile_key, target_key,
+                             OUTCOME_OK, OUTCOME_RATE_LIMITED, OUTCOME_EMPTY)
+from stage_metrics import stage_context, stage_metrics
+from twitter_parser import TwitterParser
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WorkItem:
+    """单个抓取工作项"""
+    kind: str  # 'account' | 'keyword' | 'account_keyword'
+    index: int
+    total: int
+    account: Optional[str] = None
+    keyword: Optional[str] = None
+    estimated_cost: Optional[float] = None  # 历史平均耗时（秒）
+
+    @property
+    def target_key(self) -> str:
+        """成本估算使用的目标键：账号为用户名，关键词加前缀区分"""
+        if self.kind == 'account':
+            return self.account
+        if self.kind == 'keyword':
+            return f"keyword:{self.keyword}"
+        return f"{self.account}:keyword:{self.keyword}"
+
+    @property
+    def label(self) -> str:
+        if self.kind == 'account':
+            return f"@{self.account}"
+        if self.kind == 'keyword':
+            return f"'{self.keyword}'"
+        return f"@{self.account} '{self.keyword}'"
+
+
+def build_work_items(target_accounts: List[str], target_keywords: List[str],
+                     combined: bool = False) -> List[WorkItem]:
+    """
+    构建工作列表
+
+    Args:
+        target_accounts: 目标账号（可带@前缀）
+        target_keywords: 关键词
+        combined: 为True且同时有账号和关键词时，在每个账号下搜索每个关键词；
+                  否则账号和关键词分别抓取
+    """
+    accounts = [account.lstrip('@') for account in target_accounts]
+
+    if combined and accounts and target_keywords:
+        pairs = [(account, keyword) for account in accounts for keyword in target_keywords]
+        return [WorkItem('account_keyword', i, len(pairs), account=account, keyword=keyword)
+                for i, (account, keyword) in enumerate(pairs, 1)]
+
+    items = [WorkItem('account', i, len(accounts), account=account)
+             for i, account in enumerate(accounts, 1)]
+    items.extend(WorkItem('keyword', j, len(target_keywords), keyword=keyword)
+                 for j, keyword in enumerate(target_keywords, 1))
+    return items
+
+
+class ScrapeResultSink:
+    """各配置文件共享的结果汇总，按推文链接（无链接时按用户名+内容）去重"""
+
+    def __init__(self):
+        self.tweets: List[Dict[str, Any]] = []
+        self.duplicate_count = 0
+        self.errors: Dict[str, str] = {}
+        self.timings: List[Dict[str, Any]] = []  # 每个工作项的耗时记录
+        self._seen = set()
+
+    @staticmethod
+    def dedupe_key(tweet: Dict[str, Any]) -> str:
+        link = tweet.get('link')
+        if link:
+            return link
+        return f"{tweet.get('username', '')}\n{(tweet.get('content') or '')[:500]}"
+
+    def add(self, tweets: List[Dict[str, Any]]) -> int:
+        """加入一批推文，返回新增数量"""
+        added = 0
+        for tweet in tweets:
+            key = self.dedupe_key(tweet)
+            if key in self._seen:
+                self.duplicate_count += 1
+                continue
+            self._seen.add(key)
+            self.tweets.append(tweet)
+            added += 1
+        return added
+
+
+class ProfileFanOut:
+    """在调用方已获取的主配置文件之外，再借用额外配置文件并发消费工作列表"""
+
+    DEFAULT_ITEM_INTERVAL = 3.0
+    # 目标剩余退避时间超过该值（秒）时本次跳过该目标，配置文件超过该值时停止取工作项，不让任务空等
+    MAX_TARGET_BACKOFF_WAIT = 300.0
+
+    def __init__(self, registry: BrowserSessionRegistry, extra_user_ids: List[str],
+                 scrape_item: Callable[[TwitterParser, WorkItem], Awaitable[List[Dict[str, Any]]]],
+                 item_interval: float = DEFAULT_ITEM_INTERVAL,
+                 should_continue: Callable[[], bool] = None,
+                 on_parser_ready: Callable[[TwitterParser], None] = None,
+                 tracker: Optional[AccountStateTracker] = None,
+                 rate_controller: Optional[AdaptiveRateController] = None):
+        """
+        Args:
+            registry: 当前进程的浏览器会话注册表
+            extra_user_ids: 额外借用的AdsPower用户ID（不含主配置文件）
+            scrape_item: 抓取单个工作项的协程 scrape_item(parser, item) -> 推文列表
+            item_interval: 同一配置文件连续两个工作项之间的基础间隔（秒），实际间隔带±30%抖动
+            should_continue: 返回False时各配置文件在当前工作项完成后停止
+            on_parser_ready: 额外配置文件的解析器连接后调用（例如启用抓取优化）
+            tracker: 账号状态跟踪器，提供历史耗时估算并记录本次各工作项耗时；为None时按原顺序执行
+            rate_controller: 自适应限流控制器；设置后由它决定工作项之间的等待时间，不再使用item_interval
+        """
+        self.registry = registry
+        self.extra_user_ids = list(extra_user_ids)
+        self.scrape_item = scrape_item
+        self.item_interval = item_interval
+        self.should_continue = should_continue or (lambda: True)
+        self.on_parser_ready = on_parser_ready
+        self.tracker = tracker
+        self.rate_controller = rate_controller
+
+    def order_by_cost(self, items: List[WorkItem]) -> List[WorkItem]:
+        """
+        按历史耗时从长到短排序（最长处理时间优先），让耗时长的目标先开始，
+        结尾只剩短工作项可供空闲配置文件取走；没有历史的工作项按已知耗时的平均值估算
+        """
+        if self.tracker is None or len(items) < 2:
+            return list(items)
+
+        estimates = self.tracker.get_cost_estimates([item.target_key for item in items])
+        default_cost = sum(estimates.values()) / len(estimates) if estimates else 0.0
+        for item in items:
+            item.estimated_cost = estimates.get(item.target_key, default_cost)
+        # 稳定排序：没有任何历史时保持原顺序
+        return sorted(items, key=lambda item: item.estimated_cost, reverse=True)
+
+    async def run(self, primary_parser: TwitterParser, items: List[WorkItem],
+                  primary_user_id: str = None) -> ScrapeResultSink:
+        """
+        执行工作列表；主配置文件由调用方获取和归还，额外配置文件在这里借用和归还
+
+        Args:
+            primary_parser: 调用方已连接的主配置文件解析器
+            items: 工作列表
+            primary_user_id: 主配置文件的AdsPower用户ID，限流控制按它区分配置文件
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in self.order_by_cost(items):
+            queue.put_nowait(item)
+
+        sink = ScrapeResultSink()
+        profile_count = min(len(self.extra_user_ids), max(len(items) - 1, 0))
+        if profile_count:
+            logger.info(f"🔀 工作列表 {len(items)} 项，分配给 {profile_count + 1} 个配置文件并发执行")
+
+        await asyncio.gather(
+            self._consume(primary_user_id or 'primary', primary_parser, queue, sink),
+            *(self._borrow_and_consume(user_id, queue, sink)
+              for user_id in self.extra_user_ids[:profile_count])
+        )
+
+        while not queue.empty():
+            item = queue.get_nowait()
+            sink.errors[item.label] = "所有配置文件限流退避中或任务已停止，未执行"
+
+        if self.tracker is not None:
+            self.tracker.record_item_timings(sink.timings)
+        return sink
+
+    async def _borrow_and_consume(self, user_id: str, queue: asyncio.Queue, sink: ScrapeResultSink):
+        try:
+            parser = await self.registry.acquire(user_id)
+        except Exception as e:
+            # 借用失败不影响其他配置文件，剩余工作项由其他配置文件处理
+            logger.warning(f"借用配置文件失败，用户ID: {user_id}: {e}")
+            return
+
+        try:
+            if self.on_parser_ready:
+                self.on_parser_ready(parser)
+            await self._consume(user_id, parser, queue, sink)
+        finally:
+            # 断开连接并从本进程的注册表移除，配置文件保持运行，由其所属的工作进程继续管理
+            try:
+                await self.registry.release(user_id, detach=True, retain=False)
+            except Exception as e:
+                logger.warning(f"归还配置文件失败，用户ID: {user_id}: {e}")
+
+    async def _consume(self, profile: str, parser: TwitterParser, queue: asyncio.Queue,
+                       sink: ScrapeResultSink):
+        first = True
+        while self.should_continue():
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            rate_keys = [profile_key(profile), target_key(item.target_key)]
+            if self.rate_controller is not None:
+                backoff = self.rate_controller.backoff_remaining(rate_keys[0])
+                if backoff > self.MAX_TARGET_BACKOFF_WAIT:
+                    # 剩余工作项留给其他配置文件
+                    queue.put_nowait(item)
+                    logger.warning(f"[{profile}] 配置文件限流退避中（剩余 {backoff:.0f} 秒），停止领取工作项")
+                    return
+                backoff = self.rate_controller.backoff_remaining(rate_keys[1])
+                if backoff > self.MAX_TARGET_BACKOFF_WAIT:
+                    sink.errors[item.label] = f"目标限流退避中，剩余 {backoff:.0f} 秒"
+                    logger.warning(f"[{profile}] {item.label} 限流退避中（剩余 {backoff:.0f} 秒），本次跳过")
+                    continue
+                await self.rate_controller.wait(rate_keys, self.should_continue)
+                if not self.should_continue():
+                    return
+            elif not first and self.item_interval > 0:
+                await asyncio.sleep(self.item_interval * random.uniform(0.7, 1.3))
+            first = False
+
+            timing = {'target': item.target_key, 'kind': item.kind, 'profile': profile,
+                      'estimated': item.estimated_cost}
+            parser.last_scroll_attempts = None
+            parser.last_rate_limited = False
+            limit_responses_before = parser.rate_limit_responses
+            tweets = None
+            started = time.monotonic()
+            try:
+                with stage_context(profile=profile, target=item.target_key), stage_metrics.timer('work_item'):
+                    tweets = await self.scrape_item(parser, item)
+                added = sink.add(tweets)
+                timing.update(success=True, tweets_found=len(tweets))
+                logger.info(f"[{profile}] {item.label} 完成，新增 {added} 条，累计 {len(sink.tweets)} 条")
+            except Exception as e:
+                sink.errors[item.label] = str(e)
+                timing.update(success=False, tweets_found=0)
+                logger.error(f"[{profile}] {item.label} 抓取失败: {e}")
+            timing['duration'] = round(time.monotonic() - started, 2)
+            timing['scrolls'] = getattr(parser, 'last_scroll_attempts', None)
+
+            rate_limited = bool(parser.last_rate_limited or parser.rate_limit_responses > limit_responses_before or
+                                (not tweets and await parser.detect_rate_limit_page()))
+            timing['rate_limited'] = rate_limited
+            sink.timings.append(timing)
+            self._record_rate_outcome(rate_keys, item, tweets, rate_limited)
+
+    def _record_rate_outcome(self, rate_keys: List[str], item: WorkItem,
+                             tweets: Optional[List[Dict[str, Any]]], rate_limited: bool):
+        """把限流/空结果/正常结果反馈给限流控制器；与限流无关的抓取异常不计入"""
+        if rate_limited:
+            outcome = OUTCOME_RATE_LIMITED
+        elif tweets is None:
+            return
+        elif not tweets:
+            outcome = OUTCOME_EMPTY
+        else:
+            outcome = OUTCOME_OK
+
+        if self.rate_controller is not None:
+            self.rate_controller.record_outcome(rate_keys, outcome)
+        if rate_limited and self.tracker is not None and item.account:
+            backoff = self.rate_controller.backoff_remaining(rate_keys[1]) if self.rate_controller else None
+            self.tracker.mark_rate_limited(item.account, backoff_seconds=backoff or None)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应限流控制
+按AdsPower配置文件和抓取目标分别维护请求速率（次/分钟），采用加性增、乘性减（AIMD）：
+干净的抓取后速率加一个固定步长，遇到429/限流页面时速率减半并进入指数退避，
+连续拿到空时间线（疑似被静默限流）时速率小幅下降。状态保存在SQLite中，跨任务、跨进程共享
+"""
+
+import os
+import time
+import random
+import asyncio
+import sqlite3
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Iterable
+
+from lease_service import DEFAULT_DB_PATH
+from stage_metrics import stage_metrics
+
+logger = logging.getLogger(__name__)
+
+# 抓取结果
+OUTCOME_OK = 'ok'
+OUTCOME_RATE_LIMITED = 'rate_limited'
+OUTCOME_EMPTY = 'empty'
+
+
+def profile_key(user_id: str) -> str:
+    return f"profile:{user_id}"
+
+
+def target_key(target: str) -> str:
+    return f"target:{target}"
+
+
+@dataclass
+class RateState:
+    """单个键的限流状态"""
+    key: str
+    rate: float  # 允许的请求速率（次/分钟）
+    backoff_until: float = 0.0  # 退避结束时间（时间戳）
+    consecutive_limits: int = 0
+    consecutive_empty: int = 0
+    clean_streak: int = 0
+    last_request_at: float = 0.0
+
+    @property
+    def interval(self) -> float:
+        """两次请求之间的最小间隔（秒）"""
+        return 60.0 / self.rate
+
+
+class AdaptiveRateController:
+    """AIMD限流控制器"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_limit_state (
+            key TEXT PRIMARY KEY,
+            rate REAL NOT NULL,
+            backoff_until REAL NOT NULL DEFAULT 0,
+            consecutive_limits INTEGER NOT NULL DEFAULT 0,
+            consecutive_empty INTEGER NOT NULL DEFAULT 0,
+            clean_streak INTEGER NOT NULL DEFAULT 0,
+            last_request_at REAL NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, initial_rate: float = 20.0,
+                 min_rate: float = 0.5, max_rate: float = 30.0, additive_increase: float = 1.0,
+                 limit_decrease: float = 0.5, empty_decrease: float = 0.8, empty_threshold: int = 2,
+                 base_backoff: float = 60.0, max_backoff: float = 3600.0, jitter: float = 0.15):
+        """
+        Args:
+            db_path: SQLite数据库文件路径
+            initial_rate: 没有历史状态的键的初始速率（次/分钟）
+            min_rate / max_rate: 速率上下限（次/分钟）
+            additive_increase: 每次干净抓取后增加的速率
+            limit_decrease: 遇到限流时速率乘以的系数
+            empty_decrease: 连续空结果达到empty_threshold次后速率乘以的系数
+            base_backoff / max_backoff: 限流退避时间（秒），按连续限流次数指数增长
+            jitter: 等待时间的随机抖动比例
+        """
+        self.db_path = db_path
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.limit_decrease = limit_decrease
+        self.empty_decrease = empty_decrease
+        self.empty_threshold = empty_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get_state(self, key: str) -> RateState:
+        return self.get_states([key])[key]
+
+    def get_states(self, keys: Iterable[str]) -> Dict[str, RateState]:
+        """读取状态（其他进程的更新立即可见），没有记录的键使用初始速率"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        with self._connect() as conn:
+            return self._load_states(conn, keys)
+
+    def _load_states(self, conn: sqlite3.Connection, keys: List[str]) -> Dict[str, RateState]:
+        placeholders = ','.join('?' * len(keys))
+        rows = conn.execute(
+            f"SELECT * FROM rate_limit_state WHERE key IN ({placeholders})", keys
+        ).fetchall()
+        states = {key: RateState(key=key, rate=self.initial_rate) for key in keys}
+        for row in rows:
+            states[row['key']] = RateState(
+                key=row['key'], rate=row['rate'], backoff_until=row['backoff_until'],
+                consecutive_limits=row['consecutive_limits'], consecutive_empty=row['consecutive_empty'],
+                clean_streak=row['clean_streak'], last_request_at=row['last_request_at']
+            )
+        return states
+
+    def _save(self, conn: sqlite3.Connection, state: RateState):
+        conn.execute(
+            "INSERT INTO rate_limit_state (key, rate, backoff_until, consecutive_limits, consecutive_empty, "
+            "clean_streak, last_request_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET rate = excluded.rate, backoff_until = excluded.backoff_until, "
+            "consecutive_limits = excluded.consecutive_limits, consecutive_empty = excluded.consecutive_empty, "
+            "clean_streak = excluded.clean_streak, last_request_at = excluded.last_request_at, "
+            "updated_at = excluded.updated_at",
+            (state.key, state.rate, state.backoff_until, state.consecutive_limits, state.consecutive_empty,
+             state.clean_streak, state.last_request_at, time.time())
+        )
+
+    def delay_for(self, keys: Iterable[str]) -> float:
+        """距离这些键都允许下一次请求还需等待的秒数"""
+        now = time.time()
+        delay = 0.0
+        for state in self.get_states(keys).values():
+            delay = max(delay, state.backoff_until - now, state.last_request_at + state.interval - now)
+        return max(delay, 0.0)
+
+    async def wait(self, keys: List[str], should_continue=None) -> float:
+        """
+        等到这些键都允许请求后登记本次请求，返回实际等待的秒数
+
+        同一进程内的多个协程可能同时等待同一个键，登记前重新检查一次
+        """
+        waited = 0.0
+        while True:
+            delay = self.delay_for(keys)
+            if delay <= 0:
+                break
+            if should_continue is not None and not should_continue():
+                return waited
+            sleep_for = delay * random.uniform(1.0, 1.0 + self.jitter)
+            if delay > 5:
+                logger.info(f"⏳ 限流控制：{keys} 需要等待 {sleep_for:.1f} 秒")
+            await asyncio.sleep(sleep_for)
+            waited += sleep_for
+        self.mark_request(keys)
+        stage_metrics.observe('rate_limit_wait', waited)
+        return waited
+
+    def mark_request(self, keys: Iterable[str]):
+        """登记一次请求（只更新last_request_at，不覆盖其他进程同时写入的速率和退避状态）"""
+        now = time.time()
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO rate_limit_state (key, rate, last_request_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET last_request_at = excluded.last_request_at, "
+                "updated_at = excluded.updated_at",
+                [(key, self.initial_rate, now, now) for key in keys]
+            )
+            conn.execute("COMMIT")
+
+    def record_outcome(self, keys: Iterable[str], outcome: str) -> Dict[str, RateState]:
+        """
+        根据抓取结果调整速率
+
+        Args:
+            keys: 本次请求涉及的键（配置文件、目标）
+            outcome: OUTCOME_OK / OUTCOME_RATE_LIMITED / OUTCOME_EMPTY
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        with self._connect() as conn:
+            # 在写事务内读取并更新，避免覆盖其他进程在读写之间记录的结果
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                states = self._load_states(conn, keys)
+                for state in states.values():
+                    self._apply_outcome(state, outcome, now)
+                    self._save(conn, state)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return states
+
+    def _apply_outcome(self, state: RateState, outcome: str, now: float):
+        if outcome == OUTCOME_RATE_LIMITED:
+            state.consecutive_limits += 1
+            state.clean_streak = 0
+            state.rate = max(self.min_rate, state.rate * self.limit_decrease)
+            backoff = min(self.max_backoff, self.base_backoff * (2 ** (state.consecutive_limits - 1)))
+            state.backoff_until = now + backoff
+            logger.warning(f"🚦 {state.key} 触发限流，速率降至 {state.rate:.2f} 次/分钟，退避 {backoff:.0f} 秒")
+        elif outcome == OUTCOME_EMPTY:
+            state.consecutive_empty += 1
+            state.clean_streak = 0
+            if state.consecutive_empty >= self.empty_threshold:
+                state.rate = max(self.min_rate, state.rate * self.empty_decrease)
+                logger.info(f"{state.key} 连续 {state.consecutive_empty} 次空结果，速率降至 {state.rate:.2f} 次/分钟")
+        else:
+            state.consecutive_limits = 0
+            state.consecutive_empty = 0
+            state.clean_streak += 1
+            state.rate = min(self.max_rate, state.rate + self.additive_increase)
+
+    def cooldown_multiplier(self, key: str) -> float:
+        """初始速率与当前速率之比（不小于1），用于按比例放大固定的冷却时间"""
+        return max(1.0, self.initial_rate / self.get_state(key).rate)
+
+    def backoff_remaining(self, key: str) -> float:
+        """剩余退避时间（秒）"""
+        return max(self.get_state(key).backoff_until - time.time(), 0.0)
+
+    def backoff_counts(self) -> Dict[str, int]:
+        """各类键（profile/target）中正在退避的数量"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT substr(key, 1, instr(key, ':') - 1) AS kind, COUNT(*) AS total FROM rate_limit_state "
+                "WHERE backoff_until > ? GROUP BY kind", (time.time(),)
+            ).fetchall()
+        return {row['kind']: row['total'] for row in rows}
+
+    def get_stats(self, prefix: str = None) -> List[Dict[str, float]]:
+        """所有键的当前状态（可按前缀筛选）"""
+        sql = "SELECT * FROM rate_limit_state"
+        params = []
+        if prefix:
+            sql += " WHERE key LIKE ?"
+            params.append(f"{prefix}%")
+        with self._connect() as conn:
+            rows = conn.execute(sql + " ORDER BY key", params).fetchall()
+        now = time.time()
+        return [
+            {'key': row['key'], 'rate_per_minute': round(row['rate'], 2),
+             'backoff_remaining': round(max(row['backoff_until'] - now, 0.0), 1),
+             'consecutive_limits': row['consecutive_limits'], 'clean_streak': row['clean_streak']}
+            for row in rows
+        ]
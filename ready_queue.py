@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+就绪队列
+就绪堆按调用方给出的排序键取最优项，定时堆按到期时间保存冷却/重试中的项，
+到期后由调用方重新计算排序键放回就绪堆。两个堆都采用惰性删除，
+入队、出队、移除均为O(log n)，取前K个为O(K log n)
+"""
+
+import heapq
+import itertools
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+_READY = 'ready'
+_TIMER = 'timer'
+
+
+class ReadyQueue:
+    """就绪堆 + 定时堆，每个键同一时刻只在其中一个堆里有效"""
+
+    def __init__(self):
+        self._ready: List[Tuple[Any, int, Hashable]] = []   # (排序键, 序号, 键)
+        self._timers: List[Tuple[float, int, Hashable]] = []  # (到期时间, 序号, 键)
+        self._slots: Dict[Hashable, Tuple[str, int]] = {}  # 键 -> (所在堆, 序号)，序号不符的堆项已失效
+        self._seq = itertools.count()
+        self._ready_count = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    @property
+    def ready_count(self) -> int:
+        return self._ready_count
+
+    def is_ready(self, key: Hashable) -> bool:
+        slot = self._slots.get(key)
+        return slot is not None and slot[0] == _READY
+
+    def push(self, key: Hashable, sort_key: Any):
+        """放入就绪堆（已存在时替换原有位置）"""
+        self.discard(key)
+        seq = next(self._seq)
+        self._slots[key] = (_READY, seq)
+        self._ready_count += 1
+        heapq.heappush(self._ready, (sort_key, seq, key))
+        self._maybe_compact()
+
+    def schedule(self, key: Hashable, due: float):
+        """放入定时堆，due（时间戳）到期后由pop_due取出"""
+        self.discard(key)
+        seq = next(self._seq)
+        self._slots[key] = (_TIMER, seq)
+        heapq.heappush(self._timers, (due, seq, key))
+        self._maybe_compact()
+
+    def discard(self, key: Hashable):
+        """移除键（堆中的旧项在弹出时跳过）"""
+        slot = self._slots.pop(key, None)
+        if slot is not None and slot[0] == _READY:
+            self._ready_count -= 1
+
+    def pop_due(self, now: float) -> List[Hashable]:
+        """取出所有已到期的键，调用方负责重新放回就绪堆或重新定时"""
+        due_keys = []
+        while self._timers and self._timers[0][0] <= now:
+            _, seq, key = heapq.heappop(self._timers)
+            if self._slots.get(key) == (_TIMER, seq):
+                del self._slots[key]
+                due_keys.append(key)
+        return due_keys
+
+    def next_due(self) -> Optional[float]:
+        """最早的到期时间，没有定时项时返回None"""
+        while self._timers:
+            _, seq, key = self._timers[0]
+            if self._slots.get(key) == (_TIMER, seq):
+                return self._timers[0][0]
+            heapq.heappop(self._timers)
+        return None
+
+    def peek(self) -> Optional[Hashable]:
+        """排序键最小的就绪项"""
+        while self._ready:
+            _, seq, key = self._ready[0]
+            if self._slots.get(key) == (_READY, seq):
+                return key
+            heapq.heappop(self._ready)
+        return None
+
+    def pop(self) -> Optional[Hashable]:
+        """取出排序键最小的就绪项"""
+        key = self.peek()
+        if key is not None:
+            heapq.heappop(self._ready)
+            del self._slots[key]
+            self._ready_count -= 1
+        return key
+
+    def smallest(self, count: Optional[int] = None) -> List[Hashable]:
+        """按顺序返回前count个就绪项（不取出），count为None时返回全部"""
+        if count is None or count >= self._ready_count:
+            return [key for _, _, key in sorted(self._valid_ready())]
+
+        taken = []
+        while self._ready and len(taken) < count:
+            entry = heapq.heappop(self._ready)
+            if self._slots.get(entry[2]) == (_READY, entry[1]):
+                taken.append(entry)
+        for entry in taken:
+            heapq.heappush(self._ready, entry)
+        return [key for _, _, key in taken]
+
+    def _valid_ready(self) -> List[Tuple[Any, int, Hashable]]:
+        return [entry for entry in self._ready if self._slots.get(entry[2]) == (_READY, entry[1])]
+
+    def _maybe_compact(self):
+        """失效项过多时重建堆，避免频繁更新的键让堆无限增长"""
+        live = len(self._slots)
+        if len(self._ready) + len(self._timers) > 2 * live + 64:
+            self._ready = self._valid_ready()
+            heapq.heapify(self._ready)
+            self._timers = [entry for entry in self._timers
+                            if self._slots.get(entry[2]) == (_TIMER, entry[1])]
+            heapq.heapify(self._timers)
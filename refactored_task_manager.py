@@ -19,9 +19,11 @@ import os
 import logging
 from datetime import datetime
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional, Dict, List, Tuple
 
+from lease_service import LeaseService, PROFILE
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -44,6 +46,8 @@ class TaskRequest:
     max_retries: int = 3
     scheduled_time: Optional[datetime] = None  # 计划开始时间
     queued_at: Optional[datetime] = None  # 加入队列时间
+    fanout: int = 1  # 任务内并发使用的配置文件数量（含主配置文件）
+    queue_entry_id: Optional[int] = None  # 持久化队列中的记录ID
 
 @dataclass
 class TaskSlot:
@@ -55,11 +59,17 @@ class TaskSlot:
     config_file: Optional[str] = None
     start_time: Optional[datetime] = None
     is_background: bool = True
+    worker_pid: Optional[int] = None  # 由常驻工作进程执行时的进程号
+    extra_user_ids: List[str] = field(default_factory=list)  # 任务内并发借用的额外用户ID
 
 class RefactoredTaskManager:
     """重构的任务管理器 - 无锁设计"""
     
-    def __init__(self, max_concurrent_tasks=1, user_ids=None):
+    # 没有可领取的任务时重新查询持久化队列的最长间隔（其他进程入队的任务靠它发现）
+    QUEUE_POLL_INTERVAL = 5.0
+    
+    def __init__(self, max_concurrent_tasks=1, user_ids=None, use_warm_workers=True,
+                 queue_db_path=None, queue_lease_seconds=300.0):
         # 确保用户ID池正确设置
         if user_ids and isinstance(user_ids, list) and len(user_ids) > 0:
             self.user_id_pool = list(user_ids)
@@ -81,8 +91,15 @@ class RefactoredTaskManager:
         logger.info(f"[RefactoredTaskManager] 可用用户ID数量: {len(self.user_id_pool)}")
         logger.info(f"[RefactoredTaskManager] 用户ID列表: {self.user_id_pool}")
         
-        # 使用线程安全的队列替代普通列表
-        self.task_request_queue = queue.PriorityQueue()
+        # 任务请求保存在SQLite持久化队列中，进程重启不丢失，多个调度进程可共享
+        from durable_task_queue import DurableTaskQueue
+        if queue_db_path is None:
+            queue_db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'twitter_scraper.db')
+        self.task_queue = DurableTaskQueue(queue_db_path, lease_seconds=queue_lease_seconds)
+        # 用户ID（AdsPower配置文件）的跨进程租约，多个调度进程或独立运行的脚本不会同时使用同一个配置文件
+        self.lease_service = LeaseService(queue_db_path, ttl=queue_lease_seconds)
+        self._queue_leases: Dict[int, int] = {}  # task_id -> 本进程持有租约的队列记录ID
+        self._last_heartbeat = time.monotonic()
         self.completion_queue = queue.Queue()
         
         # 使用原子操作的字典来管理状态
@@ -91,6 +108,14 @@ class RefactoredTaskManager:
         
         # 状态锁 - 只用于关键状态更新
         self._state_lock = threading.RLock()
+        # 槽位/用户ID释放或新请求入队时通知调度线程，取代睡眠后重新排队的轮询
+        self._dispatch_condition = threading.Condition(self._state_lock)
+        # 每次通知加一：调度线程在锁外访问SQLite期间错过的通知，等待前通过它发现
+        self._dispatch_generation = 0
+        
+        # 常驻工作进程池（首次提交后台任务时创建）
+        self.use_warm_workers = use_warm_workers
+        self._worker_pool = None
         
         # 启动后台处理线程
         self._running = True
@@ -102,8 +127,14 @@ class RefactoredTaskManager:
         
         print(f"[RefactoredTaskManager] 初始化完成，最大并发: {max_concurrent_tasks}")
     
-    def start_task(self, task_id: int, use_background_process: bool = True, priority: int = 0, scheduled_time: Optional[datetime] = None) -> Tuple[bool, str]:
-        """启动任务（异步）"""
+    def start_task(self, task_id: int, use_background_process: bool = True, priority: int = 0, scheduled_time: Optional[datetime] = None,
+                   fanout: int = 1) -> Tuple[bool, str]:
+        """
+        启动任务（异步）
+        
+        fanout大于1时，调度时除主用户ID外再借用最多fanout-1个空闲用户ID，
+        任务内把账号/关键词工作列表分给这些配置文件并发抓取；fanout不超过工作项数，不借用用不上的配置文件
+        """
         try:
             # 快速检查任务是否已存在
             if task_id in self.active_slots:
@@ -116,6 +147,15 @@ class RefactoredTaskManager:
                 if not task:
                     return False, f"任务 {task_id} 不存在"
                 
+                if fanout > 1:
+                    # 与执行器相同的方式构建工作列表，每个配置文件至少分到一个工作项
+                    from profile_fanout import build_work_items
+                    target_accounts = json.loads(task.target_accounts or '[]')
+                    target_keywords = json.loads(task.target_keywords or '[]')
+                    work_items = build_work_items(target_accounts, target_keywords,
+                                                  combined=bool(target_accounts and target_keywords))
+                    fanout = min(fanout, len(work_items))
+                
                 # 检查是否可以立即启动任务
                 can_start_immediately = self._can_start_task()
                 
@@ -125,22 +165,24 @@ class RefactoredTaskManager:
                     db.session.commit()
                     print(f"[RefactoredTaskManager] 任务 {task_id} 进入排队状态")
             
-            # 创建任务请求并加入队列
-            current_time = datetime.utcnow()
-            task_request = TaskRequest(
-                task_id=task_id,
-                use_background_process=use_background_process,
+            # 写入持久化队列：按优先级排序，计划时间之前不会被领取
+            entry_id = self.task_queue.enqueue(
+                task_id,
                 priority=priority,
-                scheduled_time=scheduled_time or current_time,
-                queued_at=current_time
+                not_before=scheduled_time,
+                use_background_process=use_background_process,
+                fanout=max(1, fanout)
             )
+            if entry_id is None:
+                return False, "任务已在队列中"
             
-            # 使用优先级队列，按照计划时间排序
-            queue_priority = (priority, task_request.scheduled_time.timestamp(), time.time())
-            self.task_request_queue.put((queue_priority, task_request))
+            self._notify_dispatch()
             
-            queue_position = self.task_request_queue.qsize()
-            if can_start_immediately:
+            queue_position = self.task_queue.position(entry_id)
+            if scheduled_time and scheduled_time > datetime.utcnow():
+                print(f"[RefactoredTaskManager] 任务 {task_id} 已加入队列，计划开始时间: {scheduled_time}")
+                return True, f"任务已加入队列，将在 {scheduled_time} 后执行"
+            elif can_start_immediately:
                 print(f"[RefactoredTaskManager] 任务 {task_id} 已加入处理队列，将立即执行")
                 return True, "任务已加入处理队列，将立即执行"
             else:
@@ -151,73 +193,153 @@ class RefactoredTaskManager:
             return False, f"任务启动失败: {str(e)}"
     
     def _process_requests(self):
-        """后台线程处理任务请求"""
+        """
+        后台线程处理任务请求
+        
+        只有在有空闲槽位和用户ID时才从持久化队列领取优先级最高且已到计划时间的请求，
+        否则在条件变量上等待，由 _cleanup_task / _return_user_id / start_task 唤醒；
+        队列里暂时没有可执行的任务时，等到最早的计划时间（最多QUEUE_POLL_INTERVAL秒）再查询。
+        是否调度在锁内判断，领取队列记录等SQLite操作在锁外进行，不阻塞槽位释放和状态查询
+        """
         while self._running:
             try:
-                # 等待任务请求，超时1秒
-                try:
-                    queue_priority, task_request = self.task_request_queue.get(timeout=1.0)
-                except queue.Empty:
+                with self._dispatch_condition:
+                    while self._running and not self._is_dispatch_ready():
+                        self._dispatch_condition.wait()
+                    if not self._running:
+                        break
+                    generation = self._dispatch_generation
+                
+                task_request = self._claim_next_request()
+                if task_request is None:
+                    self._wait_for_dispatch(generation, self._next_poll_timeout())
+                    continue
+                
+                user_id = self._get_available_user_id()
+                if user_id is None:
+                    # 空闲的用户ID都被其他进程持有：任务放回队列，稍后再试
+                    self._release_claim(task_request)
+                    self._wait_for_dispatch(generation, self.QUEUE_POLL_INTERVAL)
                     continue
+                # 额外配置文件只借用当前空闲的，不为凑满fanout而等待
+                extra_user_ids = self.borrow_user_ids(task_request.fanout - 1)
                 
-                # 处理任务请求
-                self._handle_task_request(task_request)
+                # 处理任务请求（在锁外启动任务，避免阻塞槽位释放）
+                self._handle_task_request(task_request, user_id, extra_user_ids)
                 
             except Exception as e:
                 print(f"[RefactoredTaskManager] 处理请求时出错: {str(e)}")
                 time.sleep(0.1)
     
-    def _handle_task_request(self, task_request: TaskRequest):
-        """处理单个任务请求"""
+    def _notify_dispatch(self):
+        """槽位/用户ID释放或新请求入队后唤醒调度线程"""
+        with self._dispatch_condition:
+            self._dispatch_generation += 1
+            self._dispatch_condition.notify_all()
+    
+    def _wait_for_dispatch(self, generation: int, timeout: float):
+        """等待下一次通知；generation之后已有通知时立即返回"""
+        with self._dispatch_condition:
+            if self._running and self._dispatch_generation == generation:
+                self._dispatch_condition.wait(timeout)
+    
+    def _is_dispatch_ready(self) -> bool:
+        """有空闲槽位和用户ID（需持有_state_lock）"""
+        return self._can_start_task() and bool(self.available_users)
+    
+    def _claim_next_request(self) -> Optional[TaskRequest]:
+        """从持久化队列领取下一个请求并登记租约（不持有_state_lock时调用）"""
+        entry = self.task_queue.claim_next()
+        if entry is None:
+            return None
+        
+        with self._state_lock:
+            self._queue_leases[entry.task_id] = entry.id
+        if entry.attempts > 1:
+            print(f"[RefactoredTaskManager] 任务 {entry.task_id} 重新领取（第 {entry.attempts}/{entry.max_attempts} 次）")
+        return TaskRequest(
+            task_id=entry.task_id,
+            use_background_process=entry.use_background_process,
+            priority=entry.priority,
+            retry_count=entry.attempts - 1,
+            max_retries=entry.max_attempts,
+            scheduled_time=entry.scheduled_time,
+            queued_at=entry.queued_at,
+            fanout=entry.fanout,
+            queue_entry_id=entry.id
+        )
+    
+    def _release_claim(self, task_request: TaskRequest):
+        """领取后无法执行的请求放回持久化队列"""
+        with self._state_lock:
+            entry_id = self._queue_leases.pop(task_request.task_id, None)
+        if entry_id is not None:
+            self.task_queue.release(entry_id)
+    
+    def _next_poll_timeout(self) -> float:
+        """距离下一次查询持久化队列的等待时间"""
+        next_ready = self.task_queue.next_ready_in()
+        if next_ready is None:
+            return self.QUEUE_POLL_INTERVAL
+        return min(max(next_ready, 0.05), self.QUEUE_POLL_INTERVAL)
+    
+    def _finish_queue_lease(self, task_id: int, success: bool = True, error: str = None):
+        """任务结束（或启动失败）时结束对应的队列租约"""
+        with self._state_lock:
+            entry_id = self._queue_leases.pop(task_id, None)
+        if entry_id is not None:
+            try:
+                self.task_queue.complete(entry_id, success=success, error=error)
+            except Exception as e:
+                print(f"[RefactoredTaskManager] 更新队列记录 {entry_id} 失败: {str(e)}")
+    
+    def _heartbeat_leases(self):
+        """为执行中任务的队列租约续期，避免被其他调度进程当作失联重新领取"""
+        now = time.monotonic()
+        if now - self._last_heartbeat < self.task_queue.lease_seconds / 3:
+            return
+        self._last_heartbeat = now
+        with self._state_lock:
+            entry_ids = list(self._queue_leases.values())
+        if entry_ids:
+            self.task_queue.heartbeat(entry_ids)
+        self.lease_service.heartbeat()
+    
+    def _handle_task_request(self, task_request: TaskRequest, user_id: str, extra_user_ids: List[str] = None):
+        """使用已分配的用户ID处理单个任务请求"""
+        extra_user_ids = extra_user_ids or []
         task_id = task_request.task_id
+        success = False
         
         try:
-            # 检查是否有可用资源
-            if not self._can_start_task():
-                # 重新加入队列，稍后重试（无限重试，直到有资源可用）
-                task_request.retry_count += 1
-                retry_delay = min(2.0 * task_request.retry_count, 10.0)  # 指数退避，最大10秒
-                time.sleep(retry_delay)
-                queue_priority = (task_request.priority, task_request.scheduled_time.timestamp(), time.time())
-                self.task_request_queue.put((queue_priority, task_request))
-                print(f"[RefactoredTaskManager] 任务 {task_id} 资源不足，重新排队 (重试 {task_request.retry_count}，延迟 {retry_delay}s)")
-                return
-            
-            # 获取可用用户ID
-            user_id = self._get_available_user_id()
-            if not user_id:
-                # 如果没有可用用户ID，说明所有用户ID都在使用中
-                # 将任务重新排队，等待用户ID释放
-                # 增加重试间隔，避免频繁重试
-                retry_delay = min(2.0 * (task_request.retry_count + 1), 10.0)  # 指数退避，最大10秒
-                task_request.retry_count += 1
-                time.sleep(retry_delay)
-                queue_priority = (task_request.priority, task_request.scheduled_time.timestamp(), time.time())
-                self.task_request_queue.put((queue_priority, task_request))
-                print(f"[RefactoredTaskManager] 任务 {task_id} 等待用户ID释放，重新排队 (重试 {task_request.retry_count}，延迟 {retry_delay}s)")
-                return
+            waited = (datetime.utcnow() - task_request.queued_at).total_seconds() if task_request.queued_at else 0
             
             # 在应用上下文中启动任务
             from web_app import app
             from flask import has_app_context
             
-            print(f"[RefactoredTaskManager] 准备启动任务 {task_id}，当前应用上下文: {has_app_context()}")
+            print(f"[RefactoredTaskManager] 准备启动任务 {task_id}（排队 {waited:.1f}s），当前应用上下文: {has_app_context()}")
             
             with app.app_context():
                 print(f"[RefactoredTaskManager] 进入应用上下文，当前应用上下文: {has_app_context()}")
-                success = self._start_task_with_user(task_id, user_id, task_request.use_background_process)
+                success = self._start_task_with_user(task_id, user_id, task_request.use_background_process, extra_user_ids)
             
             if not success:
-                # 归还用户ID
-                self._return_user_id(user_id)
                 print(f"[RefactoredTaskManager] 任务 {task_id} 启动失败")
                 self._update_task_status(task_id, 'failed', '任务启动失败')
             else:
-                print(f"[RefactoredTaskManager] 任务 {task_id} 启动成功，用户ID: {user_id}")
+                print(f"[RefactoredTaskManager] 任务 {task_id} 启动成功，用户ID: {user_id}"
+                      + (f"，并发借用: {extra_user_ids}" if extra_user_ids else ""))
             
         except Exception as e:
             print(f"[RefactoredTaskManager] 处理任务 {task_id} 时出错: {str(e)}")
             self._update_task_status(task_id, 'failed', f'处理任务时出错: {str(e)}')
+        finally:
+            if not success and task_id not in self.active_slots:
+                # 归还用户ID
+                self._return_user_id(user_id)
+                self.return_user_ids(extra_user_ids)
+                self._finish_queue_lease(task_id, success=False, error='任务启动失败')
     
     def _can_start_task(self) -> bool:
         """检查是否可以启动新任务"""
@@ -227,26 +349,75 @@ class RefactoredTaskManager:
         """检查是否可以启动新任务（公有方法，兼容原API）"""
         return self._can_start_task()
     
+    def _lease_user_ids(self, count: int) -> List[str]:
+        """
+        从本进程空闲的用户ID中领取最多count个跨进程租约（不持有_state_lock时调用）
+        
+        先在锁内把空闲用户ID暂时取出，避免本进程其他线程同时领取（同一进程的租约持有方相同），
+        在锁外写租约表，再在锁内放回没有领取到的用户ID
+        """
+        if count <= 0:
+            return []
+        with self._state_lock:
+            candidates = sorted(self.available_users)
+            self.available_users.difference_update(candidates)
+        if not candidates:
+            return []
+        
+        leased = []
+        try:
+            leased = self.lease_service.acquire_any(PROFILE, candidates, count=count)
+        finally:
+            unused = set(candidates).difference(leased)
+            if unused:
+                with self._state_lock:
+                    self.available_users.update(unused)
+        return leased
+    
     def _get_available_user_id(self) -> Optional[str]:
-        """获取可用的用户ID"""
+        """获取可用的用户ID（同时领取跨进程租约）"""
+        leased = self._lease_user_ids(1)
         with self._state_lock:
-            if self.available_users:
-                user_id = self.available_users.pop()
-                logger.info(f"[RefactoredTaskManager] 分配用户ID: {user_id}，剩余可用: {len(self.available_users)}")
-                return user_id
-            logger.warning(f"[RefactoredTaskManager] 没有可用的用户ID，当前活跃任务: {len(self.active_slots)}")
-            return None
+            available = sorted(self.available_users)
+            active_count = len(self.active_slots)
+        if leased:
+            logger.info(f"[RefactoredTaskManager] 分配用户ID: {leased[0]}，剩余可用: {len(available)}")
+            return leased[0]
+        if available:
+            logger.warning(f"[RefactoredTaskManager] 空闲用户ID均被其他进程占用: {available}")
+        else:
+            logger.warning(f"[RefactoredTaskManager] 没有可用的用户ID，当前活跃任务: {active_count}")
+        return None
     
     def _return_user_id(self, user_id: str):
-        """归还用户ID"""
+        """归还用户ID（释放跨进程租约）"""
+        if user_id not in self.user_id_pool:  # 确保只归还有效的用户ID
+            logger.warning(f"[RefactoredTaskManager] 尝试归还无效用户ID: {user_id}")
+            return
+        try:
+            self.lease_service.release(PROFILE, [user_id])
+        except Exception as e:
+            # 释放失败时租约到期后自动失效
+            logger.warning(f"[RefactoredTaskManager] 释放用户ID {user_id} 的租约失败: {e}")
         with self._state_lock:
-            if user_id in self.user_id_pool:  # 确保只归还有效的用户ID
-                self.available_users.add(user_id)
-                logger.info(f"[RefactoredTaskManager] 归还用户ID: {user_id}，当前可用: {len(self.available_users)}")
-            else:
-                logger.warning(f"[RefactoredTaskManager] 尝试归还无效用户ID: {user_id}")
+            self.available_users.add(user_id)
+            logger.info(f"[RefactoredTaskManager] 归还用户ID: {user_id}，当前可用: {len(self.available_users)}")
+        self._notify_dispatch()
+    
+    def borrow_user_ids(self, count: int) -> List[str]:
+        """借用最多count个当前空闲的用户ID（不占用任务槽位），用于任务内多配置文件并发"""
+        borrowed = self._lease_user_ids(count)
+        if borrowed:
+            logger.info(f"[RefactoredTaskManager] 借用用户ID: {borrowed}，剩余可用: {len(self.available_users)}")
+        return borrowed
     
-    def _start_task_with_user(self, task_id: int, user_id: str, use_background_process: bool) -> bool:
+    def return_user_ids(self, user_ids: List[str]):
+        """归还借用的用户ID"""
+        for user_id in user_ids:
+            self._return_user_id(user_id)
+    
+    def _start_task_with_user(self, task_id: int, user_id: str, use_background_process: bool,
+                              extra_user_ids: List[str] = None) -> bool:
         """使用指定用户ID启动任务（需要在应用上下文中调用）"""
         try:
             # 获取任务信息（在锁外进行）
@@ -266,10 +437,11 @@ class RefactoredTaskManager:
             
             print(f"[RefactoredTaskManager] 开始启动任务 {task_id}，用户ID: {user_id}")
             
+            extra_user_ids = extra_user_ids or []
             if use_background_process:
-                return self._start_background_process(task_id, user_id)
+                return self._start_background_process(task_id, user_id, extra_user_ids)
             else:
-                return self._start_thread_task(task_id, user_id)
+                return self._start_thread_task(task_id, user_id, extra_user_ids)
                 
         except Exception as e:
             print(f"[RefactoredTaskManager] 启动任务 {task_id} 失败: {str(e)}")
@@ -277,14 +449,71 @@ class RefactoredTaskManager:
             traceback.print_exc()
             return False
     
-    def _start_background_process(self, task_id: int, user_id: str) -> bool:
+    def _get_worker_pool(self):
+        """获取常驻工作进程池，首次调用时创建"""
+        with self._state_lock:
+            if self._worker_pool is None:
+                from worker_pool import WarmWorkerPool
+                self._worker_pool = WarmWorkerPool(
+                    on_task_done=self._on_worker_task_done,
+                    on_progress=self._on_worker_progress
+                )
+                self._worker_pool.warm_up(self.user_id_pool)
+            return self._worker_pool
+    
+    def _on_worker_task_done(self, task_id: int, success: bool, message: Dict):
+        """常驻工作进程上报任务结束"""
+        if not success:
+            print(f"[RefactoredTaskManager] 工作进程任务 {task_id} 失败: {message.get('error')}")
+            if message.get('type') != 'result':
+                # 工作进程启动失败或中途退出，任务状态未被工作进程更新
+                self._update_task_status(task_id, 'failed', message.get('error'))
+        self.completion_queue.put(('worker', task_id))
+    
+    def _on_worker_progress(self, task_id: int, message: Dict):
+        """常驻工作进程上报任务进度"""
+        info = {key: value for key, value in message.items() if key not in ('type', 'task_id')}
+        logger.info(f"[RefactoredTaskManager] 任务 {task_id} 进度: {info}")
+    
+    def _start_worker_task(self, task_id: int, user_id: str, extra_user_ids: List[str]) -> bool:
+        """把任务交给用户ID对应的常驻工作进程"""
+        pool = self._get_worker_pool()
+        
+        # 先登记槽位，避免工作进程过快完成时清理不到
+        slot = TaskSlot(
+            task_id=task_id,
+            user_id=user_id,
+            start_time=datetime.utcnow(),
+            is_background=True,
+            extra_user_ids=extra_user_ids
+        )
+        with self._state_lock:
+            self.active_slots[task_id] = slot
+        
+        if not pool.submit(task_id, user_id, extra_user_ids):
+            with self._state_lock:
+                self.active_slots.pop(task_id, None)
+            return False
+        
+        slot.worker_pid = pool.get_worker_pid(user_id)
+        print(f"[RefactoredTaskManager] 后台任务 {task_id} 已交给常驻工作进程，PID: {slot.worker_pid}，用户ID: {user_id}")
+        logger.info(f"[RefactoredTaskManager] 当前活跃任务数: {len(self.active_slots)}/{self.max_concurrent_tasks}")
+        return True
+    
+    def _start_background_process(self, task_id: int, user_id: str, extra_user_ids: List[str]) -> bool:
         """启动后台进程"""
+        if self.use_warm_workers:
+            try:
+                return self._start_worker_task(task_id, user_id, extra_user_ids)
+            except Exception as e:
+                print(f"[RefactoredTaskManager] 常驻工作进程不可用，改用独立进程: {str(e)}")
+        
         try:
             # 创建配置文件
             config_data = {
                 'task_id': task_id,
                 'task_type': 'daily',
-                'kwargs': {'user_id': user_id}
+                'kwargs': {'user_id': user_id, 'extra_user_ids': extra_user_ids}
             }
             
             config_file = tempfile.NamedTemporaryFile(
@@ -308,7 +537,8 @@ class RefactoredTaskManager:
                 process=process,
                 config_file=config_file.name,
                 start_time=datetime.utcnow(),
-                is_background=True
+                is_background=True,
+                extra_user_ids=extra_user_ids
             )
             
             # 原子性地添加到活动槽位
@@ -332,7 +562,7 @@ class RefactoredTaskManager:
             print(f"[RefactoredTaskManager] 后台进程启动失败: {str(e)}")
             return False
     
-    def _start_thread_task(self, task_id: int, user_id: str) -> bool:
+    def _start_thread_task(self, task_id: int, user_id: str, extra_user_ids: List[str]) -> bool:
         """启动线程任务"""
         try:
             from web_app import ScrapingTaskExecutor, app, ScrapingTask
@@ -347,7 +577,7 @@ class RefactoredTaskManager:
                             print(f"[RefactoredTaskManager] 任务 {task_id} 不存在")
                             return
                         
-                        executor = ScrapingTaskExecutor(user_id)
+                        executor = ScrapingTaskExecutor(user_id, extra_user_ids=extra_user_ids)
                         loop = asyncio.new_event_loop()
                         asyncio.set_event_loop(loop)
                         loop.run_until_complete(executor.execute_task(task_id))
@@ -365,7 +595,8 @@ class RefactoredTaskManager:
                 user_id=user_id,
                 thread=task_thread,
                 start_time=datetime.utcnow(),
-                is_background=False
+                is_background=False,
+                extra_user_ids=extra_user_ids
             )
             
             # 原子性地添加到活动槽位
@@ -404,6 +635,7 @@ class RefactoredTaskManager:
                 try:
                     task_type, task_id = self.completion_queue.get(timeout=1.0)
                 except queue.Empty:
+                    self._heartbeat_leases()
                     continue
                 
                 self._cleanup_task(task_id)
@@ -442,13 +674,17 @@ class RefactoredTaskManager:
                 except:
                     pass
             
-            # 归还用户ID
+            # 归还用户ID（含任务内并发借用的），结束队列租约
             self._return_user_id(slot.user_id)
+            self.return_user_ids(slot.extra_user_ids)
+            self._finish_queue_lease(task_id)
             
             # 从活动槽位中移除
             with self._state_lock:
                 if task_id in self.active_slots:
                     del self.active_slots[task_id]
+            # 槽位已释放，唤醒等待中的调度线程
+            self._notify_dispatch()
             
             print(f"[RefactoredTaskManager] 任务 {task_id} 清理完成")
             print(f"[RefactoredTaskManager] 当前活跃任务数: {len(self.active_slots)}/{self.max_concurrent_tasks}")
@@ -460,6 +696,10 @@ class RefactoredTaskManager:
         """停止任务"""
         slot = self.active_slots.get(task_id)
         if not slot:
+            # 仍在排队的任务直接从持久化队列中取消
+            if self.task_queue.cancel_queued(task_id):
+                self._update_task_status(task_id, 'stopped')
+                return True, "任务已从队列中移除"
             return False, "任务未在运行中"
         
         try:
@@ -472,6 +712,10 @@ class RefactoredTaskManager:
                 except subprocess.TimeoutExpired:
                     print(f"[RefactoredTaskManager] 强制杀死进程任务 {task_id}")
                     slot.process.kill()
+            elif slot.is_background and slot.worker_pid:
+                # 终止常驻工作进程，下次提交任务时重新预热
+                print(f"[RefactoredTaskManager] 停止常驻工作进程任务 {task_id}")
+                self._get_worker_pool().stop_task(slot.user_id)
             elif not slot.is_background and slot.thread:
                 # 停止线程任务
                 print(f"[RefactoredTaskManager] 停止线程任务 {task_id}")
@@ -507,13 +751,14 @@ class RefactoredTaskManager:
         with self._state_lock:
             active_count = len(self.active_slots)
             available_users = len(self.available_users)
-            queue_size = self.task_request_queue.qsize()
+        queue_size = self.task_queue.size()
             
         return {
             'active_tasks': active_count,
             'max_concurrent': self.max_concurrent_tasks,
             'available_slots': self.max_concurrent_tasks - active_count,
             'available_users': available_users,
+            'users_leased_elsewhere': len(self.lease_service.held_by_others(PROFILE)),
             'queue_size': queue_size,
             'active_task_ids': list(self.active_slots.keys()),
             'is_queue_active': queue_size > 0,
@@ -525,7 +770,7 @@ class RefactoredTaskManager:
         with self._state_lock:
             active_count = len(self.active_slots)
             available_users = len(self.available_users)
-            queue_size = self.task_request_queue.qsize()
+        queue_size = self.task_queue.size()
             
         return {
             'running_count': active_count,
@@ -554,12 +799,13 @@ class RefactoredTaskManager:
     
     def get_queue_status(self) -> Dict:
         """获取队列状态（兼容原API）"""
-        queue_size = self.task_request_queue.qsize()
+        queued_entries = self.task_queue.queued_entries()
+        queue_size = len(queued_entries)
         active_count = len(self.active_slots)
         
         return {
             'queue_length': queue_size,
-            'queued_task_ids': [],  # 新架构中无法直接获取队列中的任务ID
+            'queued_task_ids': [entry.task_id for entry in queued_entries],
             'estimated_wait_time': queue_size * 30 if queue_size > 0 else 0,  # 估算等待时间（秒）
             'queue_position_info': f'队列中有 {queue_size} 个任务等待执行' if queue_size > 0 else '队列为空',
             'concurrent_info': f'当前运行 {active_count}/{self.max_concurrent_tasks} 个任务'
@@ -567,20 +813,21 @@ class RefactoredTaskManager:
     
     def clear_queue(self):
         """清空队列（兼容原API）"""
-        # 清空优先级队列
-        while not self.task_request_queue.empty():
-            try:
-                self.task_request_queue.get_nowait()
-            except queue.Empty:
-                break
-        print(f"[RefactoredTaskManager] 任务队列已清空")
+        cancelled = self.task_queue.cancel_queued()
+        print(f"[RefactoredTaskManager] 任务队列已清空，取消 {cancelled} 个排队任务")
     
     def shutdown(self):
         """关闭管理器"""
-        self._running = False
+        with self._dispatch_condition:
+            self._running = False
+        self._notify_dispatch()
         
         # 停止所有活动任务
         for task_id in list(self.active_slots.keys()):
             self.stop_task(task_id)
         
+        if self._worker_pool is not None:
+            self._worker_pool.shutdown()
+        
+        self.lease_service.release_all()
         print(f"[RefactoredTaskManager] 管理器已关闭")
\ No newline at end of file
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取阶段耗时直方图
+导航、滚动、解析、详情页、入库、飞书同步等阶段的耗时按固定分桶累计（内存与调用次数无关），
+按任务、配置文件、抓取目标打标签。标签通过上下文传递，被计时的函数不需要改签名：
+
+    with stage_context(task=task_id):
+        ...
+        with stage_context(profile=user_id, target='@elonmusk'):
+            await parser.navigate_to_profile('elonmusk')   # 已用 @stage_metrics.timed('navigate') 装饰
+
+抓取在工作进程中执行，各进程由后台线程定期把增量合并到SQLite的stage_latency表（任务结束时也会合并），
+Web进程从表中读取；记录耗时只更新内存，不在被计时的代码路径上访问数据库
+"""
+
+import os
+import time
+import atexit
+import json
+import sqlite3
+import asyncio
+import bisect
+import logging
+import functools
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from lease_service import DEFAULT_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# 分桶上界（秒），覆盖单条解析的毫秒级到整页滚动的分钟级
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+LABEL_NAMES = ('task', 'profile', 'target')
+METRIC_NAME = 'scraper_stage_duration_seconds'
+
+SeriesKey = Tuple[str, str, str, str]  # (阶段, 任务, 配置文件, 目标)
+
+_stage_labels: contextvars.ContextVar[Tuple[Tuple[str, str], ...]] = \
+    contextvars.ContextVar('stage_labels', default=())
+
+
+@contextmanager
+def stage_context(**labels):
+    """为代码块内记录的阶段耗时附加标签（与外层标签合并，同名时覆盖）"""
+    merged = dict(_stage_labels.get())
+    merged.update({name: str(value) for name, value in labels.items() if value is not None})
+    token = _stage_labels.set(tuple(merged.items()))
+    try:
+        yield
+    finally:
+        _stage_labels.reset(token)
+
+
+class LatencyHistogram:
+    """固定分桶直方图，最后一个桶为+Inf"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, value in enumerate(other.counts):
+            self.counts[index] += value
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按桶内线性插值估算分位数，落在+Inf桶时返回观测到的最大值"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, value in enumerate(self.counts):
+            if value and cumulative + value >= rank:
+                if index == len(self.buckets):
+                    return self.max
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = min(self.buckets[index], self.max)
+                if upper <= lower:
+                    return upper
+                return lower + (upper - lower) * (rank - cumulative) / value
+            cumulative += value
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': round(self.total, 4),
+            'avg': round(self.total / self.count, 4) if self.count else None,
+            'p50': _round(self.quantile(0.5)),
+            'p95': _round(self.quantile(0.95)),
+            'p99': _round(self.quantile(0.99)),
+            'max': round(self.max, 4),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+class StageMetrics:
+    """阶段耗时记录器：进程内累计增量，定期合并到SQLite"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS stage_latency (
+            stage TEXT NOT NULL,
+            task TEXT NOT NULL,
+            profile TEXT NOT NULL,
+            target TEXT NOT NULL,
+            counts TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            max REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (stage, task, profile, target)
+        );
+        CREATE INDEX IF NOT EXISTS idx_stage_latency_updated ON stage_latency (updated_at);
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 flush_interval: float = 30.0, max_pending_series: int = 500,
+                 retention_seconds: float = 7 * 86400):
+        """
+        Args:
+            db_path: SQLite数据库文件路径，None时只在进程内累计
+            buckets: 分桶上界（秒）
+            flush_interval: 后台线程合并到数据库的间隔（秒）
+            max_pending_series: 未合并的序列数达到该值时提前唤醒后台线程合并
+            retention_seconds: 数据库中超过此时间未更新的序列被删除
+        """
+        self.db_path = db_path
+        self.buckets = tuple(buckets)
+        self.flush_interval = flush_interval
+        self.max_pending_series = max_pending_series
+        self.retention_seconds = retention_seconds
+        self._pending: Dict[SeriesKey, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._flush_wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid: Optional[int] = None
+
+    def observe(self, stage: str, seconds: float, **labels):
+        """记录一次阶段耗时，标签缺省时取当前上下文"""
+        context = dict(_stage_labels.get())
+        context.update({name: str(value) for name, value in labels.items() if value is not None})
+        key = (stage,) + tuple(context.get(name, '') for name in LABEL_NAMES)
+        with self._lock:
+            histogram = self._pending.get(key)
+            if histogram is None:
+                histogram = self._pending[key] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+            backlog = len(self._pending) >= self.max_pending_series
+        if self.db_path:
+            self._ensure_flusher()
+            if backlog:
+                self._flush_wakeup.set()
+
+    def _ensure_flusher(self):
+        """按需启动后台合并线程（fork出的工作进程中线程不存在，重新启动）"""
+        if self._flusher_pid == os.getpid() and self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid() and self._flusher is not None and self._flusher.is_alive():
+                return
+            if self._flusher_pid is None:
+                # 进程退出前合并剩余的增量
+                atexit.register(self.flush)
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(target=self._flush_loop, name='stage-metrics-flush', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            self._flush_wakeup.wait(self.flush_interval)
+            self._flush_wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"阶段耗时后台合并失败: {e}")
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        """上下文管理器：记录代码块耗时（异常时同样记录）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels)
+
+    def timed(self, stage: str) -> Callable:
+        """装饰器：记录函数（同步或异步）每次调用的耗时"""
+        def decorator(func: Callable) -> Callable:
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    started = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.observe(stage, time.perf_counter() - started)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._schema_ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        if not self._schema_ready:
+            conn.executescript(self.SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def flush(self) -> int:
+        """把进程内的增量合并到数据库，返回合并的序列数；失败时增量保留到下次"""
+        if not self.db_path:
+            return 0
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for key, histogram in pending.items():
+                    row = conn.execute(
+                        "SELECT counts, count, total, max FROM stage_latency "
+                        "WHERE stage = ? AND task = ? AND profile = ? AND target = ?", key
+                    ).fetchone()
+                    merged = self._from_row(row) if row else None
+                    if merged is None:
+                        merged = LatencyHistogram(self.buckets)
+                    merged.merge(histogram)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO stage_latency "
+                        "(stage, task, profile, target, counts, count, total, max, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (*key, json.dumps(merged.counts), merged.count, merged.total, merged.max, now)
+                    )
+                conn.execute("DELETE FROM stage_latency WHERE updated_at < ?", (now - self.retention_seconds,))
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"阶段耗时合并到数据库失败: {e}")
+            with self._lock:
+                for key, histogram in pending.items():
+                    self._pending.setdefault(key, LatencyHistogram(self.buckets)).merge(histogram)
+            return 0
+        return len(pending)
+
+    def _from_row(self, row) -> Optional[LatencyHistogram]:
+        counts = json.loads(row[0])
+        if len(counts) != len(self.buckets) + 1:
+            # 分桶配置变化后旧数据无法合并，重新累计
+            return None
+        histogram = LatencyHistogram(self.buckets)
+        histogram.counts = counts
+        histogram.count, histogram.total, histogram.max = row[1], row[2], row[3]
+        return histogram
+
+    def load(self, stage: str = None, task: str = None, since: float = None
+             ) -> Dict[SeriesKey, LatencyHistogram]:
+        """读取所有进程合并后的直方图（先合并本进程的增量）"""
+        if not self.db_path:
+            with self._lock:
+                return {key: histogram for key, histogram in self._pending.items()
+                        if (not stage or key[0] == stage) and (task is None or key[1] == str(task))}
+        self.flush()
+        sql = "SELECT stage, task, profile, target, counts, count, total, max FROM stage_latency WHERE 1 = 1"
+        params: List[Any] = []
+        if stage:
+            sql += " AND stage = ?"
+            params.append(stage)
+        if task is not None:
+            sql += " AND task = ?"
+            params.append(str(task))
+        if since is not None:
+            sql += " AND updated_at >= ?"
+            params.append(since)
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        series = {}
+        for row in rows:
+            histogram = self._from_row(row[4:])
+            if histogram is not None:
+                series[tuple(row[:4])] = histogram
+        return series
+
+    def summarize(self, group_by: Iterable[str] = ('stage',) + LABEL_NAMES, **filters) -> List[Dict[str, Any]]:
+        """按指定维度汇总，返回各组的次数、总耗时和分位数"""
+        groups = self.aggregate(self.load(**filters), group_by)
+        ordered = sorted(groups.items(), key=lambda item: item[1].total, reverse=True)
+        return [{**dict(labels), **histogram.summary()} for labels, histogram in ordered]
+
+    def aggregate(self, series: Dict[SeriesKey, LatencyHistogram], group_by: Iterable[str]
+                  ) -> 'OrderedDict[Tuple[Tuple[str, str], ...], LatencyHistogram]':
+        """把序列按group_by中的维度重新聚合（未列出的维度被合并）"""
+        names = ('stage',) + LABEL_NAMES
+        indexes = [(name, names.index(name)) for name in group_by if name in names]
+        groups: 'OrderedDict[Tuple[Tuple[str, str], ...], LatencyHistogram]' = OrderedDict()
+        for key in sorted(series):
+            group = tuple((name, key[index]) for name, index in indexes)
+            if group not in groups:
+                groups[group] = LatencyHistogram(self.buckets)
+            groups[group].merge(series[key])
+        return groups
+
+    def render_prometheus(self, group_by: Iterable[str] = ('stage', 'profile'), **filters) -> str:
+        """Prometheus文本格式；默认只按阶段和配置文件分组，避免任务、目标带来的高基数"""
+        groups = self.aggregate(self.load(**filters), group_by)
+        lines = [f"# HELP {METRIC_NAME} 抓取各阶段耗时（秒）", f"# TYPE {METRIC_NAME} histogram"]
+        for labels, histogram in groups.items():
+            base = ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels)
+            prefix = base + ',' if base else ''
+            cumulative = 0
+            for bound, value in zip(self.buckets, histogram.counts):
+                cumulative += value
+                lines.append(f'{METRIC_NAME}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+            suffix = f'{{{base}}}' if base else ''
+            lines.append(f'{METRIC_NAME}_sum{suffix} {histogram.total:.6f}')
+            lines.append(f'{METRIC_NAME}_count{suffix} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+# 全局实例
+stage_metrics = StageMetrics()
@@ -3,17 +3,28 @@
 """
 存储管理模块 - 负责推文数据的持久化存储
 支持JSON、CSV、Excel等多种格式
+
+推文按日期分区追加写入NDJSON（每行一条推文），每批一次写入；
+tweets/manifest.json记录各分区的行数、字节数、发布时间范围和各用户摘要，
+统计直接读取清单，导出只读取目标分区。旧版按用户保存的*_tweets.json仍可读取
 """
 
 import os
 import json
 import csv
+import shutil
 import logging
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from pathlib import Path
 import pandas as pd
 
+# 分区内的推文文件和清单文件名
+PARTITION_FILE = "tweets.ndjson"
+MANIFEST_FILE = "manifest.json"
+LEGACY_PATTERN = "*_tweets.json"
+
 
 class StorageManager:
     """存储管理器 - 处理推文数据的持久化存储"""
@@ -21,6 +32,10 @@ class StorageManager:
     def __init__(self, base_dir: str = "./data"):
         self.base_dir = Path(base_dir)
         self.logger = logging.getLogger(__name__)
+        self.tweets_dir = self.base_dir / "tweets"
+        self.manifest_path = self.tweets_dir / MANIFEST_FILE
+        self._manifest_lock = threading.Lock()
+        self._manifest: Optional[Dict[str, Any]] = None
         
         # 创建必要的目录结构
         self._create_directory_structure()
@@ -52,7 +67,7 @@ class StorageManager:
     async def save_user_tweets(self, username: str, tweets: List[Dict[str, Any]], 
                               metadata: Dict[str, Any] = None) -> str:
         """
-        保存单个用户的推文数据
+        保存单个用户的推文数据（追加到当天分区）
         
         Args:
             username: 用户名
@@ -63,40 +78,83 @@ class StorageManager:
             保存的文件路径
         """
         try:
-            # 获取日期目录
-            date_dir = self.get_date_directory()
-            
-            # 构建文件名
-            filename = f"{username}_tweets.json"
-            filepath = date_dir / filename
-            
-            # 准备保存的数据
-            save_data = {
-                "metadata": {
-                    "username": username,
-                    "scraped_at": datetime.now().isoformat(),
-                    "total_tweets": len(tweets),
-                    "scraping_duration": metadata.get("duration", 0) if metadata else 0,
-                    "status": "success"
-                },
-                "tweets": tweets
-            }
-            
-            # 如果有额外的元数据，合并进去
-            if metadata:
-                save_data["metadata"].update(metadata)
-            
-            # 保存JSON文件
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2, default=str)
-            
-            self.logger.info(f"用户 @{username} 的推文数据已保存到: {filepath}")
-            return str(filepath)
+            filepath = self.append_tweets(username, tweets, metadata)
+            self.logger.info(f"用户 @{username} 的 {len(tweets)} 条推文已追加到: {filepath}")
+            return filepath
             
         except Exception as e:
             self.logger.error(f"保存用户 @{username} 的推文数据失败: {e}")
             raise
     
+    def save_tweets(self, tweets: List[Dict[str, Any]], metadata: Dict[str, Any] = None) -> str:
+        """
+        保存一批推文，按推文的用户名分组后整批追加到当天分区
+        
+        Returns:
+            保存的文件路径
+        """
+        by_user: Dict[str, List[Dict[str, Any]]] = {}
+        for tweet in tweets:
+            by_user.setdefault(tweet.get("username") or "unknown", []).append(tweet)
+        
+        filepath = ""
+        for username, user_tweets in by_user.items():
+            filepath = self.append_tweets(username, user_tweets, metadata)
+        self.logger.info(f"{len(tweets)} 条推文（{len(by_user)} 个用户）已追加到: {filepath}")
+        return filepath
+    
+    def append_tweets(self, username: str, tweets: List[Dict[str, Any]], metadata: Dict[str, Any] = None,
+                      date: datetime = None) -> str:
+        """
+        把一个用户的一批推文追加到日期分区，并更新清单
+        
+        整批推文编码后一次写入；写入和清单更新在同一把锁内完成
+        """
+        date_dir = self.get_date_directory(date)
+        filepath = date_dir / PARTITION_FILE
+        scraped_at = datetime.now().isoformat()
+        
+        lines = []
+        for tweet in tweets:
+            record = dict(tweet)
+            record["source_username"] = username
+            record.setdefault("scraped_at", scraped_at)
+            lines.append(json.dumps(record, ensure_ascii=False, default=str))
+        payload = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+        
+        with self._manifest_lock:
+            manifest = self._load_manifest()
+            partition = manifest["partitions"].setdefault(date_dir.name, self._empty_partition())
+            
+            if payload:
+                with open(filepath, 'ab+') as f:
+                    # 上次写入中断留下的半行单独成行，不影响本批第一条
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            payload = b"\n" + payload
+                    f.write(payload)
+            
+            if payload:
+                # 按本次写入量累加字节数，其他进程的写入会让记录与文件大小不一致，由get_manifest重新扫描
+                partition_file = partition["files"].setdefault(PARTITION_FILE, {"rows": 0, "bytes": 0})
+                partition_file["rows"] += len(lines)
+                partition_file["bytes"] += len(payload)
+            self._merge_time_range(partition, tweets)
+            
+            user = partition["users"].setdefault(username, {"rows": 0, "batches": 0})
+            user["rows"] += len(tweets)
+            user["batches"] += 1
+            user["scraped_at"] = scraped_at
+            user["status"] = (metadata or {}).get("status", "success")
+            if metadata and "duration" in metadata:
+                user["scraping_duration"] = metadata["duration"]
+            
+            self._refresh_partition_totals(partition)
+            self._save_manifest(manifest)
+        
+        return str(filepath)
+    
     async def save_batch_summary(self, scraping_result, usernames: List[str]) -> str:
         """
         保存批次抓取摘要
@@ -189,6 +247,171 @@ class StorageManager:
             self.logger.error(f"保存账号状态失败: {e}")
             raise
     
+    # ---- 清单 ----
+    
+    @staticmethod
+    def _empty_partition() -> Dict[str, Any]:
+        return {"rows": 0, "bytes": 0, "min_publish_time": None, "max_publish_time": None,
+                "files": {}, "users": {}}
+    
+    @staticmethod
+    def _publish_time(tweet: Dict[str, Any]) -> Optional[str]:
+        """推文发布时间（ISO格式），缺失或无法解析时返回None"""
+        value = tweet.get("publish_time") or tweet.get("timestamp")
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(str(value).replace("Z", "+00:00")).isoformat()
+        except ValueError:
+            return None
+    
+    def _merge_time_range(self, partition: Dict[str, Any], tweets: List[Dict[str, Any]]):
+        times = [t for t in (self._publish_time(tweet) for tweet in tweets) if t]
+        if not times:
+            return
+        low, high = min(times), max(times)
+        if partition["min_publish_time"] is None or low < partition["min_publish_time"]:
+            partition["min_publish_time"] = low
+        if partition["max_publish_time"] is None or high > partition["max_publish_time"]:
+            partition["max_publish_time"] = high
+    
+    @staticmethod
+    def _refresh_partition_totals(partition: Dict[str, Any]):
+        partition["rows"] = sum(f["rows"] for f in partition["files"].values())
+        partition["bytes"] = sum(f["bytes"] for f in partition["files"].values())
+    
+    def _load_manifest(self) -> Dict[str, Any]:
+        """读取清单（调用方持有锁）；清单不存在或损坏时扫描分区重建"""
+        if self._manifest is not None:
+            return self._manifest
+        
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+                return self._manifest
+            except Exception as e:
+                self.logger.warning(f"读取清单失败，重新扫描分区: {e}")
+        
+        self._manifest = {"version": 1, "partitions": {}}
+        if self.tweets_dir.exists():
+            for date_dir in sorted(self.tweets_dir.iterdir()):
+                if date_dir.is_dir():
+                    self._manifest["partitions"][date_dir.name] = self._scan_partition(date_dir)
+            self._save_manifest(self._manifest)
+        return self._manifest
+    
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        """原子写入清单（先写临时文件再替换）"""
+        manifest["updated_at"] = datetime.now().isoformat()
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _scan_partition(self, date_dir: Path) -> Dict[str, Any]:
+        """完整读取一个分区重建其清单条目（清单缺失或与文件不一致时使用）"""
+        partition = self._empty_partition()
+        rows_by_file: Dict[str, int] = {}
+        for tweet, username, file_name, metadata in self._read_partition(date_dir):
+            if tweet is None:
+                # 旧版文件的用户摘要
+                partition["users"][username] = {
+                    "rows": metadata.get("total_tweets", 0), "batches": 1,
+                    "scraped_at": metadata.get("scraped_at", ""), "status": metadata.get("status", "unknown")
+                }
+                rows_by_file.setdefault(file_name, 0)
+                continue
+            rows_by_file[file_name] = rows_by_file.get(file_name, 0) + 1
+            self._merge_time_range(partition, [tweet])
+            if file_name == PARTITION_FILE:
+                user = partition["users"].setdefault(username, {"rows": 0, "batches": 0, "status": "success"})
+                user["rows"] += 1
+                user["batches"] = max(user["batches"], 1)
+                if tweet.get("scraped_at"):
+                    user["scraped_at"] = max(user.get("scraped_at", ""), str(tweet["scraped_at"]))
+        
+        for file_name, rows in rows_by_file.items():
+            partition["files"][file_name] = {"rows": rows, "bytes": (date_dir / file_name).stat().st_size}
+        self._refresh_partition_totals(partition)
+        return partition
+    
+    def _read_partition(self, date_dir: Path) -> Iterator[tuple]:
+        """
+        逐条读取分区中的推文，产出 (推文, 来源用户名, 文件名, 旧版元数据)
+        
+        旧版文件先产出一条推文为None的记录携带其元数据
+        """
+        ndjson_path = date_dir / PARTITION_FILE
+        if ndjson_path.exists():
+            with open(ndjson_path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        tweet = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 写入中断留下的半行
+                        self.logger.warning(f"跳过损坏的行 {ndjson_path}:{line_number}")
+                        continue
+                    yield tweet, tweet.get("source_username", "unknown"), PARTITION_FILE, None
+        
+        for json_file in sorted(date_dir.glob(LEGACY_PATTERN)):
+            try:
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                self.logger.warning(f"读取文件 {json_file} 失败: {e}")
+                continue
+            metadata = data.get("metadata", {})
+            username = metadata.get("username", "unknown")
+            yield None, username, json_file.name, metadata
+            for tweet in data.get("tweets", []):
+                tweet["source_username"] = username
+                yield tweet, username, json_file.name, metadata
+    
+    def get_manifest(self) -> Dict[str, Any]:
+        """
+        获取清单，并校验各分区文件大小与记录一致（只做stat，不解析文件）；
+        不一致的分区（例如其他进程写入或写入中断）重新扫描
+        """
+        with self._manifest_lock:
+            manifest = self._load_manifest()
+            changed = False
+            
+            for date_str, partition in list(manifest["partitions"].items()):
+                date_dir = self.tweets_dir / date_str
+                if not date_dir.is_dir():
+                    del manifest["partitions"][date_str]
+                    changed = True
+                    continue
+                actual = {path.name: path.stat().st_size for path in date_dir.iterdir()
+                          if path.name == PARTITION_FILE or path.match(LEGACY_PATTERN)}
+                recorded = {name: info["bytes"] for name, info in partition["files"].items()}
+                if actual != recorded:
+                    manifest["partitions"][date_str] = self._scan_partition(date_dir)
+                    changed = True
+            
+            # 清单之外新出现的分区
+            if self.tweets_dir.exists():
+                for date_dir in self.tweets_dir.iterdir():
+                    if date_dir.is_dir() and date_dir.name not in manifest["partitions"]:
+                        scanned = self._scan_partition(date_dir)
+                        if scanned["files"]:
+                            manifest["partitions"][date_dir.name] = scanned
+                            changed = True
+            
+            if changed:
+                self._save_manifest(manifest)
+            return json.loads(json.dumps(manifest))
+    
+    def _load_partition_tweets(self, date_str: str) -> List[Dict[str, Any]]:
+        """读取一个分区的全部推文（带source_username）"""
+        date_dir = self.tweets_dir / date_str
+        if not date_dir.exists():
+            raise FileNotFoundError(f"日期目录不存在: {date_dir}")
+        return [tweet for tweet, _, _, _ in self._read_partition(date_dir) if tweet is not None]
+    
     async def export_to_csv(self, date: datetime = None) -> str:
         """
         导出指定日期的推文数据为CSV格式
@@ -204,29 +427,7 @@ class StorageManager:
                 date = datetime.now()
             
             date_str = date.strftime("%Y-%m-%d")
-            date_dir = self.base_dir / "tweets" / date_str
-            
-            if not date_dir.exists():
-                raise FileNotFoundError(f"日期目录不存在: {date_dir}")
-            
-            # 收集所有推文数据
-            all_tweets = []
-            
-            for json_file in date_dir.glob("*_tweets.json"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        tweets = data.get("tweets", [])
-                        
-                        # 为每条推文添加来源信息
-                        username = data.get("metadata", {}).get("username", "unknown")
-                        for tweet in tweets:
-                            tweet["source_username"] = username
-                            all_tweets.append(tweet)
-                            
-                except Exception as e:
-                    self.logger.warning(f"读取文件 {json_file} 失败: {e}")
-                    continue
+            all_tweets = self._load_partition_tweets(date_str)
             
             if not all_tweets:
                 self.logger.warning(f"日期 {date_str} 没有找到推文数据")
@@ -263,39 +464,19 @@ class StorageManager:
                 date = datetime.now()
             
             date_str = date.strftime("%Y-%m-%d")
-            date_dir = self.base_dir / "tweets" / date_str
-            
-            if not date_dir.exists():
-                raise FileNotFoundError(f"日期目录不存在: {date_dir}")
-            
-            # 收集所有推文数据
-            all_tweets = []
-            user_summaries = []
+            all_tweets = self._load_partition_tweets(date_str)
             
-            for json_file in date_dir.glob("*_tweets.json"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        tweets = data.get("tweets", [])
-                        metadata = data.get("metadata", {})
-                        
-                        # 收集推文数据
-                        username = metadata.get("username", "unknown")
-                        for tweet in tweets:
-                            tweet["source_username"] = username
-                            all_tweets.append(tweet)
-                        
-                        # 收集用户摘要
-                        user_summaries.append({
-                            "username": username,
-                            "total_tweets": metadata.get("total_tweets", 0),
-                            "scraped_at": metadata.get("scraped_at", ""),
-                            "status": metadata.get("status", "unknown")
-                        })
-                        
-                except Exception as e:
-                    self.logger.warning(f"读取文件 {json_file} 失败: {e}")
-                    continue
+            # 用户摘要来自清单，无需读取推文
+            partition = self.get_manifest()["partitions"].get(date_str, self._empty_partition())
+            user_summaries = [
+                {
+                    "username": username,
+                    "total_tweets": user.get("rows", 0),
+                    "scraped_at": user.get("scraped_at", ""),
+                    "status": user.get("status", "unknown")
+                }
+                for username, user in partition["users"].items()
+            ]
             
             if not all_tweets:
                 self.logger.warning(f"日期 {date_str} 没有找到推文数据")
@@ -362,47 +543,27 @@ class StorageManager:
                 "date_details": []
             }
             
-            tweets_dir = self.base_dir / "tweets"
-            
-            if not tweets_dir.exists():
+            if not self.tweets_dir.exists():
                 return stats
             
-            # 遍历日期目录
-            for date_dir in tweets_dir.iterdir():
-                if not date_dir.is_dir():
+            # 只读取清单，不解析推文文件
+            for date_str, partition in sorted(self.get_manifest()["partitions"].items()):
+                if not partition["files"]:
                     continue
                 
-                date_stats = {
-                    "date": date_dir.name,
-                    "users": 0,
-                    "tweets": 0,
-                    "files": 0
-                }
-                
-                # 统计该日期的文件
-                for json_file in date_dir.glob("*_tweets.json"):
-                    try:
-                        with open(json_file, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            tweets_count = len(data.get("tweets", []))
-                            
-                            date_stats["users"] += 1
-                            date_stats["tweets"] += tweets_count
-                            date_stats["files"] += 1
-                            
-                            # 计算文件大小
-                            stats["storage_size_mb"] += json_file.stat().st_size / (1024 * 1024)
-                            
-                    except Exception as e:
-                        self.logger.warning(f"统计文件 {json_file} 失败: {e}")
-                        continue
-                
-                if date_stats["files"] > 0:
-                    stats["date_details"].append(date_stats)
-                    stats["total_dates"] += 1
-                    stats["total_users"] += date_stats["users"]
-                    stats["total_tweets"] += date_stats["tweets"]
-                    stats["total_files"] += date_stats["files"]
+                stats["date_details"].append({
+                    "date": date_str,
+                    "users": len(partition["users"]),
+                    "tweets": partition["rows"],
+                    "files": len(partition["files"]),
+                    "min_publish_time": partition["min_publish_time"],
+                    "max_publish_time": partition["max_publish_time"]
+                })
+                stats["total_dates"] += 1
+                stats["total_users"] += len(partition["users"])
+                stats["total_tweets"] += partition["rows"]
+                stats["total_files"] += len(partition["files"])
+                stats["storage_size_mb"] += partition["bytes"] / (1024 * 1024)
             
             return stats
             
@@ -438,8 +599,11 @@ class StorageManager:
                     
                     if dir_date < cutoff_date:
                         # 删除整个日期目录
-                        import shutil
                         shutil.rmtree(date_dir)
+                        with self._manifest_lock:
+                            manifest = self._load_manifest()
+                            if manifest["partitions"].pop(date_dir.name, None) is not None:
+                                self._save_manifest(manifest)
                         deleted_count += 1
                         self.logger.info(f"删除过期数据目录: {date_dir}")
                         
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+同步链路追踪日志
+替代云端同步中直接print的调试输出：按级别输出到logging，消息只在确实输出时才格式化，
+请求载荷、响应内容等大段数据只在开启调试开关时序列化；调试输出可按调用抽样，
+所有输出中的令牌、密钥在写出前脱敏
+
+调试开关：环境变量 CLOUD_SYNC_DEBUG=1 或 SyncTracer.configure(debug=True)
+抽样比例：环境变量 CLOUD_SYNC_TRACE_SAMPLE（0~1，默认1，即开启调试时每次调用都输出）
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import random
+import logging
+import functools
+import asyncio
+import contextvars
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Set
+
+TRACE_DEBUG_ENV = 'CLOUD_SYNC_DEBUG'
+TRACE_SAMPLE_ENV = 'CLOUD_SYNC_TRACE_SAMPLE'
+
+REDACTED = '***'
+# 键名包含这些词的字段整体脱敏
+SENSITIVE_KEY_PATTERN = re.compile(r'secret|token|password|authorization|cookie', re.IGNORECASE)
+# 自由文本中的令牌
+SENSITIVE_TEXT_PATTERNS = [
+    re.compile(r'(Bearer\s+)[^\s\'",}]+', re.IGNORECASE),
+    re.compile(r'(["\']?(?:\w*_)?(?:secret|token)["\']?\s*[:=]\s*["\']?)[^\s\'",}]{4,}', re.IGNORECASE),
+]
+
+
+def redact(value: Any) -> Any:
+    """返回脱敏后的副本：字典中敏感键的值替换为***"""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if isinstance(key, str) and SENSITIVE_KEY_PATTERN.search(key) and item else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+@dataclass
+class _Span:
+    name: str
+    op_id: str
+    sampled: bool
+    started: float = field(default_factory=time.monotonic)
+
+
+_current_span: contextvars.ContextVar[Optional[_Span]] = contextvars.ContextVar('sync_trace_span', default=None)
+
+
+class LazyJson:
+    """延迟序列化的JSON，只有日志真正输出时才脱敏并序列化"""
+
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        try:
+            text = json.dumps(redact(self.value), ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            text = str(self.value)
+        if self.limit is not None and len(text) > self.limit:
+            return text[:self.limit]
+        return text
+
+
+class SyncTracer:
+    """按级别、可抽样、带脱敏的同步日志"""
+
+    def __init__(self, name: str, debug: Optional[bool] = None, sample_rate: Optional[float] = None):
+        """
+        Args:
+            name: logger名称
+            debug: 是否输出调试级别内容（含载荷），None时读取环境变量CLOUD_SYNC_DEBUG
+            sample_rate: 开启调试时输出调试内容的调用比例，None时读取环境变量CLOUD_SYNC_TRACE_SAMPLE
+        """
+        self.logger = logging.getLogger(name)
+        self._secrets: Set[str] = set()
+        self.configure(debug=debug, sample_rate=sample_rate)
+
+    def configure(self, debug: Optional[bool] = None, sample_rate: Optional[float] = None):
+        """更新调试开关和抽样比例（None表示从环境变量读取）"""
+        if debug is None:
+            debug = os.environ.get(TRACE_DEBUG_ENV, '').lower() in ('1', 'true', 'yes', 'on')
+        if sample_rate is None:
+            try:
+                sample_rate = float(os.environ.get(TRACE_SAMPLE_ENV, '1'))
+            except ValueError:
+                sample_rate = 1.0
+        self.debug_flag = bool(debug)
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        # 开启调试时不受根logger的INFO级别限制
+        self.logger.setLevel(logging.DEBUG if self.debug_flag else logging.NOTSET)
+
+    @property
+    def debug_enabled(self) -> bool:
+        """当前调用是否输出调试内容（调试开关、logger级别和抽样结果都满足）"""
+        if not self.debug_flag or not self.logger.isEnabledFor(logging.DEBUG):
+            return False
+        span = _current_span.get()
+        return span is None or span.sampled
+
+    def register_secret(self, value: Optional[str]):
+        """登记需要从输出中抹去的密钥或令牌原文"""
+        if value and len(value) >= 4:
+            self._secrets.add(value)
+
+    def json(self, value: Any, limit: Optional[int] = None) -> LazyJson:
+        """作为日志参数传入的载荷，只在输出时序列化"""
+        return LazyJson(value, limit)
+
+    def debug(self, msg: str, *args):
+        if self.debug_enabled:
+            self._log(logging.DEBUG, msg, args)
+
+    def info(self, msg: str, *args):
+        self._log(logging.INFO, msg, args)
+
+    def warning(self, msg: str, *args):
+        self._log(logging.WARNING, msg, args)
+
+    def error(self, msg: str, *args):
+        self._log(logging.ERROR, msg, args)
+
+    def _log(self, level: int, msg: str, args: tuple):
+        if not self.logger.isEnabledFor(level):
+            return
+        text = msg % args if args else msg
+        span = _current_span.get()
+        self.logger.log(level, self.redact_text(text.strip('\n')), stacklevel=3, extra={
+            'sync_span': span.name if span else None,
+            'sync_op_id': span.op_id if span else None,
+        })
+
+    def redact_text(self, text: str) -> str:
+        for secret in self._secrets:
+            if secret in text:
+                text = text.replace(secret, REDACTED)
+        for pattern in SENSITIVE_TEXT_PATTERNS:
+            text = pattern.sub(lambda match: match.group(1) + REDACTED, text)
+        return text
+
+    def traced(self, name: str) -> Callable:
+        """
+        装饰器：把一次调用标记为一个追踪区段
+
+        区段内的日志带上区段名和操作ID；是否输出调试内容在进入最外层区段时按抽样比例决定一次，
+        嵌套区段沿用外层的决定，同一次同步的调试输出要么完整要么没有
+        """
+        def decorator(func: Callable) -> Callable:
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    token = _current_span.set(self._enter(name))
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self._exit(token)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                token = _current_span.set(self._enter(name))
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._exit(token)
+            return wrapper
+        return decorator
+
+    def _enter(self, name: str) -> _Span:
+        parent = _current_span.get()
+        if parent is not None:
+            return _Span(name, parent.op_id, parent.sampled)
+        sampled = self.debug_flag and random.random() < self.sample_rate
+        return _Span(name, uuid.uuid4().hex[:8], sampled)
+
+    def _exit(self, token: contextvars.Token):
+        span = _current_span.get()
+        if span is not None and self.debug_enabled:
+            self.logger.debug(f"[{span.name}] 完成，耗时 {(time.monotonic() - span.started) * 1000:.1f} ms",
+                              extra={'sync_span': span.name, 'sync_op_id': span.op_id})
+        _current_span.reset(token)
+
+
+class TraceJsonFormatter(logging.Formatter):
+    """把日志记录输出为单行JSON（含追踪区段和操作ID），供日志采集使用"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'span': getattr(record, 'sync_span', None),
+            'op_id': getattr(record, 'sync_op_id', None),
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
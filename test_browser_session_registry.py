@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器会话注册表空闲清理测试脚本
+验证清理线程只停止空闲超时且未被租出的配置文件，被其他工作进程借用（租约表中有记录）的配置文件重新计时，
+租约使用临时SQLite文件，无需AdsPower
+"""
+
+import os
+import sys
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from browser_session_registry import BrowserSessionRegistry, BrowserSession
+from lease_service import LeaseService, lease_held_check, PROFILE
+
+
+class FakeLauncher:
+    """只记录stop_browser调用"""
+
+    def __init__(self):
+        self.stopped = []
+
+    def stop_browser(self, user_id):
+        self.stopped.append(user_id)
+        return True
+
+
+def add_idle_session(registry, launcher, user_id, idle_seconds):
+    registry._sessions[user_id] = BrowserSession(
+        user_id=user_id, launcher=launcher, browser_info={},
+        last_used=time.monotonic() - idle_seconds
+    )
+
+
+def test_reap_idle_skips_leased_profile():
+    """空闲超时但被其他进程租出的配置文件重新计时，未租出的被停止"""
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'leases.db')
+        LeaseService(db_path).try_acquire(PROFILE, 'borrowed')
+
+        launcher = FakeLauncher()
+        registry = BrowserSessionRegistry(lambda: launcher, idle_ttl=60,
+                                          busy_check=lease_held_check(PROFILE, db_path))
+        add_idle_session(registry, launcher, 'borrowed', 120)
+        add_idle_session(registry, launcher, 'idle', 120)
+        add_idle_session(registry, launcher, 'recent', 10)
+
+        before = time.monotonic()
+        assert registry.reap_idle() == 1
+        assert launcher.stopped == ['idle']
+        assert set(registry._sessions) == {'borrowed', 'recent'}
+        assert registry._sessions['borrowed'].last_used >= before
+    print("   ✅ 被租出的配置文件不被停止")
+
+
+def test_reap_idle_treats_check_errors_as_busy():
+    """占用状态查询失败时按占用处理"""
+    def failing_check(user_id):
+        raise RuntimeError('database is locked')
+
+    launcher = FakeLauncher()
+    registry = BrowserSessionRegistry(lambda: launcher, idle_ttl=60, busy_check=failing_check)
+    add_idle_session(registry, launcher, 'u1', 120)
+
+    assert registry.reap_idle() == 0
+    assert launcher.stopped == [] and 'u1' in registry._sessions
+    print("   ✅ 查询失败时不停止")
+
+
+if __name__ == '__main__':
+    print("🧪 浏览器会话注册表空闲清理测试")
+    print("=" * 60)
+    test_reap_idle_skips_leased_profile()
+    test_reap_idle_treats_check_errors_as_busy()
+    print("\n🎉 所有测试通过")
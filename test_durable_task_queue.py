@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化任务队列测试脚本
+使用临时SQLite文件验证优先级领取、计划时间、租约过期重新排队、放回与取消，
+两个队列实例模拟共享同一数据库的两个调度进程
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from durable_task_queue import DurableTaskQueue
+
+
+def make_queue(directory, **kwargs):
+    return DurableTaskQueue(os.path.join(directory, 'queue.db'), **kwargs)
+
+
+def test_claim_order_and_duplicates():
+    """按priority、入队顺序领取，同一任务排队中时不能重复入队"""
+    with tempfile.TemporaryDirectory() as directory:
+        queue = make_queue(directory)
+        queue.enqueue(1, priority=5)
+        second = queue.enqueue(2, priority=0)
+        queue.enqueue(3, priority=5, fanout=3)
+
+        assert queue.enqueue(1) is None
+        assert queue.size() == 3
+        assert queue.position(second) == 1
+
+        claimed = [queue.claim_next() for _ in range(3)]
+        assert [entry.task_id for entry in claimed] == [2, 1, 3]
+        assert claimed[2].fanout == 3 and claimed[2].status == 'leased' and claimed[2].attempts == 1
+        assert queue.claim_next() is None
+    print("   ✅ 按优先级领取，重复入队被拒绝")
+
+
+def test_not_before_respected():
+    """计划时间之前不会被领取，next_ready_in给出剩余等待时间"""
+    with tempfile.TemporaryDirectory() as directory:
+        queue = make_queue(directory)
+        queue.enqueue(1, not_before=datetime.utcnow() + timedelta(hours=1))
+
+        assert queue.claim_next() is None
+        assert 3500 < queue.next_ready_in() <= 3600
+    print("   ✅ 计划时间之前不领取")
+
+
+def test_expired_lease_requeued_for_other_scheduler():
+    """持有方失联、租约过期后任务被其他调度进程重新领取，超过最大尝试次数标记失败"""
+    with tempfile.TemporaryDirectory() as directory:
+        crashed = make_queue(directory, lease_seconds=0.05)
+        other = make_queue(directory)
+        crashed.enqueue(7, max_attempts=2)
+
+        assert crashed.claim_next().task_id == 7
+        assert other.claim_next() is None
+        time.sleep(0.1)
+
+        entry = other.claim_next()
+        assert entry.task_id == 7 and entry.attempts == 2
+        # 原持有方的租约已失效，不能再结束或续约该记录
+        crashed.complete(entry.id)
+        assert crashed.heartbeat([entry.id]) == 0
+        assert other.get_stats() == {'leased': 1}
+
+        other.lease_seconds = 0.05
+        other.heartbeat([entry.id])
+        time.sleep(0.1)
+        assert other.claim_next() is None
+        assert other.get_stats() == {'failed': 1}
+    print("   ✅ 租约过期重新排队，超过尝试次数标记失败")
+
+
+def test_release_complete_and_cancel():
+    """放回不计入尝试次数，完成后可再次入队，取消只影响排队中的任务"""
+    with tempfile.TemporaryDirectory() as directory:
+        queue = make_queue(directory)
+        queue.enqueue(1)
+        queue.enqueue(2)
+
+        entry = queue.claim_next()
+        queue.release(entry.id)
+        assert queue.claim_next().attempts == 1
+
+        queue.complete(entry.id, success=True)
+        assert queue.enqueue(1) is not None
+
+        assert queue.cancel_queued(2) == 1
+        assert [item.task_id for item in queue.queued_entries()] == [1]
+        assert queue.cancel_queued() == 1
+        assert queue.size() == 0
+    print("   ✅ 放回、完成与取消")
+
+
+def test_concurrent_claims_are_exclusive():
+    """多个调度实例并发领取，每个任务只被领取一次"""
+    with tempfile.TemporaryDirectory() as directory:
+        queues = [make_queue(directory) for _ in range(4)]
+        for task_id in range(40):
+            queues[0].enqueue(task_id)
+
+        claimed = []
+        lock = threading.Lock()
+
+        def worker(queue):
+            while True:
+                entry = queue.claim_next()
+                if entry is None:
+                    return
+                with lock:
+                    claimed.append(entry.task_id)
+
+        threads = [threading.Thread(target=worker, args=(queue,)) for queue in queues]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(claimed) == list(range(40))
+    print("   ✅ 并发领取互斥")
+
+
+if __name__ == '__main__':
+    print("🧪 持久化任务队列测试")
+    print("=" * 60)
+    test_claim_order_and_duplicates()
+    test_not_before_respected()
+    test_expired_lease_requeued_for_other_scheduler()
+    test_release_complete_and_cancel()
+    test_concurrent_claims_are_exclusive()
+    print("\n🎉 所有测试通过")
@@ -98,10 +98,10 @@ def test_feishu_validation():
                 print(f"   - 同步准确率: {summary.get('sync_accuracy', 0):.2f}%")
                 
                 print("\n📋 详细统计:")
-                print(f"   - 完全匹配: {len(comparison.get('matched_records', []))} 条")
-                print(f"   - 飞书缺失: {len(comparison.get('missing_in_feishu', []))} 条")
-                print(f"   - 飞书多余: {len(comparison.get('extra_in_feishu', []))} 条")
-                print(f"   - 字段不匹配: {len(comparison.get('field_mismatches', []))} 条")
+                print(f"   - 完全匹配: {summary.get('matched_count', 0)} 条")
+                print(f"   - 飞书缺失: {summary.get('missing_in_feishu_count', 0)} 条")
+                print(f"   - 飞书多余: {summary.get('extra_in_feishu_count', 0)} 条")
+                print(f"   - 字段不匹配: {summary.get('field_mismatch_count', 0)} 条")
                 
                 # 质量评估
                 sync_accuracy = summary.get('sync_accuracy', 0)
@@ -126,7 +126,7 @@ def test_feishu_validation():
                 if extra_in_feishu:
                     print(f"\n⚠️ 飞书中多余的记录 ({len(extra_in_feishu)} 条):")
                     for i, extra in enumerate(extra_in_feishu[:3]):
-                        content = extra.get('推文原文内容', '')[:50]
+                        content = extra.get('content', extra.get('推文原文内容', ''))[:50]
                         print(f"   {i+1}. {content}...")
                     if len(extra_in_feishu) > 3:
                         print(f"   ... 还有 {len(extra_in_feishu) - 3} 条")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Google Sheets增量同步引擎测试脚本
+使用本地内存中的假Sheets API验证分块追加、行索引和按区间改写，无需网络和凭证
+"""
+
+import re
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cloud_sync import GoogleSheetsSyncEngine
+
+
+class FakeWorksheet:
+    def __init__(self, title):
+        self.title = title
+        self.rows = []
+
+
+class FakeSpreadsheet:
+    """只实现同步引擎用到的values_get / values_append / values_batch_update"""
+
+    def __init__(self):
+        self.sheet1 = FakeWorksheet('Sheet1')
+        self.worksheets = {'Sheet1': self.sheet1}
+        self.calls = []
+
+    def worksheet(self, title):
+        if title not in self.worksheets:
+            raise KeyError(title)
+        return self.worksheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        self.worksheets[title] = FakeWorksheet(title)
+        return self.worksheets[title]
+
+    def _sheet(self, a1_range):
+        return self.worksheets[a1_range.split('!')[0].strip("'").replace("''", "'")]
+
+    def values_get(self, a1_range):
+        self.calls.append('values_get')
+        return {'values': [list(row) for row in self._sheet(a1_range).rows]}
+
+    def values_append(self, a1_range, params=None, body=None):
+        self.calls.append('values_append')
+        sheet = self._sheet(a1_range)
+        first_row = len(sheet.rows) + 1
+        sheet.rows.extend(list(row) for row in body['values'])
+        last_row = len(sheet.rows)
+        return {'updates': {'updatedRange': f"'{sheet.title}'!A{first_row}:J{last_row}"}}
+
+    def values_batch_clear(self, params=None, body=None):
+        self.calls.append('values_batch_clear')
+        for a1_range in body['ranges']:
+            sheet = self._sheet(a1_range)
+            row_number = int(re.search(r'!A(\d+):', a1_range).group(1))
+            sheet.rows[row_number - 1] = []
+        # 与Sheets API一致，读取时不返回表尾的空行
+        for sheet in self.worksheets.values():
+            while sheet.rows and not any(sheet.rows[-1]):
+                sheet.rows.pop()
+
+    def values_batch_update(self, body=None):
+        self.calls.append('values_batch_update')
+        for item in body['data']:
+            sheet = self._sheet(item['range'])
+            match = re.search(r'!([A-Z]+)(\d+):([A-Z]+)\d+', item['range'])
+            first_column = ord(match.group(1)) - ord('A')
+            row = sheet.rows[int(match.group(2)) - 1]
+            for offset, value in enumerate(item['values'][0]):
+                row[first_column + offset] = value
+
+
+class FakeClient:
+    def __init__(self):
+        self.spreadsheet = FakeSpreadsheet()
+        self.open_count = 0
+
+    def open_by_key(self, spreadsheet_id):
+        self.open_count += 1
+        return self.spreadsheet
+
+
+def make_tweet(i, likes=0):
+    return {
+        'username': f'user{i}', 'content': f'推文内容 {i}', 'timestamp': '2024-01-01 00:00:00',
+        'likes': likes, 'comments': 0, 'retweets': 0,
+        'link': f'https://x.com/user{i}/status/{i}', 'tags': ['AI'], 'filter_status': ''
+    }
+
+
+def test_chunked_append_and_index():
+    """新行分块追加，表头只写一次，行索引指向实际行号"""
+    client = FakeClient()
+    engine = GoogleSheetsSyncEngine(client, 'sheet-id')
+    engine.APPEND_CHUNK_ROWS = 4
+
+    stats = engine.sync([make_tweet(i) for i in range(10)])
+    rows = client.spreadsheet.sheet1.rows
+
+    assert stats['appended'] == 10
+    assert stats['requests'] == 3  # 表头+10行，每块4行
+    assert rows[0] == GoogleSheetsSyncEngine.HEADERS
+    assert len(rows) == 11
+    assert rows[5][0] == '5' and rows[5][7] == 'https://x.com/user4/status/4'
+    assert engine._row_index['https://x.com/user4/status/4'][0] == 6
+    print("   ✅ 分块追加与行索引正确")
+
+
+def test_update_only_changed_cells():
+    """已有链接只改写变化的单元格区间，句柄复用不重复打开表格"""
+    client = FakeClient()
+    engine = GoogleSheetsSyncEngine(client, 'sheet-id')
+    engine.sync([make_tweet(i) for i in range(3)])
+
+    stats = engine.sync([make_tweet(0), make_tweet(1, likes=42), make_tweet(3)])
+    rows = client.spreadsheet.sheet1.rows
+
+    assert stats == {'appended': 1, 'updated': 1, 'unchanged': 1, 'requests': 2}
+    assert rows[2][4] == '42'
+    assert rows[4][7] == 'https://x.com/user3/status/3' and rows[4][0] == '4'
+    assert client.open_count == 1
+    print("   ✅ 只改写变化的单元格")
+
+
+def test_index_loaded_from_existing_sheet():
+    """新引擎从表格现有内容重建行索引"""
+    client = FakeClient()
+    GoogleSheetsSyncEngine(client, 'sheet-id').sync([make_tweet(i) for i in range(3)])
+
+    engine = GoogleSheetsSyncEngine(client, 'sheet-id')
+    stats = engine.sync([make_tweet(2, likes=7)])
+
+    assert stats['appended'] == 0 and stats['updated'] == 1
+    assert len(client.spreadsheet.sheet1.rows) == 4
+    print("   ✅ 从现有表格重建行索引")
+
+
+def test_legacy_timestamp_row_removed():
+    """旧版全量同步留下的"最后同步时间"行被清除，新行紧接数据追加"""
+    client = FakeClient()
+    GoogleSheetsSyncEngine(client, 'sheet-id').sync([make_tweet(i) for i in range(2)])
+    rows = client.spreadsheet.sheet1.rows
+    rows.extend([[], ['最后同步时间: 2024-01-01 00:00:00']])
+
+    engine = GoogleSheetsSyncEngine(client, 'sheet-id')
+    stats = engine.sync([make_tweet(1, likes=5), make_tweet(2)])
+
+    assert 'values_batch_clear' in client.spreadsheet.calls
+    assert stats['appended'] == 1 and stats['updated'] == 1
+    assert len(rows) == 4
+    assert rows[3][7] == 'https://x.com/user2/status/2' and rows[3][0] == '3'
+    assert not any(str(row[0]).startswith('最后同步时间') for row in rows if row)
+    assert engine._row_index['https://x.com/user2/status/2'][0] == 4
+    print("   ✅ 清除旧版同步时间戳行")
+
+
+if __name__ == '__main__':
+    print("🧪 Google Sheets增量同步引擎测试")
+    print("=" * 60)
+    test_chunked_append_and_index()
+    test_update_only_changed_cells()
+    test_index_loaded_from_existing_sheet()
+    test_legacy_timestamp_row_removed()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨进程资源租约测试脚本
+使用临时SQLite文件，两个LeaseService实例模拟两个进程，验证领取互斥、过期接管、续约、释放，
+以及RefactoredTaskManager在锁外领取/归还配置文件租约
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from lease_service import LeaseService, PROFILE, TWITTER_ACCOUNT
+
+
+def make_services(directory, count=2, ttl=300.0):
+    db_path = os.path.join(directory, 'leases.db')
+    return [LeaseService(db_path, ttl=ttl) for _ in range(count)]
+
+
+def test_acquire_is_exclusive_between_owners():
+    """其他持有方未过期的资源领取失败，本进程可重复领取"""
+    with tempfile.TemporaryDirectory() as directory:
+        first, second = make_services(directory)
+
+        assert first.try_acquire(PROFILE, 'u1')
+        assert first.try_acquire(PROFILE, 'u1')
+        assert not second.try_acquire(PROFILE, 'u1')
+        assert second.acquire_any(PROFILE, ['u1', 'u2', 'u3'], count=2) == ['u2', 'u3']
+
+        assert first.holder(PROFILE, 'u1') == first.owner
+        assert second.held_by_others(PROFILE) == {'u1'}
+        # 不同资源类型互不影响
+        assert second.try_acquire(TWITTER_ACCOUNT, 'u1')
+    print("   ✅ 领取互斥")
+
+
+def test_expired_lease_taken_over_and_heartbeat():
+    """租约过期后其他进程可以接管，续约能阻止过期"""
+    with tempfile.TemporaryDirectory() as directory:
+        first, second = make_services(directory, ttl=0.2)
+
+        first.acquire_any(PROFILE, ['u1', 'u2'], count=2)
+        time.sleep(0.12)
+        assert first.heartbeat() == 2
+        time.sleep(0.12)
+        assert not second.try_acquire(PROFILE, 'u1')
+
+        time.sleep(0.25)
+        assert first.holder(PROFILE, 'u1') is None
+        assert second.try_acquire(PROFILE, 'u1')
+        # 原持有方续约只影响自己仍持有的记录
+        assert first.heartbeat() == 1
+        assert second.holder(PROFILE, 'u1') == second.owner
+    print("   ✅ 过期接管与续约")
+
+
+def test_release_only_own_leases():
+    """只能释放本进程持有的租约"""
+    with tempfile.TemporaryDirectory() as directory:
+        first, second = make_services(directory)
+        first.acquire_any(PROFILE, ['u1', 'u2'], count=2)
+        second.try_acquire(PROFILE, 'u3')
+
+        assert second.release(PROFILE, ['u1']) == 0
+        assert first.release(PROFILE, ['u1']) == 1
+        assert second.try_acquire(PROFILE, 'u1')
+        assert first.release_all() == 1
+        assert [lease['resource'] for lease in second.active_leases(PROFILE)] == \
+            ['adspower_profile:u1', 'adspower_profile:u3']
+    print("   ✅ 释放本进程租约")
+
+
+def test_concurrent_acquire_single_winner():
+    """多个持有方同时领取同一资源，只有一个成功"""
+    with tempfile.TemporaryDirectory() as directory:
+        services = make_services(directory, count=6)
+        winners = []
+        barrier = threading.Barrier(len(services))
+
+        def contend(service):
+            barrier.wait()
+            if service.try_acquire(PROFILE, 'shared'):
+                winners.append(service.owner)
+
+        threads = [threading.Thread(target=contend, args=(service,)) for service in services]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(winners) == 1
+    print("   ✅ 并发领取只有一个成功")
+
+
+def test_task_manager_leases_outside_state_lock():
+    """任务管理器领取配置文件时跳过其他进程持有的，领取期间不持有状态锁，归还后可再次领取"""
+    from refactored_task_manager import RefactoredTaskManager
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'leases.db')
+        other_process = LeaseService(db_path)
+        other_process.try_acquire(PROFILE, 'u1')
+
+        manager = RefactoredTaskManager(max_concurrent_tasks=1, user_ids=['u1', 'u2', 'u3'],
+                                        use_warm_workers=False, queue_db_path=db_path)
+        try:
+            acquire_any = manager.lease_service.acquire_any
+            lock_free = []
+
+            def checked_acquire(*args, **kwargs):
+                # 状态锁可被其他线程获取，说明SQLite写入不在锁内
+                def probe():
+                    acquired = manager._state_lock.acquire(timeout=1)
+                    if acquired:
+                        manager._state_lock.release()
+                    lock_free.append(acquired)
+
+                thread = threading.Thread(target=probe)
+                thread.start()
+                thread.join()
+                return acquire_any(*args, **kwargs)
+
+            manager.lease_service.acquire_any = checked_acquire
+
+            assert manager._get_available_user_id() == 'u2'
+            assert manager.borrow_user_ids(5) == ['u3']
+            assert manager.available_users == {'u1'}
+            assert all(lock_free)
+
+            manager.return_user_ids(['u2', 'u3'])
+            assert manager.available_users == {'u1', 'u2', 'u3'}
+            assert other_process.held_by_others(PROFILE) == set()
+        finally:
+            manager.shutdown()
+    print("   ✅ 任务管理器在锁外领取租约")
+
+
+if __name__ == '__main__':
+    print("🧪 跨进程资源租约测试")
+    print("=" * 60)
+    test_acquire_is_exclusive_between_owners()
+    test_expired_lease_taken_over_and_heartbeat()
+    test_release_only_own_leases()
+    test_concurrent_acquire_single_winner()
+    test_task_manager_leases_outside_state_lock()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应限流控制测试脚本
+使用临时SQLite文件验证AIMD速率调整、指数退避、空结果降速、请求间隔，
+以及两个控制器实例（模拟两个进程）共享限流状态
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import rate_controller
+from rate_controller import (AdaptiveRateController, OUTCOME_OK, OUTCOME_RATE_LIMITED, OUTCOME_EMPTY,
+                             profile_key, target_key)
+from stage_metrics import StageMetrics
+
+
+def make_controller(directory, **kwargs):
+    return AdaptiveRateController(db_path=os.path.join(directory, 'rate.db'), **kwargs)
+
+
+def test_additive_increase_capped():
+    """干净抓取后速率加固定步长，不超过上限"""
+    with tempfile.TemporaryDirectory() as directory:
+        controller = make_controller(directory, initial_rate=10.0, max_rate=12.0, additive_increase=1.5)
+        key = profile_key('u1')
+
+        assert controller.record_outcome([key], OUTCOME_OK)[key].rate == 11.5
+        state = controller.record_outcome([key], OUTCOME_OK)[key]
+        assert state.rate == 12.0 and state.clean_streak == 2
+    print("   ✅ 加性增长并受上限约束")
+
+
+def test_rate_limited_halves_and_backs_off():
+    """限流时速率减半并进入指数退避，干净抓取后连续限流计数清零"""
+    with tempfile.TemporaryDirectory() as directory:
+        controller = make_controller(directory, initial_rate=16.0, min_rate=3.0,
+                                     base_backoff=10.0, max_backoff=25.0)
+        key = target_key('elonmusk')
+
+        before = time.time()
+        state = controller.record_outcome([key], OUTCOME_RATE_LIMITED)[key]
+        assert state.rate == 8.0 and state.consecutive_limits == 1
+        assert 9.5 < state.backoff_until - before <= 10.5
+
+        state = controller.record_outcome([key], OUTCOME_RATE_LIMITED)[key]
+        assert state.rate == 4.0 and 19.5 < controller.backoff_remaining(key) <= 20.0
+        state = controller.record_outcome([key], OUTCOME_RATE_LIMITED)[key]
+        assert state.rate == 3.0 and 24.5 < controller.backoff_remaining(key) <= 25.0
+        assert controller.delay_for([key]) > 24.0
+
+        state = controller.record_outcome([key], OUTCOME_OK)[key]
+        assert state.consecutive_limits == 0 and state.rate == 4.0
+    print("   ✅ 限流减半与指数退避")
+
+
+def test_empty_decrease_after_threshold():
+    """连续空结果达到阈值后才降速"""
+    with tempfile.TemporaryDirectory() as directory:
+        controller = make_controller(directory, initial_rate=10.0, empty_decrease=0.5, empty_threshold=2)
+        key = profile_key('u1')
+
+        assert controller.record_outcome([key], OUTCOME_EMPTY)[key].rate == 10.0
+        assert controller.record_outcome([key], OUTCOME_EMPTY)[key].rate == 5.0
+        assert controller.record_outcome([key], OUTCOME_OK)[key].consecutive_empty == 0
+    print("   ✅ 空结果达到阈值后降速")
+
+
+def test_request_spacing():
+    """登记请求后需间隔60/rate秒，wait等待后登记本次请求"""
+    with tempfile.TemporaryDirectory() as directory:
+        controller = make_controller(directory, initial_rate=600.0, jitter=0.0)
+        keys = [profile_key('u1'), target_key('a')]
+
+        assert controller.delay_for(keys) == 0.0
+        controller.mark_request(keys)
+        assert 0.05 < controller.delay_for(keys) <= 0.1
+        # 任一键还在间隔内都需要等待
+        assert controller.delay_for([target_key('a'), target_key('b')]) > 0.05
+
+        original_metrics = rate_controller.stage_metrics
+        rate_controller.stage_metrics = StageMetrics(db_path=None)
+        try:
+            waited = asyncio.run(controller.wait(keys))
+            assert 0.05 < waited <= 0.15
+            assert rate_controller.stage_metrics.summarize(stage='rate_limit_wait')
+        finally:
+            rate_controller.stage_metrics = original_metrics
+        assert controller.delay_for(keys) > 0.05
+
+        # should_continue返回False时放弃等待且不登记请求
+        last_request_at = controller.get_state(keys[0]).last_request_at
+        assert asyncio.run(controller.wait(keys, should_continue=lambda: False)) == 0.0
+        assert controller.get_state(keys[0]).last_request_at == last_request_at
+    print("   ✅ 请求间隔")
+
+
+def test_state_shared_and_stats():
+    """两个控制器实例共享状态，冷却倍数、退避计数和统计按前缀筛选"""
+    with tempfile.TemporaryDirectory() as directory:
+        first = make_controller(directory, initial_rate=20.0)
+        second = make_controller(directory, initial_rate=20.0)
+
+        first.record_outcome([profile_key('u1'), target_key('a')], OUTCOME_RATE_LIMITED)
+        second.record_outcome([profile_key('u2')], OUTCOME_OK)
+
+        assert second.get_state(profile_key('u1')).rate == 10.0
+        assert second.cooldown_multiplier(profile_key('u1')) == 2.0
+        assert second.cooldown_multiplier(profile_key('u2')) == 1.0
+        assert second.backoff_counts() == {'profile': 1, 'target': 1}
+
+        stats = first.get_stats('profile:')
+        assert [item['key'] for item in stats] == ['profile:u1', 'profile:u2']
+        assert stats[0]['consecutive_limits'] == 1 and stats[1]['clean_streak'] == 1
+        assert len(first.get_stats()) == 3
+    print("   ✅ 跨实例共享状态与统计")
+
+
+def test_concurrent_updates_not_lost():
+    """两个进程交替登记请求和记录限流，限流次数和退避不会被对方的旧状态覆盖"""
+    with tempfile.TemporaryDirectory() as directory:
+        scheduler = make_controller(directory, initial_rate=20.0, min_rate=0.5,
+                                    base_backoff=10.0, max_backoff=10.0)
+        workers = [make_controller(directory, initial_rate=20.0, min_rate=0.5,
+                                   base_backoff=10.0, max_backoff=10.0) for _ in range(2)]
+        key = target_key('x')
+        barrier = threading.Barrier(len(workers) + 1)
+
+        def mark_requests():
+            barrier.wait()
+            for _ in range(60):
+                scheduler.mark_request([key])
+
+        def record_limits(controller):
+            barrier.wait()
+            for _ in range(15):
+                controller.record_outcome([key], OUTCOME_RATE_LIMITED)
+
+        threads = [threading.Thread(target=mark_requests)]
+        threads += [threading.Thread(target=record_limits, args=(worker,)) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        state = scheduler.get_state(key)
+        assert state.consecutive_limits == 30
+        assert state.rate == 0.5
+        assert 9.0 < scheduler.backoff_remaining(key) <= 10.0
+        assert state.last_request_at > 0
+    print("   ✅ 并发更新不丢失")
+
+
+if __name__ == '__main__':
+    print("🧪 自适应限流控制测试")
+    print("=" * 60)
+    test_additive_increase_capped()
+    test_rate_limited_halves_and_backs_off()
+    test_empty_decrease_after_threshold()
+    test_request_spacing()
+    test_state_shared_and_stats()
+    test_concurrent_updates_not_lost()
+    print("\n🎉 所有测试通过")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+就绪队列测试脚本
+验证就绪堆/定时堆的排序、替换、惰性删除与压缩，以及AccountStateTracker基于它的就绪账号选择
+（跟踪器的快照和历史库写入临时目录）
+"""
+
+import os
+import sys
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ready_queue import ReadyQueue
+from account_state_tracker import AccountStateTracker
+
+
+def test_push_pop_order_and_replace():
+    """按排序键出队，重复push替换原有位置，discard后不再出现"""
+    queue = ReadyQueue()
+    queue.push('a', (2, 0))
+    queue.push('b', (1, 0))
+    queue.push('c', (3, 0))
+    queue.push('a', (0, 0))
+    queue.discard('c')
+
+    assert len(queue) == 2 and queue.ready_count == 2
+    assert 'c' not in queue
+    assert queue.smallest() == ['a', 'b']
+    assert queue.pop() == 'a' and queue.pop() == 'b' and queue.pop() is None
+    assert queue.ready_count == 0
+    print("   ✅ 排序、替换与移除")
+
+
+def test_timers_move_between_heaps():
+    """定时项到期后才由pop_due取出，schedule会把就绪项移入定时堆"""
+    queue = ReadyQueue()
+    queue.push('a', 1)
+    queue.schedule('a', 100.0)
+    queue.schedule('b', 50.0)
+
+    assert not queue.is_ready('a') and queue.ready_count == 0
+    assert queue.next_due() == 50.0
+    assert queue.pop_due(60.0) == ['b']
+    assert 'b' not in queue
+    assert queue.pop_due(99.0) == []
+    assert queue.pop_due(100.0) == ['a']
+    assert queue.next_due() is None
+    print("   ✅ 定时堆到期取出")
+
+
+def test_smallest_does_not_consume():
+    """smallest取前K个不改变队列内容"""
+    queue = ReadyQueue()
+    for i in range(10):
+        queue.push(i, 10 - i)
+
+    assert queue.smallest(3) == [9, 8, 7]
+    assert queue.smallest(3) == [9, 8, 7]
+    assert queue.ready_count == 10 and queue.peek() == 9
+    print("   ✅ 取前K个不出队")
+
+
+def test_stale_entries_compacted():
+    """频繁更新同一批键时失效项被压缩，堆大小有上界"""
+    queue = ReadyQueue()
+    for round_number in range(200):
+        for key in range(10):
+            if round_number % 2:
+                queue.schedule(key, float(round_number))
+            else:
+                queue.push(key, round_number)
+
+    assert len(queue) == 10
+    assert len(queue._ready) + len(queue._timers) <= 2 * 10 + 64 + 1
+    print("   ✅ 失效项压缩")
+
+
+def test_tracker_ready_accounts():
+    """跟踪器按优先级选择就绪账号，失败账号在重试时间到达前不出现"""
+    with tempfile.TemporaryDirectory() as directory:
+        tracker = AccountStateTracker(storage_dir=directory, snapshot_interval=0, history_retention_days=0)
+        for username in ('alice', 'bob', 'carol'):
+            tracker.get_account_state(username)
+        tracker.set_account_priority('carol', 0)
+        tracker.mark_failure('bob', '网络错误', retry_delay_minutes=0)
+        tracker.mark_failure('alice', '网络错误', retry_delay_minutes=30)
+
+        assert tracker.get_ready_accounts() == ['carol', 'bob']
+        assert tracker.get_ready_accounts(1) == ['carol']
+        assert tracker._count_ready_accounts() == 2
+
+        # 直接修改状态对象（绕过跟踪器）后下次选择时重新归类
+        tracker.get_account_state('alice').next_retry_time = None
+        tracker._ready_index.schedule('alice', time.time() - 1)
+        assert 'alice' in tracker.get_ready_accounts()
+        tracker.flush()
+    print("   ✅ 跟踪器就绪账号选择")
+
+
+if __name__ == '__main__':
+    print("🧪 就绪队列测试")
+    print("=" * 60)
+    test_push_pop_order_and_replace()
+    test_timers_move_between_heaps()
+    test_smallest_does_not_consume()
+    test_stale_entries_compacted()
+    test_tracker_ready_accounts()
+    print("\n🎉 所有测试通过")
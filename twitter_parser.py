@@ -9,11 +9,23 @@ import logging
 import re
 from typing import List, Dict, Any, Optional, Set
 from datetime import datetime
-from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import Browser, Page
+from playwright_driver import driver_manager
 # 配置将从调用方传入或使用默认配置
 from human_behavior_simulator import HumanBehaviorSimulator
+from stage_metrics import stage_metrics
 # from performance_optimizer import EnhancedSearchOptimizer
 
+# 页面上表示被限流的提示文字
+RATE_LIMIT_MARKERS = (
+    'Rate limit exceeded',
+    'You are being rate limited',
+    'Something went wrong. Try reloading.',
+    'Sorry, you are rate limited',
+)
+# 一次抓取中收到这么多429响应后停止滚动
+RATE_LIMIT_STOP_RESPONSES = 3
+
 class TwitterParser:
     def __init__(self, debug_port: str = None):
         self.debug_port = debug_port
@@ -28,6 +40,13 @@ class TwitterParser:
         self.seen_tweet_ids: Set[str] = set()
         self.content_cache: Dict[str, str] = {}
         self.optimization_enabled = True
+        
+        # 最近一次scrape_tweets的滚动次数（供工作项耗时统计）
+        self.last_scroll_attempts: Optional[int] = None
+        
+        # 限流信号：页面收到的429响应数、最近一次scrape_tweets是否被限流
+        self.rate_limit_responses = 0
+        self.last_rate_limited = False
     
     async def initialize(self, debug_port: str = None):
         """初始化TwitterParser
@@ -53,52 +72,14 @@ class TwitterParser:
         连接到 AdsPower 浏览器
         """
         try:
-            self.logger.info("开始启动 Playwright...")
-            playwright = await async_playwright().start()
-            
+            # 同一进程（事件循环）内共用Playwright驱动和到同一调试地址的CDP连接，
+            # 每个解析器分到自己的页面
             self.logger.info(f"开始连接到浏览器调试端口: {self.debug_port}")
-            # 连接到现有的浏览器实例
-            self.browser = await playwright.chromium.connect_over_cdp(self.debug_port)
+            self.page = await driver_manager.acquire_page(self.debug_port)
+            self.browser = self.page.context.browser
+            self.page.on('response', self._on_response)
             self.logger.info("成功连接到浏览器实例")
             
-            # 获取现有上下文和页面
-            contexts = self.browser.contexts
-            self.logger.info(f"找到 {len(contexts)} 个浏览器上下文")
-            
-            if contexts:
-                context = contexts[0]
-                pages = context.pages
-                self.logger.info(f"在上下文中找到 {len(pages)} 个页面")
-                
-                if pages:
-                    # 使用现有页面
-                    self.page = pages[0]
-                    try:
-                        current_url = self.page.url
-                        self.logger.info(f"使用现有页面，当前URL: {current_url}")
-                    except Exception as url_error:
-                        self.logger.warning(f"无法获取页面URL: {url_error}")
-                        # 创建新页面作为备选
-                        self.page = await context.new_page()
-                        self.logger.info("创建新页面作为备选")
-                else:
-                    # 在现有上下文中创建新页面
-                    self.page = await context.new_page()
-                    self.logger.info("在现有上下文中创建新页面")
-            else:
-                # 创建新的浏览器上下文，设置用户代理和其他选项
-                self.logger.info("创建新的浏览器上下文...")
-                context = await self.browser.new_context(
-                    user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    viewport={'width': 1920, 'height': 1080},
-                    extra_http_headers={
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-                    }
-                )
-                self.page = await context.new_page()
-                self.logger.info("创建新的浏览器上下文和页面")
-            
             # 设置页面默认超时时间
             default_timeout = 30000
             self.page.set_default_timeout(default_timeout)
@@ -119,6 +100,20 @@ class TwitterParser:
             self.logger.error(f"连接浏览器失败: {e}")
             raise
     
+    def _on_response(self, response):
+        """统计429响应，作为限流信号"""
+        if response.status == 429:
+            self.rate_limit_responses += 1
+            self.logger.warning(f"收到429响应: {response.url[:120]}")
+    
+    async def detect_rate_limit_page(self) -> bool:
+        """检查当前页面是否显示限流提示"""
+        try:
+            text = await self.page.evaluate("() => document.body ? document.body.innerText.slice(0, 5000) : ''")
+        except Exception:
+            return False
+        return any(marker in text for marker in RATE_LIMIT_MARKERS)
+    
     async def navigate_to_twitter(self, max_retries: int = 3):
         """
         导航到 Twitter 主页
@@ -180,6 +175,7 @@ class TwitterParser:
                     self.logger.error(f"导航到 X (Twitter) 失败，已尝试{max_retries}次")
                     raise Exception(f"导航到 X (Twitter) 失败: {e}")
     
+    @stage_metrics.timed('navigate')
     async def navigate_to_profile(self, username: str, max_retries: int = 3):
         """
         导航到指定用户的个人资料页面
@@ -237,6 +233,7 @@ class TwitterParser:
                     self.logger.error(f"导航到 @{username} 个人资料页面失败，已尝试{max_retries}次")
                     raise Exception(f"导航到 @{username} 个人资料页面失败: {e}")
     
+    @stage_metrics.timed('search')
     async def search_tweets(self, keyword: str, max_retries: int = 2):
         """
         搜索包含指定关键词的推文
@@ -424,6 +421,7 @@ class TwitterParser:
             self.logger.warning(f"处理翻译弹窗时出错: {e}")
             return False
     
+    @stage_metrics.timed('scroll')
     async def scroll_and_load_tweets(self, max_tweets: int = 10):
         """
         使用优化的滚动策略加载更多推文
@@ -595,6 +593,7 @@ class TwitterParser:
         self.logger.debug(f"数字提取失败: '{original_text}' -> 0")
         return 0
     
+    @stage_metrics.timed('parse')
     async def parse_tweet_element(self, tweet_element) -> Optional[Dict[str, Any]]:
         """
         解析单个推文元素
@@ -977,6 +976,8 @@ class TwitterParser:
         no_new_tweets_count = 0
         consecutive_empty_scrolls = 0  # 连续空滚动计数器
         total_parsed_tweets = 0  # 总解析推文数（包括不满足条件的）
+        limit_responses_before = self.rate_limit_responses
+        self.last_rate_limited = False
         
         try:
             self.logger.info(f"开始抓取推文，目标数量: {max_tweets}")
@@ -1069,25 +1070,34 @@ class TwitterParser:
                     self.logger.info(f"已达到目标推文数量: {len(tweets_data)}/{max_tweets}")
                     break
                 
+                # 时间线接口持续返回429时继续滚动没有意义
+                if self.rate_limit_responses - limit_responses_before >= RATE_LIMIT_STOP_RESPONSES:
+                    self.logger.warning(f"滚动中收到 {self.rate_limit_responses - limit_responses_before} 次429响应，停止滚动")
+                    break
+                
                 # 滚动页面加载更多推文
                 scroll_attempts += 1
                 if scroll_attempts < max_scroll_attempts:
-                    # 根据连续空滚动次数调整滚动距离
-                    scroll_distance = 1500 if consecutive_empty_scrolls > 3 else 1200
-                    await self.page.evaluate(f'window.scrollBy(0, {scroll_distance})')
-                    
-                    # 根据情况调整等待时间
-                    wait_time = 3 if consecutive_empty_scrolls > 5 else 2
-                    await asyncio.sleep(wait_time)  # 等待加载
-                    
-                    # 处理可能的弹窗
-                    try:
-                        await self.dismiss_translate_popup()
-                    except Exception:
-                        pass
+                    with stage_metrics.timer('scroll'):
+                        # 根据连续空滚动次数调整滚动距离
+                        scroll_distance = 1500 if consecutive_empty_scrolls > 3 else 1200
+                        await self.page.evaluate(f'window.scrollBy(0, {scroll_distance})')
+                        
+                        # 根据情况调整等待时间
+                        wait_time = 3 if consecutive_empty_scrolls > 5 else 2
+                        await asyncio.sleep(wait_time)  # 等待加载
+                        
+                        # 处理可能的弹窗
+                        try:
+                            await self.dismiss_translate_popup()
+                        except Exception:
+                            pass
             
             # 只返回目标数量的推文
             final_tweets = tweets_data[:max_tweets]
+            self.last_scroll_attempts = scroll_attempts
+            self.last_rate_limited = (self.rate_limit_responses > limit_responses_before or
+                                      (not final_tweets and await self.detect_rate_limit_page()))
             filter_info = f"（筛选条件: {filter_criteria}）" if filter_criteria else "（无筛选条件）"
             self.logger.info(f"推文抓取完成{filter_info}，目标: {max_tweets}，实际获取: {len(final_tweets)}，总解析: {total_parsed_tweets}，滚动次数: {scroll_attempts}")
             
@@ -1306,6 +1316,7 @@ class TwitterParser:
             self.logger.error(f"在用户 @{username} 下搜索关键词 '{keyword}' 失败: {e}")
             return []
     
+    @stage_metrics.timed('tweet_details')
     async def scrape_tweet_details(self, tweet_url: str) -> Dict[str, Any]:
         """
         抓取推文详情页的完整内容
@@ -2806,11 +2817,16 @@ class TwitterParser:
         关闭浏览器连接
         """
         try:
-            if self.browser:
-                await self.browser.close()
+            if self.page is not None:
+                self.page.remove_listener('response', self._on_response)
+                # 归还页面，最后一个使用者归还时共享连接断开、驱动停止
+                await driver_manager.release_page(self.debug_port, self.page)
                 self.logger.info("浏览器连接已关闭")
         except Exception as e:
             self.logger.error(f"关闭浏览器连接失败: {e}")
+        finally:
+            self.page = None
+            self.browser = None
 
 # 使用示例
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ Twitter抓取Web管理系统
 
 import os
 import json
+import hashlib
 import sqlite3
 import subprocess
 import tempfile
@@ -87,7 +88,8 @@ FEISHU_CONFIG = {
     'app_secret': '',
     'spreadsheet_token': '',
     'table_id': '',
-    'enabled': True  # 默认启用飞书同步
+    'enabled': True,  # 默认启用飞书同步
+    'sync_mode': 'create'  # create: 只创建未同步的记录；upsert: 按推文链接更新已有记录并创建新记录
 }
 
 # AdsPower配置信息
@@ -99,16 +101,27 @@ ADS_POWER_CONFIG = {
     'task_timeout': 900,
     'browser_startup_delay': 2,
     'headless': False,
-    'health_check': True
+    'health_check': True,
+    'warm_workers': True,  # 后台任务交给每个用户ID的常驻工作进程执行
+    'session_idle_ttl': 600,  # 浏览器会话空闲多久后停止配置文件（秒）
+    'fanout_item_interval': 3.0  # 任务内并发时同一配置文件连续抓取之间的间隔（秒）
 }
 from models import TweetModel, ScrapingConfig
 from ads_browser_launcher import AdsPowerLauncher
 from twitter_parser import TwitterParser
+from browser_session_registry import BrowserSessionRegistry
+from profile_fanout import ProfileFanOut, build_work_items
+from lease_service import lease_held_check, PROFILE
+from account_state_tracker import AccountStateTracker
+from rate_controller import AdaptiveRateController
 # from enhanced_twitter_parser import MultiWindowEnhancedScraper
 # from optimized_scraping_engine import OptimizedScrapingEngine
 from cloud_sync import CloudSyncManager
 from excel_writer import ExcelWriter
 from refactored_task_manager import RefactoredTaskManager
+from sync_trace import SyncTracer
+from stage_metrics import stage_context, stage_metrics
+from metrics_exporter import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricFamily, PrometheusExporter
 
 # 创建Flask应用
 app = Flask(__name__)
@@ -128,12 +141,18 @@ logging.basicConfig(
 )
 app.logger.setLevel(logging.INFO)
 
+# 飞书同步的调试输出（CLOUD_SYNC_DEBUG=1开启）
+feishu_trace = SyncTracer('web_app.feishu')
+
 # 减少werkzeug HTTP请求日志输出
 logging.getLogger('werkzeug').setLevel(logging.WARNING)
 
 @app.after_request
 def after_request(response):
     """设置响应头，确保正确处理中文字符"""
+    # 文件下载和指标文本保留自身的Content-Type
+    if response.direct_passthrough or response.mimetype == 'text/plain':
+        return response
     response.headers['Content-Type'] = 'text/html; charset=utf-8'
     return response
 
@@ -207,6 +226,8 @@ def load_config_from_database():
             FEISHU_CONFIG['enabled'] = config_dict['feishu_enabled'].lower() == 'true'
         if 'feishu_auto_sync' in config_dict:
             FEISHU_CONFIG['auto_sync'] = config_dict['feishu_auto_sync'].lower() == 'true'
+        if 'feishu_sync_mode' in config_dict:
+            FEISHU_CONFIG['sync_mode'] = config_dict['feishu_sync_mode']
         
         print("✅ 配置已从数据库加载完成")
         
@@ -228,6 +249,14 @@ def init_database():
             # 字段已存在或其他错误，忽略
             pass
         
+        # 确保飞书记录映射的field_digests字段存在
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(db.text('ALTER TABLE feishu_record_mapping ADD COLUMN field_digests TEXT'))
+                conn.commit()
+        except Exception:
+            pass
+        
         # 强制刷新数据库连接和元数据
         db.session.commit()
         db.session.close()
@@ -397,6 +426,19 @@ class TwitterInfluencer(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class FeishuRecordMapping(db.Model):
+    """飞书记录映射模型：推文键（链接）-> 飞书多维表格record_id"""
+    __table_args__ = (
+        db.UniqueConstraint('table_id', 'tweet_key', name='uq_feishu_record_mapping_table_key'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    table_id = db.Column(db.String(64), nullable=False)  # 飞书多维表格ID
+    tweet_key = db.Column(db.String(512), nullable=False)  # 推文链接，无链接时为内容哈希
+    record_id = db.Column(db.String(64), nullable=False)  # 飞书记录ID
+    field_digests = db.Column(db.Text)  # 上次同步的各字段值摘要，JSON格式存储
+    tweet_id = db.Column(db.Integer)  # 最近一次同步的TweetData.id
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 # 全局变量
 current_task = None
 task_thread = None
@@ -498,6 +540,233 @@ def detect_account_type(account_name: str, account_description: str = '') -> str
     return 'general'
 
 
+# 飞书流式同步
+FEISHU_SYNC_PAGE_SIZE = 500  # 每页推文数，与飞书batch_create单次上限一致
+
+def tweet_to_feishu_record(tweet: 'TweetData') -> Dict[str, Any]:
+    """将推文记录转换为飞书多维表格字段（发布时间、创建时间由飞书自动处理，不同步）"""
+    try:
+        hashtags = json.loads(tweet.hashtags) if tweet.hashtags else []
+    except (ValueError, TypeError):
+        hashtags = []
+    
+    return {
+        '推文原文内容': tweet.content or '',
+        '作者（账号）': tweet.username or '',
+        '推文链接': tweet.link or '',
+        '话题标签（Hashtag）': ', '.join(hashtags),
+        # 使用用户设置的类型标签，如果为空则使用自动分类
+        '类型标签': tweet.content_type or classify_content_type(tweet.content or ''),
+        '评论': tweet.comments or 0,
+        '点赞': tweet.likes or 0,
+        '转发': tweet.retweets or 0
+    }
+
+def feishu_record_key(link: str, username: str, content: str) -> str:
+    """推文在飞书中的去重键：优先使用推文链接，没有链接时使用作者+内容的哈希"""
+    if link and link.strip():
+        return link.strip()
+    digest = hashlib.sha1(f"{username or ''}\n{content or ''}".encode('utf-8')).hexdigest()
+    return f"content:{digest}"
+
+def feishu_tweet_key(tweet: 'TweetData') -> str:
+    """推文记录的飞书去重键"""
+    return feishu_record_key(tweet.link, tweet.username, tweet.content)
+
+def _create_feishu_sync_manager() -> CloudSyncManager:
+    """基于当前飞书配置创建云同步管理器"""
+    return CloudSyncManager({
+        'feishu': {
+            'enabled': True,
+            'app_id': FEISHU_CONFIG['app_id'],
+            'app_secret': FEISHU_CONFIG['app_secret'],
+            'spreadsheet_token': FEISHU_CONFIG['spreadsheet_token'],
+            'table_id': FEISHU_CONFIG['table_id'],
+            'base_url': 'https://open.feishu.cn/open-apis'
+        }
+    })
+
+def _mark_tweets_synced(page: List['TweetData']):
+    """通过一条 UPDATE ... WHERE id IN (...) 标记整页已同步，并保存同步时自动分类的类型标签"""
+    # 使用1而不是True，因为SQLite中BOOLEAN存储为整数
+    TweetData.query.filter(TweetData.id.in_([tweet.id for tweet in page])).update(
+        {TweetData.synced_to_feishu: 1}, synchronize_session=False
+    )
+    classified = [
+        {'id': tweet.id, 'content_type': classify_content_type(tweet.content or '')}
+        for tweet in page if not tweet.content_type
+    ]
+    if classified:
+        db.session.bulk_update_mappings(TweetData, classified)
+
+def _load_feishu_mappings(table_id: str, keys: List[str]) -> Dict[str, 'FeishuRecordMapping']:
+    """通过一次本地索引查询取得一页推文键已有的飞书记录映射"""
+    return {
+        mapping.tweet_key: mapping
+        for mapping in FeishuRecordMapping.query.filter(
+            FeishuRecordMapping.table_id == table_id,
+            FeishuRecordMapping.tweet_key.in_(keys)
+        ).all()
+    }
+
+def _save_feishu_mappings(table_id: str, synced: Dict[str, Dict[str, Any]],
+                          mappings: Dict[str, 'FeishuRecordMapping'], tweet_ids: Dict[str, int]):
+    """把upsert_to_feishu返回的record_id和字段摘要写回映射表（随调用方的事务一起提交）"""
+    now = datetime.utcnow()
+    for key, synced_record in synced.items():
+        if synced_record['action'] == 'unchanged':
+            continue
+        mapping = mappings.get(key)
+        if mapping is None:
+            mapping = FeishuRecordMapping(table_id=table_id, tweet_key=key)
+            db.session.add(mapping)
+        mapping.record_id = synced_record['record_id']
+        mapping.field_digests = json.dumps(synced_record['field_digests'], sort_keys=True)
+        mapping.tweet_id = tweet_ids[key]
+        mapping.synced_at = now
+
+def sync_task_to_feishu_streaming(task_id: int, page_size: int = FEISHU_SYNC_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    按id分页流式同步任务中未同步的推文到飞书多维表格
+    
+    每页转换后作为一个飞书批次创建，成功后通过一条 UPDATE ... WHERE id IN (...) 标记该页已同步，
+    新记录的record_id和字段摘要同时写入FeishuRecordMapping，之后切换到upsert模式时不会重复创建。
+    内存占用只与页大小相关，中途失败时最多丢失一页的进度，已标记的页不会重复同步。
+    
+    Args:
+        task_id: 任务ID
+        page_size: 每页推文数
+        
+    Returns:
+        {'success': bool, 'synced_count': int, 'page_count': int, 'error': Optional[str]}
+    """
+    sync_manager = _create_feishu_sync_manager()
+    table_id = FEISHU_CONFIG['table_id']
+    result = {'success': True, 'synced_count': 0, 'page_count': 0, 'error': None}
+    last_id = 0
+    
+    while True:
+        # 使用0而不是False，因为SQLite中BOOLEAN存储为整数
+        page = (TweetData.query
+                .filter(TweetData.task_id == task_id,
+                        TweetData.synced_to_feishu == 0,
+                        TweetData.id > last_id)
+                .order_by(TweetData.id)
+                .limit(page_size)
+                .all())
+        if not page:
+            break
+        
+        last_id = page[-1].id
+        page_data = {}
+        tweet_ids = {}
+        for tweet in page:
+            key = feishu_tweet_key(tweet)
+            page_data[key] = tweet_to_feishu_record(tweet)
+            tweet_ids[key] = tweet.id
+        
+        feishu_trace.debug("📤 [FEISHU_SYNC] 任务 %s 第 %s 页: %s 条 (id %s-%s)", task_id, result['page_count'] + 1, len(page_data), page[0].id, last_id)
+        try:
+            # 不传入已知record_id，全部新建；返回的record_id用于建立映射
+            synced = sync_manager.upsert_to_feishu(
+                page_data,
+                FEISHU_CONFIG['spreadsheet_token'],
+                table_id,
+                {}
+            )
+        except Exception as e:
+            db.session.rollback()
+            result['success'] = False
+            result['error'] = f"第 {result['page_count'] + 1} 页同步失败: {e}，已成功同步 {result['synced_count']} 条"
+            break
+        
+        _save_feishu_mappings(table_id, synced, _load_feishu_mappings(table_id, list(synced.keys())), tweet_ids)
+        _mark_tweets_synced(page)
+        db.session.commit()
+        
+        result['synced_count'] += len(page)
+        result['page_count'] += 1
+    
+    return result
+
+def upsert_task_to_feishu(task_id: int, page_size: int = FEISHU_SYNC_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    按推文链接将任务数据upsert到飞书多维表格
+    
+    分页读取任务的全部推文（包括已同步的），每页通过一次本地索引查询FeishuRecordMapping得到已有的
+    record_id和上次同步的字段摘要：已有记录只用batch_update发送变化的字段（通常只有点赞、评论、转发），
+    没有变化的记录不发送，新推文用batch_create创建，并把record_id和字段摘要写回映射表。
+    重复同步不会在飞书中产生重复记录。
+    
+    Args:
+        task_id: 任务ID
+        page_size: 每页推文数
+        
+    Returns:
+        {'success': bool, 'synced_count': int, 'created_count': int, 'updated_count': int,
+         'unchanged_count': int, 'page_count': int, 'error': Optional[str]}
+    """
+    sync_manager = _create_feishu_sync_manager()
+    table_id = FEISHU_CONFIG['table_id']
+    result = {'success': True, 'synced_count': 0, 'created_count': 0, 'updated_count': 0,
+              'unchanged_count': 0, 'page_count': 0, 'error': None}
+    last_id = 0
+    
+    while True:
+        page = (TweetData.query
+                .filter(TweetData.task_id == task_id, TweetData.id > last_id)
+                .order_by(TweetData.id)
+                .limit(page_size)
+                .all())
+        if not page:
+            break
+        
+        last_id = page[-1].id
+        page_data = {}
+        tweet_ids = {}
+        for tweet in page:
+            # 同一链接在页内重复出现时以最新抓取的数据为准
+            key = feishu_tweet_key(tweet)
+            page_data[key] = tweet_to_feishu_record(tweet)
+            tweet_ids[key] = tweet.id
+        
+        mappings = _load_feishu_mappings(table_id, list(page_data.keys()))
+        
+        feishu_trace.debug("📤 [FEISHU_SYNC] 任务 %s 第 %s 页upsert: %s 条，其中已有记录 %s 条", task_id, result['page_count'] + 1, len(page_data), len(mappings))
+        try:
+            synced = sync_manager.upsert_to_feishu(
+                page_data,
+                FEISHU_CONFIG['spreadsheet_token'],
+                table_id,
+                {key: mapping.record_id for key, mapping in mappings.items()},
+                {key: json.loads(mapping.field_digests) for key, mapping in mappings.items()
+                 if mapping.field_digests}
+            )
+        except Exception as e:
+            db.session.rollback()
+            result['success'] = False
+            result['error'] = f"第 {result['page_count'] + 1} 页同步失败: {e}"
+            break
+        
+        for synced_record in synced.values():
+            result[f"{synced_record['action']}_count"] += 1
+        _save_feishu_mappings(table_id, synced, mappings, tweet_ids)
+        
+        _mark_tweets_synced(page)
+        db.session.commit()
+        
+        result['synced_count'] += len(synced)
+        result['page_count'] += 1
+    
+    return result
+
+def sync_task_to_feishu(task_id: int, mode: str = None) -> Dict[str, Any]:
+    """按同步模式（默认取FEISHU_CONFIG['sync_mode']）同步任务数据到飞书多维表格"""
+    mode = mode or FEISHU_CONFIG.get('sync_mode', 'create')
+    if mode == 'upsert':
+        return upsert_task_to_feishu(task_id)
+    return sync_task_to_feishu_streaming(task_id)
+
 # 重构TaskManager的导入
 import queue
 from enum import Enum
@@ -535,11 +804,21 @@ class TaskSlot:
 
 
 # 单个任务执行器（修改为支持指定用户ID）
+# 浏览器会话注册表：同一进程内顺序执行的任务共享已启动的AdsPower配置文件，
+# 空闲但已被租出的配置文件不会被清理线程停止
+browser_sessions = BrowserSessionRegistry(
+    lambda: AdsPowerLauncher(ADS_POWER_CONFIG),
+    idle_ttl=ADS_POWER_CONFIG.get('session_idle_ttl', 600),
+    busy_check=lease_held_check(PROFILE, app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', ''))
+)
+
 class ScrapingTaskExecutor:
-    def __init__(self, user_id=None):
+    def __init__(self, user_id=None, extra_user_ids=None):
         self.is_running = False
         self.current_task_id = None
         self.user_id = user_id or ADS_POWER_CONFIG['user_id']
+        # 任务内并发借用的额外用户ID，账号/关键词工作列表会分给这些配置文件同时抓取
+        self.extra_user_ids = list(extra_user_ids or [])
         
     async def execute_task(self, task_id: int):
         """执行抓取任务"""
@@ -571,138 +850,55 @@ class ScrapingTaskExecutor:
             print(f"[DEBUG] 目标账号: {target_accounts}")
             print(f"[DEBUG] 关键词: {target_keywords}")
             
-            # 启动浏览器
-            print(f"[DEBUG] 正在启动AdsPower浏览器...")
-            app.logger.info(f"开始启动AdsPower浏览器，用户ID: {self.user_id}")
+            # 获取浏览器会话（空闲TTL内复用已启动的AdsPower配置文件）
+            print(f"[DEBUG] 正在获取AdsPower浏览器会话...")
+            app.logger.info(f"获取AdsPower浏览器会话，用户ID: {self.user_id}")
             
-            browser_manager = AdsPowerLauncher(ADS_POWER_CONFIG)
             user_id = self.user_id  # 使用分配的用户ID
-            
-            try:
-                # 进行完整的健康检查和浏览器启动
-                app.logger.info("正在进行AdsPower健康检查...")
-                browser_info = browser_manager.start_browser(user_id, skip_health_check=False)
-                if not browser_info:
-                    raise Exception("浏览器启动失败：未返回浏览器信息")
-                
-                app.logger.info(f"浏览器启动成功: {browser_info}")
-                print(f"[DEBUG] 浏览器启动成功: {browser_info}")
-                
-            except Exception as e:
-                app.logger.error(f"AdsPower浏览器启动失败: {str(e)}")
-                
-                # 获取详细的健康报告
-                try:
-                    health_report = browser_manager.get_health_report()
-                    app.logger.error(f"系统健康报告: {health_report}")
-                    
-                    # 尝试自动修复
-                    app.logger.info("尝试自动修复系统问题...")
-                    if browser_manager.auto_optimize_system():
-                        app.logger.info("系统优化完成，重新尝试启动浏览器...")
-                        browser_info = browser_manager.start_browser(user_id, skip_health_check=True)
-                        if browser_info:
-                            app.logger.info("浏览器启动成功（修复后）")
-                        else:
-                            raise Exception("浏览器启动失败（修复后仍然失败）")
-                    else:
-                        raise Exception(f"AdsPower浏览器启动失败且自动修复失败: {str(e)}")
-                        
-                except Exception as repair_error:
-                    app.logger.error(f"自动修复过程中发生错误: {str(repair_error)}")
-                    raise Exception(f"AdsPower浏览器启动失败: {str(e)}。修复尝试也失败: {str(repair_error)}")
-            
-            debug_port = browser_info.get('ws', {}).get('puppeteer')
-            print(f"[DEBUG] 调试端口: {debug_port}")
-            
-            # 连接解析器
-            print(f"[DEBUG] 正在连接Twitter解析器...")
-            parser = TwitterParser(debug_port)
-            await parser.connect_browser()
+            parser = await browser_sessions.acquire(user_id)
             print(f"[DEBUG] Twitter解析器连接成功")
             
-            all_tweets = []
-            
-            # 判断是否需要组合搜索（同时有账号和关键词）
-            if target_accounts and target_keywords:
+            # 同时有账号和关键词时为组合搜索：在每个指定博主下搜索每个关键词
+            combined = bool(target_accounts and target_keywords)
+            if combined:
                 print(f"[DEBUG] 检测到组合搜索模式：在指定博主下搜索关键词")
-                print(f"[DEBUG] 目标博主: {target_accounts}")
-                print(f"[DEBUG] 搜索关键词: {target_keywords}")
-                
-                # 组合搜索：在每个指定博主下搜索每个关键词
-                for account in target_accounts:
-                    if not self.is_running:
-                        break
-                    
-                    # 清理用户名，去除@符号
-                    clean_username = account.lstrip('@')
-                    
-                    for keyword in target_keywords:
-                        if not self.is_running:
-                            break
-                        
-                        try:
-                            print(f"[DEBUG] 在博主 @{clean_username} 下搜索关键词 '{keyword}'")
-                            tweets = await parser.scrape_user_keyword_tweets(
-                                username=clean_username, 
-                                keyword=keyword, 
-                                max_tweets=task.max_tweets,
-                                enable_enhanced=True
-                            )
-                            
-                            # 过滤推文
-                            filtered_tweets = self._filter_tweets(tweets, task)
-                            all_tweets.extend(filtered_tweets)
-                            
-                            print(f"[DEBUG] 在博主 @{clean_username} 下搜索关键词 '{keyword}' 完成，获得 {len(filtered_tweets)} 条有效推文")
-                            
-                        except Exception as e:
-                            print(f"在博主 @{clean_username} 下搜索关键词 '{keyword}' 失败: {e}")
-                            continue
-            else:
-                # 分别抓取账号推文和关键词推文（原有逻辑）
-                
-                # 抓取账号推文
-                for account in target_accounts:
-                    if not self.is_running:  # 检查是否被停止
-                        break
-                    
-                    # 清理用户名，去除@符号
-                    clean_username = account.lstrip('@')
-                        
-                    try:
-                        print(f"[DEBUG] 抓取博主 @{clean_username} 的推文")
-                        tweets = await parser.scrape_user_tweets(username=clean_username, max_tweets=task.max_tweets, enable_enhanced=True)
-                        
-                        # 过滤推文
-                        filtered_tweets = self._filter_tweets(tweets, task)
-                        all_tweets.extend(filtered_tweets)
-                        
-                        print(f"[DEBUG] 博主 @{clean_username} 抓取完成，获得 {len(filtered_tweets)} 条有效推文")
-                        
-                    except Exception as e:
-                        print(f"抓取账号 {clean_username} 失败: {e}")
-                        continue
-                
-                # 抓取关键词推文
-                for keyword in target_keywords:
-                    if not self.is_running:
-                        break
-                        
-                    try:
-                        print(f"[DEBUG] 全局搜索关键词 '{keyword}'")
-                        tweets = await parser.scrape_keyword_tweets(keyword, max_tweets=task.max_tweets, enable_enhanced=True)
-                        filtered_tweets = self._filter_tweets(tweets, task)
-                        all_tweets.extend(filtered_tweets)
-                        
-                        print(f"[DEBUG] 关键词 '{keyword}' 搜索完成，获得 {len(filtered_tweets)} 条有效推文")
-                        
-                    except Exception as e:
-                        print(f"搜索关键词 {keyword} 失败: {e}")
-                        continue
+            work_items = build_work_items(target_accounts, target_keywords, combined=combined)
+            
+            async def scrape_item(item_parser, item):
+                """抓取单个工作项并按任务条件过滤"""
+                if item.kind == 'account_keyword':
+                    print(f"[DEBUG] 在博主 @{item.account} 下搜索关键词 '{item.keyword}'")
+                    tweets = await item_parser.scrape_user_keyword_tweets(
+                        username=item.account,
+                        keyword=item.keyword,
+                        max_tweets=task.max_tweets,
+                        enable_enhanced=True
+                    )
+                elif item.kind == 'account':
+                    print(f"[DEBUG] 抓取博主 @{item.account} 的推文")
+                    tweets = await item_parser.scrape_user_tweets(username=item.account, max_tweets=task.max_tweets, enable_enhanced=True)
+                else:
+                    print(f"[DEBUG] 全局搜索关键词 '{item.keyword}'")
+                    tweets = await item_parser.scrape_keyword_tweets(item.keyword, max_tweets=task.max_tweets, enable_enhanced=True)
+                return self._filter_tweets(tweets, task)
             
-            # 保存到数据库
-            saved_count = self._save_tweets_to_db(all_tweets, task_id)
+            # 工作列表在主配置文件和借用的配置文件之间并发分配，共享结果和去重索引
+            if self.extra_user_ids:
+                print(f"[DEBUG] 任务内并发：额外借用配置文件 {self.extra_user_ids}")
+            fanout = ProfileFanOut(
+                browser_sessions, self.extra_user_ids, scrape_item,
+                item_interval=ADS_POWER_CONFIG.get('fanout_item_interval', ProfileFanOut.DEFAULT_ITEM_INTERVAL),
+                should_continue=lambda: self.is_running,
+                tracker=AccountStateTracker(),
+                rate_controller=AdaptiveRateController()
+            )
+            with stage_context(task=task_id):
+                sink = await fanout.run(parser, work_items, primary_user_id=self.user_id)
+                all_tweets = sink.tweets
+                print(f"[DEBUG] 抓取完成，有效推文 {len(all_tweets)} 条，重复 {sink.duplicate_count} 条，失败 {len(sink.errors)} 项")
+                
+                # 保存到数据库
+                saved_count = self._save_tweets_to_db(all_tweets, task_id)
             
             # 更新任务状态
             task.status = 'completed'
@@ -710,8 +906,8 @@ class ScrapingTaskExecutor:
             task.result_count = saved_count
             db.session.commit()
             
-            # 关闭浏览器
-            await parser.close()
+            # 归还浏览器会话：本线程的事件循环即将关闭，断开CDP连接但保留配置文件运行
+            await browser_sessions.release(user_id, detach=True)
             
             print(f"任务 {task_id} 完成，共抓取 {saved_count} 条推文")
             
@@ -729,6 +925,9 @@ class ScrapingTaskExecutor:
             
             print(f"任务 {task_id} 执行失败: {e}")
             
+            # 任务失败时停止配置文件，下次重新启动
+            await browser_sessions.release(self.user_id, healthy=False)
+            
         finally:
             self.is_running = False
             self.current_task_id = None
@@ -744,6 +943,7 @@ class ScrapingTaskExecutor:
                 filtered.append(tweet)
         return filtered
     
+    @stage_metrics.timed('save_tweets')
     def _save_tweets_to_db(self, tweets: List[Dict], task_id: int) -> int:
         """保存推文到数据库"""
         saved_count = 0
@@ -779,109 +979,50 @@ class ScrapingTaskExecutor:
     def _check_auto_sync_feishu(self, task_id: int):
         """检查是否需要自动同步到飞书"""
         try:
-            print(f"[调试] 开始检查任务 {task_id} 的自动同步...")
+            feishu_trace.debug("[调试] 开始检查任务 %s 的自动同步...", task_id)
             
             # 检查飞书配置是否启用
             if not FEISHU_CONFIG.get('enabled'):
-                print(f"[调试] 飞书配置未启用，跳过同步")
+                feishu_trace.debug("[调试] 飞书配置未启用，跳过同步")
                 return
             
             # 检查是否启用自动同步
             if not FEISHU_CONFIG.get('auto_sync', False):
-                print(f"[调试] 自动同步未启用，跳过同步 (当前值: {FEISHU_CONFIG.get('auto_sync', False)})")
+                feishu_trace.debug("[调试] 自动同步未启用，跳过同步 (当前值: %s)", FEISHU_CONFIG.get('auto_sync', False))
                 return
             
             # 检查飞书配置完整性
             required_fields = ['app_id', 'app_secret', 'spreadsheet_token', 'table_id']
             missing_fields = [field for field in required_fields if not FEISHU_CONFIG.get(field)]
             if missing_fields:
-                print(f"飞书自动同步跳过：配置不完整，缺少字段: {', '.join(missing_fields)}")
+                feishu_trace.debug("飞书自动同步跳过：配置不完整，缺少字段: %s", ', '.join(missing_fields))
                 return
             
-            print(f"开始自动同步任务 {task_id} 的数据到飞书...")
+            feishu_trace.debug("开始自动同步任务 %s 的数据到飞书...", task_id)
             
-            # 获取任务数据
-            tweets = TweetData.query.filter_by(task_id=task_id).all()
-            if not tweets:
-                print("没有数据需要同步")
+            # 分页同步（create模式只推送未同步的推文，upsert模式按链接更新或创建），每页成功后立即标记
+            sync_result = sync_task_to_feishu(task_id)
+            
+            if not sync_result['success']:
+                feishu_trace.debug("任务 %s 自动同步到飞书失败: %s", task_id, sync_result['error'])
                 return
             
-            # 准备同步数据
-            sync_data = []
-            for tweet in tweets:
-                # 解析hashtags
-                try:
-                    hashtags = json.loads(tweet.hashtags) if tweet.hashtags else []
-                except:
-                    hashtags = []
-                
-                # 不再需要时间戳转换，让飞书自动处理时间字段
-                
-                sync_data.append({
-                    '推文原文内容': tweet.content or '',
-                    '作者（账号）': tweet.username or '',
-                    '推文链接': tweet.link or '',
-                    '话题标签（Hashtag）': ', '.join(hashtags),
-                    '类型标签': tweet.content_type or '',
-                    '评论': tweet.comments or 0,
-                    '点赞': tweet.likes or 0,
-                    '转发': tweet.retweets or 0
-                })
+            if sync_result['synced_count'] == 0:
+                feishu_trace.debug("没有数据需要同步")
+                return
             
-            # 创建云同步管理器并同步（统一初始化方式，与API同步保持一致）
-            from cloud_sync import CloudSyncManager
-            sync_config = {
-                'feishu': {
-                    'enabled': True,
-                    'app_id': FEISHU_CONFIG['app_id'],
-                    'app_secret': FEISHU_CONFIG['app_secret'],
-                    'spreadsheet_token': FEISHU_CONFIG['spreadsheet_token'],
-                    'table_id': FEISHU_CONFIG['table_id'],
-                    'base_url': 'https://open.feishu.cn/open-apis'
-                }
-            }
-            sync_manager = CloudSyncManager(sync_config)
+            feishu_trace.debug("任务 %s 自动同步到飞书成功，已分 %s 页更新 %s 条记录的同步状态", task_id, sync_result['page_count'], sync_result['synced_count'])
             
-            # 直接执行同步（不调用setup_feishu，保持配置完整性）
-            success = sync_manager.sync_to_feishu(
-                sync_data,
-                FEISHU_CONFIG['spreadsheet_token'],
-                FEISHU_CONFIG['table_id']
-            )
-            
-            if success:
-                # 更新同步状态
-                for tweet in tweets:
-                    tweet.synced_to_feishu = True
-                db.session.commit()
-                print(f"任务 {task_id} 自动同步到飞书成功，已更新 {len(tweets)} 条记录的同步状态")
-                
-                # 执行数据验证
-                print(f"🔍 [AUTO_SYNC] 开始数据验证...")
-                try:
-                    from feishu_data_validator import FeishuDataValidator
-                    validator = FeishuDataValidator()
-                    validation_result = validator.validate_sync_data(task_id=task_id)
-                    
-                    if validation_result.get('success'):
-                        comparison = validation_result['comparison_result']
-                        summary = comparison['summary']
-                        print(f"✅ [AUTO_SYNC] 数据验证完成")
-                        print(f"📊 [AUTO_SYNC] 验证结果: 同步准确率 {summary['sync_accuracy']:.2f}%")
-                        print(f"📊 [AUTO_SYNC] 匹配记录: {summary['matched_count']}/{summary['total_local']}")
-                        
-                        if summary['sync_accuracy'] < 95:
-                            print(f"⚠️ [AUTO_SYNC] 发现 {summary['field_mismatch_count']} 条字段不匹配，建议检查")
-                    else:
-                        print(f"⚠️ [AUTO_SYNC] 数据验证失败: {validation_result.get('error', '未知错误')}")
-                        
-                except Exception as e:
-                    print(f"❌ [AUTO_SYNC] 数据验证异常: {e}")
-            else:
-                print(f"任务 {task_id} 自动同步到飞书失败")
+            # 后台抽样验证，不阻塞任务执行
+            feishu_trace.debug("🔍 [AUTO_SYNC] 已启动后台抽样数据验证")
+            try:
+                from feishu_data_validator import FeishuDataValidator
+                FeishuDataValidator().start_background_validation(task_id=task_id)
+            except Exception as e:
+                feishu_trace.error("❌ [AUTO_SYNC] 启动数据验证异常: %s", e)
                 
         except Exception as e:
-            print(f"自动同步到飞书时发生错误: {e}")
+            feishu_trace.debug("自动同步到飞书时发生错误: %s", e)
     
     def stop_task(self):
         """停止当前任务"""
@@ -919,7 +1060,9 @@ def init_task_manager():
         print(f"⚠️ 警告: 用户ID数量({len(user_ids)})少于最大并发任务数({max_concurrent})")
         print(f"⚠️ 建议配置至少 {max_concurrent} 个用户ID以支持完全并行")
     
-    task_manager = RefactoredTaskManager(max_concurrent_tasks=max_concurrent, user_ids=user_ids)
+    task_manager = RefactoredTaskManager(max_concurrent_tasks=max_concurrent, user_ids=user_ids,
+                                         use_warm_workers=ADS_POWER_CONFIG.get('warm_workers', True),
+                                         queue_db_path=app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', ''))
     
     print(f"[RefactoredTaskManager] 初始化完成，最大并发: {max_concurrent}")
     
@@ -1369,6 +1512,7 @@ def update_config():
                 'feishu_table_id': request.form.get('feishu_table_id', ''),
                 'feishu_enabled': 'feishu_enabled' in request.form,
                 'feishu_auto_sync': 'feishu_auto_sync' in request.form,
+                'feishu_sync_mode': request.form.get('feishu_sync_mode', 'create'),
                 'sync_interval': request.form.get('sync_interval', '24')
             }
             
@@ -1392,7 +1536,8 @@ def update_config():
                 'app_secret': feishu_configs['feishu_app_secret'],
                 'spreadsheet_token': feishu_configs['feishu_spreadsheet_token'],
                 'table_id': feishu_configs['feishu_table_id'],
-                'enabled': feishu_configs['feishu_enabled']
+                'enabled': feishu_configs['feishu_enabled'],
+                'sync_mode': feishu_configs['feishu_sync_mode']
             })
             
             db.session.commit()
@@ -1438,55 +1583,54 @@ def influencers():
 @app.route('/sync_feishu', methods=['POST'])
 def sync_feishu():
     """同步数据到飞书（支持全部同步或按任务ID同步）"""
-    print("\n" + "="*60)
-    print("🚀 [后端] 开始处理飞书同步请求")
+    feishu_trace.debug("🚀 [后端] 开始处理飞书同步请求")
     try:
         # 获取请求参数
         data = request.form.to_dict()
         task_id = data.get('task_id')
-        print(f"📋 [后端] 接收到请求参数: {data}")
-        print(f"📋 [后端] 任务ID: {task_id}")
+        feishu_trace.debug("📋 [后端] 接收到请求参数: %s", data)
+        feishu_trace.debug("📋 [后端] 任务ID: %s", task_id)
         
         # 检查飞书配置
-        print(f"🔧 [后端] 检查飞书配置状态")
-        print(f"   - 飞书启用状态: {FEISHU_CONFIG.get('enabled')}")
+        feishu_trace.debug("🔧 [后端] 检查飞书配置状态")
+        feishu_trace.debug("   - 飞书启用状态: %s", FEISHU_CONFIG.get('enabled'))
         if not FEISHU_CONFIG.get('enabled'):
-            print("❌ [后端] 飞书同步未启用")
+            feishu_trace.error("❌ [后端] 飞书同步未启用")
             return jsonify({'success': False, 'message': '飞书同步未启用'}), 400
         
         required_fields = ['app_id', 'app_secret', 'spreadsheet_token', 'table_id']
         missing_fields = [field for field in required_fields if not FEISHU_CONFIG.get(field)]
-        print(f"🔧 [后端] 检查必需配置字段: {required_fields}")
-        print(f"🔧 [后端] 缺少的配置字段: {missing_fields}")
+        feishu_trace.debug("🔧 [后端] 检查必需配置字段: %s", required_fields)
+        feishu_trace.debug("🔧 [后端] 缺少的配置字段: %s", missing_fields)
         if missing_fields:
-            print(f"❌ [后端] 飞书配置不完整，缺少字段: {missing_fields}")
+            feishu_trace.error("❌ [后端] 飞书配置不完整，缺少字段: %s", missing_fields)
             return jsonify({'success': False, 'message': f'飞书配置不完整，缺少字段: {", ".join(missing_fields)}'}), 400
         
-        print(f"✅ [后端] 飞书配置检查通过")
+        feishu_trace.info("✅ [后端] 飞书配置检查通过")
         
         # 构建查询
-        print(f"🔍 [后端] 构建数据库查询")
+        feishu_trace.debug("🔍 [后端] 构建数据库查询")
         query = TweetData.query
         if task_id:
             query = query.filter(TweetData.task_id == task_id)
-            print(f"   - 按任务ID过滤: {task_id}")
+            feishu_trace.debug("   - 按任务ID过滤: %s", task_id)
         else:
-            print(f"   - 查询所有任务的数据")
+            feishu_trace.debug("   - 查询所有任务的数据")
         
         # 获取所有相关推文数据（包括已同步和未同步的）
-        print(f"📊 [后端] 执行数据库查询")
+        feishu_trace.debug("📊 [后端] 执行数据库查询")
         all_tweets = query.all()
-        print(f"📊 [后端] 查询到总推文数: {len(all_tweets)}")
+        feishu_trace.debug("📊 [后端] 查询到总推文数: %s", len(all_tweets))
         
         # 分别统计已同步和未同步的数据
         synced_tweets = [t for t in all_tweets if t.synced_to_feishu]
         unsynced_tweets = [t for t in all_tweets if not t.synced_to_feishu]
-        print(f"📊 [后端] 数据统计:")
-        print(f"   - 已同步推文数: {len(synced_tweets)}")
-        print(f"   - 未同步推文数: {len(unsynced_tweets)}")
+        feishu_trace.debug("📊 [后端] 数据统计:")
+        feishu_trace.debug("   - 已同步推文数: %s", len(synced_tweets))
+        feishu_trace.debug("   - 未同步推文数: %s", len(unsynced_tweets))
         
         # 检查重复内容（基于推文内容和链接）
-        print(f"🔍 [后端] 开始检查重复内容")
+        feishu_trace.debug("🔍 [后端] 开始检查重复内容")
         duplicate_check = {}
         potential_duplicates = []
         
@@ -1501,7 +1645,7 @@ def sync_feishu():
             else:
                 duplicate_check[content_fingerprint] = tweet
         
-        print(f"🔍 [后端] 重复内容检查完成，发现 {len(potential_duplicates)} 组潜在重复")
+        feishu_trace.debug("🔍 [后端] 重复内容检查完成，发现 %s 组潜在重复", len(potential_duplicates))
         
         # 构建详细的同步报告
         sync_report = {
@@ -1510,7 +1654,7 @@ def sync_feishu():
             'to_sync': len(unsynced_tweets),
             'potential_duplicates': len(potential_duplicates)
         }
-        print(f"📊 [后端] 同步报告: {sync_report}")
+        feishu_trace.debug("📊 [后端] 同步报告: %s", sync_report)
         
         if not unsynced_tweets:
             message = f'内容已经同步过了，不用再同步了！'
@@ -1518,7 +1662,7 @@ def sync_feishu():
                 message += f'任务 {task_id} 的所有数据（{len(all_tweets)} 条）都已在飞书中'
             else:
                 message += f'所有数据（{len(all_tweets)} 条）都已在飞书中'
-            print(f"ℹ️ [后端] 无新数据需要同步: {message}")
+            feishu_trace.debug("ℹ️ [后端] 无新数据需要同步: %s", message)
             return jsonify({
                 'success': True, 
                 'message': message,
@@ -1527,12 +1671,12 @@ def sync_feishu():
         
         # 如果发现潜在重复内容，记录但继续同步
         if potential_duplicates:
-            print(f"⚠️ [后端] 发现 {len(potential_duplicates)} 组潜在重复内容，但将继续同步")
+            feishu_trace.warning("⚠️ [后端] 发现 %s 组潜在重复内容，但将继续同步", len(potential_duplicates))
             for dup in potential_duplicates[:3]:  # 只打印前3个
-                print(f"   - 重复内容: {dup['current'].content[:50]}...")
+                feishu_trace.debug("   - 重复内容: %s...", dup['current'].content[:50])
         
         # 初始化同步管理器
-        print(f"🔧 [后端] 初始化云同步管理器")
+        feishu_trace.debug("🔧 [后端] 初始化云同步管理器")
         sync_config = {
             'feishu': {
                 'enabled': True,
@@ -1543,74 +1687,74 @@ def sync_feishu():
                 'base_url': 'https://open.feishu.cn/open-apis'
             }
         }
-        print(f"🔧 [后端] 同步配置: {sync_config}")
+        feishu_trace.debug("🔧 [后端] 同步配置: %s", sync_config)
         sync_manager = CloudSyncManager(sync_config)
-        print(f"✅ [后端] 云同步管理器初始化完成")
+        feishu_trace.info("✅ [后端] 云同步管理器初始化完成")
         
         # 准备数据，按照飞书多维表格字段映射
-        print(f"🔄 [后端] 开始准备同步数据")
+        feishu_trace.debug("🔄 [后端] 开始准备同步数据")
         sync_data = []
         for idx, tweet in enumerate(unsynced_tweets):
-            print(f"📝 [后端] 处理第 {idx + 1}/{len(unsynced_tweets)} 条推文")
+            feishu_trace.debug("📝 [后端] 处理第 %s/%s 条推文", idx + 1, len(unsynced_tweets))
             # 使用用户设置的类型标签，如果为空则使用自动分类
             content_type = tweet.content_type or classify_content_type(tweet.content)
-            print(f"   - 推文ID: {tweet.id}")
-            print(f"   - 内容类型: {content_type}")
+            feishu_trace.debug("   - 推文ID: %s", tweet.id)
+            feishu_trace.debug("   - 内容类型: %s", content_type)
             
             # 处理发布时间
-            print(f"   - 🕐 开始处理发布时间")
-            print(f"     - 原始发布时间: {tweet.publish_time} (类型: {type(tweet.publish_time)})")
+            feishu_trace.debug("   - 🕐 开始处理发布时间")
+            feishu_trace.debug("     - 原始发布时间: %s (类型: %s)", tweet.publish_time, type(tweet.publish_time))
             
             publish_time = ''
             if tweet.publish_time:
                 try:
                     if isinstance(tweet.publish_time, str):
                         # 如果是字符串，尝试解析为datetime
-                        print(f"     - 发布时间为字符串，开始解析")
+                        feishu_trace.debug("     - 发布时间为字符串，开始解析")
                         from dateutil import parser
                         dt = parser.parse(tweet.publish_time)
                         publish_time = int(dt.timestamp())  # 使用秒级时间戳，不乘以1000
-                        print(f"     - 字符串解析成功: {publish_time} ({dt})")
+                        feishu_trace.debug("     - 字符串解析成功: %s (%s)", publish_time, dt)
                     else:
                         # 如果已经是datetime对象
-                        print(f"     - 发布时间为datetime对象")
+                        feishu_trace.debug("     - 发布时间为datetime对象")
                         publish_time = int(tweet.publish_time.timestamp())  # 使用秒级时间戳，不乘以1000
-                        print(f"     - datetime转换成功: {publish_time} ({tweet.publish_time})")
+                        feishu_trace.debug("     - datetime转换成功: %s (%s)", publish_time, tweet.publish_time)
                     
                     # 验证时间戳合理性
                     if publish_time < 946684800:  # 2000年1月1日的时间戳
-                        print(f"     - ⚠️ 发布时间戳异常 ({publish_time})，可能是1970年问题")
+                        feishu_trace.debug("     - ⚠️ 发布时间戳异常 (%s)，可能是1970年问题", publish_time)
                         publish_time = int(datetime.now().timestamp())
-                        print(f"     - 修正为当前时间戳: {publish_time}")
+                        feishu_trace.debug("     - 修正为当前时间戳: %s", publish_time)
                     
-                    print(f"   - ✅ 最终发布时间: {publish_time} ({datetime.fromtimestamp(publish_time)})")
+                    feishu_trace.debug("   - ✅ 最终发布时间: %s (%s)", publish_time, datetime.fromtimestamp(publish_time))
                 except Exception as e:
-                    print(f"   - ❌ 发布时间解析失败: {e}")
+                    feishu_trace.debug("   - ❌ 发布时间解析失败: %s", e)
                     publish_time = int(datetime.now().timestamp())
-                    print(f"   - 使用当前时间戳: {publish_time}")
+                    feishu_trace.debug("   - 使用当前时间戳: %s", publish_time)
             else:
-                print(f"     - 发布时间为空，使用当前时间")
+                feishu_trace.debug("     - 发布时间为空，使用当前时间")
                 publish_time = int(datetime.now().timestamp())
-                print(f"   - 默认发布时间: {publish_time}")
+                feishu_trace.debug("   - 默认发布时间: %s", publish_time)
             
             # 处理创建时间
-            print(f"   - 🕐 开始处理创建时间")
-            print(f"     - 原始创建时间: {tweet.scraped_at} (类型: {type(tweet.scraped_at)})")
+            feishu_trace.debug("   - 🕐 开始处理创建时间")
+            feishu_trace.debug("     - 原始创建时间: %s (类型: %s)", tweet.scraped_at, type(tweet.scraped_at))
             
             if tweet.scraped_at:
                 create_time = int(tweet.scraped_at.timestamp())
-                print(f"     - 创建时间转换成功: {create_time} ({tweet.scraped_at})")
+                feishu_trace.debug("     - 创建时间转换成功: %s (%s)", create_time, tweet.scraped_at)
             else:
                 create_time = int(datetime.now().timestamp())
-                print(f"     - 创建时间为空，使用当前时间: {create_time}")
+                feishu_trace.debug("     - 创建时间为空，使用当前时间: %s", create_time)
             
             # 验证创建时间戳合理性
             if create_time < 946684800:  # 2000年1月1日的时间戳
-                print(f"     - ⚠️ 创建时间戳异常 ({create_time})，可能是1970年问题")
+                feishu_trace.debug("     - ⚠️ 创建时间戳异常 (%s)，可能是1970年问题", create_time)
                 create_time = int(datetime.now().timestamp())
-                print(f"     - 修正为当前时间戳: {create_time}")
+                feishu_trace.debug("     - 修正为当前时间戳: %s", create_time)
             
-            print(f"   - ✅ 最终创建时间: {create_time} ({datetime.fromtimestamp(create_time)})")
+            feishu_trace.debug("   - ✅ 最终创建时间: %s (%s)", create_time, datetime.fromtimestamp(create_time))
             
             tweet_data = {
                 '推文原文内容': tweet.content,
@@ -1625,43 +1769,43 @@ def sync_feishu():
                 '创建时间': create_time
             }
             sync_data.append(tweet_data)
-            print(f"   - 数据字段数: {len(tweet_data)}")
-            print(f"   - 数据内容预览: {str(tweet_data)[:200]}...")
+            feishu_trace.debug("   - 数据字段数: %s", len(tweet_data))
+            feishu_trace.debug("   - 数据内容预览: %s...", str(tweet_data)[:200])
         
-        print(f"✅ [后端] 数据准备完成，共 {len(sync_data)} 条记录")
+        feishu_trace.info("✅ [后端] 数据准备完成，共 %s 条记录", len(sync_data))
         
         # 显示前3条数据的详细信息用于调试
-        print(f"📋 [后端] 准备同步的数据示例:")
+        feishu_trace.debug("📋 [后端] 准备同步的数据示例:")
         for i, item in enumerate(sync_data[:3]):
-            print(f"   - 第{i+1}条数据:")
+            feishu_trace.debug("   - 第%s条数据:", i+1)
             for key, value in item.items():
                 if key in ['发布时间', '创建时间']:
                     if isinstance(value, (int, float)) and value > 0:
                         readable_time = datetime.fromtimestamp(value)
-                        print(f"     - {key}: {value} ({readable_time})")
+                        feishu_trace.debug("     - %s: %s (%s)", key, value, readable_time)
                     else:
-                        print(f"     - {key}: {value} (无效时间戳)")
+                        feishu_trace.debug("     - %s: %s (无效时间戳)", key, value)
                 else:
-                    print(f"     - {key}: {str(value)[:50]}..." if len(str(value)) > 50 else f"     - {key}: {value}")
+                    feishu_trace.debug("     - %s: %s", key, str(value)[:50] + '...' if len(str(value)) > 50 else value)
         
         # 同步到飞书多维表格
-        print(f"🚀 [后端] 开始执行飞书同步")
-        print(f"   - 表格Token: {FEISHU_CONFIG['spreadsheet_token'][:10]}...")
-        print(f"   - 表格ID: {FEISHU_CONFIG['table_id']}")
+        feishu_trace.debug("🚀 [后端] 开始执行飞书同步")
+        feishu_trace.debug("   - 表格Token: %s...", FEISHU_CONFIG['spreadsheet_token'][:10])
+        feishu_trace.debug("   - 表格ID: %s", FEISHU_CONFIG['table_id'])
         success = sync_manager.sync_to_feishu(
             sync_data,
             FEISHU_CONFIG['spreadsheet_token'],
             FEISHU_CONFIG['table_id']
         )
-        print(f"📊 [后端] 飞书同步结果: {success}")
+        feishu_trace.debug("📊 [后端] 飞书同步结果: %s", success)
         
         if success:
-            print(f"✅ [后端] 同步成功，更新数据库状态")
+            feishu_trace.info("✅ [后端] 同步成功，更新数据库状态")
             # 更新同步状态
             for tweet in unsynced_tweets:
                 tweet.synced_to_feishu = True
             db.session.commit()
-            print(f"✅ [后端] 数据库状态更新完成")
+            feishu_trace.info("✅ [后端] 数据库状态更新完成")
             
             # 构建详细的成功消息
             message = f'成功同步 {len(unsynced_tweets)} 条新数据到飞书'
@@ -1675,7 +1819,7 @@ def sync_feishu():
                 message += f'\n注意：检测到 {len(potential_duplicates)} 组潜在重复内容，已一并同步'
             
             sync_report['synced_count'] = len(unsynced_tweets)
-            print(f"🎉 [后端] 同步完成，返回成功响应: {message}")
+            feishu_trace.info("🎉 [后端] 同步完成，返回成功响应: %s", message)
             
             return jsonify({
                 'success': True, 
@@ -1683,20 +1827,19 @@ def sync_feishu():
                 'report': sync_report
             })
         else:
-            print(f"❌ [后端] 同步失败，返回错误响应")
+            feishu_trace.error("❌ [后端] 同步失败，返回错误响应")
             return jsonify({'success': False, 'message': '同步到飞书失败，请检查网络连接和飞书配置'}), 500
             
     except Exception as e:
-        print(f"❌ [后端] 飞书同步过程中发生异常")
-        print(f"   - 异常类型: {type(e).__name__}")
-        print(f"   - 异常消息: {str(e)}")
+        feishu_trace.error("❌ [后端] 飞书同步过程中发生异常")
+        feishu_trace.debug("   - 异常类型: %s", type(e).__name__)
+        feishu_trace.debug("   - 异常消息: %s", str(e))
         db.session.rollback()
-        print(f"🔄 [后端] 数据库回滚完成")
+        feishu_trace.debug("🔄 [后端] 数据库回滚完成")
         import traceback
         error_details = traceback.format_exc()
-        print(f"📊 [后端] 异常详情: {error_details}")
-        print(f"❌ [后端] 返回错误响应: 同步失败: {str(e)}")
-        print("="*60 + "\n")
+        feishu_trace.debug("📊 [后端] 异常详情: %s", error_details)
+        feishu_trace.error("❌ [后端] 返回错误响应: 同步失败: %s", str(e))
         return jsonify({'success': False, 'message': f'同步失败: {str(e)}'}), 500
 
 # API路由
@@ -1891,6 +2034,60 @@ def api_task_manager_status():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/metrics/stages')
+def api_stage_metrics():
+    """各抓取阶段的耗时分布（次数、总耗时、p50/p95/p99），可按任务、阶段筛选"""
+    try:
+        group_by = request.args.get('group_by', 'stage,task,profile,target').split(',')
+        data = stage_metrics.summarize(
+            group_by=[name.strip() for name in group_by if name.strip()],
+            stage=request.args.get('stage') or None,
+            task=request.args.get('task_id') or None
+        )
+        return jsonify({'success': True, 'data': data})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/metrics/stages')
+def metrics_stages():
+    """阶段耗时直方图（Prometheus文本格式），默认按阶段和配置文件分组"""
+    group_by = request.args.get('group_by', 'stage,profile').split(',')
+    body = stage_metrics.render_prometheus(
+        group_by=[name.strip() for name in group_by if name.strip()],
+        task=request.args.get('task_id') or None
+    )
+    return app.response_class(body, content_type=METRICS_CONTENT_TYPE)
+
+def _collect_task_metrics():
+    """/metrics中的任务、推文、队列和配置文件占用指标"""
+    tasks = MetricFamily('tasks', 'gauge', '按状态统计的任务数')
+    for status, count in db.session.query(ScrapingTask.status, db.func.count(ScrapingTask.id)).group_by(ScrapingTask.status):
+        tasks.add(count, status=status or 'unknown')
+    tweets = MetricFamily('tweets_stored', 'gauge', '数据库中的推文总数')
+    tweets.add(db.session.query(db.func.count(TweetData.id)).scalar())
+    families = [tasks, tweets]
+    
+    if task_manager is not None:
+        status = task_manager.get_status()
+        queue_depth = MetricFamily('queue_depth', 'gauge', '排队等待执行的任务数')
+        queue_depth.add(status['queue_size'])
+        slots = MetricFamily('task_slots', 'gauge', '任务槽位（active为运行中，max为上限）')
+        slots.add(status['active_tasks'], state='active')
+        slots.add(status['max_concurrent'], state='max')
+        profiles = MetricFamily('profiles', 'gauge', 'AdsPower配置文件（available为本进程可用，leased_elsewhere为其他进程占用）')
+        profiles.add(status['available_users'], state='available')
+        profiles.add(status['users_leased_elsewhere'], state='leased_elsewhere')
+        families.extend([queue_depth, slots, profiles])
+    return families
+
+metrics_exporter = PrometheusExporter(rate_controller_factory=AdaptiveRateController)
+metrics_exporter.register('tasks', _collect_task_metrics)
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus指标（抓取器计数、队列深度、任务槽位、限流、阶段耗时、系统资源）"""
+    return app.response_class(metrics_exporter.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/tasks/<int:task_id>/restart', methods=['POST'])
 def api_restart_task(task_id):
     """重新启动任务"""
@@ -2352,6 +2549,65 @@ def api_export_data():
         traceback.print_exc()
         return jsonify({'success': False, 'error': f'导出失败: {str(e)}'}), 500
 
+@app.route('/api/data/export/columnar')
+def api_export_columnar():
+    """
+    导出数据为zstd压缩的Parquet/Arrow IPC文件
+    
+    参数: format=parquet|arrow, task_id, start_date/end_date（YYYY-MM-DD，按抓取时间）, min_likes
+    """
+    try:
+        from flask import send_file
+        from columnar_export import ColumnarExporter, FORMAT_EXTENSIONS, parse_date_range, tweet_to_row
+        
+        fmt = request.args.get('format', 'parquet')
+        if fmt not in FORMAT_EXTENSIONS:
+            return jsonify({'success': False, 'error': f'不支持的导出格式: {fmt}'}), 400
+        task_id = request.args.get('task_id', type=int)
+        min_likes = request.args.get('min_likes', type=int)
+        try:
+            start, end = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+        except ValueError:
+            return jsonify({'success': False, 'error': '日期格式应为YYYY-MM-DD'}), 400
+        
+        try:
+            exporter = ColumnarExporter()
+        except ImportError as e:
+            return jsonify({'success': False, 'error': str(e)}), 501
+        
+        # 筛选条件在数据库查询中完成，按任务和抓取时间排序，让导出文件的行组统计范围更窄
+        query = TweetData.query
+        if task_id:
+            query = query.filter(TweetData.task_id == task_id)
+        if start:
+            query = query.filter(TweetData.scraped_at >= start)
+        if end:
+            query = query.filter(TweetData.scraped_at < end)
+        if min_likes is not None:
+            query = query.filter(TweetData.likes >= min_likes)
+        query = query.order_by(TweetData.task_id, TweetData.scraped_at, TweetData.id)
+        
+        task_names = dict(db.session.query(ScrapingTask.id, ScrapingTask.name).all())
+        rows = (tweet_to_row(tweet, task_names.get(tweet.task_id, ''))
+                for tweet in query.yield_per(exporter.batch_size))
+        
+        filename = f'twitter_data_{task_id or "all"}_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+        result = exporter.export(rows, filename, fmt=fmt)
+        if not result['rows']:
+            os.remove(result['path'])
+            return jsonify({'success': False, 'error': '没有数据可导出'}), 400
+        
+        return send_file(
+            result['path'],
+            mimetype='application/vnd.apache.parquet' if fmt == 'parquet' else 'application/vnd.apache.arrow.file',
+            as_attachment=True,
+            download_name=os.path.basename(result['path'])
+        )
+        
+    except Exception as e:
+        app.logger.error(f"列式导出失败: {e}")
+        return jsonify({'success': False, 'error': f'导出失败: {str(e)}'}), 500
+
 @app.route('/api/data/export/<int:task_id>')
 def api_export_task_data(task_id):
     """导出特定任务数据"""
@@ -2373,209 +2629,91 @@ def api_export_task_data(task_id):
 @app.route('/api/data/sync_feishu/<int:task_id>', methods=['POST'])
 def api_sync_feishu(task_id):
     """同步数据到飞书多维表格"""
-    print(f"\n🔄 [FEISHU_SYNC] 开始同步任务 {task_id} 到飞书")
-    print(f"⏰ [FEISHU_SYNC] 同步时间: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}")
+    feishu_trace.debug("🔄 [FEISHU_SYNC] 开始同步任务 %s 到飞书", task_id)
+    feishu_trace.debug("⏰ [FEISHU_SYNC] 同步时间: %s", datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
     
     try:
         # 检查飞书配置
-        print(f"📋 [FEISHU_SYNC] 检查飞书配置...")
+        feishu_trace.debug("📋 [FEISHU_SYNC] 检查飞书配置...")
         if not FEISHU_CONFIG.get('enabled'):
-            print(f"❌ [FEISHU_SYNC] 飞书同步未启用")
+            feishu_trace.error("❌ [FEISHU_SYNC] 飞书同步未启用")
             return jsonify({'success': False, 'error': '飞书同步未启用'}), 400
         
-        print(f"✅ [FEISHU_SYNC] 飞书同步已启用")
+        feishu_trace.info("✅ [FEISHU_SYNC] 飞书同步已启用")
         
         # 检查飞书配置完整性
-        print(f"🔍 [FEISHU_SYNC] 检查配置完整性...")
+        feishu_trace.debug("🔍 [FEISHU_SYNC] 检查配置完整性...")
         required_fields = ['app_id', 'app_secret', 'spreadsheet_token', 'table_id']
         missing_fields = [field for field in required_fields if not FEISHU_CONFIG.get(field)]
         if missing_fields:
-            print(f"❌ [FEISHU_SYNC] 配置不完整，缺少字段: {missing_fields}")
+            feishu_trace.error("❌ [FEISHU_SYNC] 配置不完整，缺少字段: %s", missing_fields)
             return jsonify({
                 'success': False, 
                 'error': f'飞书配置不完整，缺少字段: {", ".join(missing_fields)}'
             }), 400
         
-        print(f"✅ [FEISHU_SYNC] 配置完整性检查通过")
-        print(f"📊 [FEISHU_SYNC] 配置信息: app_id={FEISHU_CONFIG.get('app_id')[:8]}..., spreadsheet_token={FEISHU_CONFIG.get('spreadsheet_token')[:8]}..., table_id={FEISHU_CONFIG.get('table_id')}")
+        feishu_trace.info("✅ [FEISHU_SYNC] 配置完整性检查通过")
+        feishu_trace.debug("📊 [FEISHU_SYNC] 配置信息: app_id=%s..., spreadsheet_token=%s..., table_id=%s", FEISHU_CONFIG.get('app_id')[:8], FEISHU_CONFIG.get('spreadsheet_token')[:8], FEISHU_CONFIG.get('table_id'))
         
-        # 获取任务数据 - 只获取未同步的数据
-        print(f"📊 [FEISHU_SYNC] 查询任务 {task_id} 的未同步数据...")
-        # 使用0而不是False，因为SQLite中BOOLEAN存储为整数
-        tweets = TweetData.query.filter_by(task_id=task_id, synced_to_feishu=0).all()
-        print(f"📊 [FEISHU_SYNC] 找到 {len(tweets)} 条未同步数据")
+        # 同步模式：create只推送未同步数据，upsert按推文链接更新已有记录并创建新记录
+        request_data = request.get_json(silent=True) or {}
+        sync_mode = request_data.get('mode') or FEISHU_CONFIG.get('sync_mode', 'create')
+        feishu_trace.debug("📋 [FEISHU_SYNC] 同步模式: %s", sync_mode)
         
-        if not tweets:
+        # 统计待同步的数据
+        feishu_trace.debug("📊 [FEISHU_SYNC] 查询任务 %s 的待同步数据...", task_id)
+        if sync_mode == 'upsert':
+            pending_count = TweetData.query.filter_by(task_id=task_id).count()
+        else:
+            # 使用0而不是False，因为SQLite中BOOLEAN存储为整数
+            pending_count = TweetData.query.filter_by(task_id=task_id, synced_to_feishu=0).count()
+        feishu_trace.debug("📊 [FEISHU_SYNC] 找到 %s 条待同步数据", pending_count)
+        
+        if not pending_count:
             # 检查是否有已同步的数据
-            print(f"🔍 [FEISHU_SYNC] 没有未同步数据，检查已同步数据...")
+            feishu_trace.debug("🔍 [FEISHU_SYNC] 没有未同步数据，检查已同步数据...")
             # 使用1而不是True
             synced_count = TweetData.query.filter_by(task_id=task_id, synced_to_feishu=1).count()
-            print(f"📊 [FEISHU_SYNC] 已同步数据数量: {synced_count}")
+            feishu_trace.debug("📊 [FEISHU_SYNC] 已同步数据数量: %s", synced_count)
             if synced_count > 0:
-                print(f"✅ [FEISHU_SYNC] 所有数据都已同步")
+                feishu_trace.info("✅ [FEISHU_SYNC] 所有数据都已同步")
                 return jsonify({'success': True, 'message': f'任务 {task_id} 的所有数据（{synced_count} 条）都已同步到飞书'})
             else:
-                print(f"❌ [FEISHU_SYNC] 没有任何数据需要同步")
+                feishu_trace.error("❌ [FEISHU_SYNC] 没有任何数据需要同步")
                 return jsonify({'success': False, 'error': '没有数据需要同步'}), 400
         
-        # 初始化云同步管理器
-        print(f"🔧 [FEISHU_SYNC] 初始化云同步管理器...")
-        sync_config = {
-            'feishu': {
-                'enabled': True,
-                'app_id': FEISHU_CONFIG['app_id'],
-                'app_secret': FEISHU_CONFIG['app_secret'],
-                'spreadsheet_token': FEISHU_CONFIG['spreadsheet_token'],
-                'table_id': FEISHU_CONFIG['table_id'],
-                'base_url': 'https://open.feishu.cn/open-apis'
-            }
-        }
-        print(f"📋 [FEISHU_SYNC] 同步配置: {sync_config}")
-        sync_manager = CloudSyncManager(sync_config)
-        print(f"✅ [FEISHU_SYNC] 云同步管理器初始化完成")
-        
-        # 准备数据，按照飞书多维表格字段映射
-        print(f"📝 [FEISHU_SYNC] 开始准备数据，共 {len(tweets)} 条推文...")
-        data = []
-        for i, tweet in enumerate(tweets):
-            print(f"📝 [FEISHU_SYNC] 处理第 {i+1}/{len(tweets)} 条推文 (ID: {tweet.id})")
-            
-            # 使用用户设置的类型标签，如果为空则使用自动分类
-            content_type = tweet.content_type or classify_content_type(tweet.content)
-            print(f"🏷️ [FEISHU_SYNC] 推文 {tweet.id} 类型标签: {content_type}")
-            
-            # 处理发布时间 - 修复时间戳转换问题，使用秒级时间戳与cloud_sync.py保持一致
-            print(f"⏰ [FEISHU_SYNC] 处理推文 {tweet.id} 的发布时间...")
-            print(f"⏰ [FEISHU_SYNC] 原始发布时间: {tweet.publish_time} (类型: {type(tweet.publish_time)})")
-            print(f"⏰ [FEISHU_SYNC] 抓取时间: {tweet.scraped_at} (类型: {type(tweet.scraped_at)})")
-            
-            publish_time = 0
-            if tweet.publish_time:
-                try:
-                    if isinstance(tweet.publish_time, str):
-                        # 如果是字符串，尝试解析为datetime
-                        from dateutil import parser
-                        dt = parser.parse(tweet.publish_time)
-                        # 转换为秒级时间戳（与cloud_sync.py保持一致）
-                        publish_time = int(dt.timestamp())
-                        print(f"⏰ [FEISHU_SYNC] 字符串时间解析成功: {dt} -> {publish_time}")
-                    else:
-                        # 如果已经是datetime对象
-                        publish_time = int(tweet.publish_time.timestamp())
-                        print(f"⏰ [FEISHU_SYNC] datetime对象转换成功: {tweet.publish_time} -> {publish_time}")
-                except Exception as e:
-                    # 如果解析失败，使用抓取时间作为备选
-                    print(f"❌ [FEISHU_SYNC] 发布时间解析失败: {e}, 使用抓取时间作为备选")
-                    publish_time = int(tweet.scraped_at.timestamp())
-                    print(f"⏰ [FEISHU_SYNC] 备选时间戳: {publish_time}")
-            else:
-                # 如果没有发布时间，使用抓取时间
-                print(f"⚠️ [FEISHU_SYNC] 没有发布时间，使用抓取时间")
-                publish_time = int(tweet.scraped_at.timestamp())
-                print(f"⏰ [FEISHU_SYNC] 抓取时间戳: {publish_time}")
-            
-            # 验证时间戳合理性，避免1970年问题
-            if publish_time < 946684800:  # 2000年1月1日的时间戳
-                print(f"⚠️ [FEISHU_SYNC] 发布时间戳异常 ({publish_time})，可能是1970年问题，修正为当前时间")
-                publish_time = int(datetime.now().timestamp())
-                print(f"⏰ [FEISHU_SYNC] 修正后时间戳: {publish_time}")
-            
-            # 根据飞书表格的实际字段名称进行精确映射
-            # 从用户提供的截图可以看到字段包括：推文原文内容、发布时间、作者（账号）、推文链接、话题标签（Hashtag）、类型标签、评论、点赞、转发
-            hashtags_str = ', '.join(json.loads(tweet.hashtags) if tweet.hashtags else [])
-            
-            # 转换为毫秒级时间戳（飞书API要求）
-            if publish_time < 10000000000:  # 秒级时间戳
-                publish_time_ms = publish_time * 1000
-            else:  # 已经是毫秒级
-                publish_time_ms = publish_time
-            
-            print(f"⏰ [FEISHU_SYNC] 发布时间戳转换: {publish_time} -> {publish_time_ms} (毫秒级)")
-            
-            tweet_data = {
-                '推文原文内容': tweet.content or '',
-                # 注意：移除发布时间字段，不同步时间戳
-                '作者（账号）': tweet.username or '',
-                '推文链接': tweet.link or '',
-                '话题标签（Hashtag）': hashtags_str,
-                '类型标签': content_type or '',
-                '评论': tweet.comments or 0,
-                '点赞': tweet.likes or 0,
-                '转发': tweet.retweets or 0
-                # 注意：移除创建时间字段，让飞书自动生成
-            }
-            
-            print(f"📊 [FEISHU_SYNC] 推文 {tweet.id} 数据映射完成:")
-            print(f"   - 内容: {(tweet.content or '')[:50]}...")
-            print(f"   - 作者: {tweet.username or ''}")
-            print(f"   - 链接: {tweet.link or ''}")
-            print(f"   - 标签: {hashtags_str}")
-            print(f"   - 类型: {content_type or ''}")
-            
-            data.append(tweet_data)
-        
-        # 同步到飞书多维表格
-        print(f"🚀 [FEISHU_SYNC] 开始同步 {len(data)} 条数据到飞书多维表格...")
-        print(f"📋 [FEISHU_SYNC] 目标表格: {FEISHU_CONFIG['spreadsheet_token']}")
-        print(f"📋 [FEISHU_SYNC] 目标表ID: {FEISHU_CONFIG['table_id']}")
+        # 分页同步到飞书多维表格，每页成功后立即标记已同步
+        feishu_trace.debug("🚀 [FEISHU_SYNC] 开始分页同步 %s 条数据到飞书多维表格 (每页 %s 条)...", pending_count, FEISHU_SYNC_PAGE_SIZE)
+        feishu_trace.debug("📋 [FEISHU_SYNC] 目标表ID: %s", FEISHU_CONFIG['table_id'])
         
-        success = sync_manager.sync_to_feishu(
-            data,
-            FEISHU_CONFIG['spreadsheet_token'],
-            FEISHU_CONFIG['table_id']
-        )
+        sync_result = sync_task_to_feishu(task_id, sync_mode)
+        synced_total = sync_result['synced_count']
         
-        print(f"📊 [FEISHU_SYNC] 同步结果: {'成功' if success else '失败'}")
+        feishu_trace.debug("📊 [FEISHU_SYNC] 同步结果: %s，已同步 %s 条，共 %s 页", '成功' if sync_result['success'] else '失败', synced_total, sync_result['page_count'])
+        if sync_mode == 'upsert':
+            feishu_trace.debug("📊 [FEISHU_SYNC] 新建 %s 条，增量更新 %s 条，未变化 %s 条", sync_result['created_count'], sync_result['updated_count'], sync_result['unchanged_count'])
         
-        if success:
-            print(f"✅ [FEISHU_SYNC] 同步成功，开始更新数据库状态...")
-            # 更新同步状态和内容类型
-            for i, tweet in enumerate(tweets):
-                print(f"📝 [FEISHU_SYNC] 更新推文 {tweet.id} 同步状态")
-                # 使用1而不是True，因为SQLite中BOOLEAN存储为整数
-                tweet.synced_to_feishu = 1
-                tweet.content_type = classify_content_type(tweet.content)
-            
-            print(f"💾 [FEISHU_SYNC] 提交数据库更改...")
-            db.session.commit()
-            print(f"✅ [FEISHU_SYNC] 数据库更新完成")
-            
-            # 执行数据验证
-            print(f"🔍 [FEISHU_SYNC] 开始数据验证...")
+        if sync_result['success']:
+            # 后台执行数据验证，结果通过 GET /api/data/validate_feishu/<task_id> 查看
+            feishu_trace.debug("🔍 [FEISHU_SYNC] 已启动后台数据验证...")
             try:
                 from feishu_data_validator import FeishuDataValidator
-                validator = FeishuDataValidator()
-                validation_result = validator.validate_sync_data(task_id=task_id)
-                
-                if validation_result.get('success'):
-                    comparison = validation_result['comparison_result']
-                    summary = comparison['summary']
-                    print(f"✅ [FEISHU_SYNC] 数据验证完成")
-                    print(f"📊 [FEISHU_SYNC] 验证结果: 同步准确率 {summary['sync_accuracy']:.2f}%")
-                    print(f"📊 [FEISHU_SYNC] 匹配记录: {summary['matched_count']}/{summary['total_local']}")
-                    
-                    # 在返回消息中包含验证结果
-                    validation_msg = f"，验证结果: 准确率 {summary['sync_accuracy']:.2f}% ({summary['matched_count']}/{summary['total_local']} 条匹配)"
-                    if summary['sync_accuracy'] < 95:
-                        validation_msg += f"，发现 {summary['field_mismatch_count']} 条字段不匹配"
-                else:
-                    print(f"⚠️ [FEISHU_SYNC] 数据验证失败: {validation_result.get('error', '未知错误')}")
-                    validation_msg = "，数据验证失败"
-                    
+                FeishuDataValidator().start_background_validation(task_id=task_id, sample_rate=1.0)
+                validation_msg = "，数据验证已在后台进行"
             except Exception as e:
-                print(f"❌ [FEISHU_SYNC] 数据验证异常: {e}")
-                validation_msg = "，数据验证异常"
+                feishu_trace.error("❌ [FEISHU_SYNC] 启动数据验证异常: %s", e)
+                validation_msg = "，数据验证启动失败"
             
-            print(f"🎉 [FEISHU_SYNC] 任务 {task_id} 同步完成，共 {len(data)} 条数据")
-            return jsonify({'success': True, 'message': f'成功同步 {len(data)} 条数据到飞书多维表格{validation_msg}'})
+            feishu_trace.info("🎉 [FEISHU_SYNC] 任务 %s 同步完成，共 %s 条数据", task_id, synced_total)
+            return jsonify({'success': True, 'message': f'成功同步 {synced_total} 条数据到飞书多维表格{validation_msg}'})
         else:
-            print(f"❌ [FEISHU_SYNC] 同步失败")
-            return jsonify({'success': False, 'error': '飞书同步失败'}), 500
+            feishu_trace.error("❌ [FEISHU_SYNC] 同步失败: %s", sync_result['error'])
+            return jsonify({'success': False, 'error': f"飞书同步失败: {sync_result['error']}"}), 500
             
     except Exception as e:
-        print(f"❌ [FEISHU_SYNC] 同步过程中发生异常: {str(e)}")
+        feishu_trace.error("❌ [FEISHU_SYNC] 同步过程中发生异常: %s", str(e))
         import traceback
-        print(f"📋 [FEISHU_SYNC] 异常详情: {traceback.format_exc()}")
+        feishu_trace.debug("📋 [FEISHU_SYNC] 异常详情: %s", traceback.format_exc())
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/status')
@@ -2647,7 +2785,8 @@ def api_get_feishu_config():
         'spreadsheet_token': FEISHU_CONFIG['spreadsheet_token'],
         'table_id': FEISHU_CONFIG['table_id'],
         'enabled': FEISHU_CONFIG['enabled'],
-        'auto_sync': FEISHU_CONFIG.get('auto_sync', False)
+        'auto_sync': FEISHU_CONFIG.get('auto_sync', False),
+        'sync_mode': FEISHU_CONFIG.get('sync_mode', 'create')
     })
 
 @app.route('/api/config/feishu', methods=['POST'])
@@ -2664,6 +2803,7 @@ def api_update_feishu_config():
             'feishu_table_id': data.get('table_id', FEISHU_CONFIG['table_id']),
             'feishu_enabled': str(data.get('enabled', FEISHU_CONFIG['enabled'])),
             'feishu_auto_sync': str(data.get('auto_sync', FEISHU_CONFIG.get('auto_sync', False))),
+            'feishu_sync_mode': data.get('sync_mode', FEISHU_CONFIG.get('sync_mode', 'create')),
             'sync_interval': str(data.get('sync_interval', 300))
         }
         
@@ -2690,7 +2830,8 @@ def api_update_feishu_config():
             'spreadsheet_token': feishu_configs['feishu_spreadsheet_token'],
             'table_id': feishu_configs['feishu_table_id'],
             'enabled': feishu_configs['feishu_enabled'].lower() == 'true',
-            'auto_sync': feishu_configs['feishu_auto_sync'].lower() == 'true'
+            'auto_sync': feishu_configs['feishu_auto_sync'].lower() == 'true',
+            'sync_mode': feishu_configs['feishu_sync_mode']
         })
         
         return jsonify({'success': True, 'message': '飞书配置更新成功'})
@@ -2699,12 +2840,21 @@ def api_update_feishu_config():
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/data/validate_feishu/<int:task_id>', methods=['GET'])
+def api_get_feishu_validation_result(task_id):
+    """查询任务最近一次后台数据验证的状态和摘要"""
+    from feishu_data_validator import get_background_validation_result
+    result = get_background_validation_result(task_id)
+    if result is None:
+        return jsonify({'success': False, 'error': f'任务 {task_id} 没有后台验证记录'}), 404
+    return jsonify({'success': True, 'data': result})
+
 @app.route('/api/data/validate_feishu/<int:task_id>', methods=['POST'])
 def api_validate_feishu_data(task_id):
     """验证飞书数据同步准确性"""
     try:
-        print(f"\n🔍 [FEISHU_VALIDATE] 开始验证任务 {task_id} 的飞书数据")
-        print(f"⏰ [FEISHU_VALIDATE] 验证时间: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}")
+        feishu_trace.debug("🔍 [FEISHU_VALIDATE] 开始验证任务 %s 的飞书数据", task_id)
+        feishu_trace.debug("⏰ [FEISHU_VALIDATE] 验证时间: %s", datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
         
         # 检查飞书配置
         if not FEISHU_CONFIG.get('enabled'):
@@ -2732,8 +2882,8 @@ def api_validate_feishu_data(task_id):
             comparison = validation_result['comparison_result']
             summary = comparison['summary']
             
-            print(f"✅ [FEISHU_VALIDATE] 验证完成")
-            print(f"📊 [FEISHU_VALIDATE] 同步准确率: {summary['sync_accuracy']:.2f}%")
+            feishu_trace.info("✅ [FEISHU_VALIDATE] 验证完成")
+            feishu_trace.debug("📊 [FEISHU_VALIDATE] 同步准确率: %.2f%%", summary['sync_accuracy'])
             
             # 构建详细的验证报告
             validation_report = {
@@ -2742,10 +2892,10 @@ def api_validate_feishu_data(task_id):
                 'validation_time': validation_result.get('validation_time'),
                 'summary': summary,
                 'details': {
-                    'matched_records_count': len(comparison['matched_records']),
-                    'missing_in_feishu_count': len(comparison['missing_in_feishu']),
-                    'extra_in_feishu_count': len(comparison['extra_in_feishu']),
-                    'field_mismatches_count': len(comparison['field_mismatches'])
+                    'matched_records_count': summary['matched_count'],
+                    'missing_in_feishu_count': summary['missing_in_feishu_count'],
+                    'extra_in_feishu_count': summary['extra_in_feishu_count'],
+                    'field_mismatches_count': summary['field_mismatch_count']
                 },
                 'quality_assessment': {
                     'level': 'excellent' if summary['sync_accuracy'] >= 95 else 'good' if summary['sync_accuracy'] >= 85 else 'needs_improvement',
@@ -2770,16 +2920,16 @@ def api_validate_feishu_data(task_id):
             error_msg = validation_result.get('error')
             if not error_msg:
                 error_msg = '数据验证失败，但未提供具体错误信息'
-                print(f"⚠️ [FEISHU_VALIDATE] 警告: 验证结果中缺少错误信息")
-                print(f"📋 [FEISHU_VALIDATE] 完整验证结果: {validation_result}")
+                feishu_trace.warning("⚠️ [FEISHU_VALIDATE] 警告: 验证结果中缺少错误信息")
+                feishu_trace.debug("📋 [FEISHU_VALIDATE] 完整验证结果: %s", validation_result)
             
-            print(f"❌ [FEISHU_VALIDATE] 验证失败: {error_msg}")
+            feishu_trace.error("❌ [FEISHU_VALIDATE] 验证失败: %s", error_msg)
             return jsonify({'success': False, 'error': error_msg}), 500
             
     except Exception as e:
-        print(f"❌ [FEISHU_VALIDATE] 验证异常: {e}")
+        feishu_trace.error("❌ [FEISHU_VALIDATE] 验证异常: %s", e)
         import traceback
-        print(f"📋 [FEISHU_VALIDATE] 异常详情: {traceback.format_exc()}")
+        feishu_trace.debug("📋 [FEISHU_VALIDATE] 异常详情: %s", traceback.format_exc())
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/config/feishu/test', methods=['POST'])
@@ -2827,18 +2977,18 @@ def api_test_feishu_connection():
         
         # 捕获控制台输出
         with redirect_stdout(log_capture), redirect_stderr(log_capture):
-            print(f"[飞书测试] 开始测试连接...")
-            print(f"[飞书测试] App ID: {data['app_id']}")
-            print(f"[飞书测试] 文档Token: {data['spreadsheet_token']}")
-            print(f"[飞书测试] 表格ID: {data['table_id']}")
+            feishu_trace.debug("[飞书测试] 开始测试连接...")
+            feishu_trace.debug("[飞书测试] App ID: %s", data['app_id'])
+            feishu_trace.debug("[飞书测试] 文档Token: %s", data['spreadsheet_token'])
+            feishu_trace.debug("[飞书测试] 表格ID: %s", data['table_id'])
             
             # 初始化云同步管理器
             sync_manager = CloudSyncManager(test_config)
             
             # 设置飞书配置
-            print(f"[飞书测试] 正在设置飞书配置...")
+            feishu_trace.debug("[飞书测试] 正在设置飞书配置...")
             if not sync_manager.setup_feishu(data['app_id'], data['app_secret']):
-                print(f"[飞书测试] 飞书配置设置失败")
+                feishu_trace.debug("[飞书测试] 飞书配置设置失败")
                 logs = log_capture.getvalue().split('\n')
                 return jsonify({
                     'success': False, 
@@ -2847,7 +2997,7 @@ def api_test_feishu_connection():
                     'logs': logs
                 }), 500
             
-            print(f"[飞书测试] 飞书配置设置成功")
+            feishu_trace.debug("[飞书测试] 飞书配置设置成功")
             
             # 测试连接（发送一条测试数据）
             current_time = datetime.utcnow()
@@ -2865,7 +3015,7 @@ def api_test_feishu_connection():
                 '创建时间': current_time.strftime('%Y-%m-%d %H:%M:%S')  # 使用字符串格式
             }]
             
-            print(f"[飞书测试] 正在发送测试数据...")
+            feishu_trace.debug("[飞书测试] 正在发送测试数据...")
             
             try:
                 success = sync_manager.sync_to_feishu(
@@ -2879,7 +3029,7 @@ def api_test_feishu_connection():
                 logs = [log.strip() for log in logs if log.strip()]  # 过滤空行
                 
                 if success:
-                    print(f"[飞书测试] 连接测试成功！")
+                    feishu_trace.debug("[飞书测试] 连接测试成功！")
                     logs = log_capture.getvalue().split('\n')
                     logs = [log.strip() for log in logs if log.strip()]
                     return jsonify({
@@ -2889,7 +3039,7 @@ def api_test_feishu_connection():
                         'logs': logs
                     }), 200
                 else:
-                    print(f"[飞书测试] 同步操作返回失败")
+                    feishu_trace.debug("[飞书测试] 同步操作返回失败")
                     logs = log_capture.getvalue().split('\n')
                     logs = [log.strip() for log in logs if log.strip()]
                     return jsonify({
@@ -2899,7 +3049,7 @@ def api_test_feishu_connection():
                         'logs': logs
                     }), 500
             except Exception as sync_error:
-                print(f"[飞书测试] 同步异常: {str(sync_error)}")
+                feishu_trace.debug("[飞书测试] 同步异常: %s", str(sync_error))
                 logs = log_capture.getvalue().split('\n')
                 logs = [log.strip() for log in logs if log.strip()]
                 return jsonify({
@@ -3141,6 +3291,22 @@ def api_test_adspower_connection():
     except Exception as e:
         return jsonify({'success': False, 'message': f'连接测试失败: {str(e)}'})
 
+@app.route('/api/adspower/profile_status', methods=['GET'])
+def api_adspower_profile_status():
+    """并发查询用户ID池中各配置文件的浏览器状态和系统健康状况（结果短时间缓存）"""
+    try:
+        user_ids = ADS_POWER_CONFIG.get('multi_user_ids') or [ADS_POWER_CONFIG.get('user_id')]
+        launcher = AdsPowerLauncher(ADS_POWER_CONFIG)
+        statuses = launcher.get_profile_statuses([uid for uid in user_ids if uid])
+        
+        return jsonify({
+            'success': True,
+            'profiles': {uid: {'active': info is not None} for uid, info in statuses.items()},
+            'health': launcher.get_health_report()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'获取配置文件状态失败: {str(e)}'}), 500
+
 @app.route('/api/test_open_adspower', methods=['POST'])
 def api_test_open_adspower():
     """测试打开 AdsPower 浏览器窗口"""
@@ -3905,23 +4071,36 @@ def api_batch_scrape_influencers():
         db.session.add(task)
         db.session.commit()
         
+        # 从用户ID池借用空闲配置文件，博主列表分给这些配置文件并发抓取；
+        # 没有空闲配置文件时退回默认配置文件顺序抓取
+        fanout = min(int(data.get('fanout', len(target_accounts))), len(target_accounts))
+        borrowed_user_ids = task_manager.borrow_user_ids(fanout) if task_manager else []
+        if borrowed_user_ids:
+            executor = ScrapingTaskExecutor(borrowed_user_ids[0], extra_user_ids=borrowed_user_ids[1:])
+        else:
+            executor = task_executor
+        task_id = task.id
+        
         # 启动异步抓取任务
         def run_batch_scraping():
             import asyncio
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
-                loop.run_until_complete(task_executor.execute_task(task.id))
-                
-                # 更新博主的最后抓取时间
-                for influencer in influencers:
-                    influencer.last_scraped = datetime.utcnow()
-                db.session.commit()
+                with app.app_context():
+                    loop.run_until_complete(executor.execute_task(task_id))
+                    
+                    # 更新博主的最后抓取时间
+                    TwitterInfluencer.query.filter(TwitterInfluencer.id.in_(influencer_ids)).update(
+                        {'last_scraped': datetime.utcnow()}, synchronize_session=False)
+                    db.session.commit()
                 
             except Exception as e:
                 pass
             finally:
                 loop.close()
+                if borrowed_user_ids:
+                    task_manager.return_user_ids(borrowed_user_ids)
         
         # 启动抓取线程
         import threading
@@ -3931,7 +4110,8 @@ def api_batch_scrape_influencers():
         return jsonify({
             'success': True,
             'task_id': task.id,
-            'message': f'已启动批量抓取任务，将抓取 {len(influencers)} 个博主的推文'
+            'message': f'已启动批量抓取任务，将抓取 {len(influencers)} 个博主的推文',
+            'profile_count': max(len(borrowed_user_ids), 1)
         })
         
     except Exception as e:
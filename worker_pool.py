@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻后台工作进程池
+每个AdsPower用户ID对应一个预热的 background_task_runner.py --worker 进程，
+进程启动时完成Flask/SQLAlchemy/Playwright等导入，之后通过本地socket接收任务ID，
+并在任务之间保持浏览器和CDP连接，避免每个任务重新启动Python进程和连接浏览器
+"""
+
+import os
+import sys
+import secrets
+import subprocess
+import threading
+import logging
+from dataclasses import dataclass, field
+from multiprocessing.connection import Listener, Connection
+from typing import Optional, Dict, List, Callable, Any
+
+logger = logging.getLogger(__name__)
+
+# 工作进程通过该环境变量获取连接认证密钥
+WORKER_AUTHKEY_ENV = 'TWITTER_SCRAPER_WORKER_AUTHKEY'
+
+
+@dataclass
+class WarmWorker:
+    """单个常驻工作进程"""
+    user_id: str
+    process: subprocess.Popen
+    conn: Optional[Connection] = None
+    current_task_id: Optional[int] = None
+    extra_user_ids: List[str] = field(default_factory=list)  # 当前任务借用的额外用户ID
+    dispatched: bool = False  # current_task_id是否已发送给工作进程
+    ready: threading.Event = field(default_factory=threading.Event)
+    send_lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+
+class WarmWorkerPool:
+    """按用户ID管理常驻工作进程，任务结果通过回调返回给任务管理器"""
+
+    def __init__(self, on_task_done: Callable[[int, bool, Dict[str, Any]], None],
+                 on_progress: Callable[[int, Dict[str, Any]], None] = None,
+                 ready_timeout: float = 120.0):
+        """
+        Args:
+            on_task_done: 任务结束回调 (task_id, success, message)
+            on_progress: 任务进度回调 (task_id, message)
+            ready_timeout: 等待新工作进程完成预热的最长时间（秒）
+        """
+        self.on_task_done = on_task_done
+        self.on_progress = on_progress
+        self.ready_timeout = ready_timeout
+
+        self._authkey = secrets.token_bytes(32)
+        self._listener = Listener(('127.0.0.1', 0), authkey=self._authkey)
+        self._workers: Dict[str, WarmWorker] = {}
+        self._lock = threading.RLock()
+        self._running = True
+
+        self._accept_thread = threading.Thread(target=self._accept_connections, daemon=True)
+        self._accept_thread.start()
+
+        logger.info(f"[WarmWorkerPool] 监听地址: {self.address}")
+
+    @property
+    def address(self) -> str:
+        host, port = self._listener.address
+        return f"{host}:{port}"
+
+    def _spawn_worker(self, user_id: str) -> WarmWorker:
+        """启动用户ID对应的常驻工作进程"""
+        env = dict(os.environ)
+        env[WORKER_AUTHKEY_ENV] = self._authkey.hex()
+        process = subprocess.Popen(
+            [sys.executable, 'background_task_runner.py', '--worker', user_id, self.address],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            text=True
+        )
+        worker = WarmWorker(user_id=user_id, process=process)
+        print(f"[WarmWorkerPool] 启动常驻工作进程，用户ID: {user_id}，PID: {process.pid}")
+        threading.Thread(target=self._watch_startup, args=(worker,), daemon=True).start()
+        return worker
+
+    def _watch_startup(self, worker: WarmWorker):
+        """工作进程在超时前未完成握手（导入失败、进程退出等）时终止它，并让等待中的任务失败"""
+        waited = 0.0
+        while not worker.ready.wait(1.0):
+            waited += 1.0
+            if worker.is_alive() and waited < self.ready_timeout:
+                continue
+
+            print(f"[WarmWorkerPool] 工作进程预热失败，用户ID: {worker.user_id}，PID: {worker.process.pid}")
+            with self._lock:
+                if self._workers.get(worker.user_id) is worker:
+                    del self._workers[worker.user_id]
+            if worker.is_alive():
+                worker.process.kill()
+
+            task_id = worker.current_task_id
+            worker.current_task_id = None
+            if task_id is not None:
+                self.on_task_done(task_id, False, {'error': '后台工作进程启动失败'})
+            return
+
+    def _get_worker(self, user_id: str) -> WarmWorker:
+        """获取可用的工作进程，不存在或已退出时重新启动"""
+        with self._lock:
+            worker = self._workers.get(user_id)
+            if worker is None or not worker.is_alive():
+                worker = self._spawn_worker(user_id)
+                self._workers[user_id] = worker
+            return worker
+
+    def warm_up(self, user_ids):
+        """预先为各用户ID启动工作进程"""
+        for user_id in user_ids:
+            self._get_worker(user_id)
+
+    def _accept_connections(self):
+        """接受工作进程的连接，按握手消息中的用户ID绑定到对应进程"""
+        while self._running:
+            try:
+                conn = self._listener.accept()
+                hello = conn.recv()
+            except Exception as e:
+                if self._running:
+                    logger.warning(f"[WarmWorkerPool] 接受工作进程连接失败: {e}")
+                continue
+
+            with self._lock:
+                worker = self._workers.get(hello.get('user_id'))
+                if worker is None or worker.process.pid != hello.get('pid'):
+                    logger.warning(f"[WarmWorkerPool] 未知的工作进程连接: {hello}")
+                    conn.close()
+                    continue
+                worker.conn = conn
+                worker.ready.set()
+
+            print(f"[WarmWorkerPool] 工作进程就绪，用户ID: {worker.user_id}，PID: {worker.process.pid}")
+            threading.Thread(target=self._read_messages, args=(worker,), daemon=True).start()
+            # 预热期间提交的任务在握手完成后立即发送
+            self._dispatch(worker)
+
+    def _dispatch(self, worker: WarmWorker) -> bool:
+        """把工作进程待执行的任务发送出去（未就绪时留待握手后发送）"""
+        with worker.send_lock:
+            task_id = worker.current_task_id
+            if worker.conn is None or task_id is None or worker.dispatched:
+                return True
+            try:
+                worker.conn.send({'type': 'run', 'task_id': task_id, 'extra_user_ids': worker.extra_user_ids})
+            except (OSError, ValueError) as e:
+                print(f"[WarmWorkerPool] 发送任务 {task_id} 失败: {e}")
+                worker.current_task_id = None
+                return False
+            worker.dispatched = True
+        print(f"[WarmWorkerPool] 任务 {task_id} 已发送到工作进程 {worker.process.pid}")
+        return True
+
+    def _read_messages(self, worker: WarmWorker):
+        """读取工作进程上报的进度和结果"""
+        try:
+            while True:
+                message = worker.conn.recv()
+                message_type = message.get('type')
+                task_id = message.get('task_id')
+
+                if message_type == 'progress':
+                    if self.on_progress:
+                        self.on_progress(task_id, message)
+                elif message_type == 'result':
+                    with worker.send_lock:
+                        worker.current_task_id = None
+                        worker.dispatched = False
+                    self.on_task_done(task_id, message.get('success', False), message)
+        except (EOFError, OSError):
+            pass
+
+        # 连接断开：工作进程已退出，正在执行的任务按失败处理
+        worker.ready.clear()
+        task_id = worker.current_task_id
+        worker.current_task_id = None
+        if task_id is not None:
+            print(f"[WarmWorkerPool] 工作进程 {worker.process.pid} 在执行任务 {task_id} 时退出")
+            self.on_task_done(task_id, False, {'error': '后台工作进程异常退出'})
+
+    def submit(self, task_id: int, user_id: str, extra_user_ids: List[str] = None) -> bool:
+        """
+        把任务交给用户ID对应的工作进程，不等待预热：
+        进程已就绪时立即发送，否则在握手完成后发送；预热失败时通过on_task_done回调失败
+        
+        extra_user_ids为任务内并发借用的额外配置文件，由该工作进程自行连接
+        """
+        worker = self._get_worker(user_id)
+        with worker.send_lock:
+            if worker.current_task_id is not None:
+                print(f"[WarmWorkerPool] 用户ID {user_id} 的工作进程仍在执行任务 {worker.current_task_id}")
+                return False
+            worker.current_task_id = task_id
+            worker.extra_user_ids = list(extra_user_ids or [])
+            worker.dispatched = False
+        return self._dispatch(worker)
+
+    def get_worker_pid(self, user_id: str) -> Optional[int]:
+        worker = self._workers.get(user_id)
+        return worker.process.pid if worker and worker.is_alive() else None
+
+    def stop_task(self, user_id: str):
+        """停止用户ID上正在执行的任务（终止该工作进程，下次提交时重新预热）"""
+        with self._lock:
+            worker = self._workers.pop(user_id, None)
+        if worker is None or not worker.is_alive():
+            return
+
+        # 由调用方负责更新任务状态，这里不再触发失败回调
+        worker.current_task_id = None
+        worker.process.terminate()
+        try:
+            worker.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            worker.process.kill()
+
+    def shutdown(self, timeout: float = 5.0):
+        """通知所有工作进程退出"""
+        self._running = False
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+
+        for worker in workers:
+            try:
+                if worker.conn is not None:
+                    with worker.send_lock:
+                        worker.conn.send({'type': 'shutdown'})
+            except (OSError, ValueError):
+                pass
+
+        for worker in workers:
+            try:
+                worker.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                worker.process.terminate()
+
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        print(f"[WarmWorkerPool] 已关闭 {len(workers)} 个工作进程")